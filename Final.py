@@ -1,2735 +1,7306 @@
-import streamlit as st
-from fpdf import FPDF
-import pandas as pd
-from num2words import num2words
-import datetime
-import io
-from PIL import Image
-import os
-from fpdf import FPDF, HTMLMixin
-# import textwrap
-import html as _html 
-import json
-import requests
-
-# GitHub Configuration - EMPTY PLACEHOLDERS
-LOGO_URL = ""  # Remove your GitHub URL
-STAMP_URL = ""  # Remove your GitHub URL
-
-# --- Global Data and Configuration ---
-PRODUCT_CATALOG = {
-    "Software Product 1": {"basic": 10000.0, "gst_percent": 18.0},
-    "Software Product 2": {"basic": 20000.0, "gst_percent": 18.0},
-    "Software Product 3": {"basic": 30000.0, "gst_percent": 18.0},
-    "Software Service": {"basic": 5000.0, "gst_percent": 18.0},
-}
-
-# Load data from JSON files
-def load_json_data(filename, default_data=None):
-    """Load data from JSON file with error handling"""
-    try:
-        with open(filename, 'r', encoding='utf-8') as f:
-            return json.load(f)
-    except FileNotFoundError:
-        st.warning(f"⚠️ {filename} not found. Using empty database.")
-        return default_data or {}
-    except json.JSONDecodeError as e:
-        st.error(f"❌ Error reading {filename}: {e}. Using empty database.")
-        return default_data or {}
-    except Exception as e:
-        st.error(f"❌ Unexpected error reading {filename}: {e}. Using empty database.")
-        return default_data or {}
-
-# Load vendor and end user databases
-VENDOR_DATABASE = load_json_data('vendor.json')
-END_USER_DATABASE = load_json_data('endusers.json')
-
-# Sales Person Mapping - GENERIC
-SALES_PERSON_MAPPING = {
-    "SP1": {"name": "Sales Person 1", "email": "sales1@company.com", "mobile": "+91 00000 00000"},
-    "SP2": {"name": "Sales Person 2", "email": "sales2@company.com", "mobile": "+91 00000 00000"},
-    "SP3": {"name": "Sales Person 3", "email": "sales3@company.com", "mobile": "+91 00000 00000"},
-    "SP4": {"name": "Sales Person 4", "email": "sales4@company.com", "mobile": "+91 00000 00000"}
-}
-
-# --- Helper Functions for Vendor Management ---
-def get_vendor_dropdown_options():
-    """Get vendor names for dropdown"""
-    return ["Select Vendor"] + list(VENDOR_DATABASE.keys())
-
-def update_vendor_fields(selected_vendor):
-    """Update session state with vendor details when vendor is selected"""
-    if selected_vendor and selected_vendor != "Select Vendor":
-        vendor_data = VENDOR_DATABASE.get(selected_vendor, {})
-        st.session_state.po_vendor_name = selected_vendor
-        st.session_state.po_vendor_address = vendor_data.get("address", "")
-        st.session_state.po_vendor_contact = vendor_data.get("contact", "")
-        st.session_state.po_vendor_mobile = vendor_data.get("mobile", "")
-        st.session_state.po_gst_no = vendor_data.get("gst_no", "")
-        st.session_state.po_pan_no = vendor_data.get("pan_no", "")
-        st.session_state.po_msme_no = vendor_data.get("msme_no", "")
-
-# --- Helper Functions for End User Management ---
-def get_enduser_dropdown_options():
-    """Get end user names for dropdown"""
-    return ["Select End User"] + list(END_USER_DATABASE.keys())
-
-def update_enduser_fields(selected_enduser):
-    """Update session state with end user details when end user is selected"""
-    if selected_enduser and selected_enduser != "Select End User":
-        enduser_data = END_USER_DATABASE.get(selected_enduser, {})
-        st.session_state.po_end_company = selected_enduser
-        st.session_state.po_end_address = enduser_data.get("address", "")
-        st.session_state.po_end_person = enduser_data.get("contact", "")
-        st.session_state.po_end_mobile = enduser_data.get("mobile", "")
-        st.session_state.po_end_email = enduser_data.get("email", "")
-        st.session_state.po_end_gst_no = enduser_data.get("gst_no", "")
-
-# --- Helper Functions for Quotation and PO ---
-def get_current_quarter():
-    """Get current quarter (Q1, Q2, Q3, Q4) based on current month"""
-    month = datetime.datetime.now().month
-    if month in [4, 5, 6]:
-        return "Q1"
-    elif month in [7, 8, 9]:
-        return "Q2"
-    elif month in [10, 11, 12]:
-        return "Q3"
-    else:
-        return "Q4"
-
-import os
-
-# Simple file-based counter for PO sequence
-PO_COUNTER_FILE = "po_counter.txt"
-
-def get_next_po_sequence():
-    """Simple file-based PO sequence counter"""
-    try:
-        if os.path.exists(PO_COUNTER_FILE):
-            with open(PO_COUNTER_FILE, 'r') as f:
-                current = int(f.read().strip())
-        else:
-            current = 0
-    except:
-        current = 0
-    
-    next_seq = current + 1
-    
-    with open(PO_COUNTER_FILE, 'w') as f:
-        f.write(str(next_seq))
-    
-    return next_seq
-
-def get_current_po_sequence():
-    """Get current PO sequence without incrementing"""
-    try:
-        if os.path.exists(PO_COUNTER_FILE):
-            with open(PO_COUNTER_FILE, 'r') as f:
-                return int(f.read().strip())
-    except:
-        pass
-    return 1
-
-def parse_po_number(po_number):
-    """Parse PO number to extract components"""
-    try:
-        parts = po_number.split('/')
-        if len(parts) >= 4:
-            prefix = parts[0]
-            sales_person = parts[1]
-            year = parts[2]
-            quarter_sequence = parts[3]
-            quarter = quarter_sequence.split('_')[0]
-            sequence = quarter_sequence.split('_')[1] if '_' in quarter_sequence else "001"
-            return prefix, sales_person, year, quarter, sequence
-    except:
-        pass
-    return "COM", "SP1", str(datetime.datetime.now().year), get_current_quarter(), "001"
-
-def generate_po_number(sales_person, sequence_number):
-    """Generate PO number with current quarter and sequence"""
-    current_date = datetime.datetime.now()
-    quarter = get_current_quarter()
-    year = str(current_date.year)
-    sequence = f"{sequence_number:03d}"
-    
-    return f"COM/{sales_person}/{year}/{quarter}_{sequence}"
-
-def get_next_sequence_number_po(po_number):
-    """Extract and increment sequence number from PO number"""
-    try:
-        parts = po_number.split('_')
-        if len(parts) > 1:
-            sequence = parts[-1]
-            return int(sequence) + 1
-    except:
-        pass
-    return 1
-
-# Simple file-based counter for quotations
-QUOTATION_COUNTER_FILE = "quotation_counter.txt"
-
-def get_next_quotation_sequence():
-    """Simple file-based sequence counter"""
-    try:
-        if os.path.exists(QUOTATION_COUNTER_FILE):
-            with open(QUOTATION_COUNTER_FILE, 'r') as f:
-                current = int(f.read().strip())
-        else:
-            current = 0
-    except:
-        current = 0
-    
-    next_seq = current + 1
-    
-    with open(QUOTATION_COUNTER_FILE, 'w') as f:
-        f.write(str(next_seq))
-    
-    return next_seq
-
-def get_current_quotation_sequence():
-    """Get current sequence without incrementing"""
-    try:
-        if os.path.exists(QUOTATION_COUNTER_FILE):
-            with open(QUOTATION_COUNTER_FILE, 'r') as f:
-                return int(f.read().strip())
-    except:
-        pass
-    return 1
-
-def parse_quotation_number(quotation_number):
-    """Parse quotation number to extract components"""
-    try:
-        parts = quotation_number.split('/')
-        if len(parts) >= 5:
-            prefix = parts[0]
-            sales_person = parts[1]
-            quarter = parts[2]
-            date_part = parts[3]
-            year_range = parts[4].split('_')[0]
-            sequence = parts[4].split('_')[1] if '_' in parts[4] else "001"
-            return prefix, sales_person, quarter, date_part, year_range, sequence
-    except:
-        pass
-    return "COM", "SP1", get_current_quarter(), datetime.datetime.now().strftime("%d-%m-%Y"), f"{datetime.datetime.now().year}-{datetime.datetime.now().year+1}", "001"
-
-def generate_quotation_number(sales_person, sequence_number):
-    """Generate quotation number with current quarter and sequence"""
-    current_date = datetime.datetime.now()
-    quarter = get_current_quarter()
-    year_range = f"{current_date.year}-{current_date.year+1}"
-    sequence = f"{sequence_number:03d}"
-    
-    return f"COM/{sales_person}/{quarter}/{current_date.strftime('%d-%m-%Y')}/{year_range}_{sequence}"
-
-def calculate_quotation_totals(products):
-    """Calculate quotation totals with round-off like PO generator"""
-    products_total = 0
-    for p in products:
-        gst_amt = p["basic"] * p["gst_percent"] / 100
-        per_unit_price = p["basic"] + gst_amt
-        total = per_unit_price * p["qty"]
-        products_total += total
-
-    rounded_total = round(products_total)
-    round_off = rounded_total - products_total
-    
-    return {
-        "total_base": sum(p["basic"] * p["qty"] for p in products),
-        "total_gst": sum(p["basic"] * p["gst_percent"] / 100 * p["qty"] for p in products),
-        "grand_total_unrounded": products_total,
-        "grand_total": rounded_total,
-        "round_off": round_off
-    }
-
-def get_next_sequence_number(quotation_number):
-    """Extract and increment sequence number from quotation number"""
-    try:
-        parts = quotation_number.split('_')
-        if len(parts) > 1:
-            sequence = parts[-1]
-            return int(sequence) + 1
-    except:
-        pass
-    return 1
-
-# Simple file-based counter for Invoice sequence
-INVOICE_COUNTER_FILE = "invoice_counter.txt"
-
-def get_next_invoice_sequence():
-    """Simple file-based Invoice sequence counter"""
-    try:
-        if os.path.exists(INVOICE_COUNTER_FILE):
-            with open(INVOICE_COUNTER_FILE, 'r') as f:
-                current = int(f.read().strip())
-        else:
-            current = 0
-    except:
-        current = 0
-    
-    next_seq = current + 1
-    
-    with open(INVOICE_COUNTER_FILE, 'w') as f:
-        f.write(str(next_seq))
-    
-    return next_seq
-
-def get_current_invoice_sequence():
-    """Get current Invoice sequence without incrementing"""
-    try:
-        if os.path.exists(INVOICE_COUNTER_FILE):
-            with open(INVOICE_COUNTER_FILE, 'r') as f:
-                return int(f.read().strip())
-    except:
-        pass
-    return 1
-
-def parse_invoice_number(invoice_number):
-    """Parse invoice number to extract components"""
-    try:
-        parts = invoice_number.split('/')
-        if len(parts) >= 4:
-            prefix = parts[0]
-            year_range = parts[1]
-            quarter = parts[2]
-            sequence = parts[3]
-            return prefix, year_range, quarter, sequence
-    except:
-        pass
-    return "COM", f"{str(datetime.datetime.now().year)[2:]}-{str(datetime.datetime.now().year + 1)[2:]}", get_current_quarter(), "01"
-
-def generate_invoice_number(sequence_number):
-    """Generate invoice number"""
-    current_date = datetime.datetime.now()
-    quarter = get_current_quarter()
-    year_range = f"{str(current_date.year)[2:]}-{str(current_date.year + 1)[2:]}"
-    sequence = f"{sequence_number:02d}"
-    
-    return f"COM/{year_range}/{quarter}/{sequence}"
-
-def get_next_sequence_number_invoice(invoice_number):
-    """Extract and increment sequence number from invoice number"""
-    try:
-        parts = invoice_number.split('/')
-        if len(parts) >= 4:
-            sequence = parts[3]
-            return int(sequence) + 1
-    except:
-        pass
-    return get_next_invoice_sequence()
-
-# --- PDF Class for Two-Page Quotation ---
-class QUOTATION_PDF(FPDF):
-    def __init__(self, quotation_number="Q-N/A", quotation_date="Date N/A", sales_person_code="SP1"):
-        super().__init__()
-        self.set_auto_page_break(auto=True, margin=15)
-        self.set_left_margin(15)
-        self.set_right_margin(15)
-        self.quotation_number = quotation_number
-        self.quotation_date = quotation_date
-        self.sales_person_code = sales_person_code
-        font_dir = os.path.join(os.path.dirname(__file__), "fonts")
-        try:
-            self.add_font("Calibri", "", os.path.join(font_dir, "calibri.ttf"), uni=True)
-            self.add_font("Calibri", "B", os.path.join(font_dir, "calibrib.ttf"), uni=True)
-            self.add_font("Calibri", "I", os.path.join(font_dir, "calibrii.ttf"), uni=True)
-            self.add_font("Calibri", "BI", os.path.join(font_dir, "calibriz.ttf"), uni=True)
-            self.default_font = "Calibri"
-        except:
-            self.default_font = "Helvetica"
-        
-    def sanitize_text(self, text):
-        try:
-            return text.encode('latin-1', 'ignore').decode('latin-1')
-        except:
-            return text
-
-    def header(self):
-        if hasattr(self, 'logo_path') and self.logo_path and os.path.exists(self.logo_path):
-            try:
-                self.image(self.logo_path, x=155, y=8, w=50)
-            except:
-                self.set_font(self.default_font, "B", 10)
-                self.set_xy(150, 8)
-                self.cell(40, 5, "[LOGO]", border=0, align="C")
-            
-        self.set_font(self.default_font, "B", 16)
-        self.set_y(15)
-        self.ln(5)
-
-    def footer(self):
-        self.set_y(-12)
-        
-        self.set_font("Helvetica", "", 10)
-        self.cell(0, 4, "[Company Address Placeholder]", ln=True, align="C")
-        
-        self.set_font("Helvetica", "U", 10)
-        self.set_text_color(0, 0, 255)
-        
-        email1 = "info@yourcompany.com"
-        phone_number = "+91 00000 00000"
-        website = "www.yourcompany.com"
-        
-        contact_text = f"{email1} | {phone_number} | {website}"
-        contact_width = self.get_string_width(contact_text)
-        x_contact = (self.w - contact_width) / 2
-        
-        self.set_x(x_contact)
-        self.cell(self.get_string_width(email1), 4, email1, link=f"mailto:{email1}")
-        self.set_x(x_contact + self.get_string_width(email1) + self.get_string_width(" | "))
-        self.cell(self.get_string_width(phone_number), 4, phone_number, link=f"tel:{phone_number}")
-        self.set_x(x_contact + self.get_string_width(email1) + self.get_string_width(" | ") + self.get_string_width(phone_number) + self.get_string_width(" | "))
-        self.cell(self.get_string_width(website), 4, website, link="https://www.yourcompany.com/")
-        
-        self.set_text_color(0, 0, 0)
-
-def add_clickable_email(pdf, email, label="Email: "):
-    pdf.set_font(pdf.default_font, "B", 12)
-    label_width = pdf.get_string_width(label)
-    pdf.cell(label_width, 4, label, ln=0)
-    
-    pdf.set_text_color(0, 0, 255)
-    pdf.set_font(pdf.default_font, "", 12)
-    pdf.cell(0, 4, email, ln=True, link=f"mailto:{email}")
-    pdf.set_text_color(0, 0, 0)
-
-def add_clickable_phone(pdf, phone, label="Mobile: "):
-    pdf.set_font(pdf.default_font, "B", 12)
-    label_width = pdf.get_string_width(label)
-    pdf.cell(label_width, 4, label, ln=0)
-    
-    pdf.set_text_color(0, 0, 255)
-    pdf.set_font(pdf.default_font, "", 12)
-    tel_number = phone.replace(' ', '').replace('+', '')
-    pdf.cell(0, 4, phone, ln=True, link=f"tel:{tel_number}")
-    pdf.set_text_color(0, 0, 0)
-
-def add_page_one_intro(pdf, data):
-    pdf.set_font(pdf.default_font, "B", 12)
-    pdf.set_y(35)
-    pdf.cell(0, 5, f"REF NO.: {data['quotation_number']}", ln=True, align="L")
-    pdf.cell(0, 5, f"Date: {data['quotation_date']}", ln=True, align="L")
-    pdf.ln(5)
-
-    pdf.set_font(pdf.default_font, "", 12)
-    pdf.cell(0, 5, "To,", ln=True)
-    pdf.set_font(pdf.default_font, "B", 12)
-    pdf.cell(0, 6, pdf.sanitize_text(data['vendor_name']), ln=True)
-    pdf.set_font(pdf.default_font, "", 12)
-    
-    pdf.multi_cell(94, 4, pdf.sanitize_text(data['vendor_address']))
-    
-    pdf.ln(3)
-    
-    if data.get('vendor_email'):
-        add_clickable_email(pdf, data['vendor_email'])
-        
-    pdf.ln(1)
-    if data.get('vendor_mobile'):
-        add_clickable_phone(pdf, data['vendor_mobile'])
-    
-    pdf.set_font(pdf.default_font, "BU", 12)
-    pdf.cell(0, 5, f"Kind Attention :- {pdf.sanitize_text(data['vendor_contact'])}", align="C", ln=True)
-    pdf.ln(5)
-
-    pdf.set_font(pdf.default_font, "BU", 12)
-    pdf.cell(0, 6, f"Subject :- {pdf.sanitize_text(data['subject'])}", ln=True)
-    pdf.ln(8)
-
-    intro_text = pdf.sanitize_text(data.get("intro_paragraph", ""))
-    if intro_text:
-        write_simple_justified_paragraph(pdf, intro_text)
-
-    fixed_paragraphs = [
-        "Enclosed please find our Quotation for your information and necessary action.",
-        "[Company Introduction Paragraph 1]",
-        "[Company Introduction Paragraph 2]",
-        "[Company Introduction Paragraph 3]"
-    ]
-
-    for paragraph in fixed_paragraphs:
-        write_simple_justified_paragraph(pdf, paragraph)
-        pdf.ln(3)
-
-    if pdf.get_y() > 220:
-        pdf.add_page()
-    
-    pdf.set_font(pdf.default_font, "", 12)
-    pdf.set_text_color(0, 0, 0)
-
-    contact_text = "Please revert back to us, if you need any clarification / information at the below mentioned address or email at "
-    pdf.write(5, contact_text)
-
-    sales_person_code = data.get('sales_person_code', 'SP1')
-    sales_person_info = SALES_PERSON_MAPPING.get(sales_person_code, SALES_PERSON_MAPPING['SP1'])
-    
-    pdf.set_text_color(0, 0, 255)
-    pdf.set_font(pdf.default_font, "U", 12)
-    pdf.write(5, sales_person_info["email"], link=f"mailto:{sales_person_info['email']}")
-
-    pdf.set_text_color(0, 0, 0)
-    pdf.set_font(pdf.default_font, "", 12)
-    pdf.write(5, "  Mobile: ")
-
-    pdf.set_text_color(0, 0, 255)
-    pdf.set_font(pdf.default_font, "U", 12)
-    pdf.write(5, sales_person_info["mobile"], link=f"tel:{sales_person_info['mobile'].replace(' ', '').replace('+', '')}")
-
-    pdf.ln(10)
-    pdf.set_text_color(0, 0, 0)
-    pdf.set_font(pdf.default_font, "", 12)
-    pdf.cell(0, 4, "For more information, please visit our web site & Social Media :-", ln=True)
-    pdf.set_font(pdf.default_font, "", 12)
-    
-    pdf.set_font(pdf.default_font, "U", 12)
-    pdf.set_text_color(0, 0, 255)
-
-    links = [
-        "https://www.yourcompany.com/",
-        "https://www.linkedin.com/company/yourcompany", 
-        "https://wa.me/910000000000",
-        "https://www.facebook.com/yourcompany",
-        "https://www.instagram.com/yourcompany"
-    ]
-
-    max_link_width = max(pdf.get_string_width(link) for link in links)
-    right_margin = pdf.w - pdf.r_margin
-
-    for link in links:
-        x_position = right_margin - max_link_width
-        pdf.set_x(x_position)
-        pdf.cell(max_link_width, 4, link, ln=True, link=link)
-
-    pdf.set_text_color(0, 0, 0)
-
-def write_simple_justified_paragraph(pdf, text):
-    pdf.set_font(pdf.default_font, "", 12)
-    pdf.set_text_color(0, 0, 0)
-    
-    paragraphs = text.split('\n')
-    
-    for paragraph in paragraphs:
-        paragraph = paragraph.strip()
-        if paragraph:
-            pdf.multi_cell(0, 5, paragraph, align='J')
-            pdf.ln(3)
-
-def add_quotation_header(pdf, annexure_text, quotation_text):
-    pdf.set_font(pdf.default_font, "BU", 14)
-    pdf.cell(0, 8, annexure_text, ln=True, align="C")
-    pdf.set_font(pdf.default_font, "BU", 12)
-    pdf.cell(0, 6, quotation_text, ln=True, align="C")
-    pdf.ln(8)
-
-def add_page_two_commercials(pdf, data):
-    pdf.add_page()
-    pdf.ln(10)
-    
-    annexure_text = data.get('annexure_text', 'Annexure I - Commercials')
-    quotation_title = data.get('quotation_title', 'Quotation for Software Services')
-    
-    add_quotation_header(pdf, annexure_text, quotation_title)
-
-    col_widths = [70, 25, 25, 25, 15, 25]
-    headers = ["Description", "Basic Price", "GST Tax @ 18%", "Per Unit Price", "Qty.", "Total"]
-    
-    pdf.set_fill_color(220, 220, 220)
-    pdf.set_font(pdf.default_font, "B", 10)
-    for width, header in zip(col_widths, headers):
-        pdf.cell(width, 6, header, border=1, align="C", fill=True)
-    pdf.ln()
-    
-    pdf.set_font(pdf.default_font, "", 12)
-    grand_total_unrounded = 0.0
-    
-    for product in data["products"]:
-        basic_price = product["basic"]
-        qty = product["qty"]
-        gst_amount = basic_price * (product.get("gst_percent", 18.0) / 100)
-        per_unit_price = basic_price + gst_amount
-        total = per_unit_price * qty
-        grand_total_unrounded += total
-        
-        start_y = pdf.get_y()
-        
-        desc = product["name"]
-        pdf.set_font(pdf.default_font, "", 10)
-        
-        desc_lines = pdf.multi_cell(col_widths[0], 5, desc, border=0, split_only=True)
-        desc_height = len(desc_lines) * 6
-        
-        pdf.set_xy(pdf.l_margin, start_y)
-        
-        if len(desc_lines) > 1:
-            pdf.multi_cell(col_widths[0], 6, desc, border=1)
-            current_y = pdf.get_y()
-            
-            pdf.set_xy(pdf.l_margin + col_widths[0], start_y)
-            pdf.cell(col_widths[1], desc_height, f"{basic_price:,.2f}", border=1, align="R")
-            pdf.cell(col_widths[2], desc_height, f"{gst_amount:,.2f}", border=1, align="R")
-            pdf.cell(col_widths[3], desc_height, f"{per_unit_price:,.2f}", border=1, align="R")
-            pdf.cell(col_widths[4], desc_height, f"{qty:.0f}", border=1, align="C")
-            pdf.cell(col_widths[5], desc_height, f"{total:,.2f}", border=1, align="R")
-            
-            pdf.set_y(current_y)
-        else:
-            pdf.cell(col_widths[0], 6, desc, border=1)
-            pdf.cell(col_widths[1], 6, f"{basic_price:,.2f}", border=1, align="R")
-            pdf.cell(col_widths[2], 6, f"{gst_amount:,.2f}", border=1, align="R")
-            pdf.cell(col_widths[3], 6, f"{per_unit_price:,.2f}", border=1, align="R")
-            pdf.cell(col_widths[4], 6, f"{qty:.0f}", border=1, align="C")
-            pdf.cell(col_widths[5], 6, f"{total:,.2f}", border=1, align="R")
-            pdf.ln()
-
-    round_off = data.get('round_off', 0.0)
-    pdf.set_font(pdf.default_font, "B", 10)
-    pdf.cell(sum(col_widths[:-1]), 7, "Round Off", border=1, align="R")
-    pdf.cell(col_widths[5], 7, f"{round_off:,.2f}", border=1, align="R")
-    pdf.ln()
-
-    grand_total = data.get('grand_total', grand_total_unrounded)
-    pdf.set_font(pdf.default_font, "B", 10)
-    pdf.cell(sum(col_widths[:-1]), 7, "Final Amount to be Paid", border=1, align="R")
-    pdf.cell(col_widths[5], 7, f"{grand_total:,.2f}", border=1, align="R")
-    pdf.ln(15)
-
-    pdf.set_font(pdf.default_font, "", 9)
-
-    price_validity = data.get('price_validity', '10 days from Quotation date')
-    terms = [
-        ("1. Above charges are Inclusive of GST.", ""),
-        ("2. Any changes in Govt. duties, Taxes & Forex rate at the time of dispatch shall be applicable.", ""),
-        ("3. TDS should not be deducted at the time of payment as per Govt. regulations.", ""),
-        ("4. Software licenses are delivered electronically.", ""),
-        ("5. An Internet connection is required to access cloud services.", ""),
-        ("6. Training will be charged at extra cost depending on no. of participants.", ""),
-        ("7. Price Validity: ", price_validity),
-        ("8. Payment: ", "100% Advance along with purchase order"),
-        ("9. Delivery period: ", "1-2 Weeks from the date of Purchase Order"),
-        ("10. Support: ","Includes 12 months of technical support and software updates."),
-        ("11. Installation: ","Online"),
-        ("12. Cheque to be issued on name of: ", '"[Your Company Name]"'),
-        ("13. Order to be placed on: ", "[Your Company Name] \n[Your Company Address]")
-    ]
-
-    bank_info = [
-        ("Name", "[Your Company Name]"),
-        ("Account Number", "[Your Account Number]"),
-        ("IFSC Code", "[Your IFSC Code]"),
-        ("SWIFT Code", "[Your SWIFT Code]"),
-        ("Bank Name", "[Your Bank Name]"),
-        ("Branch", "[Your Branch Name]"),
-        ("MSME", "[Your MSME Number]"),
-        ("GSTIN", "[Your GSTIN]"),
-        ("PAN No", "[Your PAN Number]")
-    ]
-
-    x_start = pdf.get_x()
-    y_start = pdf.get_y()
-    page_width = pdf.w - 1.6 * pdf.l_margin
-    col1_width = page_width * 0.62
-    col2_width = page_width * 0.38
-    padding = 2.5
-    line_height = 4
-    section_spacing = 2
-
-    def calculate_column_height(items, col_width):
-        height = 0
-        for label, value in items:
-            if value:
-                text = f"{label}{value}"
-            else:
-                text = label
-            lines = pdf.multi_cell(col_width - 2*padding, line_height, text, split_only=True)
-            height += len(lines) * line_height + section_spacing
-        return height + 3*padding
-
-    terms_height = calculate_column_height(terms, col1_width)
-    bank_items_height = calculate_column_height(bank_info, col2_width)
-    signature_height = 35
-    
-    box_height = max(terms_height, bank_items_height + signature_height)
-
-    pdf.rect(x_start, y_start, page_width, box_height)
-    pdf.line(x_start + col1_width, y_start, x_start + col1_width, y_start + box_height)
-
-    pdf.set_font(pdf.default_font, "B", 12)
-    pdf.set_xy(x_start + padding, y_start + padding)
-    pdf.cell(col1_width - 2*padding, 5, "Terms & Conditions:", ln=True)
-
-    terms_y = pdf.get_y()
-    for i, (label, value) in enumerate(terms):
-        pdf.set_xy(x_start + padding, terms_y)
-        
-        if i < 6:
-            pdf.set_font(pdf.default_font, "B", 10)
-            pdf.multi_cell(col1_width - 2*padding, line_height, label)
-            
-        elif value:
-            pdf.set_font(pdf.default_font, "", 10)
-            pdf.cell(pdf.get_string_width(label), line_height, label, ln=0)
-            
-            pdf.set_font(pdf.default_font, "B", 10)
-            remaining_width = col1_width - 2*padding - pdf.get_string_width(label)
-            pdf.multi_cell(remaining_width, line_height, value)
-            
-            pdf.set_font(pdf.default_font, "", 10)
-        else:
-            pdf.multi_cell(col1_width - 2*padding, line_height, label)
-        
-        terms_y = pdf.get_y()
-
-    pdf.set_font(pdf.default_font, "B", 12)
-    pdf.set_xy(x_start + col1_width + padding, y_start + padding)
-    pdf.cell(col2_width - 2*padding, 5, "Bank Details:", ln=True)
-    pdf.set_font(pdf.default_font, "", 12)
-
-    bank_y = pdf.get_y()
-    for label, value in bank_info:
-        pdf.set_xy(x_start + col1_width + padding, bank_y)
-        
-        pdf.set_font(pdf.default_font, "", 10)
-        pdf.cell(pdf.get_string_width(f"{label}: "), line_height, f"{label}: ", ln=0)
-        
-        pdf.set_font(pdf.default_font, "B", 10)
-        remaining_width = col2_width - 2*padding - pdf.get_string_width(f"{label}: ")
-        pdf.multi_cell(remaining_width, line_height, value)
-        
-        bank_y = pdf.get_y()
-
-    signature_start_y = y_start + box_height - signature_height - 15
-    
-    pdf.set_font(pdf.default_font, "B", 10)
-    pdf.set_xy(x_start + col1_width + padding, signature_start_y)
-    pdf.cell(col2_width - 2*padding, 5, "Yours Truly,", ln=True)
-    
-    pdf.set_xy(x_start + col1_width + padding, pdf.get_y())
-    pdf.cell(col2_width - 2*padding, 5, "For [Your Company Name]", ln=True)
-    
-    sales_person_code = data.get('sales_person_code', 'SP1')
-    sales_person_info = SALES_PERSON_MAPPING.get(sales_person_code, SALES_PERSON_MAPPING['SP1'])
-    
-    if data.get('stamp_path') and os.path.exists(data['stamp_path']):
-        try:
-            stamp_y = pdf.get_y() + 2
-            stamp_x = x_start + col1_width + padding
-            pdf.image(data['stamp_path'], x=stamp_x, y=stamp_y, w=20)
-            pdf.set_y(stamp_y + 20)
-        except:
-            pdf.set_y(pdf.get_y() + 8)
-    else:
-        pdf.set_y(pdf.get_y() + 8)
-    
-    pdf.set_font(pdf.default_font, "", 9)
-    pdf.set_xy(x_start + col1_width + padding, pdf.get_y())
-    pdf.cell(col2_width - 2*padding, 4, sales_person_info["name"], ln=True)
-    
-    pdf.set_xy(x_start + col1_width + padding, pdf.get_y())
-    pdf.cell(col2_width - 2*padding, 4, "Sales Executive", ln=True)
-    
-    pdf.set_font(pdf.default_font, "", 9)
-    pdf.set_text_color(0, 0, 0)
-    pdf.set_xy(x_start + col1_width + padding, pdf.get_y())
-    label = "Email: "
-    pdf.cell(pdf.get_string_width(label), 4, label, ln=0)
-    pdf.set_font(pdf.default_font, "U", 9)
-    pdf.set_text_color(0, 0, 255)
-    pdf.cell(col2_width - 2*padding - pdf.get_string_width(label), 4, sales_person_info["email"], 
-             ln=True, link=f"mailto:{sales_person_info['email']}")
-    
-    pdf.set_text_color(0, 0, 0)
-    pdf.set_font(pdf.default_font, "", 9)
-    pdf.set_xy(x_start + col1_width + padding, pdf.get_y())
-    label = "Mobile: "
-    pdf.cell(pdf.get_string_width(label), 4, label, ln=0)
-    pdf.set_font(pdf.default_font, "U", 9)
-    pdf.set_text_color(0, 0, 255)
-    pdf.cell(col2_width - 2*padding - pdf.get_string_width(label), 4, sales_person_info["mobile"], 
-             ln=True, link=f"tel:{sales_person_info['mobile'].replace(' ', '').replace('+', '')}")
-    pdf.set_text_color(0, 0, 0)
-
-    pdf.set_xy(x_start, y_start + box_height + 10)
-    
-def create_quotation_pdf(quotation_data, logo_path=None, stamp_path=None):
-    sales_person_code = quotation_data.get('sales_person_code', 'SP1')
-    pdf = QUOTATION_PDF(quotation_number=quotation_data['quotation_number'], 
-                        quotation_date=quotation_data['quotation_date'],
-                        sales_person_code=sales_person_code)
-    
-    if logo_path and os.path.exists(logo_path):
-        pdf.logo_path = logo_path
-    
-    quotation_data['stamp_path'] = stamp_path
-
-    pdf.add_page()
-    
-    add_page_one_intro(pdf, quotation_data)
-    add_page_two_commercials(pdf, quotation_data)
-    
-    try:
-        pdf_output = pdf.output(dest='S')
-        
-        if isinstance(pdf_output, str):
-            return pdf_output.encode('latin-1')
-        elif isinstance(pdf_output, bytearray):
-            return bytes(pdf_output)
-        elif isinstance(ppdf_output, bytes):
-            return pdf_output
-        else:
-            return str(pdf_output).encode('latin-1')
-            
-    except Exception:
-        try:
-            buffer = io.BytesIO()
-            pdf.output(dest=buffer)
-            return buffer.getvalue()
-        except Exception as e:
-            st.error(f"PDF generation failed: {e}")
-            return b""
-
-from fpdf import FPDF
-# --- PDF Class for Tax Invoice ---
-class PDF(FPDF):
-    def __init__(self):
-        super().__init__()
-        
-        font_dir = os.path.join(os.path.dirname(__file__), "fonts")
-        try:
-            self.add_font("Calibri", "", os.path.join(font_dir, "calibri.ttf"), uni=True)
-            self.add_font("Calibri", "B", os.path.join(font_dir, "calibrib.ttf"), uni=True)
-            self.add_font("Calibri", "I", os.path.join(font_dir, "calibrii.ttf"), uni=True)
-            self.add_font("Calibri", "BI", os.path.join(font_dir, "calibriz.ttf"), uni=True)
-            self.default_font = "Calibri"
-        except:
-            self.default_font = "Helvetica"
-
-        self.set_font(self.default_font, "", 8)
-        self.set_left_margin(10)
-        self.set_right_margin(15)
-        
-        self.logo_file = None
-
-    def header(self):
-        if self.logo_file and self.page_no() >= 1:
-            try:
-                self.image(self.logo_file, x=155, y=8, w=50)
-            except Exception as e:
-                pass
-        self.ln(9)
-        self.set_font(self.default_font, "B", 15)
-        self.cell(0, 6, "TAX INVOICE", ln=True, align="C")
-        self.ln(1)
-        
-    def footer(self):
-        self.set_y(-15)
-        
-        self.set_font(self.default_font, "I", 10)
-        self.cell(0, 4, "This is a Computer Generated Invoice", ln=True, align="C")
-        
-        self.set_font(self.default_font, "", 10)
-        self.cell(0, 4, "[Your Company Address]", ln=True, align="C")
-        
-        self.set_font(self.default_font, "U", 10)
-        self.set_text_color(0, 0, 255)
-        
-        email1 = "info@yourcompany.com"
-        phone_number = "+91 00000 00000"
-        website = "www.yourcompany.com"
-        
-        contact_text = f"{email1} | {phone_number} | {website}"
-        contact_width = self.get_string_width(contact_text)
-        x_contact = (self.w - contact_width) / 2
-        
-        self.set_x(x_contact)
-        self.cell(self.get_string_width(email1), 4, email1, link=f"mailto:{email1}")
-        self.set_x(x_contact + self.get_string_width(email1) + self.get_string_width(" | "))
-        self.cell(self.get_string_width(phone_number), 4, phone_number, link=f"tel:{phone_number}")
-        self.set_x(x_contact + self.get_string_width(email1) + self.get_string_width(" | ") + self.get_string_width(phone_number) + self.get_string_width(" | "))
-        self.cell(self.get_string_width(website), 4, website, link="https://www.yourcompany.com/")
-        
-        self.set_text_color(0, 0, 0)
-
-# --- Function to Create Invoice PDF ---
-def create_invoice_pdf(invoice_data, logo_file=None, stamp_file=None):
-    pdf = PDF()
-    pdf.set_auto_page_break(auto=True, margin=10)
-    
-    pdf.logo_file = logo_file
-    
-    pdf.add_page()
-
-    pdf.set_font(pdf.default_font, "B", 13)
-    pdf.cell(95, 8, "[Your Company Name].", border="LRT", ln=0)
-    pdf.cell(48, 8, "Invoice No.", border=1, ln=0, align="L")
-    pdf.cell(48, 8, "Invoice Date", border=1, ln=1, align="L")
-
-    y_left_start = pdf.get_y()
-
-    pdf.set_font(pdf.default_font, "", 12)
-    pdf.multi_cell(95, 4, invoice_data['vendor']['address'], border="L")
-    
-    vendor_lines = [
-        ("GST No. : ", invoice_data['vendor']['gst']),
-        ("MSME Registration No. : ", invoice_data['vendor']['msme']),
-        ("E-Mail : ", "info@yourcompany.com"),
-        ("Mobile No. : ", "0000000000"),
-    ]
-    
-    for i, (label, value) in enumerate(vendor_lines):
-        pdf.set_x(10)
-        pdf.set_font(pdf.default_font, "B", 12)
-        label_width = pdf.get_string_width(label) 
-        pdf.cell(label_width, 6, label, border="L", ln=0)
-        pdf.set_font(pdf.default_font, "", 12)
-        border = "R" if i < len(vendor_lines) - 1 else "R"
-        pdf.cell(95 - label_width, 6, value, border=border, ln=1)
-
-    y_left_end = pdf.get_y()
-
-    pdf.set_xy(105, y_left_start)
-    pdf.set_font(pdf.default_font, "", 12)
-    pdf.cell(48, 8, invoice_data['invoice']['invoice_no'], border="LR", ln=0, align="L")
-    pdf.cell(48, 8, invoice_data['invoice']['date'], border="R", ln=1, align="L")
-
-    payment_terms = invoice_data['invoice_details'].get('payment_terms', '100% Advance with Purchase')
-
-    y_before = pdf.get_y()
-    pdf.set_xy(153, y_before)
-    pdf.multi_cell(48, 4, payment_terms, border="LRT", align="L")
-
-    y_after = pdf.get_y()
-    actual_height = y_after - y_before
-
-    if actual_height < 8:
-        remaining_height = 8 - actual_height
-        pdf.set_xy(153, y_after)
-        pdf.cell(48, remaining_height, "", border="LR", ln=True)
-
-    pdf.set_x(105)
-    pdf.set_font(pdf.default_font, "B", 12)
-    pdf.cell(48, 8, "Supplier's Reference:", border="LRT", ln=0)
-    pdf.set_font(pdf.default_font, "", 12)
-    other_ref_value = invoice_data['Reference']['Suppliers_Reference']
-    pdf.cell(48, 8, other_ref_value, border="LRTB", ln=1)
-
-    pdf.set_x(105)
-    pdf.set_font(pdf.default_font, "B", 12)
-    pdf.cell(48, 8, "Other's Reference:", border="LRTB", ln=0)
-    pdf.set_font(pdf.default_font, "", 12)
-    other_ref_value = invoice_data['Reference']['Other']
-    pdf.cell(48, 8, other_ref_value, border="LRTB", ln=1)
-
-    pdf.set_font(pdf.default_font, "B", 12)
-    pdf.cell(95, 6, "Buyer", border="LT", ln=0)
-    pdf.cell(48, 6, "Buyer's Order No.", border=1, ln=0, align="L")
-    pdf.cell(48, 6, "Buyer's Order Date", border=1, ln=1, align="L")
-
-    y_buyer_start = pdf.get_y()
-
-    y_left_buyer_start = pdf.get_y()
-    
-    pdf.set_font(pdf.default_font, "B", 12)
-    pdf.multi_cell(95, 5, invoice_data['buyer']['name'], border="LR")
-    
-    pdf.set_font(pdf.default_font, "", 12)
-    pdf.multi_cell(95, 4, invoice_data['buyer']['address'], border="LR")
-    
-    buyer_lines = [
-        ("Email :", invoice_data['buyer']['email']),
-        ("Mobile No :", invoice_data['buyer']['mobile']),
-        ("GST No. :", invoice_data['buyer']['gst']),
-    ]
-    
-    for i, (label, value) in enumerate(buyer_lines):
-        pdf.set_x(10)
-        pdf.set_font(pdf.default_font, "B", 12)
-        label_width = pdf.get_string_width(label) + 1
-        pdf.cell(label_width, 6, label, border="L", ln=0)
-        pdf.set_font(pdf.default_font, "", 12)
-        border = "R" if i < len(buyer_lines) - 1 else "R"
-        pdf.cell(95 - label_width, 6, value, border=border, ln=1)
-
-    y_buyer_left_end = pdf.get_y()
-    total_left_height = y_buyer_left_end - y_left_buyer_start
-
-    pdf.set_xy(105, y_buyer_start)
-    
-    num_right_rows = 4
-    right_cell_height = total_left_height / num_right_rows
-    
-    pdf.set_font(pdf.default_font, "", 12)
-    pdf.cell(48, right_cell_height, invoice_data['invoice_details']['buyers_order_no'], border="LR", ln=0, align="L")
-    pdf.cell(48, right_cell_height, invoice_data['invoice_details']['buyers_order_date'], border="R", ln=1, align="L")
-
-    pdf.set_x(105)
-    pdf.set_font(pdf.default_font, "B", 12)
-    pdf.cell(48, right_cell_height, "Dispatched Through", border="LRT", ln=0)
-    pdf.set_font(pdf.default_font, "", 12)
-    pdf.cell(48, right_cell_height, invoice_data['invoice_details']['dispatched_through'], border="RT", ln=1)
-
-    pdf.set_x(105)
-    pdf.set_font(pdf.default_font, "B", 12)
-    pdf.cell(48, right_cell_height, "Destination", border="LRT", ln=0)
-    pdf.set_font(pdf.default_font, "", 12)
-    destination = invoice_data['invoice_details'].get('destination', 'City Name')
-    pdf.cell(48, right_cell_height, destination, border="RT", ln=1)
-
-    pdf.set_x(105)
-    pdf.set_font(pdf.default_font, "B", 12)
-    pdf.cell(48, right_cell_height, "Terms of delivery", border="LRT", ln=0)
-    pdf.set_font(pdf.default_font, "", 12)
-    pdf.cell(48, right_cell_height, invoice_data['invoice_details']['terms_of_delivery'], border="LRT", ln=1)
-
-    pdf.set_y(max(y_buyer_left_end, y_buyer_start + total_left_height))
-    
-    pdf.ln(0.3)
-    
-    pdf.set_font(pdf.default_font, "B", 12)
-    col_widths = [13, 82, 22, 23, 23, 28]
-    
-    pdf.cell(col_widths[0], 5, "Sr.No.", border=1, align="C")
-    pdf.cell(col_widths[1], 5, "Description of Goods", border=1, align="C")
-    pdf.cell(col_widths[2], 5, "HSN/SAC", border=1, align="C")
-    pdf.cell(col_widths[3], 5, "Quantity", border=1, align="C")
-    pdf.cell(col_widths[4], 5, "Unit Rate", border=1, align="C")
-    pdf.cell(col_widths[5], 5, "Amount", border=1, ln=True, align="C")
-
-    pdf.set_font(pdf.default_font, "", 12)
-    line_height = 5
-
-    hsn_codes = []
-    
-    for i, item in enumerate(invoice_data["items"], start=1):
-        hsn_codes.append(item['hsn'])
-        
-        if pdf.get_y() + 25 > pdf.page_break_trigger:
-            pdf.add_page()
-            pdf.set_font(pdf.default_font, "B", 12)
-            pdf.cell(col_widths[0], 5, "Sr. No.", border=1, align="C")
-            pdf.cell(col_widths[1], 5, "Description of Goods", border=1, align="C")
-            pdf.cell(col_widths[2], 5, "HSN/SAC", border=1, align="C")
-            pdf.cell(col_widths[3], 5, "Quantity", border=1, align="C")
-            pdf.cell(col_widths[4], 5, "Unit Rate", border=1, align="C")
-            pdf.cell(col_widths[5], 5, "Amount", border=1, ln=True, align="C")
-            pdf.set_font(pdf.default_font, "", 12)
-            
-        x_start = pdf.get_x()
-        y_start = pdf.get_y()
-
-        pdf.set_xy(x_start + col_widths[0], y_start)
-        pdf.multi_cell(col_widths[1], line_height, item['description'], border="LRT", align="L")
-        y_after_desc = pdf.get_y()
-        
-        row_height = y_after_desc - y_start
-        
-        pdf.set_xy(x_start, y_start)
-        pdf.multi_cell(col_widths[0], row_height, str(i), border="LRT", align="C")
-        
-        pdf.set_xy(x_start + col_widths[0] + col_widths[1], y_start)
-        pdf.multi_cell(col_widths[2], row_height, item['hsn'], border="LRT", align="C")
-        
-        pdf.set_xy(x_start + sum(col_widths[:3]), y_start)
-        pdf.multi_cell(col_widths[3], row_height, str(item['quantity']), border="LRT", align="C")
-        
-        pdf.set_xy(x_start + sum(col_widths[:4]), y_start)
-        pdf.multi_cell(col_widths[4], row_height, f"{item['unit_rate']:,.2f}", border="LRT", align="R")
-        
-        amount = item['quantity'] * item['unit_rate']
-        pdf.set_xy(x_start + sum(col_widths[:-1]), y_start)
-        pdf.multi_cell(col_widths[5], row_height, f"{amount:,.2f}", border="LRT", align="R")
-
-        pdf.set_xy(x_start, y_start + row_height)
-
-    x_start = pdf.get_x()
-    y_start = pdf.get_y()
-    
-    empty_row_height = 15
-    
-    pdf.set_xy(x_start, y_start)
-    pdf.multi_cell(col_widths[0], empty_row_height, "", border="LRB", align="C")
-    
-    pdf.set_xy(x_start + col_widths[0], y_start)
-    pdf.multi_cell(col_widths[1], empty_row_height, "", border="LRB", align="C")
-    
-    pdf.set_xy(x_start + col_widths[0] + col_widths[1], y_start)
-    pdf.multi_cell(col_widths[2], empty_row_height, "", border="LRB", align="C")
-    
-    pdf.set_xy(x_start + sum(col_widths[:3]), y_start)
-    pdf.multi_cell(col_widths[3], empty_row_height, "", border="LRB", align="C")
-    
-    pdf.set_xy(x_start + sum(col_widths[:4]), y_start)
-    pdf.multi_cell(col_widths[4], empty_row_height, "", border="LRB", align="C")
-    
-    pdf.set_xy(x_start + sum(col_widths[:-1]), y_start)
-    pdf.multi_cell(col_widths[5], empty_row_height, "", border="LRB", align="C")
-    
-    pdf.set_xy(x_start, y_start + empty_row_height)
-
-    if pdf.get_y() + 60 > pdf.page_break_trigger:
-        pdf.add_page()
-
-    pdf.set_font(pdf.default_font, "B", 12)
-    total_width = sum(col_widths[:5])
-    pdf.ln(0.2)
-    pdf.cell(total_width, 5, "Basic Amount", border=1, align="L")
-    pdf.cell(col_widths[5], 5, f"{invoice_data['totals']['basic_amount']:,.2f}", border=1, ln=True, align="R")
-    
-    pdf.cell(total_width, 5, "SGST @ 9%", border=1, align="L")
-    pdf.cell(col_widths[5], 5, f"{invoice_data['totals']['sgst']:,.2f}", border=1, ln=True, align="R")
-    
-    pdf.cell(total_width, 5, "CGST @ 9%", border=1, align="L")
-    pdf.cell(col_widths[5], 5, f"{invoice_data['totals']['cgst']:,.2f}", border=1, ln=True, align="R")
-    
-    round_off = invoice_data['totals']['final_amount'] - (invoice_data['totals']['basic_amount'] + invoice_data['totals']['sgst'] + invoice_data['totals']['cgst'])
-    if round_off != 0:
-        pdf.cell(total_width, 5, "Round Off", border=1, align="L")
-        pdf.cell(col_widths[5], 5, f"{round_off:,.2f}", border=1, ln=True, align="R")
-
-    pdf.cell(total_width, 5, "Final Amount to be Paid", border=1, align="L")
-    pdf.cell(col_widths[5], 5, f"{invoice_data['totals']['final_amount']:,.2f}", border=1, ln=True, align="R")
-    
-    pdf.cell(191, 5, "", border=1, ln=True)
-
-    pdf.set_y(pdf.get_y() - 5)
-    pdf.set_x(10)
-
-    pdf.set_font(pdf.default_font, "B", 12)
-    pdf.cell(pdf.get_string_width("Amount Chargeable (in words): "), 5, "Amount Chargeable (in words): ", ln=0)
-
-    pdf.set_font(pdf.default_font, "", 12)
-    pdf.cell(0, 5, invoice_data['totals']['amount_in_words'], ln=True)
-
-    if pdf.get_y() + 60 > pdf.page_break_trigger:
-        pdf.add_page()
-
-    pdf.set_font(pdf.default_font, "B", 12)
-    
-    pdf.cell(34, 10, "HSN/SAC", border="LRT", align="C")
-    pdf.cell(34, 10, "Taxable Value", border="LRT", align="C")
-    pdf.cell(60, 5, "Central Tax", border=1, align="C")
-    pdf.cell(63, 5, "State Tax", border=1, ln=True, align="C")
-
-    pdf.cell(34, 1, "", border="L", ln=False)
-    pdf.cell(34, 1, "", border="L", ln=False)
-    pdf.cell(30, 5, "Rate", border="L", align="C")
-    pdf.cell(30, 5, "Amount", border="LR", align="C")
-    pdf.cell(32, 5, "Rate", border="L", align="C")
-    pdf.cell(31, 5, "Amount", border="LR", ln=True, align="C")
-
-    pdf.set_font(pdf.default_font, "", 12)
-    
-    primary_hsn = hsn_codes[0] if hsn_codes else ""
-    
-    hsn_tax_value = sum(item['quantity'] * item['unit_rate'] for item in invoice_data["items"])
-    hsn_sgst = hsn_tax_value * 0.09
-    hsn_cgst = hsn_tax_value * 0.09
-    
-    pdf.cell(34, 5, primary_hsn, border=1, align="C")
-    pdf.cell(34, 5, f"{hsn_tax_value:,.2f}", border=1, align="C")
-    pdf.cell(30, 5, "9%", border=1, align="C")
-    pdf.cell(30, 5, f"{hsn_sgst:,.2f}", border=1, align="C")
-    pdf.cell(32, 5, "9%", border=1, align="C")
-    pdf.cell(31, 5, f"{hsn_cgst:,.2f}", border=1, ln=True, align="C")
-
-    pdf.set_font(pdf.default_font, "B", 12)
-    pdf.cell(34, 5, "Total", border=1, align="C")
-    pdf.cell(34, 5, f"{hsn_tax_value:,.2f}", border=1, align="C")
-    pdf.cell(30, 5, "", border=1, align="C")
-    pdf.cell(30, 5, f"{hsn_sgst:,.2f}", border=1, align="C")
-    pdf.cell(32, 5, "", border=1, align="C")
-    pdf.cell(31, 5, f"{hsn_cgst:,.2f}", border=1, ln=True, align="C")
-    
-    pdf.set_font(pdf.default_font, "B", 12)
-    label_part = "Tax Amount (in words): "
-    pdf.cell(pdf.get_string_width(label_part), 5, label_part, border="LTB", ln=0)
-
-    pdf.set_font(pdf.default_font, "", 12)
-    value_part = invoice_data['totals']['tax_in_words']
-    remaining_width = 189.7 - pdf.get_string_width(label_part)
-    pdf.cell(remaining_width, 5, value_part, border="TRB", ln=True)
-
-    if pdf.get_y() + 80 > pdf.page_break_trigger:
-        pdf.add_page()
-
-    pdf.set_font(pdf.default_font, "B", 10)
-    pdf.cell(95, 5, "Company's Bank Details", ln=0, border=1)
-    pdf.cell(96, 5, "Declaration:", ln=1, border=1)
-
-    y_before = pdf.get_y()
-    x_left = pdf.get_x()
-
-    bank_lines = [
-        ("Bank Name", "[Your Bank Name]"),
-        ("Branch", "[Your Branch Name]"),
-        ("Account No", "[Your Account Number]"),
-        ("IFS Code", "[Your IFS Code]")
-    ]
-    
-    pdf.set_font(pdf.default_font, "", 10)
-    
-    label_start_x = x_left
-    colon_x = label_start_x + 25
-    value_start_x = colon_x + 5
-    
-    current_y = y_before
-    for label, value in bank_lines:
-        pdf.set_xy(label_start_x, current_y)
-        pdf.set_font(pdf.default_font, "B", 10)
-        pdf.cell(25, 5, label, border="L", ln=0)
-        
-        pdf.set_xy(colon_x, current_y)
-        pdf.cell(5, 5, ":", ln=0)
-        
-        pdf.set_xy(value_start_x, current_y)
-        pdf.set_font(pdf.default_font, "", 10)
-        pdf.cell(50, 5, value, border="", ln=1)
-        
-        current_y += 5
-    
-    y_after_left = current_y
-    
-    pdf.set_xy(x_left + 95, y_before)
-    pdf.set_font(pdf.default_font, "", 10)
-    pdf.multi_cell(96, 4, invoice_data['declaration'], border=1)
-    y_after_right = pdf.get_y()
-    
-    max_y = max(y_after_left, y_after_right)
-    pdf.set_y(max_y)
-
-    y_signature_start = pdf.get_y()
-
-    pdf.set_font(pdf.default_font, "B", 10)
-    pdf.cell(95, 6, "Buyer's Company Signature", border="LRT", ln=0, align="C")
-
-    pdf.cell(96, 6, "For [Your Company Name].", border="LR", ln=1, align="C")
-
-    left_signature_box_height = 33
-    right_signature_box_height = 33
-
-    pdf.set_font(pdf.default_font, "I", 10)
-    pdf.set_text_color(128, 128, 128)
-
-    buyer_logo_file = invoice_data.get('buyer', {}).get('logo_file')
-
-    if buyer_logo_file:
-        try:
-            logo_width = 25
-            logo_x = 10 + (95 - logo_width) / 2
-            logo_y = pdf.get_y() + 4
-            
-            pdf.image(buyer_logo_file, x=logo_x, y=logo_y, w=logo_width)
-            
-            pdf.set_xy(10, logo_y + logo_width + 2)
-            pdf.set_font(pdf.default_font, "B", 9)
-            pdf.cell(95, 4, invoice_data['buyer']['name'], border=0, ln=1, align="C")
-            
-            pdf.set_xy(10, pdf.get_y() + 8)
-            pdf.set_font(pdf.default_font, "", 9)
-            pdf.cell(95, 4, "_________________________", border=0, ln=1, align="C")
-            pdf.cell(95, 4, "Authorized Signatory", border=0, ln=1, align="C")
-            
-            pdf.set_xy(10, y_signature_start + 6)
-            pdf.cell(95, left_signature_box_height, "", border="LRB")
-            
-            y_after_left_signature = y_signature_start + 6 + left_signature_box_height
-            
-        except Exception as e:
-            st.warning(f"Could not add buyer logo: {e}")
-            pdf.multi_cell(95, left_signature_box_height/5, "\n\n(Space for Buyer's Company\nStamp and Signature)", border="LRB", align="C")
-            y_after_left_signature = pdf.get_y()
-    else:
-        pdf.multi_cell(95, left_signature_box_height/5, "\n\n\n(Space for Buyer's Company\nStamp and Signature)", border="LRB", align="C")
-        y_after_left_signature = pdf.get_y()
-
-    pdf.set_xy(105, y_signature_start + 5)
-    pdf.set_text_color(0, 0, 0)
-
-    if stamp_file:
-        try:
-            stamp_width = 25
-            stamp_x = 105 + (96 - stamp_width) / 2
-            stamp_y = pdf.get_y() + 2
-            pdf.image(stamp_file, x=stamp_x, y=stamp_y, w=stamp_width)
-        except Exception as e:
-            st.warning(f"Could not add stamp: {e}")
-
-    pdf.set_xy(105, y_signature_start + 10 + right_signature_box_height - 10)
-    pdf.set_font(pdf.default_font, "B", 10)
-    pdf.cell(96, 5, "Authorized Signatory", border=0, ln=True, align="C")
-
-    pdf.set_xy(105, y_signature_start + 6)
-    pdf.cell(96, right_signature_box_height, "", border="LRB")
-
-    pdf.set_y(max(y_after_left_signature, y_signature_start + 6 + right_signature_box_height))
-
-    pdf_bytes = pdf.output(dest="S").encode('latin-1') if isinstance(pdf.output(dest="S"), str) else pdf.output(dest="S")
-    return pdf_bytes
-
-# --- PDF Class ---
-class PO_PDF(FPDF):
-    def __init__(self):
-        super().__init__()
-        self.set_auto_page_break(auto=False, margin=10)
-        self.set_left_margin(15)
-        self.set_right_margin(15)
-        self.logo_path = None
-        font_dir = os.path.join(os.path.dirname(__file__), "fonts")
-        try:
-            self.add_font("Calibri", "", os.path.join(font_dir, "calibri.ttf"), uni=True)
-            self.add_font("Calibri", "B", os.path.join(font_dir, "calibrib.ttf"), uni=True)
-            self.add_font("Calibri", "I", os.path.join(font_dir, "calibrii.ttf"), uni=True)
-            self.add_font("Calibri", "BI", os.path.join(font_dir, "calibriz.ttf"), uni=True)
-            self.default_font = "Calibri"
-        except:
-            self.default_font = "Helvetica"
-
-        self.website_url = "https://yourcompany.com/"
-    def header(self):
-        self.ln(5)
-        if self.page_no() == 1:
-            self.ln(1)
-            if self.logo_path and os.path.exists(self.logo_path):
-                self.image(self.logo_path, x=155, y=8, w=50,link=self.website_url)
-                self.ln(4)
-            self.set_font(self.default_font, "BU", 15)
-            self.cell(0, 15, "PURCHASE ORDER", ln=True, align="C")
-            self.ln(1)
-
-            self.set_font(self.default_font, "", 12)
-            self.set_xy(140,33)
-            self.multi_cell(60,4,
-                            f"PO No: {self.sanitize_text(st.session_state.po_number)}\n"
-                            f"Date: {self.sanitize_text(st.session_state.po_date)}")
-
-    def footer(self):
-        self.set_y(-12)
-        
-        self.set_font("Helvetica", "", 10)
-        self.cell(0, 4, "[Your Company Address]", ln=True, align="C")
-        
-        self.set_font("Helvetica", "U", 10)
-        self.set_text_color(0, 0, 255)
-        
-        email1 = "info@yourcompany.com"
-        phone_number = "+91 00000 00000"
-        website = "www.yourcompany.com"
-        
-        contact_text = f"{email1} | {phone_number} | {website}"
-        contact_width = self.get_string_width(contact_text)
-        x_contact = (self.w - contact_width) / 2
-        
-        self.set_x(x_contact)
-        self.cell(self.get_string_width(email1), 4, email1, link=f"mailto:{email1}")
-        self.set_x(x_contact + self.get_string_width(email1) + self.get_string_width(" | "))
-        self.cell(self.get_string_width(phone_number), 4, phone_number, link=f"tel:{phone_number}")
-        self.set_x(x_contact + self.get_string_width(email1) + self.get_string_width(" | ") + self.get_string_width(phone_number) + self.get_string_width(" | "))
-        self.cell(self.get_string_width(website), 4, website, link="https://www.yourcompany.com/")
-        
-        self.set_text_color(0, 0, 0)
-
-    def section_title(self, title):
-        self.set_font(self.default_font, "B", 12)
-        self.cell(0, 6, self.sanitize_text(title), ln=True)
-        self.ln(1)
-
-    def sanitize_text(self, text):
-        return text.encode('ascii', 'ignore').decode('ascii')
-
-def number_to_words(number):
-    """Convert number to words"""
-    try:
-        from num2words import num2words
-        return num2words(number, lang='en_IN').title() + " Rupees Only/-"
-    except ImportError:
-        words = f"Rupees {number:,.2f} Only/-"
-        return words
-
-def create_po_pdf(po_data, logo_path=None):
-    pdf = PO_PDF()
-    pdf.logo_path = logo_path
-    pdf.add_page()
-
-    sanitized_vendor_name = pdf.sanitize_text(po_data['vendor_name'])
-    sanitized_vendor_address = pdf.sanitize_text(po_data['vendor_address'])
-    sanitized_vendor_contact = pdf.sanitize_text(po_data['vendor_contact'])
-    sanitized_vendor_mobile = pdf.sanitize_text(po_data['vendor_mobile'])
-    sanitized_gst_no = pdf.sanitize_text(po_data['gst_no'])
-    sanitized_pan_no = pdf.sanitize_text(po_data['pan_no'])
-    sanitized_msme_no = pdf.sanitize_text(po_data['msme_no'])
-    sanitized_bill_to_company = pdf.sanitize_text(po_data['bill_to_company'])
-    sanitized_bill_to_address = pdf.sanitize_text(po_data['bill_to_address'])
-    sanitized_ship_to_company = pdf.sanitize_text(po_data['ship_to_company'])
-    sanitized_ship_to_address = pdf.sanitize_text(po_data['ship_to_address'])
-    sanitized_end_company = pdf.sanitize_text(po_data['end_company'])
-    sanitized_end_address = pdf.sanitize_text(po_data['end_address'])
-    sanitized_end_person = pdf.sanitize_text(po_data['end_person'])
-    sanitized_end_mobile = pdf.sanitize_text(po_data['end_mobile'])
-    sanitized_end_email = pdf.sanitize_text(po_data['end_email'])
-    sanitized_payment_terms = pdf.sanitize_text(po_data['payment_terms'])
-    sanitized_delivery_terms = pdf.sanitize_text(po_data['delivery_terms'])
-    sanitized_prepared_by = pdf.sanitize_text(po_data['prepared_by'])
-    sanitized_authorized_by = pdf.sanitize_text(po_data['authorized_by'])
-    sanitized_company_name = pdf.sanitize_text(po_data['company_name'])
-    
-    pdf.set_font(pdf.default_font, "B", 12)
-    pdf.section_title("To:")
-
-    pdf.set_font(pdf.default_font, "B", 12)
-    pdf.multi_cell(90, 5, sanitized_vendor_name)
-
-    pdf.set_font(pdf.default_font, "", 12)
-    pdf.multi_cell(90, 5, sanitized_vendor_address)
-
-    pdf.set_font(pdf.default_font, "B", 12)
-    pdf.write(5, "Kind Attend: ")
-    pdf.set_font(pdf.default_font, "", 12)
-    pdf.multi_cell(95, 5, sanitized_vendor_contact)
-
-    pdf.set_font(pdf.default_font, "B", 12)
-    pdf.write(5, "Mobile: ")
-    pdf.set_font(pdf.default_font, "", 12)
-    pdf.multi_cell(95, 5, sanitized_vendor_mobile)
-
-    pdf.ln(5)
-
-    start_y = pdf.get_y()
-
-    pdf.set_font(pdf.default_font, "B", 12)
-    pdf.cell(90, 5, "Bill To:", ln=1)
-
-    pdf.set_font(pdf.default_font, "B", 12)
-    pdf.multi_cell(90, 5, sanitized_bill_to_company)
-
-    pdf.set_font(pdf.default_font, "", 12)
-    pdf.multi_cell(90, 5, sanitized_bill_to_address)
-
-    y_after_bill = pdf.get_y()
-
-    pdf.set_xy(110, start_y)
-    pdf.set_font(pdf.default_font, "B", 12)
-    pdf.cell(90, 5, "Ship To:", ln=1)
-    pdf.set_x(110)
-
-    pdf.set_font(pdf.default_font, "B", 12)
-    pdf.multi_cell(90, 5, sanitized_ship_to_company)
-
-    pdf.set_x(110)
-    pdf.set_font(pdf.default_font, "", 12)
-    pdf.multi_cell(90, 5, sanitized_ship_to_address)
-
-    y_after_ship = pdf.get_y()
-
-    pdf.set_y(max(y_after_bill, y_after_ship))
-    pdf.ln(2)
-    
-    pdf.set_font(pdf.default_font, "B", 12)
-    pdf.write(5, "GST NO: ")
-    pdf.set_font(pdf.default_font, "", 12)
-    pdf.multi_cell(0, 5, sanitized_gst_no)
-
-    pdf.set_font(pdf.default_font, "B", 12)
-    pdf.write(5, "PAN NO: ")
-    pdf.set_font(pdf.default_font, "", 12)
-    pdf.multi_cell(0, 5, sanitized_pan_no)
-
-    pdf.set_font(pdf.default_font, "B", 12)
-    pdf.write(5, "MSME Registration No: ")
-    pdf.set_font(pdf.default_font, "", 12)
-    pdf.multi_cell(0, 5, sanitized_msme_no)
-
-    pdf.ln(2)
-
-    col_widths = [65, 22, 30, 25, 15, 22]
-    headers = ["Product", "Basic", "GST TAX @ 18%", "Per Unit Price", "Qty.", "Total"]
-    pdf.set_fill_color(220, 220, 220)
-    pdf.set_font(pdf.default_font, "B", 12)
-    for h, w in zip(headers, col_widths):
-        pdf.cell(w, 6, pdf.sanitize_text(h), border=1, align="C", fill=True)
-    pdf.ln()
-
-    pdf.set_font(pdf.default_font, "", 12)
-    line_height = 5
-
-    products_total = 0
-    for p in po_data["products"]:
-        gst_amt = p["basic"] * p["gst_percent"] / 100
-        per_unit_price = p["basic"] + gst_amt
-        total = per_unit_price * p["qty"]
-        products_total += total
-
-    rounded_total = round(products_total)
-    round_off = rounded_total - products_total
-
-    for p in po_data["products"]:
-        gst_amt = p["basic"] * p["gst_percent"] / 100
-        per_unit_price = p["basic"] + gst_amt
-        total = per_unit_price * p["qty"]
-        name = pdf.sanitize_text(p["name"])
-
-        num_lines = pdf.multi_cell(col_widths[0], line_height, name, border=0, split_only=True)
-        max_lines = max(len(num_lines), 1)
-        row_height = line_height * max_lines
-
-        x_start = pdf.get_x()
-        y_start = pdf.get_y()
-
-        pdf.multi_cell(col_widths[0], line_height, name, border=1)
-        pdf.set_xy(x_start + col_widths[0], y_start)
-        pdf.cell(col_widths[1], row_height, f"{p['basic']:,.2f}", border=1, align="R")
-        pdf.cell(col_widths[2], row_height, f"{gst_amt:,.2f}", border=1, align="R")
-        pdf.cell(col_widths[3], row_height, f"{per_unit_price:,.2f}", border=1, align="R")
-        pdf.cell(col_widths[4], row_height, f"{p['qty']:.2f}", border=1, align="C")
-        pdf.cell(col_widths[5], row_height, f"{total:,.2f}", border=1, align="R")
-        pdf.ln(row_height)
-
-    pdf.set_font(pdf.default_font, "B", 12)
-    pdf.cell(sum(col_widths[:-1]), 6, "Round Off", border=1, align="R")
-    pdf.cell(col_widths[5], 6, f"{round_off:,.2f}", border=1, align="R")
-    pdf.ln()
-
-    pdf.set_font(pdf.default_font, "B", 12)
-    pdf.cell(sum(col_widths[:-1]), 6, "Final Amount to be Paid", border=1, align="R")
-    pdf.cell(col_widths[5], 6, f"{rounded_total:,.2f}", border=1, align="R")
-    pdf.ln(4)
-
-    pdf.ln(5)
-    pdf.set_font(pdf.default_font, "B", 12)
-    pdf.cell(45, 4, "Amount in Words")
-    pdf.cell(5, 4, ":")
-    pdf.set_font(pdf.default_font, "", 12)
-    pdf.multi_cell(0, 4, pdf.sanitize_text(po_data['amount_words']))
-
-    pdf.set_font(pdf.default_font, "B", 12)
-
-    pdf.cell(45, 5, "Taxes")
-    pdf.cell(5, 4, ":")
-    pdf.set_font(pdf.default_font, "", 12)
-    pdf.multi_cell(0, 5, f"As specified above")
-
-    pdf.set_font(pdf.default_font, "B", 12)
-    pdf.cell(45, 5, "Payment")
-    pdf.cell(5, 4, ":")
-    pdf.set_font(pdf.default_font, "", 12)
-    pdf.multi_cell(0, 5, f"{sanitized_payment_terms}")
-
-    pdf.set_font(pdf.default_font, "B", 12)
-    pdf.cell(45, 5, "Delivery")
-    pdf.cell(5, 4, ":")
-    pdf.set_font(pdf.default_font, "", 12)
-    pdf.multi_cell(0, 5, f"{sanitized_delivery_terms}")
-
-    pdf.ln(2)
-
-    pdf.section_title("End User Details")
-    pdf.set_font(pdf.default_font, "", 12)
-
-    pdf.set_font(pdf.default_font, "B", 12)
-    pdf.cell(45, 5, "Company Name")
-    pdf.cell(5, 4, ":")
-    pdf.set_font(pdf.default_font, "", 12)
-    pdf.multi_cell(0, 5, f"{sanitized_end_company}")
-
-    pdf.set_font(pdf.default_font, "B", 12)
-    pdf.cell(45, 5, "Company Address")
-    pdf.cell(5, 4, ":")
-    pdf.set_font(pdf.default_font, "", 12)
-    pdf.multi_cell(0, 5, f"{sanitized_end_address}")
-
-    pdf.set_font(pdf.default_font, "B", 12)
-    pdf.cell(45, 5, "Contact")
-    pdf.cell(5, 4, ":")
-    pdf.set_font(pdf.default_font, "", 12)
-    pdf.multi_cell(0, 5, f"{sanitized_end_person}")
-
-    pdf.set_font(pdf.default_font, "B", 12)
-    pdf.cell(45, 5, "Mobile No:")
-    pdf.cell(5, 4, ":")
-    pdf.set_font(pdf.default_font, "", 12)
-    pdf.multi_cell(0, 5, f"{sanitized_end_mobile}")
-
-    pdf.set_font(pdf.default_font, "B", 12)
-    pdf.cell(45, 5, "Email")
-    pdf.cell(5, 4, ":")
-    pdf.set_font(pdf.default_font, "", 12)
-    pdf.multi_cell(0, 5, f"{sanitized_end_email}")
-
-    pdf.ln(5)
-    pdf.set_font(pdf.default_font, "", 12)
-    pdf.cell(0, 5, f"For, {sanitized_company_name}", ln=True, border=0, align="L")
-    stamp_path = None
-    if stamp_path and os.path.exists(stamp_path):
-        pdf.ln(2)
-        pdf.image(stamp_path, x=pdf.get_x(), y=pdf.get_y(), w=25)
-        pdf.ln(15)
-
-    pdf_bytes = pdf.output(dest="S").encode('latin-1')
-    return pdf_bytes
-
-def safe_str_state(key, default=""):
-    """Ensure session_state value exists and is always a string."""
-    if key not in st.session_state or not isinstance(st.session_state[key], str):
-        st.session_state[key] = str(default)
-    return st.session_state[key] 
-
-def safe_image_path(image_path, default_name):
-    """Safely handle image paths, return None if file doesn't exist"""
-    if image_path and os.path.exists(image_path):
-        return image_path
-    else:
-        st.sidebar.warning(f"⚠ {default_name} not found")
-        return None
-
-def load_images_from_github():
-    """Download images from GitHub"""
-    logo_path = None
-    stamp_path = None
-    
-    try:
-        if LOGO_URL:
-            logo_response = requests.get(LOGO_URL, timeout=10)
-            if logo_response.status_code == 200:
-                logo_path = "github_logo.jpg"
-                with open(logo_path, "wb") as f:
-                    f.write(logo_response.content)
-    except Exception as e:
-        st.sidebar.warning(f"⚠ Logo download failed: {str(e)}")
-    
-    try:
-        if STAMP_URL:
-            stamp_response = requests.get(STAMP_URL, timeout=10)
-            if stamp_response.status_code == 200:
-                stamp_path = "github_stamp.jpg"
-                with open(stamp_path, "wb") as f:
-                    f.write(stamp_response.content)
-    except Exception as e:
-        st.sidebar.warning(f"⚠ Stamp download failed: {str(e)}")
-    
-    return logo_path, stamp_path
-
-def save_uploaded_file(uploaded_file, filename):
-    """Save uploaded file to disk"""
-    try:
-        with open(filename, "wb") as f:
-            f.write(uploaded_file.getbuffer())
-        return filename
-    except Exception as e:
-        st.sidebar.error(f"Error saving {filename}: {str(e)}")
-        return None
-
-# --- The main function ---
-def main():
-    st.set_page_config(page_title="Document Generator", page_icon="📑", layout="wide")
-    st.title("📑 Document Generator - Invoice, PO & Quotation")
-
-    # --- Logo and Stamp Configuration in Sidebar ---
-    st.sidebar.header("📷 Company Branding")
-    
-    use_github = st.sidebar.checkbox("Use GitHub Images", value=False, 
-                                   help="Use logo and stamp from GitHub repository")
-    
-    uploaded_logo = None
-    uploaded_stamp = None
-    
-    if not use_github:
-        st.sidebar.subheader("Upload Custom Images")
-        uploaded_logo = st.sidebar.file_uploader("Upload Company Logo", 
-                                               type=["png", "jpg", "jpeg"], 
-                                               key="global_logo")
-        uploaded_stamp = st.sidebar.file_uploader("Upload Company Stamp", 
-                                                type=["png", "jpg", "jpeg"], 
-                                                key="global_stamp")
-    
-    global_logo_path = None
-    global_stamp_path = None
-    
-    if use_github:
-        with st.sidebar.status("Loading images from GitHub..."):
-            global_logo_path, global_stamp_path = load_images_from_github()
-            
-            if global_logo_path:
-                st.sidebar.success("✓ GitHub logo loaded")
-            else:
-                st.sidebar.error("❌ GitHub logo failed")
-                
-            if global_stamp_path:
-                st.sidebar.success("✓ GitHub stamp loaded")
-            else:
-                st.sidebar.error("❌ GitHub stamp failed")
-    else:
-        if uploaded_logo:
-            global_logo_path = save_uploaded_file(uploaded_logo, "custom_logo.jpg")
-            if global_logo_path:
-                st.sidebar.success("✓ Custom logo loaded")
-        
-        if uploaded_stamp:
-            global_stamp_path = save_uploaded_file(uploaded_stamp, "custom_stamp.jpg")
-            if global_stamp_path:
-                st.sidebar.success("✓ Custom stamp loaded")
-    
-    st.sidebar.subheader("Image Status")
-    if global_logo_path:
-        st.sidebar.info("Logo: ✅ Loaded")
-    else:
-        st.sidebar.error("Logo: ❌ Not available")
-    
-    if global_stamp_path:
-        st.sidebar.info("Stamp: ✅ Loaded")
-    else:
-        st.sidebar.error("Stamp: ❌ Not available")
-
-    # --- Initialize Session State ---
-    # Quotation session states
-    if "quotation_seq" not in st.session_state:
-        st.session_state.quotation_seq = get_current_quotation_sequence()
-    if "quotation_products" not in st.session_state:
-        st.session_state.quotation_products = []
-    if "last_quotation_number" not in st.session_state:
-        st.session_state.last_quotation_number = ""
-    if "quotation_number" not in st.session_state:
-        st.session_state.quotation_number = generate_quotation_number("SP1", st.session_state.quotation_seq)
-    if "current_quote_sales_person" not in st.session_state:
-        st.session_state.current_quote_sales_person = "SP1"
-
-    # PO session states  
-    if "po_seq" not in st.session_state:
-        st.session_state.po_seq = get_current_po_sequence()
-    if "products" not in st.session_state:
-        st.session_state.products = []
-    if "company_name" not in st.session_state:
-        st.session_state.company_name = "Your Company Name"
-    if "po_number" not in st.session_state:
-        st.session_state.po_number = generate_po_number("SP1", st.session_state.po_seq)
-    if "po_date" not in st.session_state:
-        st.session_state.po_date = datetime.date.today().strftime("%d-%m-%Y")
-    if "last_po_number" not in st.session_state:
-        st.session_state.last_po_number = ""
-    if "current_po_sales_person" not in st.session_state:
-        st.session_state.current_po_sales_person = "SP1"
-    if "current_po_quarter" not in st.session_state:
-        st.session_state.current_po_quarter = get_current_quarter()
-
-    # Invoice session states
-    if "invoice_seq" not in st.session_state:
-        st.session_state.invoice_seq = get_current_invoice_sequence()
-    if "invoice_number" not in st.session_state:
-        st.session_state.invoice_number = generate_invoice_number(st.session_state.invoice_seq)
-    if "last_invoice_number" not in st.session_state:
-        st.session_state.last_invoice_number = ""
-    if "current_invoice_quarter" not in st.session_state:
-        st.session_state.current_invoice_quarter = get_current_quarter()
-
-    # Invoice buyer session states
-    if "invoice_buyer_company" not in st.session_state:
-        st.session_state.invoice_buyer_company = "Customer Company Ltd."
-    if "invoice_buyer_address" not in st.session_state:
-        st.session_state.invoice_buyer_address = "Customer Address"
-    if "invoice_buyer_gst" not in st.session_state:
-        st.session_state.invoice_buyer_gst = "GSTNUMBER"
-    if "invoice_buyer_mobile" not in st.session_state:
-        st.session_state.invoice_buyer_mobile = "00000 00000"
-    if "invoice_buyer_email" not in st.session_state:
-        st.session_state.invoice_buyer_email = "customer@company.com"
-
-    # Vendor session states
-    if "po_vendor_name" not in st.session_state:
-        st.session_state.po_vendor_name = "Supplier Company Ltd."
-    if "po_vendor_address" not in st.session_state:
-        st.session_state.po_vendor_address = "Supplier Address"
-    if "po_vendor_contact" not in st.session_state:
-        st.session_state.po_vendor_contact = "Contact Person"
-    if "po_vendor_mobile" not in st.session_state:
-        st.session_state.po_vendor_mobile = "+91 00000 00000"
-    if "po_gst_no" not in st.session_state:
-        st.session_state.po_gst_no = "GSTNUMBER"
-    if "po_pan_no" not in st.session_state:
-        st.session_state.po_pan_no = "PANNUMBER"
-    if "po_msme_no" not in st.session_state:
-        st.session_state.po_msme_no = "MSMENUMBER"
-
-    # Quotation end user session states
-    if "quote_end_company" not in st.session_state:
-        st.session_state.quote_end_company = "Customer Company Ltd."
-    if "quote_end_address" not in st.session_state:
-        st.session_state.quote_end_address = "Customer Address"
-    if "quote_end_person" not in st.session_state:
-        st.session_state.quote_end_person = "Contact Person"
-    if "quote_end_mobile" not in st.session_state:
-        st.session_state.quote_end_mobile = "0000000000"
-    if "quote_end_email" not in st.session_state:
-        st.session_state.quote_end_email = "customer@company.com"
-    if "quote_end_gst_no" not in st.session_state:
-        st.session_state.quote_end_gst_no = "GSTNUMBER"
-
-    # PO end user session states
-    if "po_end_company" not in st.session_state:
-        st.session_state.po_end_company = "Customer Company Ltd."
-    if "po_end_address" not in st.session_state:
-        st.session_state.po_end_address = "Customer Address"
-    if "po_end_person" not in st.session_state:
-        st.session_state.po_end_person = "Contact Person"
-    if "po_end_mobile" not in st.session_state:
-        st.session_state.po_end_mobile = "0000000000"
-    if "po_end_email" not in st.session_state:
-        st.session_state.po_end_email = "customer@company.com"
-    if "po_end_gst_no" not in st.session_state:
-        st.session_state.po_end_gst_no = "GSTNUMBER"
-
-    # PO bill to/ship to session states
-    if "po_bill_to_company" not in st.session_state:
-        st.session_state.po_bill_to_company = "Your Company Name"
-    if "po_bill_to_address" not in st.session_state:
-        st.session_state.po_bill_to_address = "Your Company Address"
-    if "po_ship_to_company" not in st.session_state:
-        st.session_state.po_ship_to_company = "Your Company Name"
-    if "po_ship_to_address" not in st.session_state:
-        st.session_state.po_ship_to_address = "Your Company Address"
-
-    # --- Upload Excel and Load Vendor/End User ---
-    uploaded_excel = st.file_uploader("📂 Upload Vendor & End User Excel", type=["xlsx"])
-
-    if uploaded_excel:
-        vendors_df = pd.read_excel(uploaded_excel, sheet_name="Vendors", dtype={"Mobile": str})
-        endusers_df = pd.read_excel(uploaded_excel, sheet_name="EndUsers")
-
-        st.success("✅ Excel loaded successfully!")
-
-        vendor_name = st.selectbox("Select Vendor", vendors_df["Vendor Name"].unique())
-        vendor = vendors_df[vendors_df["Vendor Name"] == vendor_name].iloc[0]
-
-        end_user_name = st.selectbox("Select End User", endusers_df["End User Company"].unique())
-        end_user = endusers_df[endusers_df["End User Company"] == end_user_name].iloc[0]
-
-        def safe_strip(value):
-            try:
-                if pd.isna(value):
-                    return ""
-                return str(value).split(".")[0].strip()
-            except Exception:
-                return ""
-
-        vendor_mobile = safe_strip(vendor.get("Mobile", ""))
-        End_user_mobile = safe_strip(end_user.get("End Mobile", ""))
-
-        st.session_state.po_vendor_name = vendor["Vendor Name"]
-        st.session_state.po_vendor_address = vendor["Vendor Address"]
-        st.session_state.po_vendor_contact = vendor["Contact Person"]
-        st.session_state.po_vendor_mobile = vendor_mobile
-        st.session_state.po_end_company = end_user["End User Company"]
-        st.session_state.po_end_address = end_user["End User Address"]
-        st.session_state.po_end_person = end_user["End User Contact"]
-        st.session_state.po_end_mobile = End_user_mobile
-        st.session_state.po_end_email = end_user["End User Email"]
-        st.session_state.po_end_gst_no = end_user["GST NO"]
-
-        st.info("Vendor & End User details auto-filled from Excel ✅")
-
-    # Create tabs for different document types
-    tab1, tab2, tab3 = st.tabs(["Quotation Generator", "Purchase Order Generator", "Tax Invoice Generator"])
-
-    with tab1:
-        if global_logo_path and os.path.exists(global_logo_path):
-            st.image(global_logo_path, width=150)
-            st.markdown("### Quotation Generator")
-        else:
-            st.header("Quotation Generator")  
-        
-        today = datetime.date.today()
-        current_quarter = get_current_quarter()
-        
-        st.sidebar.header("Quotation Settings")
-        sales_person = st.sidebar.selectbox("Select Sales Person", 
-                                        options=list(SALES_PERSON_MAPPING.keys()), 
-                                        format_func=lambda x: f"{x} - {SALES_PERSON_MAPPING[x]['name']}",
-                                        key="quote_sales_person")
-        
-        current_sales_person_info = SALES_PERSON_MAPPING.get(sales_person, SALES_PERSON_MAPPING['SP1'])
-        
-        def get_quotation_number():
-            if st.session_state.last_quotation_number:
-                try:
-                    last_prefix, last_sales_person, last_quarter, last_date, last_year_range, last_sequence = parse_quotation_number(st.session_state.last_quotation_number)
-                    
-                    if last_sales_person == sales_person and last_quarter == current_quarter:
-                        next_sequence = get_next_sequence_number(st.session_state.last_quotation_number)
-                        return generate_quotation_number(sales_person, next_sequence)
-                    else:
-                        return generate_quotation_number(sales_person, 1)
-                except:
-                    return generate_quotation_number(sales_person, st.session_state.quotation_seq)
-            else:
-                return generate_quotation_number(sales_person, st.session_state.quotation_seq)
-        
-        if "current_quote_sales_person" not in st.session_state:
-            st.session_state.current_quote_sales_person = sales_person
-            st.session_state.quotation_number = get_quotation_number()
-        
-        if (st.session_state.current_quote_sales_person != sales_person or 
-            st.session_state.get('current_quarter', '') != current_quarter):
-            st.session_state.current_quote_sales_person = sales_person
-            st.session_state.current_quarter = current_quarter
-            st.session_state.quotation_number = get_quotation_number()
-        
-        st.sidebar.info(f"**Current Sales Person:** {current_sales_person_info['name']}")
-        st.sidebar.info(f"**Current Quarter:** {current_quarter}")
-        
-        try:
-            prefix, current_sp, quarter, date_part, year_range, sequence = parse_quotation_number(st.session_state.quotation_number)
-            st.sidebar.success(f"**Auto-generated Quotation Number**")
-            st.sidebar.info(f"**Format:** {current_sp}/{quarter}/{date_part}/{year_range}_{sequence}")
-        except:
-            st.sidebar.warning("Could not parse quotation number")
-        
-        st.sidebar.subheader("Quotation Number Editor")
-        
-        try:
-            current_prefix, current_sp, current_q, current_date, current_year_range, current_seq = parse_quotation_number(st.session_state.quotation_number)
-            
-            col1, col2, col3, col4 = st.sidebar.columns([1, 2, 2, 1])
-            
-            with col1:
-                st.text_input("Sales Person", value=current_sp, key="quote_sp_display", disabled=True)
-            
-            with col2:
-                new_date = st.text_input("Date", value=current_date, key="quote_date_edit")
-            
-            with col3:
-                new_year_range = st.text_input("Year Range", value=current_year_range, key="quote_year_edit")
-            
-            with col4:
-                new_sequence = st.number_input("Sequence", 
-                                            min_value=1, 
-                                            value=int(current_seq), 
-                                            step=1,
-                                            key="quote_seq_edit")
-            
-            new_quotation_number = f"COM/{sales_person}/{current_q}/{new_date}/{new_year_range}_{new_sequence:03d}"
-            
-            if new_quotation_number != st.session_state.quotation_number:
-                st.session_state.quotation_number = new_quotation_number
-                
-        except Exception as e:
-            st.sidebar.error(f"Error parsing quotation number: {e}")
-            st.session_state.quotation_number = generate_quotation_number(sales_person, st.session_state.quotation_seq)
-        
-        st.sidebar.code(st.session_state.quotation_number)
-        
-        quotation_auto_increment = st.sidebar.checkbox("Auto-increment Sequence", value=True, key="quote_auto_increment")
-        
-        if st.sidebar.button("Reset to Auto-generate", use_container_width=True):
-            st.session_state.quotation_seq = 1
-            st.session_state.last_quotation_number = ""
-            st.session_state.quotation_number = get_quotation_number()
-            st.sidebar.success("Quotation number reset to auto-generated")
-            st.rerun()
-        
-        col1, col2 = st.columns([1, 1])
-        
-        with col1:
-            st.header("Recipient Details")
-            
-            selected_enduser_quote = st.selectbox(
-                "Select Company", 
-                options=get_enduser_dropdown_options(),
-                key="enduser_dropdown_quote"
-            )
-            
-            if selected_enduser_quote and selected_enduser_quote != "Select End User":
-                enduser_data = END_USER_DATABASE.get(selected_enduser_quote, {})
-                st.session_state.quote_end_company = selected_enduser_quote
-                st.session_state.quote_end_address = enduser_data.get("address", "")
-                st.session_state.quote_end_person = enduser_data.get("contact", "")
-                st.session_state.quote_end_mobile = enduser_data.get("mobile", "")
-                st.session_state.quote_end_email = enduser_data.get("email", "")
-                st.session_state.quote_end_gst_no = enduser_data.get("gst_no", "")
-            
-            vendor_name = st.text_input("Company Name", 
-                                    value=st.session_state.get("quote_end_company", "Customer Company Ltd."), 
-                                    key="quote_end_company")
-            vendor_address = st.text_area("Company Address", 
-                                        value=st.session_state.get("quote_end_address", "Customer Address"), 
-                                        key="quote_end_address")
-            vendor_email = st.text_input("Email", 
-                                    value=st.session_state.get("quote_end_email", "customer@company.com"), 
-                                    key="quote_end_email")
-            vendor_contact = st.text_input("Contact Person (Kind Attention)", 
-                                        value=st.session_state.get("quote_end_person", "Contact Person"), 
-                                        key="quote_end_person")
-            vendor_mobile = st.text_input("Mobile", 
-                                        value=st.session_state.get("quote_end_mobile", "0000000000"), 
-                                        key="quote_end_mobile")
-            
-            vendor_gst = st.text_input("GST No (Optional)", 
-                                    value=st.session_state.get("quote_end_gst_no", ""), 
-                                    key="quote_end_gst_no")
-
-            st.header("Quotation Details")
-            price_validity = st.text_input("Price Validity", "10 days from Quotation date", key="quote_price_validity")
-            subject_line = st.text_input("Subject", "Proposal for Software Services", key="quote_subject")
-            intro_paragraphs_1 = st.text_area("Introduction Paragraph",
-            "This is with reference to your requirement for software services.",
-            key="quote_intro"
-            )
-
-        
-        with col2:
-            st.header("Products & Services")
-            
-            col_annexure, col_title = st.columns(2)
-            
-            with col_annexure:
-                annexure_text = st.text_input(
-                    "Annexure Text", 
-                    "Annexure I - Commercials", 
-                    key="quote_annexure_input",
-                    help="Enter annexure text"
-                )
-            
-            with col_title:
-                quotation_title = st.text_input(
-                    "Quotation Title", 
-                    "Quotation for Software Services", 
-                    key="quote_title_input",
-                    help="Enter the main title"
-                )
-            
-            st.subheader("Add Products")
-            selected_product = st.selectbox("Select from Catalog", [""] + list(PRODUCT_CATALOG.keys()), key="quote_product_select_catalog")
-            
-            if st.button("➕ Add Selected Product", key="quote_add_selected_product"):
-                if selected_product:
-                    details = PRODUCT_CATALOG[selected_product]
-                    st.session_state.quotation_products.append({
-                        "name": selected_product,
-                        "basic": details["basic"],
-                        "gst_percent": details["gst_percent"],
-                        "qty": 1.0,
-                    })
-                    st.success(f"{selected_product} added!")
-            
-            if st.button("➕ Add Empty Product", key="quote_add_empty_product"):
-                st.session_state.quotation_products.append({"name": "New Product", "basic": 0.0, "gst_percent": 18.0, "qty": 1.0})
-
-            st.subheader("Current Products")
-            for i, p in enumerate(st.session_state.quotation_products):
-                with st.expander(f"Product {i+1}: {p['name']}", expanded=i == 0):
-                    st.session_state.quotation_products[i]["name"] = st.text_input("Name", p["name"], key=f"quote_name_{i}")
-                    st.session_state.quotation_products[i]["basic"] = st.number_input("Basic (₹)", p["basic"], format="%.2f", key=f"quote_basic_{i}")
-                    st.session_state.quotation_products[i]["gst_percent"] = st.number_input("GST %", p["gst_percent"], format="%.1f", key=f"quote_gst_{i}")
-                    st.session_state.quotation_products[i]["qty"] = st.number_input("Qty", p["qty"], format="%.2f", key=f"quote_qty_{i}")
-                    if st.button("Remove", key=f"quote_remove_{i}"):
-                        st.session_state.quotation_products.pop(i)
-                        st.rerun()
-        
-        st.header("Preview & Generate Quotation")
-        
-        st.info(f"**Quotation Number:** {st.session_state.quotation_number}")
-        st.info(f"**Sales Person:** {current_sales_person_info['name']} ({sales_person}) - {current_sales_person_info['email']}")
-        
-        totals = calculate_quotation_totals(st.session_state.quotation_products)
-        
-        total_base = sum(p["basic"] * p["qty"] for p in st.session_state.quotation_products)
-        total_gst = sum(p["basic"] * p["gst_percent"] / 100 * p["qty"] for p in st.session_state.quotation_products)
-        grand_total = total_base + total_gst
-        amount_words = num2words(grand_total, to="currency", currency="INR").title()
-        
-        col3, col4, col5 = st.columns(3)
-        with col3:
-            st.metric("Total Base Amount", f"₹{total_base:,.2f}")
-        with col4:
-            st.metric("Total GST", f"₹{total_gst:,.2f}")
-        with col5:
-            st.metric("Grand Total", f"₹{grand_total:,.2f}")
-        
-        st.subheader("Company Branding")
-        st.info("Using global logo and stamp from sidebar settings")
-        logo_path = global_logo_path
-        stamp_path = global_stamp_path
-
-        if not logo_path:
-            st.warning("⚠ No company logo available")
-        if not stamp_path:
-            st.warning("⚠ No company stamp available")
-        
-        if st.button("Generate Quotation PDF", type="primary", use_container_width=True, key="generate_quote"):
-            if not st.session_state.quotation_products:
-                st.error("Please add at least one product to generate the quotation.")
-            else:
-                products_total = 0
-                for p in st.session_state.quotation_products:
-                    gst_amt = p["basic"] * p["gst_percent"] / 100
-                    per_unit_price = p["basic"] + gst_amt
-                    total = per_unit_price * p["qty"]
-                    products_total += total
-
-                rounded_total = round(products_total)
-                round_off = rounded_total - products_total
-
-                grand_total = rounded_total
-                amount_words = number_to_words(rounded_total)
-
-                quotation_data = {
-                    "quotation_number": st.session_state.quotation_number,
-                    "quotation_date": today.strftime("%d-%m-%Y"),
-                    "vendor_name": vendor_name,
-                    "vendor_address": vendor_address,
-                    "vendor_email": vendor_email,
-                    "vendor_contact": vendor_contact,
-                    "vendor_mobile": vendor_mobile,
-                    "products": st.session_state.quotation_products,
-                    "price_validity": price_validity,
-                    "grand_total": grand_total,
-                    "round_off": round_off,
-                    "amount_words": amount_words,
-                    "subject": subject_line,
-                    "intro_paragraph": intro_paragraphs_1,
-                    "product_name": selected_product if selected_product else "Software",   
-                    "sales_person_code": sales_person,  
-                    "annexure_text": annexure_text,  
-                    "quotation_title": quotation_title
-                }
-                
-                try:
-                    pdf_bytes = create_quotation_pdf(quotation_data, logo_path, stamp_path)
-                    
-                    st.session_state.last_quotation_number = st.session_state.quotation_number
-                    
-                    if quotation_auto_increment:
-                        next_sequence = get_next_quotation_sequence()
-                        st.session_state.quotation_seq = next_sequence
-                    
-                    st.success("✅ Quotation generated successfully!")
-                    st.info(f"📧 Sales Person: {current_sales_person_info['name']}")
-                    
-                    st.download_button(
-                        "⬇ Download Quotation PDF",
-                        data=pdf_bytes,
-                        file_name=f"{vendor_name}_{st.session_state.quotation_number.replace('/', '_')}.pdf",
-                        mime="application/pdf",
-                        use_container_width=True
-                    )
-                    
-                except Exception as e:
-                    st.error(f"Error generating PDF: {str(e)}")
-
-    with tab2:
-        if global_logo_path and os.path.exists(global_logo_path):
-            st.image(global_logo_path, width=150)
-            st.markdown("### Purchase Order Generator")
-        else:
-            st.header("Purchase Order Generator")  
-        
-        today = datetime.date.today()
-        current_quarter = get_current_quarter()
-        
-        st.sidebar.header("PO Settings")
-        
-        po_sales_person = st.sidebar.selectbox("Select Sales Person", 
-                                            options=list(SALES_PERSON_MAPPING.keys()), 
-                                            format_func=lambda x: f"{x} - {SALES_PERSON_MAPPING[x]['name']}",
-                                            key="po_sales_person_select")
-        
-        current_sales_person_info = SALES_PERSON_MAPPING.get(po_sales_person, SALES_PERSON_MAPPING['SP1'])
-        
-        def get_po_number():
-            if st.session_state.last_po_number:
-                try:
-                    last_prefix, last_sales_person, last_year, last_quarter, last_sequence = parse_po_number(st.session_state.last_po_number)
-                    
-                    if last_sales_person == po_sales_person and last_quarter == current_quarter:
-                        next_sequence = get_next_sequence_number_po(st.session_state.last_po_number)
-                        return generate_po_number(po_sales_person, next_sequence)
-                    else:
-                        return generate_po_number(po_sales_person, 1)
-                except:
-                    return generate_po_number(po_sales_person, st.session_state.po_seq)
-            else:
-                return generate_po_number(po_sales_person, st.session_state.po_seq)
-        
-        if "current_po_sales_person" not in st.session_state:
-            st.session_state.current_po_sales_person = po_sales_person
-            st.session_state.po_number = get_po_number()
-        
-        if (st.session_state.current_po_sales_person != po_sales_person or 
-            st.session_state.get('current_po_quarter', '') != current_quarter):
-            st.session_state.current_po_sales_person = po_sales_person
-            st.session_state.current_po_quarter = current_quarter
-            st.session_state.po_number = get_po_number()
-        
-        st.sidebar.info(f"**Current Sales Person:** {current_sales_person_info['name']}")
-        st.sidebar.info(f"**Current Quarter:** {current_quarter}")
-        
-        try:
-            prefix, current_sp, year, quarter, sequence = parse_po_number(st.session_state.po_number)
-            st.sidebar.success(f"**Auto-generated PO Number**")
-            st.sidebar.info(f"**Format:** {current_sp}/{year}/{quarter}_{sequence}")
-        except:
-            st.sidebar.warning("Could not parse PO number")
-        
-        st.sidebar.subheader("PO Number Editor")
-        
-        try:
-            current_prefix, current_sp, current_year, current_q, current_seq = parse_po_number(st.session_state.po_number)
-            
-            col1, col2, col3, col4 = st.sidebar.columns([1, 2, 2, 1])
-            
-            with col1:
-                st.text_input("Sales Person", value=current_sp, key="po_sp_display", disabled=True)
-            
-            with col2:
-                new_year = st.text_input("Year", value=current_year, key="po_year_edit")
-            
-            with col3:
-                new_quarter = st.text_input("Quarter", value=current_q, key="po_quarter_edit")
-            
-            with col4:
-                new_sequence = st.number_input("Sequence", 
-                                            min_value=1, 
-                                            value=int(current_seq), 
-                                            step=1,
-                                            key="po_seq_edit")
-            
-            new_po_number = f"COM/{po_sales_person}/{new_year}/{new_quarter}_{new_sequence:03d}"
-            
-            if new_po_number != st.session_state.po_number:
-                st.session_state.po_number = new_po_number
-                
-        except Exception as e:
-            st.sidebar.error(f"Error parsing PO number: {e}")
-            st.session_state.po_number = generate_po_number(po_sales_person, st.session_state.po_seq)
-        
-        st.sidebar.code(st.session_state.po_number)
-        
-        po_auto_increment = st.sidebar.checkbox("Auto-increment Sequence", value=True, key="po_auto_increment_checkbox")
-        
-        if st.sidebar.button("Reset to Auto-generate", use_container_width=True, key="po_reset_auto_generate"):
-            st.session_state.po_seq = 1
-            st.session_state.last_po_number = ""
-            st.session_state.po_number = get_po_number()
-            st.sidebar.success("PO number reset to auto-generated")
-            st.rerun()
-        
-        col1, col2 = st.columns(2)
-        
-        with col1:
-            st.subheader("Vendor & End User Details")
-            
-            selected_vendor = st.selectbox(
-                "Select Vendor", 
-                options=get_vendor_dropdown_options(),
-                key="vendor_dropdown_po"
-            )
-            
-            if selected_vendor and selected_vendor != "Select Vendor":
-                update_vendor_fields(selected_vendor)
-            
-            st.subheader("Vendor Details")
-            vendor_name = st.text_input(
-                "Vendor Name",
-                value=st.session_state.get("po_vendor_name", "Supplier Company Ltd."),
-                key="po_vendor_name"
-            )
-            vendor_address = st.text_area(
-                "Vendor Address",
-                value=st.session_state.get("po_vendor_address", "Supplier Address"),
-                key="po_vendor_address"
-            )
-            vendor_contact = st.text_input(
-                "Contact Person",
-                value=st.session_state.get("po_vendor_contact", "Contact Person"),
-                key="po_vendor_contact"
-            )
-            vendor_mobile = st.text_input(
-                "Mobile",
-                value=st.session_state.get("po_vendor_mobile", "+91 00000 00000"),
-                key="po_vendor_mobile"
-            )
-            
-            st.subheader("End User Details")
-            
-            selected_enduser = st.selectbox(
-                "Select End User", 
-                options=get_enduser_dropdown_options(),
-                key="enduser_dropdown_po"
-            )
-            
-            if selected_enduser and selected_enduser != "Select End User":
-                update_enduser_fields(selected_enduser)
-            
-            end_company = st.text_input(
-                "End User Company",
-                value=st.session_state.get("po_end_company", "Customer Company Ltd."),
-                key="po_end_company"
-            )
-            end_address = st.text_area(
-                "End User Address",
-                value=st.session_state.get("po_end_address", "Customer Address"),
-                key="po_end_address"
-            )
-            end_person = st.text_input(
-                "End User Contact",
-                value=st.session_state.get("po_end_person", "Contact Person"),
-                key="po_end_person"
-            )
-            end_mobile = st.text_input(
-                "End Mobile",
-                value=str(st.session_state.get("po_end_mobile", "0000000000") or "").strip(),
-                key="po_end_mobile"
-            )
-            end_email = st.text_input(
-                "End User Email",
-                value=st.session_state.get("po_end_email", "customer@company.com"),
-                key="po_end_email"
-            )
-            
-            st.subheader("Products")
-            selected_product = st.selectbox("Select from Catalog", [""] + list(PRODUCT_CATALOG.keys()), key="po_product_select_catalog")
-            
-            col_add1, col_add2 = st.columns(2)
-            with col_add1:
-                if st.button("➕ Add Selected Product", key="po_add_selected_product", use_container_width=True):
-                    if selected_product:
-                        details = PRODUCT_CATALOG[selected_product]
-                        st.session_state.products.append({
-                            "name": selected_product,
-                            "basic": details["basic"],
-                            "gst_percent": details["gst_percent"],
-                            "qty": 1.0,
-                        })
-                        st.success(f"{selected_product} added!")
-                        st.rerun()
-            with col_add2:
-                if st.button("➕ Add Empty Product", key="po_add_empty_product", use_container_width=True):
-                    st.session_state.products.append({"name": "New Product", "basic": 0.0, "gst_percent": 18.0, "qty": 1.0})
-                    st.rerun()
-
-            for i, p in enumerate(st.session_state.products):
-                with st.expander(f"Product {i+1}: {p['name']}", expanded=True):
-                    col_prod1, col_prod2, col_prod3, col_prod4 = st.columns([3, 2, 2, 1])
-                    with col_prod1:
-                        st.session_state.products[i]["name"] = st.text_input("Name", p["name"], key=f"po_name_{i}")
-                    with col_prod2:
-                        st.session_state.products[i]["basic"] = st.number_input("Basic (₹)", p["basic"], format="%.2f", key=f"po_basic_{i}")
-                    with col_prod3:
-                        st.session_state.products[i]["gst_percent"] = st.number_input("GST %", p["gst_percent"], format="%.1f", key=f"po_gst_{i}")
-                    with col_prod4:
-                        st.session_state.products[i]["qty"] = st.number_input("Qty", p["qty"], format="%.2f", key=f"po_qty_{i}")
-                    if st.button("Remove", key=f"po_remove_{i}", use_container_width=True):
-                        st.session_state.products.pop(i)
-                        st.rerun()
-
-        with col2:
-            st.subheader("Company & Tax Details")
-            
-            bill_to_company = st.text_input(
-                "Bill To",
-                value=safe_str_state("po_bill_to_company", "Your Company Name"),
-                key="po_bill_to_company_input"
-            )
-            bill_to_address = st.text_area(
-                "Bill To Address",
-                value=safe_str_state("po_bill_to_address", "Your Company Address"),
-                key="po_bill_to_address_input"
-            )
-            ship_to_company = st.text_input(
-                "Ship To",
-                value=safe_str_state("po_ship_to_company", "Your Company Name"),
-                key="po_ship_to_company_input"
-            )
-            ship_to_address = st.text_area(
-                "Ship To Address",
-                value=safe_str_state("po_ship_to_address", "Your Company Address"),
-                key="po_ship_to_address_input"
-            )
-            gst_no = st.text_input(
-                "GST No",
-                value=st.session_state.get("po_gst_no", "GSTNUMBER"),
-                key="po_gst_no_input"
-            )
-            pan_no = st.text_input(
-                "PAN No",
-                value=st.session_state.get("po_pan_no", "PANNUMBER"),
-                key="po_pan_no_input"
-            )
-            msme_no = st.text_input(
-                "MSME No",
-                value=st.session_state.get("po_msme_no", "MSMENUMBER"),
-                key="po_msme_no_input"
-            )
-            
-            st.subheader("Terms & Authorization")
-            payment_terms = st.text_input("Payment Terms", "30 Days from Invoice date.", key="po_payment_terms_input")
-            delivery_days = st.number_input("Delivery (Days)", min_value=1, value=2, key="po_delivery_days_input")
-            delivery_terms = st.text_input("Delivery Terms", f"Within {delivery_days} Days.", key="po_delivery_terms_input")
-            prepared_by = st.text_input("Prepared By", "Finance Department", key="po_prepared_by_input")
-            authorized_by = st.text_input("Authorized By", "Your Company Name", key="po_authorized_by_input")
-            
-            st.subheader("Preview & Generate")
-            
-            st.info(f"**PO Number:** {st.session_state.po_number}")
-            st.info(f"**Sales Person:** {current_sales_person_info['name']} ({po_sales_person}) - {current_sales_person_info['email']}")
-            
-            total_base = sum(p["basic"] * p["qty"] for p in st.session_state.products)
-            total_gst = sum(p["basic"] * p["gst_percent"] / 100 * p["qty"] for p in st.session_state.products)
-            grand_total = total_base + total_gst
-            amount_words = num2words(grand_total, to="currency", currency="INR").title()
-            st.metric("Grand Total", f"₹{grand_total:,.2f}")
-
-            logo_path = global_logo_path
-            if not logo_path:
-                st.warning("No company logo available. Please upload one in the sidebar.")
-            
-            if st.button("Generate PO", type="primary", key="po_generate_button", use_container_width=True):
-                products_total = 0
-                for p in st.session_state.products:
-                    gst_amt = p["basic"] * p["gst_percent"] / 100
-                    per_unit_price = p["basic"] + gst_amt
-                    total = per_unit_price * p["qty"]
-                    products_total += total
-
-                rounded_total = round(products_total)
-                round_off = rounded_total - products_total
-
-                grand_total = rounded_total
-                amount_words = number_to_words(rounded_total)
-
-                po_data = {
-                    "po_number": st.session_state.po_number,
-                    "po_date": st.session_state.po_date,
-                    "vendor_name": vendor_name,
-                    "vendor_address": vendor_address,
-                    "vendor_contact": vendor_contact,
-                    "vendor_mobile": vendor_mobile,
-                    "gst_no": gst_no,
-                    "pan_no": pan_no,
-                    "msme_no": msme_no,
-                    "bill_to_company": bill_to_company,
-                    "bill_to_address": bill_to_address,
-                    "ship_to_company": ship_to_company,
-                    "ship_to_address": ship_to_address,
-                    "end_company": end_company,
-                    "end_address": end_address,
-                    "end_person": end_person,
-                    "end_mobile": end_mobile,
-                    "end_email": end_email,
-                    "products": st.session_state.products,
-                    "grand_total": grand_total,
-                    "amount_words": amount_words,
-                    "payment_terms": payment_terms,
-                    "delivery_terms": delivery_terms,
-                    "prepared_by": prepared_by,
-                    "authorized_by": authorized_by,
-                    "company_name": st.session_state.company_name
-                }
-
-                pdf_bytes = create_po_pdf(po_data, logo_path)
-                st.session_state.last_po_number = st.session_state.po_number
-                
-                if po_auto_increment:
-                    next_sequence = get_next_po_sequence()
-                    st.session_state.po_seq = next_sequence
-
-                st.success("Purchase Order generated!")
-                st.info(f"📧 Sales Person: {current_sales_person_info['name']}")
-                
-                st.download_button(
-                    "⬇ Download Purchase Order",
-                    data=pdf_bytes,
-                    file_name=f"{end_company}_{st.session_state.po_number.replace('/', '_')}.pdf",
-                    mime="application/pdf",
-                    use_container_width=True
-                )
-
-    with tab3:
-        if global_logo_path and os.path.exists(global_logo_path):
-            st.image(global_logo_path, width=150)
-            st.markdown("### Tax Invoice Generator")
-        else:
-            st.header("Tax Invoice Generator")  
-        
-        today = datetime.date.today()
-        current_quarter = get_current_quarter()
-        
-        st.sidebar.header("Invoice Settings")
-        
-        def get_invoice_number():
-            if st.session_state.last_invoice_number:
-                try:
-                    last_prefix, last_year_range, last_quarter, last_sequence = parse_invoice_number(st.session_state.last_invoice_number)
-                    
-                    if last_quarter == current_quarter:
-                        next_sequence = get_next_sequence_number_invoice(st.session_state.last_invoice_number)
-                        return generate_invoice_number(next_sequence)
-                    else:
-                        return generate_invoice_number(1)
-                except:
-                    return generate_invoice_number(st.session_state.invoice_seq)
-            else:
-                return generate_invoice_number(st.session_state.invoice_seq)
-        
-        if "current_invoice_quarter" not in st.session_state:
-            st.session_state.current_invoice_quarter = current_quarter
-            st.session_state.invoice_number = get_invoice_number()
-        
-        if st.session_state.get('current_invoice_quarter', '') != current_quarter:
-            st.session_state.current_invoice_quarter = current_quarter
-            st.session_state.invoice_number = get_invoice_number()
-        
-        st.sidebar.info(f"**Current Quarter:** {current_quarter}")
-        
-        try:
-            prefix, year_range, quarter, sequence = parse_invoice_number(st.session_state.invoice_number)
-            st.sidebar.success(f"**Auto-generated Invoice Number**")
-            st.sidebar.info(f"**Format:** {year_range}/{quarter}/{sequence}")
-        except:
-            st.sidebar.warning("Could not parse invoice number")
-        
-        st.sidebar.subheader("Invoice Number Editor")
-        
-        try:
-            current_prefix, current_year_range, current_q, current_seq = parse_invoice_number(st.session_state.invoice_number)
-            
-            col1, col2, col3 = st.sidebar.columns([2, 2, 1])
-            
-            with col1:
-                new_year_range = st.text_input("Year Range", value=current_year_range, key="invoice_year_edit")
-            
-            with col2:
-                new_quarter = st.text_input("Quarter", value=current_q, key="invoice_quarter_edit")
-            
-            with col3:
-                new_sequence = st.number_input("Sequence", 
-                                            min_value=1, 
-                                            value=int(current_seq), 
-                                            step=1,
-                                            key="invoice_seq_edit")
-            
-            new_invoice_number = f"COM/{new_year_range}/{new_quarter}/{new_sequence:02d}"
-            
-            if new_invoice_number != st.session_state.invoice_number:
-                st.session_state.invoice_number = new_invoice_number
-                
-        except Exception as e:
-            st.sidebar.error(f"Error parsing invoice number: {e}")
-            st.session_state.invoice_number = generate_invoice_number(st.session_state.invoice_seq)
-        
-        st.sidebar.code(st.session_state.invoice_number)
-        
-        invoice_auto_increment = st.sidebar.checkbox("Auto-increment Sequence", value=True, key="invoice_auto_increment")
-        
-        if st.sidebar.button("Reset to Auto-generate", use_container_width=True, key="invoice_reset_auto_generate"):
-            next_sequence = get_next_invoice_sequence()
-            st.session_state.invoice_seq = next_sequence
-            st.session_state.last_invoice_number = ""
-            st.session_state.invoice_number = generate_invoice_number(next_sequence)
-            st.sidebar.success(f"Invoice number reset to next sequence: {next_sequence}")
-            st.rerun()
-
-        col1, col2 = st.columns([1,1])
-        with col1:
-            st.subheader("Invoice Details")
-            
-            st.info(f"**Invoice Number:** {st.session_state.invoice_number}")
-            
-            invoice_no = st.text_input("Invoice No", st.session_state.invoice_number, key="invoice_number_input")
-            invoice_date = st.text_input("Invoice Date", datetime.date.today().strftime("%d-%m-%Y"))
-            Suppliers_Reference = st.text_input("Supplier's Reference", "NA")
-            Others_Reference = st.text_input("Other's Reference", "NA")
-            buyers_order_no = st.text_input("Buyer's Order No.", "Online")
-            buyers_order_date = st.text_input("Buyer's Order Date", datetime.date.today().strftime("%d-%m-%Y"))
-            dispatched_through = st.text_input("Dispatched Through", "Online")
-            
-            payment_terms = st.text_input("Mode/Terms of Payment", "100% Advance with Purchase")
-            
-            terms_of_delivery = st.text_input("Terms of delivery", "Within Month")
-            
-            destination = st.text_input("Destination", "City Name")
-            
-            st.subheader("Seller Details")
-            vendor_name = st.text_input("Seller Name", "Your Company Name")
-            vendor_address = st.text_area("Seller Address", "Your Company Address")
-            vendor_gst = st.text_input("Seller GST No.", "GSTNUMBER")
-            vendor_msme = st.text_input("Seller MSME Registration No.", "MSMENUMBER")
-
-        with col2:
-            st.subheader("Buyer Details")
-            
-            selected_enduser_invoice = st.selectbox(
-                "Select Buyer", 
-                options=get_enduser_dropdown_options(),
-                key="enduser_dropdown_invoice"
-            )
-            
-            if selected_enduser_invoice and selected_enduser_invoice != "Select End User":
-                enduser_data = END_USER_DATABASE.get(selected_enduser_invoice, {})
-                st.session_state.invoice_buyer_company = selected_enduser_invoice
-                st.session_state.invoice_buyer_address = enduser_data.get("address", "")
-                st.session_state.invoice_buyer_mobile = enduser_data.get("mobile", "")
-                st.session_state.invoice_buyer_email = enduser_data.get("email", "")
-                st.session_state.invoice_buyer_gst = enduser_data.get("gst_no", "")
-            
-            buyer_name = st.text_input(
-                "Buyer Name",
-                value=st.session_state.get("invoice_buyer_company", "Customer Company Ltd."),
-                key="invoice_buyer_company"
-            )
-            
-            buyer_address = st.text_area(
-                "Buyer Address",
-                value=st.session_state.get("invoice_buyer_address", "Customer Address"),
-                key="invoice_buyer_address"
-            )
-
-            buyer_mobile = st.text_input(
-                "Buyer mobile.",
-                value=st.session_state.get("invoice_buyer_mobile", "00000 00000"),
-                key="invoice_buyer_mobile"
-            )
-            buyer_email = st.text_input(
-                "Buyer email.",
-                value=st.session_state.get("invoice_buyer_email", "customer@company.com"),
-                key="invoice_buyer_email"
-            )
-            buyer_gst = st.text_input(
-                "Buyer GST No.",
-                value=st.session_state.get("invoice_buyer_gst", "GSTNUMBER"),
-                key="invoice_buyer_gst"
-            )
-
-            st.subheader("Products")
-            items = []
-            num_items = st.number_input("Number of Products", 1, 10, 1, key="invoice_num_items")
-            for i in range(num_items):
-                with st.expander(f"Product {i+1}"):
-                    desc = st.text_area(f"Description {i+1}", "Software Product\nDescription\nSerial #\nContract #\nEnd Date:", key=f"invoice_desc_{i}")
-                    hsn = st.text_input(f"HSN/SAC {i+1}", "997331", key=f"invoice_hsn_{i}")
-                    qty = st.number_input(f"Quantity {i+1}", 1.00, 100.00, 1.00, key=f"invoice_qty_{i}")
-                    rate = st.number_input(f"Unit Rate {i+1}", 0.00, 100000000.00, 10000.00, key=f"invoice_rate_{i}")
-                    rate = round(rate, 2)
-                    items.append({"description": desc, "hsn": hsn, "quantity": qty, "unit_rate": rate})
-
-            st.subheader("Declaration")
-            declaration = st.text_area("Declaration", "Standard declaration text as per your requirements.")
-            
-            st.subheader("Company Branding")
-            st.info("Using global logo and stamp from sidebar settings")
-            logo_path = global_logo_path
-            stamp_path = global_stamp_path
-
-            if not logo_path:
-                st.warning("⚠ No company logo available")
-            if not stamp_path:
-                st.warning("⚠ No company stamp available")
-            
-            st.subheader("Invoice Preview & Download")
-
-            if st.button("Generate Invoice", key="generate_invoice_button"):
-                current_invoice_no = st.session_state.invoice_number
-                
-                try:
-                    prefix, year_range, quarter, sequence = parse_invoice_number(current_invoice_no)
-                    manual_sequence = int(sequence)
-                    
-                    with open(INVOICE_COUNTER_FILE, 'w') as f:
-                        f.write(str(manual_sequence))
-                    
-                    st.session_state.invoice_seq = manual_sequence
-                    
-                    st.success(f"✅ Invoice sequence updated to: {manual_sequence}")
-                    
-                except Exception as e:
-                    st.error(f"Error parsing invoice number: {e}")
-                
-                invoice_no = current_invoice_no
-                
-                basic_amount = round(sum(item['quantity'] * item['unit_rate'] for item in items), 2)
-                sgst = round(basic_amount * 0.09, 2)
-                cgst = round(basic_amount * 0.09, 2)
-                final_amount_unrounded = basic_amount + sgst + cgst
-                
-                final_amount = round(final_amount_unrounded)
-                round_off = final_amount - final_amount_unrounded
-                
-                st.info(f"**Calculated Amounts:** Basic: ₹{basic_amount:.2f}, SGST: ₹{sgst:.2f}, CGST: ₹{cgst:.2f}, Final: ₹{final_amount:.2f}")
-                if round_off != 0:
-                    st.info(f"**Round Off:** ₹{round_off:.2f}")
-                
-                def convert_to_indian_currency(amount):
-                    try:
-                        rupees = int(amount)
-                        paise = round((amount - rupees) * 100)
-                        
-                        rupees_text = num2words(rupees, to='cardinal', lang='en_IN').title()
-                        
-                        if paise > 0:
-                            paise_text = num2words(paise, to='cardinal', lang='en_IN').title()
-                            return f"{rupees_text} Rupees And {paise_text} Paise Only/-"
-                        else:
-                            return f"{rupees_text} Rupees Only/-"
-                            
-                    except Exception as e:
-                        return f"Amount: ₹{amount:.2f}"
-
-                amount_in_words = convert_to_indian_currency(final_amount)
-                tax_in_words = convert_to_indian_currency(round(sgst + cgst, 2))
-
-                invoice_data = {
-                    "invoice": {"invoice_no": invoice_no, "date": invoice_date},
-                    "Reference": {"Suppliers_Reference": Suppliers_Reference, "Other": Others_Reference},
-                    "vendor": {"name": vendor_name, "address": vendor_address, "gst": vendor_gst, "msme": vendor_msme},
-                    "buyer": {"name": buyer_name, "address": buyer_address, "gst": buyer_gst, "mobile":buyer_mobile, "email":buyer_email},
-                    "invoice_details": {
-                        "buyers_order_no": buyers_order_no,
-                        "buyers_order_date": buyers_order_date,
-                        "dispatched_through": dispatched_through,
-                        "payment_terms": payment_terms,
-                        "terms_of_delivery": terms_of_delivery,
-                        "destination": destination
-                    },
-                    "items": items,
-                    "totals": {
-                        "basic_amount": basic_amount,
-                        "sgst": sgst,
-                        "cgst": cgst,
-                        "final_amount": final_amount,
-                        "amount_in_words": amount_in_words,
-                        "tax_in_words": tax_in_words
-                    },
-                    "declaration": declaration
-                }
-
-                pdf_file = create_invoice_pdf(invoice_data, logo_path, stamp_path)
-
-                st.session_state.last_invoice_number = invoice_no
-                
-                if invoice_auto_increment:
-                    next_sequence = manual_sequence + 1
-                    st.session_state.invoice_seq = next_sequence
-                    
-                    with open(INVOICE_COUNTER_FILE, 'w') as f:
-                        f.write(str(next_sequence))
-
-                st.success("Invoice generated successfully!")
-                
-                st.download_button(
-                    "⬇ Download Invoice PDF",
-                    data=pdf_file,
-                    file_name=f"{buyer_name}_{invoice_date}_{invoice_no.replace('/', '_')}.pdf",
-                    mime="application/pdf",
-                    key="invoice_download_button")
-                                
-for path in ["github_logo.jpg", "github_stamp.jpg", "custom_logo.jpg", "custom_stamp.jpg"]:
-    if os.path.exists(path):
-        try:
-            os.remove(path)
-        except:
-            pass
-
-st.divider()
-st.caption("© 2025 Document Generator")
-
-if __name__ == "__main__":
-    main()
-
-
-
+import streamlit as st
+from fpdf import FPDF
+import pandas as pd
+from num2words import num2words
+import datetime
+import io
+from PIL import Image
+import os
+from fpdf import FPDF, HTMLMixin
+from fpdf import XPos, YPos
+# import textwrap
+import html as _html 
+import json
+import decimal
+import numpy as np
+import re
+import requests
+import hashlib
+import sqlite3
+import zlib
+import zipfile
+import csv
+import shutil
+import tempfile
+import time
+import uuid
+import functools
+import dataclasses
+from dataclasses import dataclass
+import contextlib
+import unicodedata
+import sys
+import argparse
+import signal
+import traceback
+import threading
+import concurrent.futures
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import multiprocessing
+import pickle
+import http.server
+from requests.adapters import HTTPAdapter
+
+# --- Process-Wide Resources ---
+# Streamlit executes this script from the top on every rerun, so caches, locks,
+# worker pools and sessions built at module level would start cold each time
+# (and a fresh lock no longer excludes threads still holding the old one).
+# Such objects are registered through process_resource() instead: built once
+# per process and shared by every rerun and session until the app's cache is
+# cleared.
+@st.cache_resource(show_spinner=False)
+def _process_resources():
+    return {}, threading.RLock()
+
+def process_resource(name, factory):
+    """Object registered under name for the life of the process, built by factory on first use"""
+    resources, lock = _process_resources()
+    with lock:
+        if name not in resources:
+            resources[name] = factory()
+        return resources[name]
+
+def release_process_resource(name):
+    """Unregister the object under name and return it (None if there was none)"""
+    resources, lock = _process_resources()
+    with lock:
+        return resources.pop(name, None)
+
+# GitHub Configuration - EMPTY PLACEHOLDERS
+LOGO_URL = ""  # Remove your GitHub URL
+STAMP_URL = ""  # Remove your GitHub URL
+
+# --- Global Data and Configuration ---
+PRODUCT_CATALOG = {
+    "Software Product 1": {"basic": 10000.0, "gst_percent": 18.0},
+    "Software Product 2": {"basic": 20000.0, "gst_percent": 18.0},
+    "Software Product 3": {"basic": 30000.0, "gst_percent": 18.0},
+    "Software Service": {"basic": 5000.0, "gst_percent": 18.0},
+}
+
+# Load data from JSON files
+def load_json_data(filename, default_data=None):
+    """Load data from JSON file with error handling"""
+    try:
+        with open(filename, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        st.warning(f"⚠️ {filename} not found. Using empty database.")
+        return default_data or {}
+    except json.JSONDecodeError as e:
+        st.error(f"❌ Error reading {filename}: {e}. Using empty database.")
+        return default_data or {}
+    except Exception as e:
+        st.error(f"❌ Unexpected error reading {filename}: {e}. Using empty database.")
+        return default_data or {}
+
+# Vendor and end user databases, loaded by main() on every run
+VENDOR_DATABASE = {}
+END_USER_DATABASE = {}
+
+def load_contact_databases():
+    """Reload the vendor and end user databases from their JSON files"""
+    global VENDOR_DATABASE, END_USER_DATABASE
+    VENDOR_DATABASE = load_json_data('vendor.json')
+    END_USER_DATABASE = load_json_data('endusers.json')
+
+# Sales Person Mapping - GENERIC
+SALES_PERSON_MAPPING = {
+    "SP1": {"name": "Sales Person 1", "email": "sales1@company.com", "mobile": "+91 00000 00000"},
+    "SP2": {"name": "Sales Person 2", "email": "sales2@company.com", "mobile": "+91 00000 00000"},
+    "SP3": {"name": "Sales Person 3", "email": "sales3@company.com", "mobile": "+91 00000 00000"},
+    "SP4": {"name": "Sales Person 4", "email": "sales4@company.com", "mobile": "+91 00000 00000"}
+}
+
+# --- Helper Functions for Vendor Management ---
+def get_vendor_dropdown_options():
+    """Get vendor names for dropdown"""
+    return ["Select Vendor"] + list(VENDOR_DATABASE.keys())
+
+def update_vendor_fields(selected_vendor):
+    """Update session state with vendor details when vendor is selected"""
+    if selected_vendor and selected_vendor != "Select Vendor":
+        vendor_data = VENDOR_DATABASE.get(selected_vendor, {})
+        st.session_state.po_vendor_name = selected_vendor
+        st.session_state.po_vendor_address = vendor_data.get("address", "")
+        st.session_state.po_vendor_contact = vendor_data.get("contact", "")
+        st.session_state.po_vendor_mobile = vendor_data.get("mobile", "")
+        st.session_state.po_gst_no = vendor_data.get("gst_no", "")
+        st.session_state.po_pan_no = vendor_data.get("pan_no", "")
+        st.session_state.po_msme_no = vendor_data.get("msme_no", "")
+
+# --- Helper Functions for End User Management ---
+def get_enduser_dropdown_options():
+    """Get end user names for dropdown"""
+    return ["Select End User"] + list(END_USER_DATABASE.keys())
+
+def update_enduser_fields(selected_enduser):
+    """Update session state with end user details when end user is selected"""
+    if selected_enduser and selected_enduser != "Select End User":
+        enduser_data = END_USER_DATABASE.get(selected_enduser, {})
+        st.session_state.po_end_company = selected_enduser
+        st.session_state.po_end_address = enduser_data.get("address", "")
+        st.session_state.po_end_person = enduser_data.get("contact", "")
+        st.session_state.po_end_mobile = enduser_data.get("mobile", "")
+        st.session_state.po_end_email = enduser_data.get("email", "")
+        st.session_state.po_end_gst_no = enduser_data.get("gst_no", "")
+
+# --- Helper Functions for Quotation and PO ---
+def get_current_quarter(date=None):
+    """Get current quarter (Q1, Q2, Q3, Q4) based on current month"""
+    month = (date or datetime.datetime.now()).month
+    if month in [4, 5, 6]:
+        return "Q1"
+    elif month in [7, 8, 9]:
+        return "Q2"
+    elif month in [10, 11, 12]:
+        return "Q3"
+    else:
+        return "Q4"
+
+def get_financial_year(date=None):
+    """Financial year (April to March) containing date, e.g. 2026-27"""
+    date = date or datetime.datetime.now()
+    start = date.year if date.month >= 4 else date.year - 1
+    return f"{start}-{str(start + 1)[2:]}"
+
+import os
+
+# --- Sequence Reservation ---
+# Counter files hold the last sequence number handed out. Workers reserve a
+# contiguous block in one locked read-modify-write and then format numbers
+# locally; unused numbers are handed back, or logged as a gap if another
+# reservation has already moved the counter past them.
+SEQUENCE_AUDIT_FILE = "sequence_audit.jsonl"
+_sequence_locks = process_resource("sequence_locks", dict)
+_sequence_locks_guard = process_resource("sequence_locks_guard", threading.Lock)
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+@contextlib.contextmanager
+def counter_file_lock(counter_file):
+    """Serialize counter updates across threads and, where supported, processes"""
+    with _sequence_locks_guard:
+        thread_lock = _sequence_locks.setdefault(os.path.abspath(counter_file), threading.Lock())
+    with thread_lock:
+        lock_dir = os.path.dirname(counter_file)
+        if lock_dir:
+            os.makedirs(lock_dir, exist_ok=True)
+        with open(f"{counter_file}.lock", "a") as lock_file:
+            if fcntl:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+def read_sequence(counter_file, default=0):
+    """Current value of a counter file"""
+    try:
+        with open(counter_file, 'r') as f:
+            return int(f.read().strip())
+    except (OSError, ValueError):
+        return default
+
+def write_sequence(counter_file, value):
+    """Atomically replace a counter file's value"""
+    tmp_path = f"{counter_file}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, 'w') as f:
+        f.write(str(value))
+    os.replace(tmp_path, counter_file)
+
+def record_sequence_event(counter_file, event, start, end):
+    """Append a reservation/return/gap entry to the sequence audit log"""
+    entry = {"counter": counter_file, "event": event, "start": start, "end": end,
+             "at": datetime.datetime.now().isoformat(timespec="seconds")}
+    with open(SEQUENCE_AUDIT_FILE, "a", encoding="utf-8") as f:
+        f.write(json.dumps(entry) + "\n")
+
+class SequenceBlock:
+    """Contiguous run of sequence numbers reserved with a single counter update"""
+
+    def __init__(self, counter_file, start, end):
+        self.counter_file = counter_file
+        self.start = start
+        self.end = end
+        self.next = start
+
+    @property
+    def remaining(self):
+        return max(self.end - self.next + 1, 0)
+
+    def take(self):
+        """Next number in the block, with no further I/O"""
+        if self.next > self.end:
+            raise ValueError(f"Sequence block {self.start}-{self.end} of {self.counter_file} is exhausted")
+        value = self.next
+        self.next += 1
+        return value
+
+    def __iter__(self):
+        while self.next <= self.end:
+            yield self.take()
+
+    def release(self):
+        """Return unused numbers to the counter, or log them as a gap if it has moved on"""
+        if self.next > self.end:
+            return
+        with counter_file_lock(self.counter_file):
+            if read_sequence(self.counter_file) == self.end:
+                write_sequence(self.counter_file, self.next - 1)
+                event = "returned"
+            else:
+                event = "gap"
+        record_sequence_event(self.counter_file, event, self.next, self.end)
+        self.next = self.end + 1
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.release()
+        return False
+
+def reserve_sequence_block(counter_file, count):
+    """Reserve count consecutive sequence numbers in one atomic counter update"""
+    if count < 1:
+        raise ValueError("count must be at least 1")
+    with counter_file_lock(counter_file):
+        current = read_sequence(counter_file)
+        write_sequence(counter_file, current + count)
+    if count > 1:
+        record_sequence_event(counter_file, "reserved", current + 1, current + count)
+    return SequenceBlock(counter_file, current + 1, current + count)
+
+def reserve_sequence_through(counter_file, value):
+    """Reserve every number up to value, moving the counter forward only"""
+    with counter_file_lock(counter_file):
+        current = read_sequence(counter_file)
+        if value > current:
+            write_sequence(counter_file, value)
+    if value <= current:
+        return None
+    record_sequence_event(counter_file, "reserved", current + 1, value)
+    return SequenceBlock(counter_file, current + 1, value)
+
+# --- Sharded Counters ---
+# Quotation and PO numbers restart per sales person and quarter, so each
+# (document type, sales person, FY, quarter) gets its own counter file. Shards
+# are created on first use, which is also what rolls numbering over at quarter
+# and financial-year boundaries, and updates to different shards never contend.
+SEQUENCE_COUNTER_DIR = "sequence_counters"
+
+def sharded_counter_file(doc_type, sales_person="", date=None):
+    """Counter file for a (document type, sales person, FY, quarter) shard"""
+    date = date or datetime.datetime.now()
+    sales_person = re.sub(r"[^A-Za-z0-9_-]", "_", sales_person) or "ALL"
+    return os.path.join(SEQUENCE_COUNTER_DIR, doc_type, sales_person,
+                        get_financial_year(date), f"{get_current_quarter(date)}.txt")
+
+def seed_counter_shard(counter_file, legacy_counter_file, date=None):
+    """Start a shard from the old global counter if that was last used in the same quarter"""
+    if os.path.exists(counter_file) or not os.path.exists(legacy_counter_file):
+        return
+    date = date or datetime.datetime.now()
+    legacy_date = datetime.datetime.fromtimestamp(os.path.getmtime(legacy_counter_file))
+    if (get_financial_year(legacy_date), get_current_quarter(legacy_date)) != (get_financial_year(date), get_current_quarter(date)):
+        return
+    with counter_file_lock(counter_file):
+        if not os.path.exists(counter_file):
+            write_sequence(counter_file, read_sequence(legacy_counter_file))
+
+def reserve_sharded_sequence(doc_type, sales_person, count=1, legacy_counter_file=None, date=None):
+    """Reserve a block of numbers from the shard for this sales person and quarter"""
+    counter_file = sharded_counter_file(doc_type, sales_person, date)
+    if legacy_counter_file:
+        seed_counter_shard(counter_file, legacy_counter_file, date)
+    return reserve_sequence_block(counter_file, count)
+
+def read_sharded_sequence(doc_type, sales_person, default=0, legacy_counter_file=None, date=None):
+    """Current value of the shard for this sales person and quarter"""
+    counter_file = sharded_counter_file(doc_type, sales_person, date)
+    if legacy_counter_file:
+        seed_counter_shard(counter_file, legacy_counter_file, date)
+    return read_sequence(counter_file, default)
+
+# --- Money ---
+# Amounts are held as integer paise (int64 when vectorized over line items), so
+# line totals, tax summaries and amounts in words agree to the paisa. Rates are
+# carried in basis points and quantities in thousandths, which keeps every
+# product an exact integer; each value is divided back to paise exactly once
+# with an explicit rounding mode.
+ROUND_HALF_UP = "half_up"
+ROUND_HALF_EVEN = "half_even"
+ROUND_UP = "up"
+ROUND_DOWN = "down"
+GST_ROUNDING = ROUND_HALF_UP
+QUANTITY_SCALE = 1000
+RATE_SCALE = 10000
+SGST_RATE_BP = 900
+CGST_RATE_BP = 900
+
+def to_scaled(value, scale):
+    """Exact integer value * scale for an int, float, str or Decimal, rounding half up"""
+    if isinstance(value, Money):
+        return value.paise * scale // 100
+    if isinstance(value, int):
+        return value * scale
+    if isinstance(value, float):
+        # Values already at the scale's precision only carry binary representation error
+        raw = value * scale
+        nearest = round(raw)
+        if abs(raw - nearest) <= 1e-9 * max(abs(raw), 1.0):
+            return int(nearest)
+    text = repr(value) if isinstance(value, float) else str(value)
+    return int((decimal.Decimal(text) * scale).to_integral_value(rounding=decimal.ROUND_HALF_UP))
+
+def to_scaled_array(values, scale):
+    """Vectorized to_scaled over a sequence of amounts, as an int64 array"""
+    values = [value.rupees if isinstance(value, Money) else value for value in values]
+    raw = np.asarray(values, dtype=np.float64) * scale
+    nearest = np.rint(raw)
+    scaled = nearest.astype(np.int64)
+    for index in np.flatnonzero(np.abs(raw - nearest) > 1e-9 * np.maximum(np.abs(raw), 1.0)):
+        scaled[index] = to_scaled(values[index], scale)
+    return scaled
+
+def to_paise(amount):
+    """Exact paise for a rupee amount"""
+    return to_scaled(amount, 100)
+
+def divide_rounded(numerator, denominator, mode=GST_ROUNDING):
+    """Integer division of an int or int64 array with an explicit rounding mode"""
+    sign = np.sign(numerator)
+    quotient, remainder = np.divmod(np.abs(numerator), denominator)
+    if mode == ROUND_HALF_UP:
+        bump = 2 * remainder >= denominator
+    elif mode == ROUND_HALF_EVEN:
+        bump = (2 * remainder > denominator) | ((2 * remainder == denominator) & (quotient % 2 == 1))
+    elif mode == ROUND_UP:
+        bump = remainder > 0
+    elif mode == ROUND_DOWN:
+        bump = remainder < 0
+    else:
+        raise ValueError(f"Unknown rounding mode {mode!r}")
+    result = sign * (quotient + bump)
+    return int(result) if np.ndim(result) == 0 else result.astype(np.int64)
+
+@functools.total_ordering
+class Money:
+    """Immutable rupee amount stored as integer paise"""
+    __slots__ = ("paise",)
+
+    def __init__(self, paise=0):
+        object.__setattr__(self, "paise", int(paise))
+
+    def __setattr__(self, name, value):
+        raise AttributeError("Money is immutable")
+
+    @classmethod
+    def of(cls, amount):
+        return amount if isinstance(amount, Money) else cls(to_paise(amount))
+
+    @property
+    def rupees(self):
+        return self.paise / 100
+
+    def round_to_rupee(self, mode=GST_ROUNDING):
+        return Money(divide_rounded(self.paise, 100, mode) * 100)
+
+    def __add__(self, other):
+        return Money(self.paise + Money.of(other).paise) if isinstance(other, (Money, int)) else NotImplemented
+
+    __radd__ = __add__
+
+    def __sub__(self, other):
+        return Money(self.paise - Money.of(other).paise) if isinstance(other, (Money, int)) else NotImplemented
+
+    def __rsub__(self, other):
+        return Money(Money.of(other).paise - self.paise) if isinstance(other, (Money, int)) else NotImplemented
+
+    def __neg__(self):
+        return Money(-self.paise)
+
+    def __eq__(self, other):
+        if not isinstance(other, (Money, int)):
+            return NotImplemented
+        return self.paise == Money.of(other).paise
+
+    def __lt__(self, other):
+        if not isinstance(other, (Money, int)):
+            return NotImplemented
+        return self.paise < Money.of(other).paise
+
+    def __hash__(self):
+        return hash(self.paise / 100)
+
+    def __bool__(self):
+        return self.paise != 0
+
+    def __float__(self):
+        return self.paise / 100
+
+    def __int__(self):
+        return int(self.paise / 100)
+
+    def __format__(self, spec):
+        return format(decimal.Decimal(self.paise).scaleb(-2), spec or ".2f")
+
+    def __str__(self):
+        return format(self, ".2f")
+
+    def __repr__(self):
+        return f"Money({self})"
+
+def _column(lines, field):
+    """One field from every line, for dict lines from the UI or line models"""
+    if lines and isinstance(lines[0], dict):
+        return [line[field] for line in lines]
+    return [getattr(line, field) for line in lines]
+
+def product_line_amounts(products, mode=GST_ROUNDING):
+    """Paise arrays for basic price, GST per unit, unit price with GST, line total and line base amount"""
+    basic = to_scaled_array(_column(products, "basic"), 100)
+    rate = to_scaled_array(_column(products, "gst_percent"), 100)
+    qty = to_scaled_array(_column(products, "qty"), QUANTITY_SCALE)
+    gst = divide_rounded(basic * rate, RATE_SCALE, mode)
+    unit = basic + gst
+    total = divide_rounded(unit * qty, QUANTITY_SCALE, mode)
+    base = divide_rounded(basic * qty, QUANTITY_SCALE, mode)
+    return basic, gst, unit, total, base
+
+def invoice_line_amounts(items, mode=GST_ROUNDING):
+    """Paise array of quantity x unit rate for each invoice line"""
+    rate = to_scaled_array(_column(items, "unit_rate"), 100)
+    qty = to_scaled_array(_column(items, "quantity"), QUANTITY_SCALE)
+    return divide_rounded(rate * qty, QUANTITY_SCALE, mode)
+
+def calculate_invoice_totals(items, mode=GST_ROUNDING):
+    """Invoice totals with SGST/CGST on the taxable value and the final amount rounded to the rupee"""
+    basic_amount = Money(int(invoice_line_amounts(items, mode).sum()))
+    sgst = Money(divide_rounded(basic_amount.paise * SGST_RATE_BP, RATE_SCALE, mode))
+    cgst = Money(divide_rounded(basic_amount.paise * CGST_RATE_BP, RATE_SCALE, mode))
+    unrounded = basic_amount + sgst + cgst
+    final_amount = unrounded.round_to_rupee(mode)
+    return {
+        "basic_amount": basic_amount,
+        "sgst": sgst,
+        "cgst": cgst,
+        "tax_total": sgst + cgst,
+        "final_amount_unrounded": unrounded,
+        "final_amount": final_amount,
+        "round_off": final_amount - unrounded,
+    }
+
+def amount_in_words(amount):
+    """Amount in Indian English words, with paise when there are any; negative amounts start with Minus"""
+    total_paise = to_paise(amount)
+    rupees, paise = divmod(abs(total_paise), 100)
+    sign = "Minus " if total_paise < 0 else ""
+    try:
+        rupees_text = num2words(rupees, to='cardinal', lang='en_IN').title()
+        if paise > 0:
+            paise_text = num2words(paise, to='cardinal', lang='en_IN').title()
+            return f"{sign}{rupees_text} Rupees And {paise_text} Paise Only/-"
+        return f"{sign}{rupees_text} Rupees Only/-"
+    except Exception:
+        return f"Rupees {format_inr(Money(total_paise))} Only/-"
+
+# --- Indian Number Formatting ---
+# Amounts are printed with lakh/crore grouping (12,34,567.89). Documents repeat
+# the same few values many times (rates, taxes, totals), so results are
+# memoized per value; misses group integer paise, never float digits.
+@functools.lru_cache(maxsize=65536)
+def format_inr(amount):
+    """Amount with Indian digit grouping and two decimals"""
+    paise = amount.paise if isinstance(amount, Money) else to_paise(amount)
+    rupees, fraction = divmod(abs(paise), 100)
+    sign = "-" if paise < 0 else ""
+    if rupees < 1000:
+        return f"{sign}{rupees}.{fraction:02d}"
+    head, tail = divmod(rupees, 1000)
+    text = f"{tail:03d}.{fraction:02d}"
+    while head >= 100:
+        head, pair = divmod(head, 100)
+        text = f"{pair:02d},{text}"
+    return f"{sign}{head},{text}"
+
+# --- Document Number Grammar ---
+# Each series is described once as a template of named fields. Templates are
+# compiled to a single anchored regex for parsing and validation; formatting
+# fills the same template and re-checks the result, so numbers built by the
+# app and numbers typed into the editors follow identical rules.
+NUMBER_FIELD_PATTERNS = {
+    "prefix": r"[A-Z]+",
+    "sales_person": r"[A-Za-z0-9]+",
+    "quarter": r"Q[1-4]",
+    "date": r"(?:0[1-9]|[12][0-9]|3[01])-(?:0[1-9]|1[0-2])-[0-9]{4}",
+    "year": r"[0-9]{4}",
+    "year_range": r"[0-9]{4}-[0-9]{4}",
+    "short_year_range": r"[0-9]{2}-[0-9]{2}",
+    "sequence": r"[0-9]{1,6}",
+}
+
+NUMBER_FORMATS = {
+    "quotation": "{prefix}/{sales_person}/{quarter}/{date}/{year_range}_{sequence:03}",
+    "po": "{prefix}/{sales_person}/{year}/{quarter}_{sequence:03}",
+    "invoice": "{prefix}/{short_year_range}/{quarter}/{sequence:02}",
+}
+
+class DocumentNumberError(ValueError):
+    """A document number that does not follow its series grammar"""
+
+class DocumentNumberFormat:
+    """A series template compiled for single-pass parsing, validation and formatting"""
+    FIELD = re.compile(r"\{(\w+)(?::(\d+))?\}")
+
+    def __init__(self, doc_type, template):
+        self.doc_type = doc_type
+        self.template = template
+        self.parts = []
+        pattern = []
+        position = 0
+        for match in self.FIELD.finditer(template):
+            if match.start() > position:
+                literal = template[position:match.start()]
+                self.parts.append(literal)
+                pattern.append(re.escape(literal))
+            field = match.group(1)
+            self.parts.append((field, int(match.group(2) or 0)))
+            pattern.append(f"(?P<{field}>{NUMBER_FIELD_PATTERNS[field]})")
+            position = match.end()
+        if position < len(template):
+            self.parts.append(template[position:])
+            pattern.append(re.escape(template[position:]))
+        self.regex = re.compile("".join(pattern))
+        self.field_regexes = {field: re.compile(NUMBER_FIELD_PATTERNS[field])
+                              for field, _ in (p for p in self.parts if isinstance(p, tuple))}
+
+    def parse(self, number):
+        """Field values of a number, raising DocumentNumberError with the first problem found"""
+        match = self.regex.fullmatch(number) if isinstance(number, str) else None
+        if match is None:
+            raise DocumentNumberError(self.explain(number))
+        fields = match.groupdict()
+        self.check(number, fields)
+        return fields
+
+    def is_valid(self, number):
+        try:
+            self.parse(number)
+            return True
+        except DocumentNumberError:
+            return False
+
+    def check(self, number, fields):
+        """Rules that a regex cannot express"""
+        for field in ("year_range", "short_year_range"):
+            if field in fields:
+                start, end = fields[field].split("-")
+                if int(end) != (int(start) + 1) % 10 ** len(end):
+                    raise DocumentNumberError(f"Invalid {self.doc_type} number {number!r}: "
+                                              f"year range {fields[field]} is not two consecutive years")
+        if int(fields["sequence"]) < 1:
+            raise DocumentNumberError(f"Invalid {self.doc_type} number {number!r}: sequence must be at least 1")
+
+    def explain(self, number):
+        """Locate where a number departs from the template"""
+        if not isinstance(number, str):
+            return f"Invalid {self.doc_type} number: expected text, got {type(number).__name__}"
+        position = 0
+        for part in self.parts:
+            if isinstance(part, str):
+                if not number.startswith(part, position):
+                    return (f"Invalid {self.doc_type} number {number!r}: expected {part!r} "
+                            f"at position {position + 1}")
+                position += len(part)
+            else:
+                match = self.field_regexes[part[0]].match(number, position)
+                if not match:
+                    return (f"Invalid {self.doc_type} number {number!r}: bad {part[0].replace('_', ' ')} "
+                            f"at position {position + 1}")
+                position = match.end()
+        if position < len(number):
+            return f"Invalid {self.doc_type} number {number!r}: unexpected text at position {position + 1}"
+        return f"Invalid {self.doc_type} number {number!r}: does not match {self.template}"
+
+    def format(self, **fields):
+        """Fill the template and validate the result"""
+        pieces = []
+        for part in self.parts:
+            if isinstance(part, str):
+                pieces.append(part)
+                continue
+            field, width = part
+            if field not in fields:
+                raise DocumentNumberError(f"Missing {field.replace('_', ' ')} for {self.doc_type} number")
+            value = fields[field]
+            pieces.append(f"{int(value):0{width}d}" if width else str(value).strip())
+        number = "".join(pieces)
+        self.parse(number)
+        return number
+
+NUMBER_GRAMMARS = {doc_type: DocumentNumberFormat(doc_type, template) for doc_type, template in NUMBER_FORMATS.items()}
+
+def parse_document_number(doc_type, number):
+    """Parse a number of the given document type into its fields"""
+    return NUMBER_GRAMMARS[doc_type].parse(number.strip() if isinstance(number, str) else number)
+
+def format_document_number(doc_type, **fields):
+    """Build a validated number of the given document type"""
+    return NUMBER_GRAMMARS[doc_type].format(**fields)
+
+def get_next_sequence_from_number(doc_type, number, default=1):
+    """Sequence following the one in number, or default if number is not valid"""
+    try:
+        return int(parse_document_number(doc_type, number)["sequence"]) + 1
+    except DocumentNumberError:
+        return default
+
+# Global PO counter used before counters were sharded
+PO_COUNTER_FILE = "po_counter.txt"
+
+def get_next_po_sequence(sales_person="SP1"):
+    """Next PO sequence for the sales person's current quarter"""
+    return reserve_sharded_sequence("po", sales_person, legacy_counter_file=PO_COUNTER_FILE).take()
+
+def get_current_po_sequence(sales_person="SP1"):
+    """Get current PO sequence without incrementing"""
+    return read_sharded_sequence("po", sales_person, default=1, legacy_counter_file=PO_COUNTER_FILE)
+
+def parse_po_number(po_number):
+    """Parse PO number to extract components"""
+    fields = parse_document_number("po", po_number)
+    return fields["prefix"], fields["sales_person"], fields["year"], fields["quarter"], fields["sequence"]
+
+def generate_po_number(sales_person, sequence_number):
+    """Generate PO number with current quarter and sequence"""
+    current_date = datetime.datetime.now()
+    return format_document_number("po", prefix="COM", sales_person=sales_person, year=current_date.year,
+                                  quarter=get_current_quarter(), sequence=sequence_number)
+
+def get_next_sequence_number_po(po_number):
+    """Extract and increment sequence number from PO number"""
+    return get_next_sequence_from_number("po", po_number)
+
+# Global quotation counter used before counters were sharded
+QUOTATION_COUNTER_FILE = "quotation_counter.txt"
+
+def get_next_quotation_sequence(sales_person="SP1"):
+    """Next quotation sequence for the sales person's current quarter"""
+    return reserve_sharded_sequence("quotation", sales_person, legacy_counter_file=QUOTATION_COUNTER_FILE).take()
+
+def get_current_quotation_sequence(sales_person="SP1"):
+    """Get current sequence without incrementing"""
+    return read_sharded_sequence("quotation", sales_person, default=1, legacy_counter_file=QUOTATION_COUNTER_FILE)
+
+def parse_quotation_number(quotation_number):
+    """Parse quotation number to extract components"""
+    fields = parse_document_number("quotation", quotation_number)
+    return (fields["prefix"], fields["sales_person"], fields["quarter"], fields["date"],
+            fields["year_range"], fields["sequence"])
+
+def generate_quotation_number(sales_person, sequence_number):
+    """Generate quotation number with current quarter and sequence"""
+    current_date = datetime.datetime.now()
+    return format_document_number("quotation", prefix="COM", sales_person=sales_person,
+                                  quarter=get_current_quarter(), date=current_date.strftime('%d-%m-%Y'),
+                                  year_range=f"{current_date.year}-{current_date.year+1}", sequence=sequence_number)
+
+def calculate_quotation_totals(products, mode=GST_ROUNDING):
+    """Calculate quotation totals with round-off like PO generator"""
+    basic, gst, unit, total, base = product_line_amounts(products, mode)
+    products_total = Money(int(total.sum()))
+    total_base = Money(int(base.sum()))
+    rounded_total = products_total.round_to_rupee(mode)
+    
+    return {
+        "line_paise": (basic, gst, unit, total),
+        "total_base": total_base,
+        "total_gst": products_total - total_base,
+        "grand_total_unrounded": products_total,
+        "grand_total": rounded_total,
+        "round_off": rounded_total - products_total
+    }
+
+def get_next_sequence_number(quotation_number):
+    """Extract and increment sequence number from quotation number"""
+    return get_next_sequence_from_number("quotation", quotation_number)
+
+# Simple file-based counter for Invoice sequence
+INVOICE_COUNTER_FILE = "invoice_counter.txt"
+
+def get_next_invoice_sequence():
+    """Simple file-based Invoice sequence counter"""
+    return reserve_sequence_block(INVOICE_COUNTER_FILE, 1).take()
+
+def get_current_invoice_sequence():
+    """Get current Invoice sequence without incrementing"""
+    return read_sequence(INVOICE_COUNTER_FILE, default=1)
+
+def parse_invoice_number(invoice_number):
+    """Parse invoice number to extract components"""
+    fields = parse_document_number("invoice", invoice_number)
+    return fields["prefix"], fields["short_year_range"], fields["quarter"], fields["sequence"]
+
+def generate_invoice_number(sequence_number):
+    """Generate invoice number"""
+    current_date = datetime.datetime.now()
+    return format_document_number("invoice", prefix="COM",
+                                  short_year_range=f"{str(current_date.year)[2:]}-{str(current_date.year + 1)[2:]}",
+                                  quarter=get_current_quarter(), sequence=sequence_number)
+
+def get_next_sequence_number_invoice(invoice_number):
+    """Extract and increment sequence number from invoice number"""
+    try:
+        return int(parse_document_number("invoice", invoice_number)["sequence"]) + 1
+    except DocumentNumberError:
+        return get_next_invoice_sequence()
+
+# --- Fonts ---
+FONT_DIR = os.path.join(os.path.dirname(__file__), "fonts")
+
+def add_calibri_fonts(pdf):
+    """Register the Calibri family on a PDF and return the font to use by default"""
+    try:
+        pdf.add_font("Calibri", "", os.path.join(FONT_DIR, "calibri.ttf"), uni=True)
+        pdf.add_font("Calibri", "B", os.path.join(FONT_DIR, "calibrib.ttf"), uni=True)
+        pdf.add_font("Calibri", "I", os.path.join(FONT_DIR, "calibrii.ttf"), uni=True)
+        pdf.add_font("Calibri", "BI", os.path.join(FONT_DIR, "calibriz.ttf"), uni=True)
+        return "Calibri"
+    except:
+        return "Helvetica"
+
+# --- Text Sanitizer ---
+# Builders emit Latin-1 text. Characters outside it are transliterated in one
+# str.translate pass: common typography and the rupee sign have explicit
+# replacements, accented Latin letters fold to their base letter, and anything
+# without a sensible equivalent is dropped.
+TRANSLITERATIONS = {
+    "\u20b9": "Rs.",
+    "\u2018": "'", "\u2019": "'", "\u201a": ",", "\u201b": "'", "\u2032": "'",
+    "\u201c": '"', "\u201d": '"', "\u201e": '"', "\u201f": '"', "\u2033": '"',
+    "\u2010": "-", "\u2011": "-", "\u2012": "-", "\u2013": "-", "\u2014": "-", "\u2015": "-", "\u2212": "-",
+    "\u2026": "...", "\u2022": "\u00b7", "\u2023": "\u00b7", "\u2027": "\u00b7",
+    "\u2002": " ", "\u2003": " ", "\u2009": " ", "\u202f": " ",
+    "\u200b": "", "\u200c": "", "\u200d": "", "\ufeff": "",
+    "\u20ac": "EUR", "\u2122": "(TM)", "\u2116": "No.",
+    "\u0131": "i", "\u0142": "l", "\u0141": "L", "\u0111": "d", "\u0110": "D",
+    "\u0153": "oe", "\u0152": "OE", "\u0192": "f",
+}
+
+class TransliterationTable(dict):
+    """str.translate table that resolves unseen code points once and remembers them"""
+
+    def __missing__(self, code):
+        if code < 256:
+            value = code
+        else:
+            decomposed = unicodedata.normalize("NFKD", chr(code))
+            value = "".join(c for c in decomposed if ord(c) < 256 and not unicodedata.combining(c)) or None
+        self[code] = value
+        return value
+
+def build_transliteration_table():
+    table = TransliterationTable({ord(char): value for char, value in TRANSLITERATIONS.items()})
+    # Latin Extended-A/B and Latin Extended Additional cover the diacritics in Indian names
+    for start, end in ((0x0100, 0x0250), (0x1E00, 0x1F00)):
+        for code in range(start, end):
+            if code not in table:
+                table[code]
+    return table
+
+LATIN1_TRANSLITERATION = build_transliteration_table()
+
+@functools.lru_cache(maxsize=8192)
+def _transliterate(text):
+    return text.translate(LATIN1_TRANSLITERATION)
+
+def sanitize_text(text):
+    """Map text to Latin-1, transliterating what the PDF fonts cannot encode"""
+    if not isinstance(text, str) or text.isascii():
+        return text
+    return _transliterate(text)
+
+def sanitize_document_data(data):
+    """Copy of a document's data with every string sanitized"""
+    if isinstance(data, str):
+        return sanitize_text(data)
+    if isinstance(data, dict):
+        return {key: sanitize_document_data(value) for key, value in data.items()}
+    if isinstance(data, list):
+        return [sanitize_document_data(value) for value in data]
+    if isinstance(data, tuple):
+        return tuple(sanitize_document_data(value) for value in data)
+    if dataclasses.is_dataclass(data) and not isinstance(data, type):
+        return dataclasses.replace(data, **{field.name: sanitize_document_data(getattr(data, field.name))
+                                            for field in dataclasses.fields(data)})
+    return data
+
+# --- Document Models ---
+# Builders take these immutable, slot-based records. Values are checked and
+# normalized once when a record is built (lists become tuples, numbers are
+# validated), so a record can be shared between renders and used as a cache
+# key. from_dict() accepts the dict shapes the UI has always produced.
+def _text(value):
+    return "" if value is None else str(value)
+
+def _amount(value, field, allow_negative=False):
+    if isinstance(value, Money):
+        value = value.rupees
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        try:
+            value = float(value)
+        except (TypeError, ValueError):
+            raise ValueError(f"{field} must be a number, got {value!r}")
+    if value != value or (value < 0 and not allow_negative):
+        raise ValueError(f"{field} must be a non-negative number, got {value!r}")
+    return value
+
+def _normalize(record, text_fields=(), amount_fields=(), signed_fields=()):
+    for field in text_fields:
+        object.__setattr__(record, field, _text(getattr(record, field)))
+    for field in amount_fields:
+        object.__setattr__(record, field, _amount(getattr(record, field), f"{type(record).__name__}.{field}"))
+    for field in signed_fields:
+        object.__setattr__(record, field, _amount(getattr(record, field), f"{type(record).__name__}.{field}", True))
+
+def _records(values, record_type):
+    return tuple(value if isinstance(value, record_type) else record_type(**value) for value in values or ())
+
+@dataclass(frozen=True, slots=True)
+class Party:
+    name: str = ""
+    address: str = ""
+    contact: str = ""
+    mobile: str = ""
+    email: str = ""
+    gstin: str = ""
+    pan: str = ""
+    msme: str = ""
+
+    def __post_init__(self):
+        _normalize(self, text_fields=("name", "address", "contact", "mobile", "email", "gstin", "pan", "msme"))
+
+@dataclass(frozen=True, slots=True)
+class ProductLine:
+    name: str
+    basic: float
+    qty: float = 1.0
+    gst_percent: float = 18.0
+
+    def __post_init__(self):
+        _normalize(self, text_fields=("name",), amount_fields=("basic", "qty", "gst_percent"))
+
+@dataclass(frozen=True, slots=True)
+class InvoiceLine:
+    description: str
+    quantity: float
+    unit_rate: float
+    hsn: str = ""
+
+    def __post_init__(self):
+        _normalize(self, text_fields=("description", "hsn"), amount_fields=("quantity", "unit_rate"))
+
+@dataclass(frozen=True, slots=True)
+class InvoiceTotals:
+    basic_amount: float
+    sgst: float
+    cgst: float
+    final_amount: float
+    amount_in_words: str = ""
+    tax_in_words: str = ""
+
+    def __post_init__(self):
+        _normalize(self, text_fields=("amount_in_words", "tax_in_words"),
+                   amount_fields=("basic_amount", "sgst", "cgst", "final_amount"))
+
+@dataclass(frozen=True, slots=True)
+class QuotationDocument:
+    quotation_number: str
+    quotation_date: str
+    vendor: Party
+    products: tuple
+    price_validity: str = "10 days from Quotation date"
+    grand_total: float = None
+    round_off: float = 0.0
+    amount_words: str = ""
+    subject: str = ""
+    intro_paragraph: str = ""
+    product_name: str = ""
+    sales_person_code: str = "SP1"
+    annexure_text: str = "Annexure I - Commercials"
+    quotation_title: str = "Quotation for Software Services"
+
+    def __post_init__(self):
+        _normalize(self, text_fields=("quotation_number", "quotation_date", "price_validity", "amount_words", "subject",
+                                      "intro_paragraph", "product_name", "sales_person_code", "annexure_text",
+                                      "quotation_title"),
+                   signed_fields=("round_off",))
+        object.__setattr__(self, "products", _records(self.products, ProductLine))
+        if self.grand_total is not None:
+            object.__setattr__(self, "grand_total", _amount(self.grand_total, "QuotationDocument.grand_total"))
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(
+            quotation_number=data["quotation_number"],
+            quotation_date=data["quotation_date"],
+            vendor=Party(name=data.get("vendor_name"), address=data.get("vendor_address"),
+                         contact=data.get("vendor_contact"), mobile=data.get("vendor_mobile"),
+                         email=data.get("vendor_email"), gstin=data.get("vendor_gst")),
+            products=data["products"],
+            price_validity=data.get("price_validity", "10 days from Quotation date"),
+            grand_total=data.get("grand_total"),
+            round_off=data.get("round_off", 0.0),
+            amount_words=data.get("amount_words"),
+            subject=data.get("subject"),
+            intro_paragraph=data.get("intro_paragraph"),
+            product_name=data.get("product_name"),
+            sales_person_code=data.get("sales_person_code", "SP1"),
+            annexure_text=data.get("annexure_text", "Annexure I - Commercials"),
+            quotation_title=data.get("quotation_title", "Quotation for Software Services"))
+
+@dataclass(frozen=True, slots=True)
+class PurchaseOrderDocument:
+    po_number: str
+    po_date: str
+    vendor: Party
+    bill_to: Party
+    ship_to: Party
+    end_user: Party
+    products: tuple
+    grand_total: float = 0.0
+    amount_words: str = ""
+    payment_terms: str = ""
+    delivery_terms: str = ""
+    prepared_by: str = ""
+    authorized_by: str = ""
+    company_name: str = ""
+
+    def __post_init__(self):
+        _normalize(self, text_fields=("po_number", "po_date", "amount_words", "payment_terms", "delivery_terms",
+                                      "prepared_by", "authorized_by", "company_name"),
+                   amount_fields=("grand_total",))
+        object.__setattr__(self, "products", _records(self.products, ProductLine))
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(
+            po_number=data["po_number"],
+            po_date=data["po_date"],
+            vendor=Party(name=data.get("vendor_name"), address=data.get("vendor_address"),
+                         contact=data.get("vendor_contact"), mobile=data.get("vendor_mobile"),
+                         gstin=data.get("gst_no"), pan=data.get("pan_no"), msme=data.get("msme_no")),
+            bill_to=Party(name=data.get("bill_to_company"), address=data.get("bill_to_address")),
+            ship_to=Party(name=data.get("ship_to_company"), address=data.get("ship_to_address")),
+            end_user=Party(name=data.get("end_company"), address=data.get("end_address"),
+                           contact=data.get("end_person"), mobile=data.get("end_mobile"), email=data.get("end_email")),
+            products=data["products"],
+            grand_total=data.get("grand_total", 0.0),
+            amount_words=data.get("amount_words"),
+            payment_terms=data.get("payment_terms"),
+            delivery_terms=data.get("delivery_terms"),
+            prepared_by=data.get("prepared_by"),
+            authorized_by=data.get("authorized_by"),
+            company_name=data.get("company_name"))
+
+@dataclass(frozen=True, slots=True)
+class InvoiceDocument:
+    invoice_no: str
+    invoice_date: str
+    vendor: Party
+    buyer: Party
+    items: tuple
+    totals: InvoiceTotals
+    suppliers_reference: str = ""
+    other_reference: str = ""
+    buyers_order_no: str = ""
+    buyers_order_date: str = ""
+    dispatched_through: str = ""
+    payment_terms: str = "100% Advance with Purchase"
+    terms_of_delivery: str = ""
+    destination: str = "City Name"
+    declaration: str = ""
+    buyer_logo: bytes = None
+
+    def __post_init__(self):
+        _normalize(self, text_fields=("invoice_no", "invoice_date", "suppliers_reference", "other_reference",
+                                      "buyers_order_no", "buyers_order_date", "dispatched_through", "payment_terms",
+                                      "terms_of_delivery", "destination", "declaration"))
+        object.__setattr__(self, "items", _records(self.items, InvoiceLine))
+        if not isinstance(self.totals, InvoiceTotals):
+            object.__setattr__(self, "totals", InvoiceTotals(**self.totals))
+
+    @classmethod
+    def from_dict(cls, data):
+        details = data.get("invoice_details", {})
+        reference = data.get("Reference", {})
+        vendor = data.get("vendor", {})
+        buyer = data.get("buyer", {})
+        return cls(
+            invoice_no=data["invoice"]["invoice_no"],
+            invoice_date=data["invoice"]["date"],
+            vendor=Party(name=vendor.get("name"), address=vendor.get("address"), gstin=vendor.get("gst"),
+                         msme=vendor.get("msme")),
+            buyer=Party(name=buyer.get("name"), address=buyer.get("address"), gstin=buyer.get("gst"),
+                        mobile=buyer.get("mobile"), email=buyer.get("email")),
+            items=data["items"],
+            totals=data["totals"],
+            suppliers_reference=reference.get("Suppliers_Reference"),
+            other_reference=reference.get("Other"),
+            buyers_order_no=details.get("buyers_order_no"),
+            buyers_order_date=details.get("buyers_order_date"),
+            dispatched_through=details.get("dispatched_through"),
+            payment_terms=details.get("payment_terms", "100% Advance with Purchase"),
+            terms_of_delivery=details.get("terms_of_delivery"),
+            destination=details.get("destination", "City Name"),
+            declaration=data.get("declaration"),
+            buyer_logo=buyer.get("logo_file"))
+
+def as_document(data, model):
+    """Accept either a model instance or the legacy dict shape for it"""
+    return data if isinstance(data, model) else model.from_dict(data)
+
+@functools.lru_cache(maxsize=256)
+def sanitize_document(document):
+    """Sanitized copy of a document model, memoized since models are immutable"""
+    return sanitize_document_data(document)
+
+# --- Text Metrics Cache ---
+# String widths and wrapped lines depend only on the font, the text and the
+# available width, so they are memoized once per process and shared by every
+# builder. Counters make the hit rate visible in benchmarks.
+class TextMetricsCache:
+    """Process-wide memo of string widths and multi_cell line splits"""
+
+    def __init__(self, max_entries=100000):
+        self.enabled = True
+        self.max_entries = max_entries
+        self.lock = threading.Lock()
+        self.widths = {}
+        self.wraps = {}
+        self.width_hits = 0
+        self.width_misses = 0
+        self.wrap_hits = 0
+        self.wrap_misses = 0
+
+    def _store(self, table, key, value):
+        with self.lock:
+            if len(table) >= self.max_entries:
+                table.clear()
+            table[key] = value
+
+    def string_width(self, key, compute):
+        if not self.enabled:
+            return compute()
+        width = self.widths.get(key)
+        if width is None:
+            self.width_misses += 1
+            width = compute()
+            self._store(self.widths, key, width)
+        else:
+            self.width_hits += 1
+        return width
+
+    def split_lines(self, key, compute):
+        if not self.enabled:
+            return compute()
+        lines = self.wraps.get(key)
+        if lines is None:
+            self.wrap_misses += 1
+            lines = tuple(compute())
+            self._store(self.wraps, key, lines)
+        else:
+            self.wrap_hits += 1
+        return list(lines)
+
+    def stats(self):
+        width_total = self.width_hits + self.width_misses
+        wrap_total = self.wrap_hits + self.wrap_misses
+        return {
+            "width_hits": self.width_hits,
+            "width_misses": self.width_misses,
+            "width_hit_rate": self.width_hits / width_total if width_total else 0.0,
+            "wrap_hits": self.wrap_hits,
+            "wrap_misses": self.wrap_misses,
+            "wrap_hit_rate": self.wrap_hits / wrap_total if wrap_total else 0.0,
+            "entries": len(self.widths) + len(self.wraps),
+        }
+
+    def clear(self):
+        with self.lock:
+            self.widths.clear()
+            self.wraps.clear()
+            self.width_hits = self.width_misses = self.wrap_hits = self.wrap_misses = 0
+
+TEXT_METRICS = process_resource("text_metrics", TextMetricsCache)
+
+class CachedMetricsFPDF(FPDF):
+    """FPDF whose string widths and line splits go through TEXT_METRICS"""
+    document_first_page = 1
+    pending_document = None
+
+    optimize = False
+
+    def optimize_output(self):
+        """Compress content streams and resample images for print from here on"""
+        self.optimize = True
+        self.set_compression(True)
+
+    def image(self, name, x=None, y=None, w=0, h=0, *args, **kwargs):
+        if self.optimize and w:
+            name = print_ready_image(name, w) or name
+        return super().image(name, x, y, w, h, *args, **kwargs)
+
+    def start_document(self, title):
+        """Begin a new document in a batch: its pages are numbered from 1 and bookmarked as title"""
+        self.pending_document = title
+
+    def document_page_no(self):
+        """Page number within the current document of a batch"""
+        return self.page_no() - self.document_first_page + 1
+
+    def add_page(self, *args, **kwargs):
+        title, self.pending_document = self.pending_document, None
+        if title is not None:
+            self.document_first_page = self.page + 1
+            kwargs.update(label_style="D", label_prefix=f"{title} - ", label_start=1)
+        super().add_page(*args, **kwargs)
+        if title is not None:
+            self.start_section(title)
+
+    def sanitize_text(self, text):
+        return sanitize_text(text)
+
+    def _font_key(self):
+        return (self.font_family, self.font_style, self.font_size_pt,
+                getattr(self, "font_stretching", 100), getattr(self, "char_spacing", 0))
+
+    def get_string_width(self, s, normalized=False, markdown=False):
+        if markdown:
+            return super().get_string_width(s, normalized, markdown)
+        return TEXT_METRICS.string_width(
+            self._font_key() + (s,),
+            lambda: super(CachedMetricsFPDF, self).get_string_width(s, normalized))
+
+    def split_lines(self, w, h, text):
+        """Lines multi_cell(w, h, text) would produce, without drawing them"""
+        if w == 0:
+            w = self.w - self.r_margin - self.x
+        return TEXT_METRICS.split_lines(
+            self._font_key() + (self.c_margin, w, text),
+            lambda: self.multi_cell(w, h, text, split_only=True))
+
+# --- Static PDF Fragments ---
+# Fixed blocks (boilerplate paragraphs, link lists, terms and bank boxes, page
+# footers) are laid out once: line breaking and string widths are resolved
+# against a metrics PDF and the result is kept as a list of positioned drawing
+# operations. Each document then replays the operations with plain cell/rect
+# calls, which skips FPDF's multi_cell line breaking altogether. Blocks that
+# depend on a few values (price validity, sales person) are cached per
+# distinct value, up to STATIC_FRAGMENT_CACHE_SIZE blocks. With
+# USE_STATIC_FRAGMENTS off the blocks are drawn directly, as benchmark-render
+# does to measure the time the fragments save.
+USE_STATIC_FRAGMENTS = True
+STATIC_FRAGMENT_CACHE_SIZE = 256
+_static_fragments = process_resource("static_fragments", dict)
+_metrics_pdfs = process_resource("metrics_pdfs", dict)
+_static_fragments_lock = process_resource("static_fragments_lock", threading.Lock)
+
+class PDFFragment:
+    """Pre-laid-out block of drawing operations that can be replayed into any page"""
+    __slots__ = ("ops", "height")
+
+    def __init__(self, ops, height):
+        self.ops = ops
+        self.height = height
+
+    def replay(self, pdf, x=None, y=None):
+        """Draw the block at (x, y), defaulting to the current position; returns named anchors"""
+        x0 = pdf.l_margin if x is None else x
+        if y is not None:
+            pdf.set_y(y)
+        y0 = pdf.get_y()
+        anchors = {}
+        for op in self.ops:
+            kind = op[0]
+            if kind == "font":
+                pdf.set_font(op[1], op[2], op[3])
+            elif kind == "color":
+                pdf.set_text_color(op[1], op[2], op[3])
+            elif kind == "line":
+                height = op[1]
+                if pdf.will_page_break(height):
+                    pdf.add_page()
+                line_y = pdf.get_y()
+                for dx, w, text, align, link in op[2]:
+                    pdf.set_xy(x0 + dx, line_y)
+                    pdf.cell(w, height, text, align=align, link=link)
+                pdf.set_xy(x0, line_y + height)
+            elif kind == "space":
+                pdf.set_xy(x0, pdf.get_y() + op[1])
+            elif kind == "cell_at":
+                dx, dy, w, h, text, align, link = op[1:]
+                pdf.set_xy(x0 + dx, y0 + dy)
+                pdf.cell(w, h, text, align=align, link=link)
+            elif kind == "rect_at":
+                pdf.rect(x0 + op[1], y0 + op[2], op[3], op[4])
+            elif kind == "line_at":
+                pdf.line(x0 + op[1], y0 + op[2], x0 + op[3], y0 + op[4])
+            elif kind == "anchor":
+                anchors[op[1]] = (x0 + op[2], y0 + op[3])
+        return anchors
+
+class FragmentBuilder:
+    """Records a block's layout against a metrics PDF instead of drawing it"""
+
+    def __init__(self, metrics_pdf, default_font):
+        self.pdf = metrics_pdf
+        self.default_font = default_font
+        self.ops = []
+        self.y = 0.0
+
+    @property
+    def content_width(self):
+        return self.pdf.w - self.pdf.l_margin - self.pdf.r_margin
+
+    def set_font(self, family, style, size):
+        self.pdf.set_font(family, style, size)
+        self.ops.append(("font", family, style, size))
+
+    def set_text_color(self, r, g, b):
+        self.ops.append(("color", r, g, b))
+
+    def string_width(self, text):
+        return self.pdf.get_string_width(text)
+
+    def split_lines(self, w, h, text):
+        return self.pdf.split_lines(w, h, text)
+
+    def line(self, h, pieces):
+        """One flowed line made of (dx, w, text, align, link) pieces"""
+        self.ops.append(("line", h, tuple(pieces)))
+        self.y += h
+
+    def space(self, h):
+        self.ops.append(("space", h))
+        self.y += h
+
+    def wrap(self, w, h, text, align="J"):
+        """Break text like multi_cell does; yields the pieces making up each line"""
+        margin = self.pdf.c_margin
+        for segment in text.split("\n"):
+            lines = self.split_lines(w, h, segment) or [""]
+            for i, line_text in enumerate(lines):
+                words = line_text.split()
+                if align == "J" and i < len(lines) - 1 and len(words) > 1:
+                    # Justified lines are drawn word by word at their final positions
+                    widths = [self.string_width(word) for word in words]
+                    gap = (w - 2 * margin - sum(widths)) / (len(words) - 1)
+                    pieces = []
+                    offset = 0
+                    for word, width in zip(words, widths):
+                        pieces.append((offset, width + 2 * margin, word, "L", ""))
+                        offset += width + gap
+                    yield pieces
+                else:
+                    yield [(0, w, line_text, "L" if align == "J" else align, "")]
+
+    def paragraph(self, w, h, text, align="J"):
+        """Flowed multi-line text"""
+        for pieces in self.wrap(w, h, text, align):
+            self.line(h, pieces)
+
+    def cell_at(self, dx, dy, w, h, text, align="L", link=""):
+        self.ops.append(("cell_at", dx, dy, w, h, text, align, link))
+
+    def text_block_at(self, dx, dy, w, h, text, align="J"):
+        """Anchored multi-line text; returns the offset just below it"""
+        for pieces in self.wrap(w, h, text, align):
+            for piece_dx, piece_w, piece_text, piece_align, link in pieces:
+                self.cell_at(dx + piece_dx, dy, piece_w, h, piece_text, piece_align, link)
+            dy += h
+        return dy
+
+    def rect_at(self, dx, dy, w, h):
+        self.ops.append(("rect_at", dx, dy, w, h))
+
+    def line_at(self, dx1, dy1, dx2, dy2):
+        self.ops.append(("line_at", dx1, dy1, dx2, dy2))
+
+    def anchor(self, name, dx, dy):
+        self.ops.append(("anchor", name, dx, dy))
+
+    def build(self, height=None):
+        return PDFFragment(tuple(self.ops), self.y if height is None else height)
+
+def get_metrics_pdf(pdf):
+    """Unrendered PDF sharing the fonts and margins of pdf, used for layout only"""
+    key = (pdf.default_font, pdf.w, pdf.l_margin, pdf.r_margin)
+    metrics = _metrics_pdfs.get(key)
+    if metrics is None:
+        metrics = CachedMetricsFPDF()
+        add_calibri_fonts(metrics)
+        metrics.set_margins(pdf.l_margin, pdf.t_margin, pdf.r_margin)
+        metrics.set_auto_page_break(False)
+        metrics.add_page()
+        _metrics_pdfs[key] = metrics
+    return metrics
+
+def get_static_fragment(pdf, name, build_fn, *params):
+    """Return the fragment for (name, params), laying it out on first use"""
+    key = (name, pdf.default_font, pdf.w, pdf.l_margin, pdf.r_margin) + params
+    fragment = _static_fragments.get(key)
+    if fragment is None:
+        with _static_fragments_lock:
+            builder = FragmentBuilder(get_metrics_pdf(pdf), pdf.default_font)
+            build_fn(builder, *params)
+            fragment = builder.build()
+            if len(_static_fragments) >= STATIC_FRAGMENT_CACHE_SIZE:
+                _static_fragments.clear()
+            _static_fragments[key] = fragment
+    return fragment
+
+def build_contact_footer(fb, family, address_lines):
+    """Centered address line(s) followed by the linked email | phone | website row"""
+    for style, text in address_lines:
+        fb.set_font(family, style, 10)
+        fb.line(4, [(0, fb.content_width, text, "C", "")])
+
+    fb.set_font(family, "U", 10)
+    fb.set_text_color(0, 0, 255)
+
+    email1 = "info@yourcompany.com"
+    phone_number = "+91 00000 00000"
+    website = "www.yourcompany.com"
+
+    contact_width = fb.string_width(f"{email1} | {phone_number} | {website}")
+    separator_width = fb.string_width(" | ")
+    x_contact = (fb.pdf.w - contact_width) / 2 - fb.pdf.l_margin
+
+    pieces = []
+    for text, link in ((email1, f"mailto:{email1}"),
+                       (phone_number, f"tel:{phone_number}"),
+                       (website, "https://www.yourcompany.com/")):
+        width = fb.string_width(text)
+        pieces.append((x_contact, width, text, "L", link))
+        x_contact += width + separator_width
+    fb.line(4, pieces)
+    fb.set_text_color(0, 0, 0)
+
+def add_contact_footer(pdf, family, address_lines):
+    """Page footer: address line(s) and the contact row, replayed or drawn directly"""
+    if USE_STATIC_FRAGMENTS:
+        get_static_fragment(pdf, "contact_footer", build_contact_footer, family, address_lines).replay(pdf)
+        return
+
+    for style, text in address_lines:
+        pdf.set_font(family, style, 10)
+        pdf.cell(0, 4, text, ln=True, align="C")
+
+    pdf.set_font(family, "U", 10)
+    pdf.set_text_color(0, 0, 255)
+
+    email1 = "info@yourcompany.com"
+    phone_number = "+91 00000 00000"
+    website = "www.yourcompany.com"
+
+    contact_text = f"{email1} | {phone_number} | {website}"
+    contact_width = pdf.get_string_width(contact_text)
+    x_contact = (pdf.w - contact_width) / 2
+
+    pdf.set_x(x_contact)
+    pdf.cell(pdf.get_string_width(email1), 4, email1, link=f"mailto:{email1}")
+    pdf.set_x(x_contact + pdf.get_string_width(email1) + pdf.get_string_width(" | "))
+    pdf.cell(pdf.get_string_width(phone_number), 4, phone_number, link=f"tel:{phone_number}")
+    pdf.set_x(x_contact + pdf.get_string_width(email1) + pdf.get_string_width(" | ") + pdf.get_string_width(phone_number) + pdf.get_string_width(" | "))
+    pdf.cell(pdf.get_string_width(website), 4, website, link="https://www.yourcompany.com/")
+
+    pdf.set_text_color(0, 0, 0)
+
+# --- Branding Images ---
+def branding_image(asset):
+    """Return an FPDF image source for in-memory image bytes or an existing path"""
+    if isinstance(asset, (bytes, bytearray)):
+        return io.BytesIO(asset) if asset else None
+    if isinstance(asset, str) and asset and os.path.exists(asset):
+        return asset
+    return None
+
+# --- PDF Output ---
+# Builders take optimize=True where small files matter more than the source
+# images: the hot folder, renewals, bulk exports and print batches. Optimized
+# PDFs compress their content streams and embed images resampled to the
+# printed size at PRINT_DPI. Pages are white, so transparent logos are
+# flattened onto white and stored as JPEG like the stamps. TrueType fonts need
+# no extra step: FPDF already embeds only the glyphs a document uses.
+# Resampled images are cached per source and width. Documents downloaded from
+# the app keep their images as uploaded.
+PRINT_DPI = 200
+IMAGE_JPEG_QUALITY = 90
+
+@functools.lru_cache(maxsize=32)
+def _print_ready_image_bytes(data, width_mm):
+    image = Image.open(io.BytesIO(data))
+    target_width = round(width_mm / 25.4 * PRINT_DPI)
+    if image.width <= target_width and image.format == "JPEG":
+        return data
+    if image.width > target_width:
+        image = image.resize((target_width, max(1, round(image.height * target_width / image.width))), Image.LANCZOS)
+    if image.mode in ("RGBA", "LA", "P"):
+        image = image.convert("RGBA")
+        flattened = Image.new("RGB", image.size, "white")
+        flattened.paste(image, mask=image.getchannel("A"))
+        image = flattened
+    elif image.mode not in ("RGB", "L"):
+        image = image.convert("RGB")
+    buffer = io.BytesIO()
+    image.save(buffer, format="JPEG", quality=IMAGE_JPEG_QUALITY, optimize=True)
+    return buffer.getvalue() if buffer.tell() < len(data) else data
+
+def print_ready_image(source, width_mm):
+    """Image source resampled for printing at width_mm, or None if it cannot be read"""
+    try:
+        if isinstance(source, io.BytesIO):
+            data = source.getvalue()
+        elif isinstance(source, (bytes, bytearray)):
+            data = bytes(source)
+        elif isinstance(source, str) and os.path.exists(source):
+            with open(source, "rb") as f:
+                data = f.read()
+        else:
+            return None
+        return io.BytesIO(_print_ready_image_bytes(data, width_mm))
+    except (OSError, ValueError, Image.DecompressionBombError):
+        return None
+
+def pdf_output_bytes(pdf):
+    """Serialize a finished PDF once, as bytes, whichever FPDF produced it"""
+    output = pdf.output(dest="S")
+    return output.encode("latin-1") if isinstance(output, str) else bytes(output)
+
+def pdf_size_breakdown(pdf_bytes):
+    """Bytes per object type in a PDF: images, fonts, page content, annotations and structure"""
+    breakdown = {}
+    for match in re.finditer(rb"\d+ 0 obj(.*?)endobj", pdf_bytes, re.S):
+        body = match.group(1)
+        header = body.split(b"stream", 1)[0]
+        if b"/Subtype /Image" in header:
+            kind = "images"
+        elif b"/FontFile" in header or b"/Length1" in header or re.search(rb"/Type /(Font|FontDescriptor)", header):
+            kind = "fonts"
+        elif b"/Annot" in header or b"/Subtype /Link" in header:
+            kind = "annotations"
+        elif b"stream" in body:
+            kind = "content"
+        else:
+            kind = "structure"
+        breakdown[kind] = breakdown.get(kind, 0) + len(match.group(0))
+    breakdown["other"] = len(pdf_bytes) - sum(breakdown.values())
+    return breakdown
+
+# --- PDF Class for Two-Page Quotation ---
+class QUOTATION_PDF(CachedMetricsFPDF):
+    def __init__(self, quotation_number="Q-N/A", quotation_date="Date N/A", sales_person_code="SP1"):
+        super().__init__()
+        self.set_auto_page_break(auto=True, margin=15)
+        self.set_left_margin(15)
+        self.set_right_margin(15)
+        self.quotation_number = quotation_number
+        self.quotation_date = quotation_date
+        self.sales_person_code = sales_person_code
+        self.default_font = add_calibri_fonts(self)
+        
+    def header(self):
+        logo = branding_image(getattr(self, 'logo_path', None))
+        if logo:
+            try:
+                self.image(logo, x=155, y=8, w=50)
+            except:
+                self.set_font(self.default_font, "B", 10)
+                self.set_xy(150, 8)
+                self.cell(40, 5, "[LOGO]", border=0, align="C")
+            
+        self.set_font(self.default_font, "B", 16)
+        self.set_y(15)
+        self.ln(5)
+
+    def footer(self):
+        self.set_y(-12)
+        add_contact_footer(self, "Helvetica", (("", "[Company Address Placeholder]"),))
+
+def add_clickable_email(pdf, email, label="Email: "):
+    pdf.set_font(pdf.default_font, "B", 12)
+    label_width = pdf.get_string_width(label)
+    pdf.cell(label_width, 4, label, ln=0)
+    
+    pdf.set_text_color(0, 0, 255)
+    pdf.set_font(pdf.default_font, "", 12)
+    pdf.cell(0, 4, email, ln=True, link=f"mailto:{email}")
+    pdf.set_text_color(0, 0, 0)
+
+def add_clickable_phone(pdf, phone, label="Mobile: "):
+    pdf.set_font(pdf.default_font, "B", 12)
+    label_width = pdf.get_string_width(label)
+    pdf.cell(label_width, 4, label, ln=0)
+    
+    pdf.set_text_color(0, 0, 255)
+    pdf.set_font(pdf.default_font, "", 12)
+    tel_number = phone.replace(' ', '').replace('+', '')
+    pdf.cell(0, 4, phone, ln=True, link=f"tel:{tel_number}")
+    pdf.set_text_color(0, 0, 0)
+
+def add_page_one_intro(pdf, quotation):
+    pdf.set_font(pdf.default_font, "B", 12)
+    pdf.set_y(35)
+    pdf.cell(0, 5, f"REF NO.: {quotation.quotation_number}", ln=True, align="L")
+    pdf.cell(0, 5, f"Date: {quotation.quotation_date}", ln=True, align="L")
+    pdf.ln(5)
+
+    pdf.set_font(pdf.default_font, "", 12)
+    pdf.cell(0, 5, "To,", ln=True)
+    pdf.set_font(pdf.default_font, "B", 12)
+    pdf.cell(0, 6, quotation.vendor.name, ln=True)
+    pdf.set_font(pdf.default_font, "", 12)
+    
+    pdf.multi_cell(94, 4, quotation.vendor.address)
+    
+    pdf.ln(3)
+    
+    if quotation.vendor.email:
+        add_clickable_email(pdf, quotation.vendor.email)
+        
+    pdf.ln(1)
+    if quotation.vendor.mobile:
+        add_clickable_phone(pdf, quotation.vendor.mobile)
+    
+    pdf.set_font(pdf.default_font, "BU", 12)
+    pdf.cell(0, 5, f"Kind Attention :- {quotation.vendor.contact}", align="C", ln=True)
+    pdf.ln(5)
+
+    pdf.set_font(pdf.default_font, "BU", 12)
+    pdf.cell(0, 6, f"Subject :- {quotation.subject}", ln=True)
+    pdf.ln(8)
+
+    intro_text = quotation.intro_paragraph
+    if intro_text:
+        write_simple_justified_paragraph(pdf, intro_text)
+
+    if USE_STATIC_FRAGMENTS:
+        get_static_fragment(pdf, "quotation_intro_paragraphs", build_intro_paragraphs).replay(pdf)
+    else:
+        for paragraph in QUOTATION_FIXED_PARAGRAPHS:
+            write_simple_justified_paragraph(pdf, paragraph)
+            pdf.ln(3)
+
+    if pdf.get_y() > 220:
+        pdf.add_page()
+    
+    pdf.set_font(pdf.default_font, "", 12)
+    pdf.set_text_color(0, 0, 0)
+
+    contact_text = "Please revert back to us, if you need any clarification / information at the below mentioned address or email at "
+    pdf.write(5, contact_text)
+
+    sales_person_info = SALES_PERSON_MAPPING.get(quotation.sales_person_code, SALES_PERSON_MAPPING['SP1'])
+    
+    pdf.set_text_color(0, 0, 255)
+    pdf.set_font(pdf.default_font, "U", 12)
+    pdf.write(5, sales_person_info["email"], link=f"mailto:{sales_person_info['email']}")
+
+    pdf.set_text_color(0, 0, 0)
+    pdf.set_font(pdf.default_font, "", 12)
+    pdf.write(5, "  Mobile: ")
+
+    pdf.set_text_color(0, 0, 255)
+    pdf.set_font(pdf.default_font, "U", 12)
+    pdf.write(5, sales_person_info["mobile"], link=f"tel:{sales_person_info['mobile'].replace(' ', '').replace('+', '')}")
+
+    pdf.ln(10)
+    if USE_STATIC_FRAGMENTS:
+        get_static_fragment(pdf, "quotation_social_links", build_social_links).replay(pdf)
+    else:
+        draw_social_links(pdf)
+
+QUOTATION_FIXED_PARAGRAPHS = [
+    "Enclosed please find our Quotation for your information and necessary action.",
+    "[Company Introduction Paragraph 1]",
+    "[Company Introduction Paragraph 2]",
+    "[Company Introduction Paragraph 3]"
+]
+
+QUOTATION_SOCIAL_LINKS = [
+    "https://www.yourcompany.com/",
+    "https://www.linkedin.com/company/yourcompany", 
+    "https://wa.me/910000000000",
+    "https://www.facebook.com/yourcompany",
+    "https://www.instagram.com/yourcompany"
+]
+
+def build_intro_paragraphs(fb):
+    """Fixed intro paragraphs, laid out as write_simple_justified_paragraph would"""
+    family = fb.default_font
+    fb.set_font(family, "", 12)
+    fb.set_text_color(0, 0, 0)
+    for paragraph in QUOTATION_FIXED_PARAGRAPHS:
+        for line in paragraph.split('\n'):
+            line = line.strip()
+            if line:
+                fb.paragraph(fb.content_width, 5, line, align="J")
+                fb.space(3)
+        fb.space(3)
+
+def build_social_links(fb):
+    """Website and social media links, right-aligned under a caption"""
+    family = fb.default_font
+    fb.set_text_color(0, 0, 0)
+    fb.set_font(family, "", 12)
+    fb.line(4, [(0, fb.content_width, "For more information, please visit our web site & Social Media :-", "L", "")])
+
+    fb.set_font(family, "U", 12)
+    fb.set_text_color(0, 0, 255)
+    max_link_width = max(fb.string_width(link) for link in QUOTATION_SOCIAL_LINKS)
+    x_position = fb.content_width - max_link_width
+    for link in QUOTATION_SOCIAL_LINKS:
+        fb.line(4, [(x_position, max_link_width, link, "L", link)])
+    fb.set_text_color(0, 0, 0)
+
+def draw_social_links(pdf):
+    """Website and social media links drawn directly, as build_social_links lays them out"""
+    pdf.set_text_color(0, 0, 0)
+    pdf.set_font(pdf.default_font, "", 12)
+    pdf.cell(0, 4, "For more information, please visit our web site & Social Media :-", ln=True)
+    
+    pdf.set_font(pdf.default_font, "U", 12)
+    pdf.set_text_color(0, 0, 255)
+
+    max_link_width = max(pdf.get_string_width(link) for link in QUOTATION_SOCIAL_LINKS)
+    right_margin = pdf.w - pdf.r_margin
+
+    for link in QUOTATION_SOCIAL_LINKS:
+        x_position = right_margin - max_link_width
+        pdf.set_x(x_position)
+        pdf.cell(max_link_width, 4, link, ln=True, link=link)
+
+    pdf.set_text_color(0, 0, 0)
+
+def write_simple_justified_paragraph(pdf, text):
+    pdf.set_font(pdf.default_font, "", 12)
+    pdf.set_text_color(0, 0, 0)
+    
+    paragraphs = text.split('\n')
+    
+    for paragraph in paragraphs:
+        paragraph = paragraph.strip()
+        if paragraph:
+            pdf.multi_cell(0, 5, paragraph, align='J')
+            pdf.ln(3)
+
+def add_quotation_header(pdf, annexure_text, quotation_text):
+    pdf.set_font(pdf.default_font, "BU", 14)
+    pdf.cell(0, 8, annexure_text, ln=True, align="C")
+    pdf.set_font(pdf.default_font, "BU", 12)
+    pdf.cell(0, 6, quotation_text, ln=True, align="C")
+    pdf.ln(8)
+
+def add_page_two_commercials(pdf, quotation, stamp_path=None):
+    pdf.add_page()
+    pdf.ln(10)
+    
+    add_quotation_header(pdf, quotation.annexure_text, quotation.quotation_title)
+
+    col_widths = [70, 25, 25, 25, 15, 25]
+    headers = ["Description", "Basic Price", "GST Tax @ 18%", "Per Unit Price", "Qty.", "Total"]
+    
+    pdf.set_fill_color(220, 220, 220)
+    pdf.set_font(pdf.default_font, "B", 10)
+    for width, header in zip(col_widths, headers):
+        pdf.cell(width, 6, header, border=1, align="C", fill=True)
+    pdf.ln()
+    
+    pdf.set_font(pdf.default_font, "", 12)
+    totals = calculate_quotation_totals(quotation.products)
+    
+    for product, *line in zip(quotation.products, *(column.tolist() for column in totals["line_paise"])):
+        basic_price, gst_amount, per_unit_price, total = map(Money, line)
+        qty = product.qty
+        
+        start_y = pdf.get_y()
+        
+        desc = product.name
+        pdf.set_font(pdf.default_font, "", 10)
+        
+        desc_lines = pdf.split_lines(col_widths[0], 5, desc)
+        desc_height = len(desc_lines) * 6
+        
+        pdf.set_xy(pdf.l_margin, start_y)
+        
+        if len(desc_lines) > 1:
+            pdf.multi_cell(col_widths[0], 6, desc, border=1)
+            current_y = pdf.get_y()
+            
+            pdf.set_xy(pdf.l_margin + col_widths[0], start_y)
+            pdf.cell(col_widths[1], desc_height, format_inr(basic_price), border=1, align="R")
+            pdf.cell(col_widths[2], desc_height, format_inr(gst_amount), border=1, align="R")
+            pdf.cell(col_widths[3], desc_height, format_inr(per_unit_price), border=1, align="R")
+            pdf.cell(col_widths[4], desc_height, f"{qty:.0f}", border=1, align="C")
+            pdf.cell(col_widths[5], desc_height, format_inr(total), border=1, align="R")
+            
+            pdf.set_y(current_y)
+        else:
+            pdf.cell(col_widths[0], 6, desc, border=1)
+            pdf.cell(col_widths[1], 6, format_inr(basic_price), border=1, align="R")
+            pdf.cell(col_widths[2], 6, format_inr(gst_amount), border=1, align="R")
+            pdf.cell(col_widths[3], 6, format_inr(per_unit_price), border=1, align="R")
+            pdf.cell(col_widths[4], 6, f"{qty:.0f}", border=1, align="C")
+            pdf.cell(col_widths[5], 6, format_inr(total), border=1, align="R")
+            pdf.ln()
+
+    round_off = Money.of(quotation.round_off)
+    pdf.set_font(pdf.default_font, "B", 10)
+    pdf.cell(sum(col_widths[:-1]), 7, "Round Off", border=1, align="R")
+    pdf.cell(col_widths[5], 7, format_inr(round_off), border=1, align="R")
+    pdf.ln()
+
+    grand_total = totals["grand_total"] if quotation.grand_total is None else Money.of(quotation.grand_total)
+    pdf.set_font(pdf.default_font, "B", 10)
+    pdf.cell(sum(col_widths[:-1]), 7, "Final Amount to be Paid", border=1, align="R")
+    pdf.cell(col_widths[5], 7, format_inr(grand_total), border=1, align="R")
+    pdf.ln(15)
+
+    pdf.set_font(pdf.default_font, "", 9)
+
+    stamp = branding_image(stamp_path)
+
+    if not USE_STATIC_FRAGMENTS:
+        draw_terms_box(pdf, quotation, stamp)
+        return
+
+    x_start = pdf.get_x()
+    y_start = pdf.get_y()
+    terms_box = get_static_fragment(pdf, "quotation_terms_box", build_terms_box,
+                                    quotation.price_validity, quotation.sales_person_code, bool(stamp))
+    anchors = terms_box.replay(pdf, x_start, y_start)
+
+    if stamp:
+        try:
+            stamp_x, stamp_y = anchors["stamp"]
+            pdf.image(stamp, x=stamp_x, y=stamp_y, w=20)
+        except:
+            pass
+
+    pdf.set_xy(x_start, y_start + terms_box.height + 10)
+
+def build_terms_box(fb, price_validity, sales_person_code, has_stamp):
+    """Terms & conditions, bank details and signature box of the commercials page"""
+    family = fb.default_font
+    terms = [
+        ("1. Above charges are Inclusive of GST.", ""),
+        ("2. Any changes in Govt. duties, Taxes & Forex rate at the time of dispatch shall be applicable.", ""),
+        ("3. TDS should not be deducted at the time of payment as per Govt. regulations.", ""),
+        ("4. Software licenses are delivered electronically.", ""),
+        ("5. An Internet connection is required to access cloud services.", ""),
+        ("6. Training will be charged at extra cost depending on no. of participants.", ""),
+        ("7. Price Validity: ", price_validity),
+        ("8. Payment: ", "100% Advance along with purchase order"),
+        ("9. Delivery period: ", "1-2 Weeks from the date of Purchase Order"),
+        ("10. Support: ","Includes 12 months of technical support and software updates."),
+        ("11. Installation: ","Online"),
+        ("12. Cheque to be issued on name of: ", '"[Your Company Name]"'),
+        ("13. Order to be placed on: ", "[Your Company Name] \n[Your Company Address]")
+    ]
+
+    bank_info = [
+        ("Name", "[Your Company Name]"),
+        ("Account Number", "[Your Account Number]"),
+        ("IFSC Code", "[Your IFSC Code]"),
+        ("SWIFT Code", "[Your SWIFT Code]"),
+        ("Bank Name", "[Your Bank Name]"),
+        ("Branch", "[Your Branch Name]"),
+        ("MSME", "[Your MSME Number]"),
+        ("GSTIN", "[Your GSTIN]"),
+        ("PAN No", "[Your PAN Number]")
+    ]
+
+    page_width = fb.pdf.w - 1.6 * fb.pdf.l_margin
+    col1_width = page_width * 0.62
+    col2_width = page_width * 0.38
+    padding = 2.5
+    line_height = 4
+    section_spacing = 2
+
+    def calculate_column_height(items, col_width):
+        height = 0
+        for label, value in items:
+            if value:
+                text = f"{label}{value}"
+            else:
+                text = label
+            lines = fb.split_lines(col_width - 2*padding, line_height, text)
+            height += len(lines) * line_height + section_spacing
+        return height + 3*padding
+
+    fb.set_font(family, "", 9)
+    terms_height = calculate_column_height(terms, col1_width)
+    bank_items_height = calculate_column_height(bank_info, col2_width)
+    signature_height = 35
+
+    box_height = max(terms_height, bank_items_height + signature_height)
+
+    fb.rect_at(0, 0, page_width, box_height)
+    fb.line_at(col1_width, 0, col1_width, box_height)
+
+    fb.set_font(family, "B", 12)
+    fb.cell_at(padding, padding, col1_width - 2*padding, 5, "Terms & Conditions:")
+
+    terms_y = padding + 5
+    for i, (label, value) in enumerate(terms):
+        if i < 6:
+            fb.set_font(family, "B", 10)
+            terms_y = fb.text_block_at(padding, terms_y, col1_width - 2*padding, line_height, label)
+        elif value:
+            fb.set_font(family, "", 10)
+            label_width = fb.string_width(label)
+            fb.cell_at(padding, terms_y, label_width, line_height, label)
+
+            fb.set_font(family, "B", 10)
+            terms_y = fb.text_block_at(padding + label_width, terms_y,
+                                       col1_width - 2*padding - label_width, line_height, value)
+        else:
+            terms_y = fb.text_block_at(padding, terms_y, col1_width - 2*padding, line_height, label)
+
+    fb.set_font(family, "B", 12)
+    fb.cell_at(col1_width + padding, padding, col2_width - 2*padding, 5, "Bank Details:")
+
+    bank_y = padding + 5
+    for label, value in bank_info:
+        fb.set_font(family, "", 10)
+        label_width = fb.string_width(f"{label}: ")
+        fb.cell_at(col1_width + padding, bank_y, label_width, line_height, f"{label}: ")
+
+        fb.set_font(family, "B", 10)
+        bank_y = fb.text_block_at(col1_width + padding + label_width, bank_y,
+                                  col2_width - 2*padding - label_width, line_height, value)
+
+    sales_person_info = SALES_PERSON_MAPPING.get(sales_person_code, SALES_PERSON_MAPPING['SP1'])
+    signature_x = col1_width + padding
+    signature_width = col2_width - 2*padding
+    y = box_height - signature_height - 15
+
+    fb.set_font(family, "B", 10)
+    fb.cell_at(signature_x, y, signature_width, 5, "Yours Truly,")
+    fb.cell_at(signature_x, y + 5, signature_width, 5, "For [Your Company Name]")
+    y += 10
+
+    if has_stamp:
+        fb.anchor("stamp", signature_x, y + 2)
+        y += 22
+    else:
+        y += 8
+
+    fb.set_font(family, "", 9)
+    fb.cell_at(signature_x, y, signature_width, 4, sales_person_info["name"])
+    fb.cell_at(signature_x, y + 4, signature_width, 4, "Sales Executive")
+    y += 8
+
+    tel_number = sales_person_info['mobile'].replace(' ', '').replace('+', '')
+    for label, value, link in (("Email: ", sales_person_info["email"], f"mailto:{sales_person_info['email']}"),
+                               ("Mobile: ", sales_person_info["mobile"], f"tel:{tel_number}")):
+        fb.set_text_color(0, 0, 0)
+        fb.set_font(family, "", 9)
+        label_width = fb.string_width(label)
+        fb.cell_at(signature_x, y, label_width, 4, label)
+        fb.set_font(family, "U", 9)
+        fb.set_text_color(0, 0, 255)
+        fb.cell_at(signature_x + label_width, y, signature_width - label_width, 4, value, link=link)
+        y += 4
+    fb.set_text_color(0, 0, 0)
+
+    fb.y = box_height
+
+def draw_terms_box(pdf, quotation, stamp=None):
+    """Terms, bank details and signature box drawn directly, as build_terms_box lays it out"""
+    terms = [
+        ("1. Above charges are Inclusive of GST.", ""),
+        ("2. Any changes in Govt. duties, Taxes & Forex rate at the time of dispatch shall be applicable.", ""),
+        ("3. TDS should not be deducted at the time of payment as per Govt. regulations.", ""),
+        ("4. Software licenses are delivered electronically.", ""),
+        ("5. An Internet connection is required to access cloud services.", ""),
+        ("6. Training will be charged at extra cost depending on no. of participants.", ""),
+        ("7. Price Validity: ", quotation.price_validity),
+        ("8. Payment: ", "100% Advance along with purchase order"),
+        ("9. Delivery period: ", "1-2 Weeks from the date of Purchase Order"),
+        ("10. Support: ","Includes 12 months of technical support and software updates."),
+        ("11. Installation: ","Online"),
+        ("12. Cheque to be issued on name of: ", '"[Your Company Name]"'),
+        ("13. Order to be placed on: ", "[Your Company Name] \n[Your Company Address]")
+    ]
+
+    bank_info = [
+        ("Name", "[Your Company Name]"),
+        ("Account Number", "[Your Account Number]"),
+        ("IFSC Code", "[Your IFSC Code]"),
+        ("SWIFT Code", "[Your SWIFT Code]"),
+        ("Bank Name", "[Your Bank Name]"),
+        ("Branch", "[Your Branch Name]"),
+        ("MSME", "[Your MSME Number]"),
+        ("GSTIN", "[Your GSTIN]"),
+        ("PAN No", "[Your PAN Number]")
+    ]
+
+    x_start = pdf.get_x()
+    y_start = pdf.get_y()
+    page_width = pdf.w - 1.6 * pdf.l_margin
+    col1_width = page_width * 0.62
+    col2_width = page_width * 0.38
+    padding = 2.5
+    line_height = 4
+    section_spacing = 2
+
+    def calculate_column_height(items, col_width):
+        height = 0
+        for label, value in items:
+            if value:
+                text = f"{label}{value}"
+            else:
+                text = label
+            lines = pdf.split_lines(col_width - 2*padding, line_height, text)
+            height += len(lines) * line_height + section_spacing
+        return height + 3*padding
+
+    terms_height = calculate_column_height(terms, col1_width)
+    bank_items_height = calculate_column_height(bank_info, col2_width)
+    signature_height = 35
+    
+    box_height = max(terms_height, bank_items_height + signature_height)
+
+    pdf.rect(x_start, y_start, page_width, box_height)
+    pdf.line(x_start + col1_width, y_start, x_start + col1_width, y_start + box_height)
+
+    pdf.set_font(pdf.default_font, "B", 12)
+    pdf.set_xy(x_start + padding, y_start + padding)
+    pdf.cell(col1_width - 2*padding, 5, "Terms & Conditions:", ln=True)
+
+    terms_y = pdf.get_y()
+    for i, (label, value) in enumerate(terms):
+        pdf.set_xy(x_start + padding, terms_y)
+        
+        if i < 6:
+            pdf.set_font(pdf.default_font, "B", 10)
+            pdf.multi_cell(col1_width - 2*padding, line_height, label)
+            
+        elif value:
+            pdf.set_font(pdf.default_font, "", 10)
+            pdf.cell(pdf.get_string_width(label), line_height, label, ln=0)
+            
+            pdf.set_font(pdf.default_font, "B", 10)
+            remaining_width = col1_width - 2*padding - pdf.get_string_width(label)
+            pdf.multi_cell(remaining_width, line_height, value)
+            
+            pdf.set_font(pdf.default_font, "", 10)
+        else:
+            pdf.multi_cell(col1_width - 2*padding, line_height, label)
+        
+        terms_y = pdf.get_y()
+
+    pdf.set_font(pdf.default_font, "B", 12)
+    pdf.set_xy(x_start + col1_width + padding, y_start + padding)
+    pdf.cell(col2_width - 2*padding, 5, "Bank Details:", ln=True)
+    pdf.set_font(pdf.default_font, "", 12)
+
+    bank_y = pdf.get_y()
+    for label, value in bank_info:
+        pdf.set_xy(x_start + col1_width + padding, bank_y)
+        
+        pdf.set_font(pdf.default_font, "", 10)
+        pdf.cell(pdf.get_string_width(f"{label}: "), line_height, f"{label}: ", ln=0)
+        
+        pdf.set_font(pdf.default_font, "B", 10)
+        remaining_width = col2_width - 2*padding - pdf.get_string_width(f"{label}: ")
+        pdf.multi_cell(remaining_width, line_height, value)
+        
+        bank_y = pdf.get_y()
+
+    signature_start_y = y_start + box_height - signature_height - 15
+    
+    pdf.set_font(pdf.default_font, "B", 10)
+    pdf.set_xy(x_start + col1_width + padding, signature_start_y)
+    pdf.cell(col2_width - 2*padding, 5, "Yours Truly,", ln=True)
+    
+    pdf.set_xy(x_start + col1_width + padding, pdf.get_y())
+    pdf.cell(col2_width - 2*padding, 5, "For [Your Company Name]", ln=True)
+    
+    sales_person_info = SALES_PERSON_MAPPING.get(quotation.sales_person_code, SALES_PERSON_MAPPING['SP1'])
+    
+    if stamp:
+        try:
+            stamp_y = pdf.get_y() + 2
+            stamp_x = x_start + col1_width + padding
+            pdf.image(stamp, x=stamp_x, y=stamp_y, w=20)
+            pdf.set_y(stamp_y + 20)
+        except:
+            pdf.set_y(pdf.get_y() + 8)
+    else:
+        pdf.set_y(pdf.get_y() + 8)
+    
+    pdf.set_font(pdf.default_font, "", 9)
+    pdf.set_xy(x_start + col1_width + padding, pdf.get_y())
+    pdf.cell(col2_width - 2*padding, 4, sales_person_info["name"], ln=True)
+    
+    pdf.set_xy(x_start + col1_width + padding, pdf.get_y())
+    pdf.cell(col2_width - 2*padding, 4, "Sales Executive", ln=True)
+    
+    pdf.set_font(pdf.default_font, "", 9)
+    pdf.set_text_color(0, 0, 0)
+    pdf.set_xy(x_start + col1_width + padding, pdf.get_y())
+    label = "Email: "
+    pdf.cell(pdf.get_string_width(label), 4, label, ln=0)
+    pdf.set_font(pdf.default_font, "U", 9)
+    pdf.set_text_color(0, 0, 255)
+    pdf.cell(col2_width - 2*padding - pdf.get_string_width(label), 4, sales_person_info["email"], 
+             ln=True, link=f"mailto:{sales_person_info['email']}")
+    
+    pdf.set_text_color(0, 0, 0)
+    pdf.set_font(pdf.default_font, "", 9)
+    pdf.set_xy(x_start + col1_width + padding, pdf.get_y())
+    label = "Mobile: "
+    pdf.cell(pdf.get_string_width(label), 4, label, ln=0)
+    pdf.set_font(pdf.default_font, "U", 9)
+    pdf.set_text_color(0, 0, 255)
+    pdf.cell(col2_width - 2*padding - pdf.get_string_width(label), 4, sales_person_info["mobile"], 
+             ln=True, link=f"tel:{sales_person_info['mobile'].replace(' ', '').replace('+', '')}")
+    pdf.set_text_color(0, 0, 0)
+
+    pdf.set_xy(x_start, y_start + box_height + 10)
+    
+def layout_quotation(pdf, quotation_data, logo_path=None, stamp_path=None):
+    """Lay out one quotation on new pages of a QUOTATION_PDF"""
+    quotation = sanitize_document(as_document(quotation_data, QuotationDocument))
+    pdf.quotation_number = quotation.quotation_number
+    pdf.quotation_date = quotation.quotation_date
+    pdf.sales_person_code = quotation.sales_person_code
+    pdf.logo_path = logo_path if branding_image(logo_path) else None
+
+    pdf.add_page()
+    
+    add_page_one_intro(pdf, quotation)
+    add_page_two_commercials(pdf, quotation, stamp_path)
+
+def create_quotation_pdf(quotation_data, logo_path=None, stamp_path=None, optimize=False):
+    pdf = QUOTATION_PDF()
+    if optimize:
+        pdf.optimize_output()
+    layout_quotation(pdf, quotation_data, logo_path, stamp_path)
+    
+    try:
+        return pdf_output_bytes(pdf)
+    except Exception as e:
+        st.error(f"PDF generation failed: {e}")
+        return b""
+
+from fpdf import FPDF
+# --- PDF Class for Tax Invoice ---
+class PDF(CachedMetricsFPDF):
+    def __init__(self):
+        super().__init__()
+        
+        self.default_font = add_calibri_fonts(self)
+
+        self.set_font(self.default_font, "", 8)
+        self.set_left_margin(10)
+        self.set_right_margin(15)
+        
+        self.logo_file = None
+
+    def header(self):
+        logo = branding_image(self.logo_file)
+        if logo and self.page_no() >= 1:
+            try:
+                self.image(logo, x=155, y=8, w=50)
+            except Exception as e:
+                pass
+        self.ln(9)
+        self.set_font(self.default_font, "B", 15)
+        self.cell(0, 6, "TAX INVOICE", ln=True, align="C")
+        self.ln(1)
+        
+    def footer(self):
+        self.set_y(-15)
+        add_contact_footer(self, self.default_font,
+                           (("I", "This is a Computer Generated Invoice"), ("", "[Your Company Address]")))
+
+# --- Function to Create Invoice PDF ---
+def create_invoice_pdf(invoice_data, logo_file=None, stamp_file=None, optimize=False):
+    pdf = PDF()
+    if optimize:
+        pdf.optimize_output()
+    layout_invoice(pdf, invoice_data, logo_file, stamp_file)
+    return pdf_output_bytes(pdf)
+
+def layout_invoice(pdf, invoice_data, logo_file=None, stamp_file=None):
+    """Lay out one invoice on new pages of an invoice PDF"""
+    invoice = sanitize_document(as_document(invoice_data, InvoiceDocument))
+    pdf.set_auto_page_break(auto=True, margin=10)
+    
+    pdf.logo_file = logo_file
+    
+    pdf.add_page()
+
+    pdf.set_font(pdf.default_font, "B", 13)
+    pdf.cell(95, 8, "[Your Company Name].", border="LRT", ln=0)
+    pdf.cell(48, 8, "Invoice No.", border=1, ln=0, align="L")
+    pdf.cell(48, 8, "Invoice Date", border=1, ln=1, align="L")
+
+    y_left_start = pdf.get_y()
+
+    pdf.set_font(pdf.default_font, "", 12)
+    pdf.multi_cell(95, 4, invoice.vendor.address, border="L")
+    
+    vendor_lines = [
+        ("GST No. : ", invoice.vendor.gstin),
+        ("MSME Registration No. : ", invoice.vendor.msme),
+        ("E-Mail : ", "info@yourcompany.com"),
+        ("Mobile No. : ", "0000000000"),
+    ]
+    
+    for i, (label, value) in enumerate(vendor_lines):
+        pdf.set_x(10)
+        pdf.set_font(pdf.default_font, "B", 12)
+        label_width = pdf.get_string_width(label) 
+        pdf.cell(label_width, 6, label, border="L", ln=0)
+        pdf.set_font(pdf.default_font, "", 12)
+        border = "R" if i < len(vendor_lines) - 1 else "R"
+        pdf.cell(95 - label_width, 6, value, border=border, ln=1)
+
+    y_left_end = pdf.get_y()
+
+    pdf.set_xy(105, y_left_start)
+    pdf.set_font(pdf.default_font, "", 12)
+    pdf.cell(48, 8, invoice.invoice_no, border="LR", ln=0, align="L")
+    pdf.cell(48, 8, invoice.invoice_date, border="R", ln=1, align="L")
+
+    payment_terms = invoice.payment_terms
+
+    y_before = pdf.get_y()
+    pdf.set_xy(153, y_before)
+    pdf.multi_cell(48, 4, payment_terms, border="LRT", align="L")
+
+    y_after = pdf.get_y()
+    actual_height = y_after - y_before
+
+    if actual_height < 8:
+        remaining_height = 8 - actual_height
+        pdf.set_xy(153, y_after)
+        pdf.cell(48, remaining_height, "", border="LR", ln=True)
+
+    pdf.set_x(105)
+    pdf.set_font(pdf.default_font, "B", 12)
+    pdf.cell(48, 8, "Supplier's Reference:", border="LRT", ln=0)
+    pdf.set_font(pdf.default_font, "", 12)
+    other_ref_value = invoice.suppliers_reference
+    pdf.cell(48, 8, other_ref_value, border="LRTB", ln=1)
+
+    pdf.set_x(105)
+    pdf.set_font(pdf.default_font, "B", 12)
+    pdf.cell(48, 8, "Other's Reference:", border="LRTB", ln=0)
+    pdf.set_font(pdf.default_font, "", 12)
+    other_ref_value = invoice.other_reference
+    pdf.cell(48, 8, other_ref_value, border="LRTB", ln=1)
+
+    pdf.set_font(pdf.default_font, "B", 12)
+    pdf.cell(95, 6, "Buyer", border="LT", ln=0)
+    pdf.cell(48, 6, "Buyer's Order No.", border=1, ln=0, align="L")
+    pdf.cell(48, 6, "Buyer's Order Date", border=1, ln=1, align="L")
+
+    y_buyer_start = pdf.get_y()
+
+    y_left_buyer_start = pdf.get_y()
+    
+    pdf.set_font(pdf.default_font, "B", 12)
+    pdf.multi_cell(95, 5, invoice.buyer.name, border="LR")
+    
+    pdf.set_font(pdf.default_font, "", 12)
+    pdf.multi_cell(95, 4, invoice.buyer.address, border="LR")
+    
+    buyer_lines = [
+        ("Email :", invoice.buyer.email),
+        ("Mobile No :", invoice.buyer.mobile),
+        ("GST No. :", invoice.buyer.gstin),
+    ]
+    
+    for i, (label, value) in enumerate(buyer_lines):
+        pdf.set_x(10)
+        pdf.set_font(pdf.default_font, "B", 12)
+        label_width = pdf.get_string_width(label) + 1
+        pdf.cell(label_width, 6, label, border="L", ln=0)
+        pdf.set_font(pdf.default_font, "", 12)
+        border = "R" if i < len(buyer_lines) - 1 else "R"
+        pdf.cell(95 - label_width, 6, value, border=border, ln=1)
+
+    y_buyer_left_end = pdf.get_y()
+    total_left_height = y_buyer_left_end - y_left_buyer_start
+
+    pdf.set_xy(105, y_buyer_start)
+    
+    num_right_rows = 4
+    right_cell_height = total_left_height / num_right_rows
+    
+    pdf.set_font(pdf.default_font, "", 12)
+    pdf.cell(48, right_cell_height, invoice.buyers_order_no, border="LR", ln=0, align="L")
+    pdf.cell(48, right_cell_height, invoice.buyers_order_date, border="R", ln=1, align="L")
+
+    pdf.set_x(105)
+    pdf.set_font(pdf.default_font, "B", 12)
+    pdf.cell(48, right_cell_height, "Dispatched Through", border="LRT", ln=0)
+    pdf.set_font(pdf.default_font, "", 12)
+    pdf.cell(48, right_cell_height, invoice.dispatched_through, border="RT", ln=1)
+
+    pdf.set_x(105)
+    pdf.set_font(pdf.default_font, "B", 12)
+    pdf.cell(48, right_cell_height, "Destination", border="LRT", ln=0)
+    pdf.set_font(pdf.default_font, "", 12)
+    destination = invoice.destination
+    pdf.cell(48, right_cell_height, destination, border="RT", ln=1)
+
+    pdf.set_x(105)
+    pdf.set_font(pdf.default_font, "B", 12)
+    pdf.cell(48, right_cell_height, "Terms of delivery", border="LRT", ln=0)
+    pdf.set_font(pdf.default_font, "", 12)
+    pdf.cell(48, right_cell_height, invoice.terms_of_delivery, border="LRT", ln=1)
+
+    pdf.set_y(max(y_buyer_left_end, y_buyer_start + total_left_height))
+    
+    pdf.ln(0.3)
+    
+    pdf.set_font(pdf.default_font, "B", 12)
+    col_widths = [13, 82, 22, 23, 23, 28]
+    
+    pdf.cell(col_widths[0], 5, "Sr.No.", border=1, align="C")
+    pdf.cell(col_widths[1], 5, "Description of Goods", border=1, align="C")
+    pdf.cell(col_widths[2], 5, "HSN/SAC", border=1, align="C")
+    pdf.cell(col_widths[3], 5, "Quantity", border=1, align="C")
+    pdf.cell(col_widths[4], 5, "Unit Rate", border=1, align="C")
+    pdf.cell(col_widths[5], 5, "Amount", border=1, ln=True, align="C")
+
+    pdf.set_font(pdf.default_font, "", 12)
+    line_height = 5
+
+    hsn_codes = []
+    line_amounts = invoice_line_amounts(invoice.items).tolist()
+    
+    for i, item in enumerate(invoice.items, start=1):
+        hsn_codes.append(item.hsn)
+        
+        if pdf.get_y() + 25 > pdf.page_break_trigger:
+            pdf.add_page()
+            pdf.set_font(pdf.default_font, "B", 12)
+            pdf.cell(col_widths[0], 5, "Sr. No.", border=1, align="C")
+            pdf.cell(col_widths[1], 5, "Description of Goods", border=1, align="C")
+            pdf.cell(col_widths[2], 5, "HSN/SAC", border=1, align="C")
+            pdf.cell(col_widths[3], 5, "Quantity", border=1, align="C")
+            pdf.cell(col_widths[4], 5, "Unit Rate", border=1, align="C")
+            pdf.cell(col_widths[5], 5, "Amount", border=1, ln=True, align="C")
+            pdf.set_font(pdf.default_font, "", 12)
+            
+        x_start = pdf.get_x()
+        y_start = pdf.get_y()
+
+        pdf.set_xy(x_start + col_widths[0], y_start)
+        pdf.multi_cell(col_widths[1], line_height, item.description, border="LRT", align="L")
+        y_after_desc = pdf.get_y()
+        
+        row_height = y_after_desc - y_start
+        
+        pdf.set_xy(x_start, y_start)
+        pdf.multi_cell(col_widths[0], row_height, str(i), border="LRT", align="C")
+        
+        pdf.set_xy(x_start + col_widths[0] + col_widths[1], y_start)
+        pdf.multi_cell(col_widths[2], row_height, item.hsn, border="LRT", align="C")
+        
+        pdf.set_xy(x_start + sum(col_widths[:3]), y_start)
+        pdf.multi_cell(col_widths[3], row_height, str(item.quantity), border="LRT", align="C")
+        
+        pdf.set_xy(x_start + sum(col_widths[:4]), y_start)
+        pdf.multi_cell(col_widths[4], row_height, format_inr(item.unit_rate), border="LRT", align="R")
+        
+        amount = Money(line_amounts[i - 1])
+        pdf.set_xy(x_start + sum(col_widths[:-1]), y_start)
+        pdf.multi_cell(col_widths[5], row_height, format_inr(amount), border="LRT", align="R")
+
+        pdf.set_xy(x_start, y_start + row_height)
+
+    x_start = pdf.get_x()
+    y_start = pdf.get_y()
+    
+    empty_row_height = 15
+    
+    pdf.set_xy(x_start, y_start)
+    pdf.multi_cell(col_widths[0], empty_row_height, "", border="LRB", align="C")
+    
+    pdf.set_xy(x_start + col_widths[0], y_start)
+    pdf.multi_cell(col_widths[1], empty_row_height, "", border="LRB", align="C")
+    
+    pdf.set_xy(x_start + col_widths[0] + col_widths[1], y_start)
+    pdf.multi_cell(col_widths[2], empty_row_height, "", border="LRB", align="C")
+    
+    pdf.set_xy(x_start + sum(col_widths[:3]), y_start)
+    pdf.multi_cell(col_widths[3], empty_row_height, "", border="LRB", align="C")
+    
+    pdf.set_xy(x_start + sum(col_widths[:4]), y_start)
+    pdf.multi_cell(col_widths[4], empty_row_height, "", border="LRB", align="C")
+    
+    pdf.set_xy(x_start + sum(col_widths[:-1]), y_start)
+    pdf.multi_cell(col_widths[5], empty_row_height, "", border="LRB", align="C")
+    
+    pdf.set_xy(x_start, y_start + empty_row_height)
+
+    if pdf.get_y() + 60 > pdf.page_break_trigger:
+        pdf.add_page()
+
+    pdf.set_font(pdf.default_font, "B", 12)
+    total_width = sum(col_widths[:5])
+    pdf.ln(0.2)
+    pdf.cell(total_width, 5, "Basic Amount", border=1, align="L")
+    pdf.cell(col_widths[5], 5, format_inr(invoice.totals.basic_amount), border=1, ln=True, align="R")
+    
+    pdf.cell(total_width, 5, "SGST @ 9%", border=1, align="L")
+    pdf.cell(col_widths[5], 5, format_inr(invoice.totals.sgst), border=1, ln=True, align="R")
+    
+    pdf.cell(total_width, 5, "CGST @ 9%", border=1, align="L")
+    pdf.cell(col_widths[5], 5, format_inr(invoice.totals.cgst), border=1, ln=True, align="R")
+    
+    round_off = Money.of(invoice.totals.final_amount) - Money.of(invoice.totals.basic_amount) \
+        - Money.of(invoice.totals.sgst) - Money.of(invoice.totals.cgst)
+    if round_off:
+        pdf.cell(total_width, 5, "Round Off", border=1, align="L")
+        pdf.cell(col_widths[5], 5, format_inr(round_off), border=1, ln=True, align="R")
+
+    pdf.cell(total_width, 5, "Final Amount to be Paid", border=1, align="L")
+    pdf.cell(col_widths[5], 5, format_inr(invoice.totals.final_amount), border=1, ln=True, align="R")
+    
+    pdf.cell(191, 5, "", border=1, ln=True)
+
+    pdf.set_y(pdf.get_y() - 5)
+    pdf.set_x(10)
+
+    pdf.set_font(pdf.default_font, "B", 12)
+    pdf.cell(pdf.get_string_width("Amount Chargeable (in words): "), 5, "Amount Chargeable (in words): ", ln=0)
+
+    pdf.set_font(pdf.default_font, "", 12)
+    pdf.cell(0, 5, invoice.totals.amount_in_words, ln=True)
+
+    if pdf.get_y() + 60 > pdf.page_break_trigger:
+        pdf.add_page()
+
+    pdf.set_font(pdf.default_font, "B", 12)
+    
+    pdf.cell(34, 10, "HSN/SAC", border="LRT", align="C")
+    pdf.cell(34, 10, "Taxable Value", border="LRT", align="C")
+    pdf.cell(60, 5, "Central Tax", border=1, align="C")
+    pdf.cell(63, 5, "State Tax", border=1, ln=True, align="C")
+
+    pdf.cell(34, 1, "", border="L", ln=False)
+    pdf.cell(34, 1, "", border="L", ln=False)
+    pdf.cell(30, 5, "Rate", border="L", align="C")
+    pdf.cell(30, 5, "Amount", border="LR", align="C")
+    pdf.cell(32, 5, "Rate", border="L", align="C")
+    pdf.cell(31, 5, "Amount", border="LR", ln=True, align="C")
+
+    pdf.set_font(pdf.default_font, "", 12)
+    
+    primary_hsn = hsn_codes[0] if hsn_codes else ""
+    
+    hsn_totals = calculate_invoice_totals(invoice.items)
+    hsn_tax_value = hsn_totals["basic_amount"]
+    hsn_sgst = hsn_totals["sgst"]
+    hsn_cgst = hsn_totals["cgst"]
+    
+    pdf.cell(34, 5, primary_hsn, border=1, align="C")
+    pdf.cell(34, 5, format_inr(hsn_tax_value), border=1, align="C")
+    pdf.cell(30, 5, "9%", border=1, align="C")
+    pdf.cell(30, 5, format_inr(hsn_sgst), border=1, align="C")
+    pdf.cell(32, 5, "9%", border=1, align="C")
+    pdf.cell(31, 5, format_inr(hsn_cgst), border=1, ln=True, align="C")
+
+    pdf.set_font(pdf.default_font, "B", 12)
+    pdf.cell(34, 5, "Total", border=1, align="C")
+    pdf.cell(34, 5, format_inr(hsn_tax_value), border=1, align="C")
+    pdf.cell(30, 5, "", border=1, align="C")
+    pdf.cell(30, 5, format_inr(hsn_sgst), border=1, align="C")
+    pdf.cell(32, 5, "", border=1, align="C")
+    pdf.cell(31, 5, format_inr(hsn_cgst), border=1, ln=True, align="C")
+    
+    pdf.set_font(pdf.default_font, "B", 12)
+    label_part = "Tax Amount (in words): "
+    pdf.cell(pdf.get_string_width(label_part), 5, label_part, border="LTB", ln=0)
+
+    pdf.set_font(pdf.default_font, "", 12)
+    value_part = invoice.totals.tax_in_words
+    remaining_width = 189.7 - pdf.get_string_width(label_part)
+    pdf.cell(remaining_width, 5, value_part, border="TRB", ln=True)
+
+    if pdf.get_y() + 80 > pdf.page_break_trigger:
+        pdf.add_page()
+
+    pdf.set_font(pdf.default_font, "B", 10)
+    pdf.cell(95, 5, "Company's Bank Details", ln=0, border=1)
+    pdf.cell(96, 5, "Declaration:", ln=1, border=1)
+
+    y_before = pdf.get_y()
+    x_left = pdf.get_x()
+
+    bank_lines = [
+        ("Bank Name", "[Your Bank Name]"),
+        ("Branch", "[Your Branch Name]"),
+        ("Account No", "[Your Account Number]"),
+        ("IFS Code", "[Your IFS Code]")
+    ]
+    
+    pdf.set_font(pdf.default_font, "", 10)
+    
+    label_start_x = x_left
+    colon_x = label_start_x + 25
+    value_start_x = colon_x + 5
+    
+    current_y = y_before
+    for label, value in bank_lines:
+        pdf.set_xy(label_start_x, current_y)
+        pdf.set_font(pdf.default_font, "B", 10)
+        pdf.cell(25, 5, label, border="L", ln=0)
+        
+        pdf.set_xy(colon_x, current_y)
+        pdf.cell(5, 5, ":", ln=0)
+        
+        pdf.set_xy(value_start_x, current_y)
+        pdf.set_font(pdf.default_font, "", 10)
+        pdf.cell(50, 5, value, border="", ln=1)
+        
+        current_y += 5
+    
+    y_after_left = current_y
+    
+    pdf.set_xy(x_left + 95, y_before)
+    pdf.set_font(pdf.default_font, "", 10)
+    pdf.multi_cell(96, 4, invoice.declaration, border=1)
+    y_after_right = pdf.get_y()
+    
+    max_y = max(y_after_left, y_after_right)
+    pdf.set_y(max_y)
+
+    y_signature_start = pdf.get_y()
+
+    pdf.set_font(pdf.default_font, "B", 10)
+    pdf.cell(95, 6, "Buyer's Company Signature", border="LRT", ln=0, align="C")
+
+    pdf.cell(96, 6, "For [Your Company Name].", border="LR", ln=1, align="C")
+
+    left_signature_box_height = 33
+    right_signature_box_height = 33
+
+    pdf.set_font(pdf.default_font, "I", 10)
+    pdf.set_text_color(128, 128, 128)
+
+    buyer_logo_file = invoice.buyer_logo
+
+    if buyer_logo_file:
+        try:
+            logo_width = 25
+            logo_x = 10 + (95 - logo_width) / 2
+            logo_y = pdf.get_y() + 4
+            
+            pdf.image(branding_image(buyer_logo_file), x=logo_x, y=logo_y, w=logo_width)
+            
+            pdf.set_xy(10, logo_y + logo_width + 2)
+            pdf.set_font(pdf.default_font, "B", 9)
+            pdf.cell(95, 4, invoice.buyer.name, border=0, ln=1, align="C")
+            
+            pdf.set_xy(10, pdf.get_y() + 8)
+            pdf.set_font(pdf.default_font, "", 9)
+            pdf.cell(95, 4, "_________________________", border=0, ln=1, align="C")
+            pdf.cell(95, 4, "Authorized Signatory", border=0, ln=1, align="C")
+            
+            pdf.set_xy(10, y_signature_start + 6)
+            pdf.cell(95, left_signature_box_height, "", border="LRB")
+            
+            y_after_left_signature = y_signature_start + 6 + left_signature_box_height
+            
+        except Exception as e:
+            st.warning(f"Could not add buyer logo: {e}")
+            pdf.multi_cell(95, left_signature_box_height/5, "\n\n(Space for Buyer's Company\nStamp and Signature)", border="LRB", align="C")
+            y_after_left_signature = pdf.get_y()
+    else:
+        pdf.multi_cell(95, left_signature_box_height/5, "\n\n\n(Space for Buyer's Company\nStamp and Signature)", border="LRB", align="C")
+        y_after_left_signature = pdf.get_y()
+
+    pdf.set_xy(105, y_signature_start + 5)
+    pdf.set_text_color(0, 0, 0)
+
+    stamp = branding_image(stamp_file)
+    if stamp:
+        try:
+            stamp_width = 25
+            stamp_x = 105 + (96 - stamp_width) / 2
+            stamp_y = pdf.get_y() + 2
+            pdf.image(stamp, x=stamp_x, y=stamp_y, w=stamp_width)
+        except Exception as e:
+            st.warning(f"Could not add stamp: {e}")
+
+    pdf.set_xy(105, y_signature_start + 10 + right_signature_box_height - 10)
+    pdf.set_font(pdf.default_font, "B", 10)
+    pdf.cell(96, 5, "Authorized Signatory", border=0, ln=True, align="C")
+
+    pdf.set_xy(105, y_signature_start + 6)
+    pdf.cell(96, right_signature_box_height, "", border="LRB")
+
+    pdf.set_y(max(y_after_left_signature, y_signature_start + 6 + right_signature_box_height))
+
+# --- PDF Class ---
+class PO_PDF(CachedMetricsFPDF):
+    def __init__(self, po_number="PO-N/A", po_date="Date N/A"):
+        super().__init__()
+        self.po_number = po_number
+        self.po_date = po_date
+        self.set_auto_page_break(auto=False, margin=10)
+        self.set_left_margin(15)
+        self.set_right_margin(15)
+        self.logo_path = None
+        self.default_font = add_calibri_fonts(self)
+
+        self.website_url = "https://yourcompany.com/"
+    def header(self):
+        self.ln(5)
+        if self.document_page_no() == 1:
+            self.ln(1)
+            logo = branding_image(self.logo_path)
+            if logo:
+                self.image(logo, x=155, y=8, w=50,link=self.website_url)
+                self.ln(4)
+            self.set_font(self.default_font, "BU", 15)
+            self.cell(0, 15, "PURCHASE ORDER", ln=True, align="C")
+            self.ln(1)
+
+            self.set_font(self.default_font, "", 12)
+            self.set_xy(140,33)
+            self.multi_cell(60,4,
+                            f"PO No: {self.sanitize_text(self.po_number)}\n"
+                            f"Date: {self.sanitize_text(self.po_date)}",
+                            new_x=XPos.LMARGIN, new_y=YPos.NEXT)
+
+    def footer(self):
+        self.set_y(-12)
+        add_contact_footer(self, "Helvetica", (("", "[Your Company Address]"),))
+
+    def section_title(self, title):
+        self.set_font(self.default_font, "B", 12)
+        self.cell(0, 6, self.sanitize_text(title), ln=True)
+        self.ln(1)
+
+def number_to_words(number):
+    """Convert number to words"""
+    return amount_in_words(number)
+
+def create_po_pdf(po_data, logo_path=None, optimize=False):
+    pdf = PO_PDF()
+    if optimize:
+        pdf.optimize_output()
+    layout_po(pdf, po_data, logo_path)
+    return pdf_output_bytes(pdf)
+
+def layout_po(pdf, po_data, logo_path=None):
+    """Lay out one purchase order on new pages of a PO_PDF"""
+    po = sanitize_document(as_document(po_data, PurchaseOrderDocument))
+    pdf.po_number = po.po_number
+    pdf.po_date = po.po_date
+    pdf.logo_path = logo_path
+    pdf.add_page()
+
+    pdf.set_font(pdf.default_font, "B", 12)
+    pdf.section_title("To:")
+
+    pdf.set_font(pdf.default_font, "B", 12)
+    pdf.multi_cell(90, 5, po.vendor.name, new_x=XPos.LMARGIN, new_y=YPos.NEXT)
+
+    pdf.set_font(pdf.default_font, "", 12)
+    pdf.multi_cell(90, 5, po.vendor.address, new_x=XPos.LMARGIN, new_y=YPos.NEXT)
+
+    pdf.set_font(pdf.default_font, "B", 12)
+    pdf.write(5, "Kind Attend: ")
+    pdf.set_font(pdf.default_font, "", 12)
+    pdf.multi_cell(95, 5, po.vendor.contact, new_x=XPos.LMARGIN, new_y=YPos.NEXT)
+
+    pdf.set_font(pdf.default_font, "B", 12)
+    pdf.write(5, "Mobile: ")
+    pdf.set_font(pdf.default_font, "", 12)
+    pdf.multi_cell(95, 5, po.vendor.mobile, new_x=XPos.LMARGIN, new_y=YPos.NEXT)
+
+    pdf.ln(5)
+
+    start_y = pdf.get_y()
+
+    pdf.set_font(pdf.default_font, "B", 12)
+    pdf.cell(90, 5, "Bill To:", ln=1)
+
+    pdf.set_font(pdf.default_font, "B", 12)
+    pdf.multi_cell(90, 5, po.bill_to.name, new_x=XPos.LMARGIN, new_y=YPos.NEXT)
+
+    pdf.set_font(pdf.default_font, "", 12)
+    pdf.multi_cell(90, 5, po.bill_to.address, new_x=XPos.LMARGIN, new_y=YPos.NEXT)
+
+    y_after_bill = pdf.get_y()
+
+    pdf.set_xy(110, start_y)
+    pdf.set_font(pdf.default_font, "B", 12)
+    pdf.cell(90, 5, "Ship To:", ln=1)
+    pdf.set_x(110)
+
+    pdf.set_font(pdf.default_font, "B", 12)
+    pdf.multi_cell(90, 5, po.ship_to.name, new_x=XPos.LMARGIN, new_y=YPos.NEXT)
+
+    pdf.set_x(110)
+    pdf.set_font(pdf.default_font, "", 12)
+    pdf.multi_cell(90, 5, po.ship_to.address, new_x=XPos.LMARGIN, new_y=YPos.NEXT)
+
+    y_after_ship = pdf.get_y()
+
+    pdf.set_y(max(y_after_bill, y_after_ship))
+    pdf.ln(2)
+    
+    pdf.set_font(pdf.default_font, "B", 12)
+    pdf.write(5, "GST NO: ")
+    pdf.set_font(pdf.default_font, "", 12)
+    pdf.multi_cell(0, 5, po.vendor.gstin, new_x=XPos.LMARGIN, new_y=YPos.NEXT)
+
+    pdf.set_font(pdf.default_font, "B", 12)
+    pdf.write(5, "PAN NO: ")
+    pdf.set_font(pdf.default_font, "", 12)
+    pdf.multi_cell(0, 5, po.vendor.pan, new_x=XPos.LMARGIN, new_y=YPos.NEXT)
+
+    pdf.set_font(pdf.default_font, "B", 12)
+    pdf.write(5, "MSME Registration No: ")
+    pdf.set_font(pdf.default_font, "", 12)
+    pdf.multi_cell(0, 5, po.vendor.msme, new_x=XPos.LMARGIN, new_y=YPos.NEXT)
+
+    pdf.ln(2)
+
+    col_widths = [65, 22, 30, 25, 15, 22]
+    headers = ["Product", "Basic", "GST TAX @ 18%", "Per Unit Price", "Qty.", "Total"]
+    pdf.set_fill_color(220, 220, 220)
+    pdf.set_font(pdf.default_font, "B", 12)
+    for h, w in zip(headers, col_widths):
+        pdf.cell(w, 6, h, border=1, align="C", fill=True)
+    pdf.ln()
+
+    pdf.set_font(pdf.default_font, "", 12)
+    line_height = 5
+
+    totals = calculate_quotation_totals(po.products)
+    rounded_total = totals["grand_total"]
+    round_off = totals["round_off"]
+
+    for p, *line in zip(po.products, *(column.tolist() for column in totals["line_paise"])):
+        basic, gst_amt, per_unit_price, total = map(Money, line)
+        name = p.name
+
+        num_lines = pdf.split_lines(col_widths[0], line_height, name)
+        max_lines = max(len(num_lines), 1)
+        row_height = line_height * max_lines
+
+        x_start = pdf.get_x()
+        y_start = pdf.get_y()
+
+        pdf.multi_cell(col_widths[0], line_height, name, border=1, new_x=XPos.LMARGIN, new_y=YPos.NEXT)
+        pdf.set_xy(x_start + col_widths[0], y_start)
+        pdf.cell(col_widths[1], row_height, format_inr(basic), border=1, align="R")
+        pdf.cell(col_widths[2], row_height, format_inr(gst_amt), border=1, align="R")
+        pdf.cell(col_widths[3], row_height, format_inr(per_unit_price), border=1, align="R")
+        pdf.cell(col_widths[4], row_height, f"{p.qty:.2f}", border=1, align="C")
+        pdf.cell(col_widths[5], row_height, format_inr(total), border=1, align="R")
+        pdf.ln(row_height)
+
+    pdf.set_font(pdf.default_font, "B", 12)
+    pdf.cell(sum(col_widths[:-1]), 6, "Round Off", border=1, align="R")
+    pdf.cell(col_widths[5], 6, format_inr(round_off), border=1, align="R")
+    pdf.ln()
+
+    pdf.set_font(pdf.default_font, "B", 12)
+    pdf.cell(sum(col_widths[:-1]), 6, "Final Amount to be Paid", border=1, align="R")
+    pdf.cell(col_widths[5], 6, format_inr(rounded_total), border=1, align="R")
+    pdf.ln(4)
+
+    pdf.ln(5)
+    pdf.set_font(pdf.default_font, "B", 12)
+    pdf.cell(45, 4, "Amount in Words")
+    pdf.cell(5, 4, ":")
+    pdf.set_font(pdf.default_font, "", 12)
+    pdf.multi_cell(0, 4, po.amount_words, new_x=XPos.LMARGIN, new_y=YPos.NEXT)
+
+    pdf.set_font(pdf.default_font, "B", 12)
+
+    pdf.cell(45, 5, "Taxes")
+    pdf.cell(5, 4, ":")
+    pdf.set_font(pdf.default_font, "", 12)
+    pdf.multi_cell(0, 5, f"As specified above", new_x=XPos.LMARGIN, new_y=YPos.NEXT)
+
+    pdf.set_font(pdf.default_font, "B", 12)
+    pdf.cell(45, 5, "Payment")
+    pdf.cell(5, 4, ":")
+    pdf.set_font(pdf.default_font, "", 12)
+    pdf.multi_cell(0, 5, po.payment_terms, new_x=XPos.LMARGIN, new_y=YPos.NEXT)
+
+    pdf.set_font(pdf.default_font, "B", 12)
+    pdf.cell(45, 5, "Delivery")
+    pdf.cell(5, 4, ":")
+    pdf.set_font(pdf.default_font, "", 12)
+    pdf.multi_cell(0, 5, po.delivery_terms, new_x=XPos.LMARGIN, new_y=YPos.NEXT)
+
+    pdf.ln(2)
+
+    pdf.section_title("End User Details")
+    pdf.set_font(pdf.default_font, "", 12)
+
+    pdf.set_font(pdf.default_font, "B", 12)
+    pdf.cell(45, 5, "Company Name")
+    pdf.cell(5, 4, ":")
+    pdf.set_font(pdf.default_font, "", 12)
+    pdf.multi_cell(0, 5, po.end_user.name, new_x=XPos.LMARGIN, new_y=YPos.NEXT)
+
+    pdf.set_font(pdf.default_font, "B", 12)
+    pdf.cell(45, 5, "Company Address")
+    pdf.cell(5, 4, ":")
+    pdf.set_font(pdf.default_font, "", 12)
+    pdf.multi_cell(0, 5, po.end_user.address, new_x=XPos.LMARGIN, new_y=YPos.NEXT)
+
+    pdf.set_font(pdf.default_font, "B", 12)
+    pdf.cell(45, 5, "Contact")
+    pdf.cell(5, 4, ":")
+    pdf.set_font(pdf.default_font, "", 12)
+    pdf.multi_cell(0, 5, po.end_user.contact, new_x=XPos.LMARGIN, new_y=YPos.NEXT)
+
+    pdf.set_font(pdf.default_font, "B", 12)
+    pdf.cell(45, 5, "Mobile No:")
+    pdf.cell(5, 4, ":")
+    pdf.set_font(pdf.default_font, "", 12)
+    pdf.multi_cell(0, 5, po.end_user.mobile, new_x=XPos.LMARGIN, new_y=YPos.NEXT)
+
+    pdf.set_font(pdf.default_font, "B", 12)
+    pdf.cell(45, 5, "Email")
+    pdf.cell(5, 4, ":")
+    pdf.set_font(pdf.default_font, "", 12)
+    pdf.multi_cell(0, 5, po.end_user.email, new_x=XPos.LMARGIN, new_y=YPos.NEXT)
+
+    pdf.ln(5)
+    pdf.set_font(pdf.default_font, "", 12)
+    pdf.cell(0, 5, f"For, {po.company_name}", ln=True, border=0, align="L")
+    stamp_path = None
+    if stamp_path and os.path.exists(stamp_path):
+        pdf.ln(2)
+        pdf.image(stamp_path, x=pdf.get_x(), y=pdf.get_y(), w=25)
+        pdf.ln(15)
+
+def safe_str_state(key, default=""):
+    """Ensure session_state value exists and is always a string."""
+    if key not in st.session_state or not isinstance(st.session_state[key], str):
+        st.session_state[key] = str(default)
+    return st.session_state[key] 
+
+def safe_image_path(image_path, default_name):
+    """Safely handle image paths, return None if file doesn't exist"""
+    if image_path and os.path.exists(image_path):
+        return image_path
+    else:
+        st.sidebar.warning(f"⚠ {default_name} not found")
+        return None
+
+# --- Remote Branding Fetcher ---
+# Remote images go through one pooled HTTP session and a small on-disk cache.
+# Entries younger than the TTL are served without a request; older ones are
+# revalidated with ETag/Last-Modified, and the cached copy is used when offline.
+BRANDING_CACHE_DIR = "branding_cache"
+BRANDING_CACHE_TTL_SECONDS = 24 * 60 * 60
+
+def new_http_session():
+    """requests.Session with a connection pool"""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=8)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+def get_http_session():
+    """Shared requests.Session with a connection pool"""
+    return process_resource("http_session", new_http_session)
+
+def _branding_cache_paths(url, cache_dir):
+    key = hashlib.sha256(url.encode("utf-8")).hexdigest()
+    return os.path.join(cache_dir, f"{key}.bin"), os.path.join(cache_dir, f"{key}.json")
+
+def _write_branding_cache(url, cache_dir, content, meta):
+    os.makedirs(cache_dir, exist_ok=True)
+    data_path, meta_path = _branding_cache_paths(url, cache_dir)
+    if content is not None:
+        write_file_atomic(data_path, content)
+    write_file_atomic(meta_path, json.dumps(meta).encode("utf-8"))
+
+def fetch_cached_image(url, timeout=10, session=None, cache_dir=BRANDING_CACHE_DIR, ttl=BRANDING_CACHE_TTL_SECONDS):
+    """Fetch image bytes through the revalidating on-disk cache"""
+    data_path, meta_path = _branding_cache_paths(url, cache_dir)
+    cached = None
+    meta = {}
+    try:
+        with open(meta_path, "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        with open(data_path, "rb") as f:
+            cached = f.read()
+    except (OSError, ValueError):
+        meta = {}
+
+    if cached is not None and time.time() - meta.get("fetched_at", 0) < ttl:
+        return cached
+
+    headers = {}
+    if cached is not None:
+        if meta.get("etag"):
+            headers["If-None-Match"] = meta["etag"]
+        if meta.get("last_modified"):
+            headers["If-Modified-Since"] = meta["last_modified"]
+
+    try:
+        response = (session or get_http_session()).get(url, headers=headers, timeout=timeout)
+    except requests.RequestException:
+        if cached is not None:
+            return cached
+        raise
+
+    if response.status_code == 304 and cached is not None:
+        meta["fetched_at"] = time.time()
+        _write_branding_cache(url, cache_dir, None, meta)
+        return cached
+    if response.status_code == 200:
+        _write_branding_cache(url, cache_dir, response.content, {
+            "url": url,
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified"),
+            "fetched_at": time.time(),
+        })
+        return response.content
+    if cached is not None:
+        return cached
+    raise requests.HTTPError(f"HTTP {response.status_code} for {url}", response=response)
+
+def load_images_from_github(logo_url=None, stamp_url=None, timeout=10):
+    """Fetch logo and stamp concurrently through the branding cache"""
+    urls = {"Logo": logo_url or LOGO_URL, "Stamp": stamp_url or STAMP_URL}
+    results = {"Logo": None, "Stamp": None}
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        futures = {name: executor.submit(fetch_cached_image, url, timeout)
+                   for name, url in urls.items() if url}
+        for name, future in futures.items():
+            try:
+                results[name] = future.result()
+            except Exception as e:
+                st.sidebar.warning(f"⚠ {name} download failed: {str(e)}")
+
+    return results["Logo"], results["Stamp"]
+
+GITHUB_BRANDING_RETRY_SECONDS = 60
+
+def get_session_assets():
+    """Branding images owned by the current session, kept in memory only"""
+    if "branding_assets" not in st.session_state:
+        st.session_state.branding_assets = {}
+    return st.session_state.branding_assets
+
+def save_uploaded_file(uploaded_file, asset_name):
+    """Store an uploaded image in the session's asset namespace"""
+    assets = get_session_assets()
+    cached = assets.get(asset_name)
+    if cached and cached["file_id"] == getattr(uploaded_file, "file_id", uploaded_file.name):
+        return cached["data"]
+    try:
+        data = uploaded_file.getvalue()
+        Image.open(io.BytesIO(data)).verify()
+    except Exception as e:
+        st.sidebar.error(f"Error reading {uploaded_file.name}: {str(e)}")
+        return None
+    assets[asset_name] = {"file_id": getattr(uploaded_file, "file_id", uploaded_file.name), "data": data}
+    return data
+
+def load_session_github_images():
+    """GitHub branding for this session; images that arrived are kept, missing ones are retried after a pause"""
+    assets = get_session_assets()
+    missing = [name for name in ("github_logo", "github_stamp") if assets.get(name) is None]
+    if missing and time.time() - assets.get("github_attempted", 0) >= GITHUB_BRANDING_RETRY_SECONDS:
+        assets["github_attempted"] = time.time()
+        for name, data in zip(("github_logo", "github_stamp"), load_images_from_github()):
+            if name in missing and data is not None:
+                assets[name] = data
+    return assets.get("github_logo"), assets.get("github_stamp")
+
+# --- Document Archive ---
+# Generated PDFs are stored zlib-compressed under their SHA-256 so identical
+# documents share one blob; a SQLite table indexes the metadata for lookups.
+ARCHIVE_DIR = "document_archive"
+ARCHIVE_DB_FILE = os.path.join(ARCHIVE_DIR, "archive.db")
+ARCHIVE_BLOB_DIR = os.path.join(ARCHIVE_DIR, "blobs")
+
+ARCHIVE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    id INTEGER PRIMARY KEY,
+    doc_type TEXT NOT NULL,
+    number TEXT NOT NULL,
+    doc_date TEXT NOT NULL,
+    sales_person TEXT NOT NULL DEFAULT '',
+    party TEXT NOT NULL DEFAULT '' COLLATE NOCASE,
+    gstin TEXT NOT NULL DEFAULT '',
+    grand_total REAL NOT NULL DEFAULT 0,
+    sha256 TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    created_at TEXT NOT NULL,
+    UNIQUE (doc_type, number, sha256)
+);
+CREATE INDEX IF NOT EXISTS idx_documents_number ON documents (number);
+CREATE INDEX IF NOT EXISTS idx_documents_party ON documents (party);
+CREATE INDEX IF NOT EXISTS idx_documents_gstin ON documents (gstin);
+CREATE INDEX IF NOT EXISTS idx_documents_type_date ON documents (doc_type, doc_date);
+CREATE INDEX IF NOT EXISTS idx_documents_gstin_type_date ON documents (gstin, doc_type, doc_date);
+CREATE INDEX IF NOT EXISTS idx_documents_party_type_date ON documents (party, doc_type, doc_date);
+CREATE TABLE IF NOT EXISTS issued_numbers (
+    id INTEGER PRIMARY KEY,
+    doc_type TEXT NOT NULL,
+    number TEXT NOT NULL,
+    series TEXT NOT NULL,
+    fy TEXT NOT NULL,
+    sequence INTEGER,
+    issued_at TEXT NOT NULL,
+    UNIQUE (doc_type, number)
+);
+CREATE TABLE IF NOT EXISTS contracts (
+    contract_key TEXT PRIMARY KEY,
+    contract_no TEXT NOT NULL DEFAULT '',
+    serial_no TEXT NOT NULL DEFAULT '',
+    product TEXT NOT NULL DEFAULT '',
+    description TEXT NOT NULL,
+    quantity REAL NOT NULL DEFAULT 1,
+    unit_rate REAL NOT NULL DEFAULT 0,
+    hsn TEXT NOT NULL DEFAULT '',
+    end_date TEXT NOT NULL,
+    party TEXT NOT NULL DEFAULT '' COLLATE NOCASE,
+    gstin TEXT NOT NULL DEFAULT '',
+    buyer TEXT NOT NULL,
+    vendor TEXT NOT NULL,
+    invoice_number TEXT NOT NULL,
+    invoice_date TEXT NOT NULL,
+    renewal_quote TEXT NOT NULL DEFAULT ''
+);
+CREATE INDEX IF NOT EXISTS idx_contracts_end_date ON contracts (end_date);
+CREATE TABLE IF NOT EXISTS invoice_lines (
+    invoice_no TEXT NOT NULL,
+    line_no INTEGER NOT NULL,
+    invoice_date TEXT NOT NULL,
+    fy TEXT NOT NULL,
+    quarter TEXT NOT NULL,
+    buyer TEXT NOT NULL DEFAULT '',
+    buyer_gstin TEXT NOT NULL DEFAULT '',
+    invoice_paise INTEGER NOT NULL,
+    hsn TEXT NOT NULL DEFAULT '',
+    description TEXT NOT NULL DEFAULT '',
+    quantity REAL NOT NULL,
+    rate_bp INTEGER NOT NULL,
+    taxable_paise INTEGER NOT NULL,
+    sgst_paise INTEGER NOT NULL,
+    cgst_paise INTEGER NOT NULL,
+    igst_paise INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (invoice_no, line_no)
+);
+CREATE INDEX IF NOT EXISTS idx_invoice_lines_period ON invoice_lines (fy, quarter);
+CREATE TABLE IF NOT EXISTS sales_rollups (
+    doc_type TEXT NOT NULL,
+    sales_person TEXT NOT NULL,
+    fy TEXT NOT NULL,
+    quarter TEXT NOT NULL,
+    party TEXT NOT NULL COLLATE NOCASE,
+    documents INTEGER NOT NULL DEFAULT 0,
+    amount_paise INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (doc_type, sales_person, fy, quarter, party)
+);
+CREATE INDEX IF NOT EXISTS idx_sales_rollups_period ON sales_rollups (fy, quarter);
+CREATE TABLE IF NOT EXISTS product_rollups (
+    doc_type TEXT NOT NULL,
+    sales_person TEXT NOT NULL,
+    fy TEXT NOT NULL,
+    quarter TEXT NOT NULL,
+    product TEXT NOT NULL,
+    lines INTEGER NOT NULL DEFAULT 0,
+    quantity REAL NOT NULL DEFAULT 0,
+    amount_paise INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (doc_type, sales_person, fy, quarter, product)
+);
+CREATE INDEX IF NOT EXISTS idx_product_rollups_period ON product_rollups (fy, quarter);
+CREATE TABLE IF NOT EXISTS sequence_bitmaps (
+    doc_type TEXT NOT NULL,
+    series TEXT NOT NULL,
+    fy TEXT NOT NULL,
+    bitmap BLOB NOT NULL,
+    PRIMARY KEY (doc_type, series, fy)
+);
+"""
+
+# Document contents are searchable through an FTS5 table whose rowid is the
+# documents row it indexes. SQLite builds without FTS5 simply skip it.
+SEARCH_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS document_text USING fts5(
+    number, parties, body, doc_type UNINDEXED, tokenize = "unicode61 tokenchars '-_/'"
+);
+"""
+
+def sqlite_has_fts5():
+    try:
+        sqlite3.connect(":memory:").execute("CREATE VIRTUAL TABLE probe USING fts5(text)")
+        return True
+    except sqlite3.OperationalError:
+        return False
+
+ARCHIVE_FTS5 = sqlite_has_fts5()
+_archive_databases = process_resource("archive_databases", set)
+
+def to_iso_date(date_text):
+    """Convert a dd-mm-YYYY document date to YYYY-MM-DD; raises ValueError if it does not parse"""
+    if isinstance(date_text, (datetime.date, datetime.datetime)):
+        return date_text.strftime("%Y-%m-%d")
+    return datetime.datetime.strptime(str(date_text).strip(), "%d-%m-%Y").strftime("%Y-%m-%d")
+
+def valid_document_date(date_text):
+    """Whether a document date is in the dd-mm-YYYY form the archive indexes"""
+    try:
+        to_iso_date(date_text)
+    except ValueError:
+        return False
+    return True
+
+def like_prefix(text):
+    """LIKE pattern (with ESCAPE '\\') matching values that start with text literally"""
+    return text.strip().replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+
+def get_archive_connection():
+    """Open the archive index; WAL mode and the schema are set up once per database per process"""
+    os.makedirs(ARCHIVE_BLOB_DIR, exist_ok=True)
+    path = os.path.abspath(ARCHIVE_DB_FILE)
+    fresh = path not in _archive_databases or not os.path.exists(path)
+    conn = sqlite3.connect(path, timeout=30)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA synchronous=NORMAL")
+    if fresh:
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.executescript(ARCHIVE_SCHEMA)
+        if ARCHIVE_FTS5:
+            conn.executescript(SEARCH_SCHEMA)
+        rekey_invoice_series(conn)
+        _archive_databases.add(path)
+    return conn
+
+def archive_blob_path(sha256):
+    """Location of a compressed PDF blob, fanned out by the first two hex digits"""
+    return os.path.join(ARCHIVE_BLOB_DIR, sha256[:2], f"{sha256[2:]}.pdf.z")
+
+def store_pdf_blob(pdf_bytes):
+    """Write PDF bytes to the content-addressed store and return their hash"""
+    sha256 = hashlib.sha256(pdf_bytes).hexdigest()
+    blob_path = archive_blob_path(sha256)
+    if not os.path.exists(blob_path):
+        os.makedirs(os.path.dirname(blob_path), exist_ok=True)
+        tmp_path = f"{blob_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(zlib.compress(pdf_bytes, 6))
+        os.replace(tmp_path, blob_path)
+    return sha256
+
+def archive_document(pdf_bytes, doc_type, number, doc_date, sales_person="", party="", gstin="", grand_total=0.0,
+                     document=None):
+    """Store a generated PDF and record its metadata row; returns the blob hash
+
+    The first archive of a number is added to the sales rollups. Passing the document (model or legacy
+    dict) adds its product lines to them too and makes its contents searchable; for invoices it also
+    indexes contract lines for renewals and line items for GST returns.
+    """
+    if not pdf_bytes:
+        return None
+    sha256 = store_pdf_blob(pdf_bytes)
+    model = as_document(document, DOCUMENT_MODELS[doc_type]) if document is not None else None
+    conn = get_archive_connection()
+    try:
+        with conn:
+            first_archive = conn.execute("SELECT 1 FROM documents WHERE doc_type = ? AND number = ? LIMIT 1",
+                                         (doc_type, number)).fetchone() is None
+            inserted = conn.execute(
+                "INSERT OR IGNORE INTO documents "
+                "(doc_type, number, doc_date, sales_person, party, gstin, grand_total, sha256, size, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (doc_type, number, to_iso_date(doc_date), sales_person or "", (party or "").strip(),
+                 (gstin or "").strip().upper(), float(grand_total or 0), sha256, len(pdf_bytes),
+                 datetime.datetime.now().isoformat(timespec="seconds")))
+            if inserted.rowcount and ARCHIVE_FTS5:
+                fields = (document_search_fields(doc_type, model) if model is not None
+                          else (number, f"{party or ''} {gstin or ''}", ""))
+                index_document_text(conn, inserted.lastrowid, doc_type, *fields)
+            if first_archive:
+                record_sales(conn, doc_type, number, doc_date, sales_person, party, grand_total, model)
+            if doc_type == "invoice" and model is not None:
+                index_invoice_contracts(conn, model)
+                index_invoice_lines(conn, model)
+    finally:
+        conn.close()
+    return sha256
+
+def find_archived_documents(number=None, party=None, doc_type=None, limit=50):
+    """Look up archived documents by exact number or party-name prefix"""
+    clauses = []
+    params = []
+    if number:
+        clauses.append("number = ?")
+        params.append(number.strip())
+    if party:
+        clauses.append("party LIKE ? ESCAPE '\\'")
+        params.append(like_prefix(party))
+    if doc_type:
+        clauses.append("doc_type = ?")
+        params.append(doc_type)
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+    conn = get_archive_connection()
+    try:
+        rows = conn.execute(
+            f"SELECT * FROM documents {where} ORDER BY doc_date DESC, id DESC LIMIT ?",
+            params + [int(limit)]).fetchall()
+        return [dict(row) for row in rows]
+    finally:
+        conn.close()
+
+def load_archived_pdf(sha256):
+    """Read a PDF back from the content-addressed store"""
+    try:
+        with open(archive_blob_path(sha256), "rb") as f:
+            return zlib.decompress(f.read())
+    except (OSError, zlib.error):
+        return None
+
+def render_archive_sidebar():
+    """Sidebar search over previously generated documents"""
+    st.sidebar.header("📁 Document Archive")
+    search_number = st.sidebar.text_input("Document Number", key="archive_search_number")
+    search_party = st.sidebar.text_input("Party Name", key="archive_search_party")
+    if not (search_number or search_party):
+        return
+
+    try:
+        results = find_archived_documents(number=search_number, party=search_party, limit=20)
+    except sqlite3.Error as e:
+        st.sidebar.error(f"Archive lookup failed: {e}")
+        return
+
+    if not results:
+        st.sidebar.info("No archived documents found")
+        return
+
+    selected = st.sidebar.selectbox(
+        "Matching documents",
+        options=range(len(results)),
+        format_func=lambda i: f"{results[i]['doc_type'].title()} {results[i]['number']} - "
+                              f"{results[i]['party']} (₹{format_inr(results[i]['grand_total'])})",
+        key="archive_result_select")
+    row = results[selected]
+    render_deferred_download("⬇ Download Archived PDF", lambda: load_archived_pdf(row["sha256"]),
+                             f"{row['number'].replace('/', '_')}.pdf", key="archive_download_button",
+                             container=st.sidebar)
+
+    if st.sidebar.button(f"📦 Export {len(results)} Matches as ZIP", key="archive_export_button"):
+        file_name = f"archive_export_{datetime.date.today().strftime('%d-%m-%Y')}.zip"
+        path = new_spool_path(file_name)
+        exported = export_archived_zip(results, path)
+        export = register_spooled_file(path, file_name, mime="application/zip")
+        st.sidebar.success(f"✅ Exported {exported} documents")
+        render_spooled_download(export, "⬇ Download Archive Export", key="archive_export_download",
+                                container=st.sidebar)
+
+# --- Issued Number Registry ---
+# Every generated number is recorded once per document type. Lookups go to an
+# in-memory set that catches up on new rows incrementally; a hit is re-read
+# from the table, since another process may have released the number since.
+# Each (series, FY) keeps a bitmap of issued sequences so gap reports read a
+# single blob. A series is the scope its counter numbers: quotations and POs
+# restart per sales person and quarter, while invoices share one counter that
+# never restarts, so an invoice series spans years and its gaps are counted
+# from where the previous financial year left off. Numbers are registered
+# before their document is rendered, so two sessions cannot both produce one;
+# a render that fails releases its number again.
+QUARTER_START_MONTHS = {"Q1": 4, "Q2": 7, "Q3": 10, "Q4": 1}
+CONTINUOUS_SERIES_TYPES = ("invoice",)
+
+def quarter_financial_year(year, quarter):
+    """Financial year of a quarter that falls in the given calendar year"""
+    return get_financial_year(datetime.date(int(year), QUARTER_START_MONTHS[quarter], 1))
+
+def number_series(doc_type, number):
+    """Split a document number into (series, financial year, sequence); sequence is None if unparseable"""
+    try:
+        fields = parse_document_number(doc_type, number)
+    except DocumentNumberError:
+        return "", "", None
+    if doc_type == "quotation":
+        fy = get_financial_year(datetime.datetime.strptime(fields["date"], "%d-%m-%Y"))
+        series = f"{fields['prefix']}/{fields['sales_person']}/{fields['quarter']}"
+    elif doc_type == "po":
+        fy = quarter_financial_year(fields["year"], fields["quarter"])
+        series = f"{fields['prefix']}/{fields['sales_person']}/{fields['quarter']}"
+    else:
+        fy = quarter_financial_year(2000 + int(fields["short_year_range"][:2]), fields["quarter"])
+        series = fields["prefix"]
+    return series, fy, int(fields["sequence"])
+
+def rekey_invoice_series(conn):
+    """Move invoice numbers registered per quarter and calendar year onto their counter's series and
+    financial year, rebuilding the invoice bitmaps; returns the number of rows moved"""
+    rows = conn.execute("SELECT id, number FROM issued_numbers WHERE doc_type = 'invoice' AND series LIKE '%/%'").fetchall()
+    if not rows:
+        return 0
+    with conn:
+        for row in rows:
+            series, fy, _ = number_series("invoice", row["number"])
+            conn.execute("UPDATE issued_numbers SET series = ?, fy = ? WHERE id = ?", (series, fy, row["id"]))
+        bitmaps = {}
+        for row in conn.execute("SELECT series, fy, sequence FROM issued_numbers "
+                                "WHERE doc_type = 'invoice' AND sequence IS NOT NULL"):
+            set_bitmap_bit(bitmaps.setdefault((row["series"], row["fy"]), bytearray()), row["sequence"])
+        conn.execute("DELETE FROM sequence_bitmaps WHERE doc_type = 'invoice'")
+        conn.executemany("INSERT INTO sequence_bitmaps (doc_type, series, fy, bitmap) VALUES ('invoice', ?, ?, ?)",
+                         [(series, fy, bytes(bitmap)) for (series, fy), bitmap in bitmaps.items()])
+    return len(rows)
+
+def set_bitmap_bit(bitmap, position):
+    """Set a bit in a bytearray bitmap, growing it as needed"""
+    byte_index = position >> 3
+    if byte_index >= len(bitmap):
+        bitmap.extend(bytes(byte_index - len(bitmap) + 1))
+    bitmap[byte_index] |= 1 << (position & 7)
+
+def bitmap_gaps(bitmap, first=1):
+    """Ranges of unset sequences between first and the highest set bit"""
+    highest = int.from_bytes(bitmap, "little").bit_length() - 1
+    gaps = []
+    gap_start = None
+    for byte_index, byte in enumerate(bitmap):
+        if byte == 0xFF and gap_start is None:
+            continue
+        for bit in range(8):
+            position = (byte_index << 3) | bit
+            if position < first or position > highest:
+                continue
+            if byte >> bit & 1:
+                if gap_start is not None:
+                    gaps.append((gap_start, position - 1))
+                    gap_start = None
+            elif gap_start is None:
+                gap_start = position
+    return gaps
+
+class IssuedNumberRegistry:
+    """Process-wide set of issued (document type, number) pairs mirrored from the archive database"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.issued = set()
+        self.last_id = 0
+        self.backfilled = False
+
+    def refresh(self, conn):
+        """Pull rows added since the last refresh, including ones from other processes"""
+        with self.lock:
+            rows = conn.execute("SELECT id, doc_type, number FROM issued_numbers WHERE id > ? ORDER BY id",
+                                (self.last_id,)).fetchall()
+            for row in rows:
+                self.issued.add((row["doc_type"], row["number"]))
+            if rows:
+                self.last_id = rows[-1]["id"]
+
+    def contains(self, doc_type, number):
+        return (doc_type, number.strip()) in self.issued
+
+    def recheck(self, conn, doc_type, number):
+        """Confirm a cached number against the table, forgetting it if it has been released"""
+        number = number.strip()
+        if conn.execute("SELECT 1 FROM issued_numbers WHERE doc_type = ? AND number = ?",
+                        (doc_type, number)).fetchone():
+            return True
+        with self.lock:
+            self.issued.discard((doc_type, number))
+        return False
+
+ISSUED_NUMBERS = process_resource("issued_numbers", IssuedNumberRegistry)
+
+def is_number_issued(doc_type, number):
+    """Whether a document number has already been issued for this document type"""
+    if not ISSUED_NUMBERS.backfilled:
+        backfill_issued_numbers()
+        ISSUED_NUMBERS.backfilled = True
+    conn = get_archive_connection()
+    try:
+        ISSUED_NUMBERS.refresh(conn)
+        return ISSUED_NUMBERS.contains(doc_type, number) and ISSUED_NUMBERS.recheck(conn, doc_type, number)
+    finally:
+        conn.close()
+
+def register_issued_number(doc_type, number, conn=None):
+    """Record a number as issued; returns False if it already was"""
+    number = number.strip()
+    series, fy, sequence = number_series(doc_type, number)
+    own_conn = conn is None
+    conn = conn or get_archive_connection()
+    try:
+        with conn:
+            try:
+                conn.execute(
+                    "INSERT INTO issued_numbers (doc_type, number, series, fy, sequence, issued_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (doc_type, number, series, fy, sequence, datetime.datetime.now().isoformat(timespec="seconds")))
+            except sqlite3.IntegrityError:
+                return False
+            if sequence is not None:
+                row = conn.execute("SELECT bitmap FROM sequence_bitmaps WHERE doc_type = ? AND series = ? AND fy = ?",
+                                   (doc_type, series, fy)).fetchone()
+                bitmap = bytearray(row["bitmap"]) if row else bytearray()
+                set_bitmap_bit(bitmap, sequence)
+                conn.execute("INSERT OR REPLACE INTO sequence_bitmaps (doc_type, series, fy, bitmap) VALUES (?, ?, ?, ?)",
+                             (doc_type, series, fy, bytes(bitmap)))
+        ISSUED_NUMBERS.refresh(conn)
+        return True
+    finally:
+        if own_conn:
+            conn.close()
+
+def release_issued_number(doc_type, number):
+    """Withdraw a number that was registered for a document that was never produced"""
+    number = number.strip()
+    series, fy, sequence = number_series(doc_type, number)
+    conn = get_archive_connection()
+    try:
+        with conn:
+            conn.execute("DELETE FROM issued_numbers WHERE doc_type = ? AND number = ?", (doc_type, number))
+            if sequence is not None:
+                row = conn.execute("SELECT bitmap FROM sequence_bitmaps WHERE doc_type = ? AND series = ? AND fy = ?",
+                                   (doc_type, series, fy)).fetchone()
+                if row and sequence >> 3 < len(row["bitmap"]):
+                    bitmap = bytearray(row["bitmap"])
+                    bitmap[sequence >> 3] &= ~(1 << (sequence & 7)) & 0xFF
+                    conn.execute("UPDATE sequence_bitmaps SET bitmap = ? WHERE doc_type = ? AND series = ? AND fy = ?",
+                                 (bytes(bitmap), doc_type, series, fy))
+    finally:
+        conn.close()
+    with ISSUED_NUMBERS.lock:
+        ISSUED_NUMBERS.issued.discard((doc_type, number))
+
+def claim_document_numbers(numbers):
+    """Register {doc_type: number} before rendering; on a clash shows an error, releases the rest and returns False"""
+    claimed = []
+    try:
+        for doc_type, number in numbers.items():
+            if not register_issued_number(doc_type, number):
+                st.error(f"❌ {({'po': 'PO'}).get(doc_type, doc_type.title())} number {number} has already been "
+                         "issued. Change the sequence before generating.")
+                break
+            claimed.append((doc_type, number))
+        else:
+            return True
+    except sqlite3.Error as e:
+        st.error(f"❌ Could not register {doc_type} number {number}: {e}")
+    for doc_type, number in claimed:
+        release_issued_number(doc_type, number)
+    return False
+
+def backfill_issued_numbers():
+    """Register numbers of documents archived before the registry existed"""
+    conn = get_archive_connection()
+    try:
+        rows = conn.execute(
+            "SELECT DISTINCT d.doc_type, d.number FROM documents d "
+            "LEFT JOIN issued_numbers i ON i.doc_type = d.doc_type AND i.number = d.number "
+            "WHERE i.id IS NULL").fetchall()
+        for row in rows:
+            register_issued_number(row["doc_type"], row["number"], conn=conn)
+        return len(rows)
+    finally:
+        conn.close()
+
+def validate_archived_numbers(batch_size=10000):
+    """Re-check every archived and issued number against its grammar; returns (checked, invalid rows)"""
+    conn = get_archive_connection()
+    try:
+        cursor = conn.execute("SELECT doc_type, number FROM documents UNION SELECT doc_type, number FROM issued_numbers")
+        checked = 0
+        invalid = []
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            for doc_type, number in rows:
+                grammar = NUMBER_GRAMMARS.get(doc_type)
+                checked += 1
+                if grammar is None:
+                    invalid.append((doc_type, number, f"Unknown document type {doc_type!r}"))
+                    continue
+                try:
+                    grammar.parse(number)
+                except DocumentNumberError as e:
+                    invalid.append((doc_type, number, str(e)))
+        return checked, invalid
+    finally:
+        conn.close()
+
+def series_start(conn, doc_type, series, fy, bitmap):
+    """First sequence a financial year's bitmap should hold: 1, or for a continuous series the one after
+    the previous year's highest (the year's lowest issued sequence if there is no previous year)"""
+    if doc_type not in CONTINUOUS_SERIES_TYPES:
+        return 1
+    previous = conn.execute("SELECT bitmap FROM sequence_bitmaps WHERE doc_type = ? AND series = ? AND fy < ? "
+                            "ORDER BY fy DESC LIMIT 1", (doc_type, series, fy)).fetchone()
+    if previous:
+        return int.from_bytes(previous["bitmap"], "little").bit_length()
+    value = int.from_bytes(bitmap, "little")
+    return (value & -value).bit_length() - 1 if value else 1
+
+def find_missing_numbers(doc_type, fy):
+    """Gap report for one financial year: missing sequence ranges per series"""
+    conn = get_archive_connection()
+    try:
+        rows = conn.execute("SELECT series, bitmap FROM sequence_bitmaps WHERE doc_type = ? AND fy = ? ORDER BY series",
+                            (doc_type, fy)).fetchall()
+        starts = [series_start(conn, doc_type, row["series"], fy, row["bitmap"]) for row in rows]
+    finally:
+        conn.close()
+    report = []
+    for row, first in zip(rows, starts):
+        bitmap = row["bitmap"]
+        report.append({
+            "series": row["series"],
+            "issued": bin(int.from_bytes(bitmap, "little")).count("1"),
+            "highest": int.from_bytes(bitmap, "little").bit_length() - 1,
+            "missing": bitmap_gaps(bitmap, first),
+        })
+    return report
+
+def render_number_gaps_sidebar():
+    """Sidebar report of sequence numbers skipped within a financial year"""
+    with st.sidebar.expander("🔢 Missing Numbers"):
+        doc_type = st.selectbox("Document Type", ["quotation", "po", "invoice"],
+                                format_func=lambda t: {"po": "Purchase Order"}.get(t, t.title()),
+                                key="number_gaps_doc_type")
+        fy = st.text_input("Financial Year", value=get_financial_year(), key="number_gaps_fy")
+        try:
+            report = find_missing_numbers(doc_type, fy.strip())
+        except sqlite3.Error as e:
+            st.error(f"Registry lookup failed: {e}")
+            return
+        if not report:
+            st.info("No numbers issued in this financial year")
+            return
+        for entry in report:
+            missing = ", ".join(str(a) if a == b else f"{a}-{b}" for a, b in entry["missing"])
+            st.markdown(f"**{entry['series']}** — {entry['issued']} issued up to {entry['highest']}")
+            if missing:
+                st.warning(f"Missing: {missing}")
+            else:
+                st.caption("No gaps")
+
+# --- Download Spool ---
+# PDFs handed to the browser are spooled to disk and kept in session state only
+# by reference, so a session never pins more than the file it is serving.
+# st.download_button still reads a spooled file into memory on each run that
+# shows it. Earlier downloads and archive lookups are read back only on the
+# run in which the user asks for them.
+DOWNLOAD_SPOOL_DIR = os.path.join(tempfile.gettempdir(), "document_generator_spool")
+SPOOL_SESSION_BUDGET_BYTES = 20 * 1024 * 1024
+SPOOL_MAX_AGE_SECONDS = 2 * 60 * 60
+SPOOL_CLEANUP_INTERVAL_SECONDS = 10 * 60
+_spool_cleanup = process_resource("spool_cleanup", lambda: {"last_run": 0.0})
+
+def get_session_spool_dir():
+    """Spool directory owned by the current Streamlit session"""
+    if "spool_session_id" not in st.session_state:
+        st.session_state.spool_session_id = uuid.uuid4().hex
+    return os.path.join(DOWNLOAD_SPOOL_DIR, st.session_state.spool_session_id)
+
+def new_spool_path(file_name, attempts=3):
+    """Fresh, already created file in the session spool for a file that will be served as file_name"""
+    spool_dir = get_session_spool_dir()
+    path = os.path.join(spool_dir, f"{uuid.uuid4().hex}{os.path.splitext(file_name)[1] or '.pdf'}")
+    for attempt in range(attempts):
+        os.makedirs(spool_dir, exist_ok=True)
+        try:
+            # Creating the file at once keeps the folder non-empty, so the spool
+            # cleanup can no longer remove it before the caller writes
+            with open(path, "xb"):
+                return path
+        except FileNotFoundError:
+            if attempt == attempts - 1:
+                raise
+
+def spool_download(pdf_bytes, file_name, mime="application/pdf"):
+    """Write a generated PDF (or bundle) to the session spool and return a reference to it"""
+    path = new_spool_path(file_name)
+    with open(path, "wb") as f:
+        f.write(pdf_bytes)
+    return register_spooled_file(path, file_name, mime)
+
+def register_spooled_file(path, file_name, mime="application/pdf"):
+    """Track a file already written to the session spool and return a reference to it"""
+    entry = {"path": path, "file_name": file_name, "size": os.path.getsize(path), "created": time.time(), "mime": mime}
+    entries = st.session_state.setdefault("spooled_downloads", [])
+    entries.append(entry)
+
+    # Evict the oldest spooled files once the session is over its budget
+    while len(entries) > 1 and sum(e["size"] for e in entries) > SPOOL_SESSION_BUDGET_BYTES:
+        evicted = entries.pop(0)
+        try:
+            os.remove(evicted["path"])
+        except OSError:
+            pass
+    return entry
+
+def render_spooled_download(entry, label, key=None, container=st, **kwargs):
+    """Serve a spooled PDF through a download button; its bytes are read for this run only, session
+    state keeps just the path"""
+    if not entry or not os.path.exists(entry["path"]):
+        container.warning("⚠ This download has expired, please generate the document again")
+        return
+    with open(entry["path"], "rb") as f:
+        container.download_button(label, data=f, file_name=entry["file_name"], mime=entry.get("mime", "application/pdf"),
+                           key=key, **kwargs)
+
+def spool_archived_pdf(sha256, file_name, slot):
+    """Spooled copy of an archived PDF, decompressed once and reused while slot still holds it"""
+    spooled = st.session_state.get(slot)
+    if spooled and spooled["sha256"] == sha256 and os.path.exists(spooled["entry"]["path"]):
+        return spooled["entry"]
+    pdf_bytes = load_archived_pdf(sha256)
+    if not pdf_bytes:
+        return None
+    entry = spool_download(pdf_bytes, file_name)
+    st.session_state[slot] = {"sha256": sha256, "entry": entry}
+    return entry
+
+def read_spooled_file(entry):
+    """Bytes of a spooled file, or None once it has expired"""
+    try:
+        with open(entry["path"], "rb") as f:
+            return f.read()
+    except (OSError, TypeError):
+        return None
+
+def render_deferred_download(label, load, file_name, key, mime="application/pdf", container=st, **kwargs):
+    """Download button whose bytes are loaded only on the run in which the user asks for them"""
+    if not container.button(label, key=f"{key}_prepare", **kwargs):
+        return
+    data = load()
+    if data is None:
+        container.warning("⚠ This file is no longer available")
+        return
+    container.download_button(f"💾 Save {file_name}", data=data, file_name=file_name, mime=mime, key=key, **kwargs)
+
+def cleanup_download_spool(max_age=SPOOL_MAX_AGE_SECONDS):
+    """Remove spooled files and empty session folders older than max_age"""
+    now = time.time()
+    if now - _spool_cleanup["last_run"] < SPOOL_CLEANUP_INTERVAL_SECONDS:
+        return
+    _spool_cleanup["last_run"] = now
+
+    if not os.path.isdir(DOWNLOAD_SPOOL_DIR):
+        return
+    for session_dir in os.scandir(DOWNLOAD_SPOOL_DIR):
+        if not session_dir.is_dir():
+            continue
+        for spooled in os.scandir(session_dir.path):
+            try:
+                if now - spooled.stat().st_mtime > max_age:
+                    os.remove(spooled.path)
+            except OSError:
+                pass
+        try:
+            os.rmdir(session_dir.path)
+        except OSError:
+            pass
+
+def render_recent_downloads_sidebar():
+    """Sidebar picker for this session's spooled documents"""
+    entries = [e for e in st.session_state.get("spooled_downloads", []) if os.path.exists(e["path"])]
+    st.session_state.spooled_downloads = entries
+    if not entries:
+        return
+
+    st.sidebar.header("⬇ Recent Downloads")
+    selected = st.sidebar.selectbox(
+        "Generated this session",
+        options=range(len(entries) - 1, -1, -1),
+        format_func=lambda i: entries[i]["file_name"],
+        key="recent_download_select")
+    entry = entries[selected]
+    render_deferred_download("⬇ Download Selected", lambda: read_spooled_file(entry), entry["file_name"],
+                             key="recent_download_button", mime=entry.get("mime", "application/pdf"),
+                             container=st.sidebar)
+
+# --- Deal Bundles ---
+# A deal holds the parties and line items once; its quotation, PO and invoice
+# are derived from it with totals computed a single time, and the three PDFs
+# are rendered in parallel and returned together as one ZIP. Rendering is pure
+# Python and holds the GIL, so documents go to a long-lived pool of spawned
+# worker processes, one per CPU; each worker imports this script as
+# __mp_main__ and warms its own text metrics cache. With a single CPU or a
+# single document there is nothing to overlap and rendering stays in-process,
+# as it does when a model cannot be pickled across (e.g. another session's
+# rerun has replaced __main__) or the pool has broken.
+BUNDLE_DOCUMENT_TYPES = ("quotation", "po", "invoice")
+RENDER_POOL_WORKERS = os.cpu_count() or 1
+DEFAULT_DECLARATION = "Standard declaration text as per your requirements."
+COMPANY_PARTY = Party(name="Your Company Name", address="Your Company Address", gstin="GSTNUMBER", msme="MSMENUMBER")
+
+@dataclass(frozen=True, slots=True)
+class Deal:
+    deal_date: str
+    customer: Party
+    supplier: Party
+    company: Party
+    products: tuple
+    sales_person_code: str = "SP1"
+    hsn: str = "997331"
+    subject: str = "Proposal for Software Services"
+    intro_paragraph: str = "This is with reference to your requirement for software services."
+    price_validity: str = "10 days from Quotation date"
+    payment_terms: str = "30 Days from Invoice date."
+    delivery_terms: str = "Within 2 Days."
+    prepared_by: str = "Finance Department"
+    declaration: str = DEFAULT_DECLARATION
+
+    def __post_init__(self):
+        _normalize(self, text_fields=("deal_date", "sales_person_code", "hsn", "subject", "intro_paragraph",
+                                      "price_validity", "payment_terms", "delivery_terms", "prepared_by",
+                                      "declaration"))
+        object.__setattr__(self, "products", _records(self.products, ProductLine))
+        if not self.products:
+            raise ValueError("Deal needs at least one product")
+
+    @property
+    def invoice_items(self):
+        return tuple(InvoiceLine(description=p.name, quantity=p.qty, unit_rate=p.basic, hsn=self.hsn)
+                     for p in self.products)
+
+@functools.lru_cache(maxsize=64)
+def deal_totals(deal):
+    """Quotation/PO and invoice totals for a deal, computed once per deal"""
+    quotation = calculate_quotation_totals(deal.products)
+    invoice = calculate_invoice_totals(deal.invoice_items)
+    return {"quotation": quotation,
+            "invoice": invoice,
+            "grand_total_words": amount_in_words(quotation["grand_total"]),
+            "final_amount_words": amount_in_words(invoice["final_amount"]),
+            "tax_words": amount_in_words(invoice["tax_total"])}
+
+def reserve_document_number(doc_type, sales_person="SP1"):
+    """Fresh number of doc_type from its counter"""
+    if doc_type == "quotation":
+        return generate_quotation_number(sales_person, get_next_quotation_sequence(sales_person))
+    if doc_type == "po":
+        return generate_po_number(sales_person, get_next_po_sequence(sales_person))
+    return generate_invoice_number(get_next_invoice_sequence())
+
+def reserve_deal_numbers(sales_person, doc_types=BUNDLE_DOCUMENT_TYPES):
+    """Fresh numbers for a deal's documents, keyed by document type"""
+    return {doc_type: reserve_document_number(doc_type, sales_person) for doc_type in doc_types}
+
+def derive_deal_documents(deal, numbers):
+    """Models for a deal, one per document type numbered in numbers"""
+    totals = deal_totals(deal)
+    quotation_totals = totals["quotation"]
+    invoice_totals = totals["invoice"]
+    company = deal.company
+    builders = {
+        "quotation": lambda: QuotationDocument(
+            quotation_number=numbers["quotation"], quotation_date=deal.deal_date, vendor=deal.customer,
+            products=deal.products, price_validity=deal.price_validity,
+            grand_total=quotation_totals["grand_total"], round_off=quotation_totals["round_off"],
+            amount_words=totals["grand_total_words"], subject=deal.subject, intro_paragraph=deal.intro_paragraph,
+            product_name=deal.products[0].name, sales_person_code=deal.sales_person_code),
+        "po": lambda: PurchaseOrderDocument(
+            po_number=numbers["po"], po_date=deal.deal_date, vendor=deal.supplier,
+            bill_to=Party(name=company.name, address=company.address),
+            ship_to=Party(name=company.name, address=company.address),
+            end_user=deal.customer, products=deal.products, grand_total=quotation_totals["grand_total"],
+            amount_words=totals["grand_total_words"], payment_terms=deal.payment_terms,
+            delivery_terms=deal.delivery_terms, prepared_by=deal.prepared_by, authorized_by=company.name,
+            company_name=company.name),
+        "invoice": lambda: InvoiceDocument(
+            invoice_no=numbers["invoice"], invoice_date=deal.deal_date, vendor=company, buyer=deal.customer,
+            items=deal.invoice_items,
+            totals=InvoiceTotals(basic_amount=invoice_totals["basic_amount"], sgst=invoice_totals["sgst"],
+                                 cgst=invoice_totals["cgst"], final_amount=invoice_totals["final_amount"],
+                                 amount_in_words=totals["final_amount_words"], tax_in_words=totals["tax_words"]),
+            other_reference=numbers.get("quotation", ""), buyers_order_date=deal.deal_date,
+            payment_terms=deal.payment_terms, terms_of_delivery=deal.delivery_terms,
+            declaration=deal.declaration),
+    }
+    return {doc_type: builders[doc_type]() for doc_type in BUNDLE_DOCUMENT_TYPES if doc_type in numbers}
+
+def get_render_pool():
+    """Render worker processes shared by every parallel render, started on first use"""
+    return process_resource("render_pool", lambda: ProcessPoolExecutor(
+        max_workers=RENDER_POOL_WORKERS, mp_context=multiprocessing.get_context("spawn")))
+
+def discard_render_pool():
+    """Drop a broken render pool so the next parallel render starts a fresh one"""
+    pool = release_process_resource("render_pool")
+    if pool is not None:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+def render_document(doc_type, document, logo=None, stamp=None, optimize=False):
+    """Render a document model with the builder for its type"""
+    if doc_type == "po":
+        return create_po_pdf(document, logo, optimize)
+    builder = create_quotation_pdf if doc_type == "quotation" else create_invoice_pdf
+    return builder(document, logo, stamp, optimize)
+
+def render_documents(documents, logo=None, stamp=None, optimize=False):
+    """Render (doc_type, model) pairs in the worker pool and return their PDFs in the same order"""
+    pdfs = None
+    if len(documents) > 1 and RENDER_POOL_WORKERS > 1:
+        try:
+            pool = get_render_pool()
+            futures = [pool.submit(render_document, doc_type, document, logo, stamp, optimize)
+                       for doc_type, document in documents]
+            pdfs = [future.result() for future in futures]
+        except pickle.PicklingError:
+            pass
+        except BrokenProcessPool:
+            discard_render_pool()
+    if pdfs is None:
+        pdfs = [render_document(doc_type, document, logo, stamp, optimize) for doc_type, document in documents]
+    empty = [document_summary(doc_type, document)[0]
+             for (doc_type, document), pdf_bytes in zip(documents, pdfs) if not pdf_bytes]
+    if empty:
+        raise RuntimeError(f"Rendering produced no output for: {', '.join(empty)}")
+    return pdfs
+
+def render_deal_documents(documents, logo=None, stamp=None):
+    """Render a deal's documents in parallel and return their PDFs by document type"""
+    return dict(zip(documents, render_documents(list(documents.items()), logo, stamp)))
+
+def document_file_name(doc_type, number):
+    """File name for a document inside a bundle"""
+    return f"{doc_type}_{number.replace('/', '_')}.pdf"
+
+def deal_bundle_zip(documents, pdfs):
+    """Deal PDFs and their manifest packed into one ZIP, in quotation, PO, invoice order"""
+    buffer = io.BytesIO()
+    with DocumentZipWriter(buffer) as bundle:
+        for doc_type in BUNDLE_DOCUMENT_TYPES:
+            if doc_type in pdfs:
+                bundle.add_document(doc_type, documents[doc_type], pdfs[doc_type])
+    return buffer.getvalue()
+
+def create_deal_bundle(deal, numbers, logo=None, stamp=None):
+    """Documents, PDFs and ZIP for a deal; with a CPU per document and warm workers, latency
+    approaches that of the slowest document plus pickling the PDFs back"""
+    documents = derive_deal_documents(deal, numbers)
+    pdfs = render_deal_documents(documents, logo, stamp)
+    return documents, pdfs, deal_bundle_zip(documents, pdfs)
+
+# --- Streaming ZIP Export ---
+# Bulk exports render one document at a time and append it to the archive as
+# soon as it is ready, so memory holds a single PDF however many are exported.
+# PDFs are stored as-is (their streams are already Flate-compressed); the
+# manifest rows go to a temporary file and become manifest.csv on close. The
+# target may be a path or any writable stream, seekable or not.
+EXPORT_MANIFEST_NAME = "manifest.csv"
+EXPORT_MANIFEST_FIELDS = ("file_name", "doc_type", "number", "date", "party", "gstin", "grand_total")
+
+def document_summary(doc_type, document):
+    """Number, date, party, GSTIN and total of a document model, for manifests"""
+    if doc_type == "quotation":
+        total = document.grand_total
+        if total is None:
+            total = calculate_quotation_totals(document.products)["grand_total"]
+        return document.quotation_number, document.quotation_date, document.vendor.name, document.vendor.gstin, total
+    if doc_type == "po":
+        return document.po_number, document.po_date, document.vendor.name, document.vendor.gstin, document.grand_total
+    return (document.invoice_no, document.invoice_date, document.buyer.name, document.buyer.gstin,
+            document.totals.final_amount)
+
+class DocumentZipWriter:
+    """ZIP of PDFs written entry by entry, with a manifest CSV added on close"""
+
+    def __init__(self, target):
+        self.zip = zipfile.ZipFile(target, "w", zipfile.ZIP_STORED)
+        self.manifest = tempfile.TemporaryFile()
+        self.manifest_text = io.TextIOWrapper(self.manifest, encoding="utf-8", newline="")
+        self.rows = csv.writer(self.manifest_text)
+        self.rows.writerow(EXPORT_MANIFEST_FIELDS)
+        self.count = 0
+
+    def add(self, file_name, pdf_bytes, doc_type="", number="", date="", party="", gstin="", grand_total=0):
+        self.zip.writestr(file_name, pdf_bytes)
+        self.rows.writerow((file_name, doc_type, number, date, party, gstin, f"{float(grand_total or 0):.2f}"))
+        self.count += 1
+
+    def add_document(self, doc_type, document, pdf_bytes):
+        number, date, party, gstin, grand_total = document_summary(doc_type, document)
+        self.add(document_file_name(doc_type, number), pdf_bytes, doc_type, number, date, party, gstin, grand_total)
+
+    def close(self):
+        if self.zip.fp is None:
+            return
+        try:
+            self.manifest_text.flush()
+            self.manifest.seek(0)
+            info = zipfile.ZipInfo(EXPORT_MANIFEST_NAME, time.localtime()[:6])
+            info.compress_type = zipfile.ZIP_DEFLATED
+            with self.zip.open(info, "w") as entry:
+                shutil.copyfileobj(self.manifest, entry)
+        finally:
+            self.zip.close()
+            self.manifest_text.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+def export_documents_zip(documents, target, logo=None, stamp=None, optimize=True):
+    """Render (doc_type, model) pairs one at a time into a ZIP at target; returns the count"""
+    with DocumentZipWriter(target) as export:
+        for doc_type, document in documents:
+            export.add_document(doc_type, document, render_document(doc_type, document, logo, stamp, optimize))
+    return export.count
+
+def export_archived_zip(rows, target):
+    """Stream archived PDFs for archive rows into a ZIP at target; returns the count"""
+    with DocumentZipWriter(target) as export:
+        for row in rows:
+            pdf_bytes = load_archived_pdf(row["sha256"])
+            if pdf_bytes:
+                export.add(document_file_name(row["doc_type"], row["number"]), pdf_bytes, row["doc_type"],
+                           row["number"], row["doc_date"], row["party"], row["gstin"], row["grand_total"])
+    return export.count
+
+# --- Print Batches ---
+# Month-end print runs lay many documents of one type into a single PDF. They
+# share one FPDF, so each font and image is embedded once and referenced from
+# every page. Each document gets its own page labels, so readers number its
+# pages from 1, and an outline bookmark under its document number.
+DOCUMENT_MODELS = {"quotation": QuotationDocument, "po": PurchaseOrderDocument, "invoice": InvoiceDocument}
+PRINT_BATCH_CLASSES = {"quotation": QUOTATION_PDF, "po": PO_PDF, "invoice": PDF}
+
+def layout_document(pdf, doc_type, document, logo=None, stamp=None):
+    """Lay out a document model on new pages of pdf with the layout for its type"""
+    if doc_type == "po":
+        layout_po(pdf, document, logo)
+    elif doc_type == "quotation":
+        layout_quotation(pdf, document, logo, stamp)
+    else:
+        layout_invoice(pdf, document, logo, stamp)
+
+def create_print_batch_pdf(doc_type, documents, logo=None, stamp=None, optimize=True):
+    """One PDF holding every document of doc_type, with shared resources, page labels and bookmarks"""
+    pdf = PRINT_BATCH_CLASSES[doc_type]()
+    if optimize:
+        pdf.optimize_output()
+    for document in documents:
+        document = as_document(document, DOCUMENT_MODELS[doc_type])
+        pdf.start_document(document_summary(doc_type, document)[0])
+        layout_document(pdf, doc_type, document, logo, stamp)
+    return pdf_output_bytes(pdf)
+
+# --- Hot Folder Ingestion ---
+# An ERP drops order exports (JSON or CSV) into <root>/inbox. The watcher
+# claims each settled file by renaming it into processing/, which is atomic, so
+# no file is picked up twice. It parses the file into document models, renders
+# them on the shared render pool and writes the PDFs to outbox/<file>/. The
+# source then moves to outbox/, or to failed/ next to an .error.json report.
+# Rows are validated before any number is reserved. Numbers assigned to CSV
+# orders are journalled beside the claimed file, and so is every number the
+# file registers, before rendering; a number is released again if its PDF was
+# never archived. Each PDF is archived and published to the outbox in one
+# step. A restarted watcher resumes whatever is left in processing/ (one
+# watcher per root): documents already published are skipped, numbers the
+# file itself registered are reused, and archived PDFs are published without
+# rendering again. Claims stop while max_in_flight files are in progress, so the
+# backlog waits in the inbox rather than in memory. `check-hot-folder` runs
+# sample orders of every document type through the watcher.
+HOT_FOLDER_DIR = "hot_folder"
+HOT_FOLDER_SUBDIRS = ("inbox", "processing", "outbox", "failed")
+HOT_FOLDER_EXTENSIONS = (".json", ".csv")
+HOT_FOLDER_POLL_SECONDS = 2.0
+HOT_FOLDER_SETTLE_SECONDS = 1.0
+HOT_FOLDER_MAX_IN_FLIGHT = 8
+HOT_FOLDER_RENDER_CHUNK = 32
+HOT_FOLDER_METRICS_FILE = "metrics.json"
+
+class IngestError(ValueError):
+    """An inbox file that cannot be turned into documents"""
+
+def hot_folder_path(root, folder, name=""):
+    return os.path.join(root, folder, name)
+
+def write_file_atomic(path, data):
+    """Write bytes so that readers see either nothing or the whole file"""
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+def parse_order_json(text):
+    """(doc_type, model) pairs from a JSON export holding one document dict or a list of them"""
+    try:
+        payload = json.loads(text)
+    except json.JSONDecodeError as e:
+        raise IngestError(f"invalid JSON: {e}") from e
+    documents = []
+    for index, record in enumerate(payload if isinstance(payload, list) else [payload], 1):
+        doc_type = record.get("doc_type") if isinstance(record, dict) else None
+        if doc_type not in DOCUMENT_MODELS:
+            raise IngestError(f"record {index}: doc_type must be one of {', '.join(DOCUMENT_MODELS)}")
+        try:
+            documents.append((doc_type, DOCUMENT_MODELS[doc_type].from_dict(record)))
+        except (KeyError, TypeError, ValueError) as e:
+            raise IngestError(f"record {index}: {e!r}") from e
+    return documents
+
+def party_from_row(row, prefix):
+    return Party(**{field: row.get(f"{prefix}{field}") for field in ("name", "address", "contact", "mobile", "email", "gstin")})
+
+def check_document_date(label, date):
+    """Raise IngestError unless date is a dd-mm-YYYY date the archive can index"""
+    try:
+        to_iso_date(date)
+    except ValueError as e:
+        raise IngestError(f"{label}: date {date!r} is not a dd-mm-YYYY date") from e
+
+def check_order_row(line, row):
+    """Raise IngestError for a CSV order whose date, sales person or number could not be issued"""
+    if row.get("date"):
+        check_document_date(f"line {line}", row["date"])
+    try:
+        if row.get("number"):
+            parse_document_number(row["doc_type"], row["number"])
+        elif row["doc_type"] == "quotation":
+            generate_quotation_number(row.get("sales_person") or "SP1", 1)
+        elif row["doc_type"] == "po":
+            generate_po_number(row.get("sales_person") or "SP1", 1)
+    except DocumentNumberError as e:
+        raise IngestError(f"line {line}: {e}") from e
+
+def parse_order_csv(text, numbers_file=None):
+    """(doc_type, model) pairs from a CSV export with one line item per row, grouped by order_id
+
+    Every row is validated before any number is reserved, so a bad row costs no sequence number.
+    """
+    reader = csv.DictReader(io.StringIO(text))
+    missing = {"order_id", "doc_type", "item", "rate"} - set(reader.fieldnames or ())
+    if missing:
+        raise IngestError(f"missing columns: {', '.join(sorted(missing))}")
+    orders = {}
+    for line, row in enumerate(reader, 2):
+        if row["doc_type"] not in DOCUMENT_MODELS:
+            raise IngestError(f"line {line}: doc_type must be one of {', '.join(DOCUMENT_MODELS)}")
+        try:
+            product = ProductLine(name=row["item"], basic=row["rate"], qty=row.get("qty") or 1,
+                                  gst_percent=row.get("gst_percent") or 18)
+        except ValueError as e:
+            raise IngestError(f"line {line}: {e}") from e
+        key = (row["order_id"], row["doc_type"])
+        if key not in orders:
+            check_order_row(line, row)
+        orders.setdefault(key, (row, []))[1].append(product)
+
+    assigned = {}
+    if numbers_file and os.path.exists(numbers_file):
+        with open(numbers_file, encoding="utf-8") as f:
+            assigned = json.load(f)
+    deals = []
+    for (order_id, doc_type), (row, products) in orders.items():
+        deal = Deal(deal_date=row.get("date") or datetime.date.today().strftime("%d-%m-%Y"),
+                    customer=party_from_row(row, "customer_"), supplier=party_from_row(row, "supplier_"),
+                    company=COMPANY_PARTY, products=products, sales_person_code=row.get("sales_person") or "SP1",
+                    hsn=row.get("hsn") or "997331")
+        key = f"{doc_type}:{order_id}"
+        if not assigned.get(key):
+            assigned[key] = row.get("number") or reserve_document_number(doc_type, deal.sales_person_code)
+        deals.append((doc_type, deal, assigned[key]))
+    if numbers_file:
+        write_file_atomic(numbers_file, json.dumps(assigned).encode("utf-8"))
+    return [(doc_type, derive_deal_documents(deal, {doc_type: number})[doc_type]) for doc_type, deal, number in deals]
+
+def read_issued_journal(path):
+    """Numbers ("doc_type:number") a claimed file has registered, from its .issued journal"""
+    if not os.path.exists(path):
+        return set()
+    with open(path, encoding="utf-8") as f:
+        return set(json.load(f))
+
+def archived_pdf(doc_type, number):
+    """PDF last archived under a document number, or None"""
+    rows = find_archived_documents(number=number, doc_type=doc_type, limit=1)
+    return load_archived_pdf(rows[0]["sha256"]) if rows else None
+
+def process_hot_folder_file(root, name, logo=None, stamp=None):
+    """Render every document in a claimed file into outbox/<file>/; returns (documents, bytes)
+
+    Safe to run again on a file a crashed watcher left in processing/. Every document is validated
+    before a number is registered; numbers are journalled in <file>.issued before they are registered,
+    so on resume one already registered to this file is not a clash; and each PDF is archived and
+    then published in one step, so a published PDF is always archived and an archived one is
+    published from the archive rather than rendered again.
+    """
+    path = hot_folder_path(root, "processing", name)
+    with open(path, encoding="utf-8-sig") as f:
+        text = f.read()
+    if name.lower().endswith(".csv"):
+        documents = parse_order_csv(text, numbers_file=f"{path}.numbers")
+    else:
+        documents = parse_order_json(text)
+    if not documents:
+        raise IngestError("file holds no documents")
+    for doc_type, document in documents:
+        number, date = document_summary(doc_type, document)[:2]
+        check_document_date(f"{doc_type} {number}", date)
+
+    journal_path = f"{path}.issued"
+    journal = read_issued_journal(journal_path)
+    out_dir = hot_folder_path(root, "outbox", os.path.splitext(name)[0])
+    os.makedirs(out_dir, exist_ok=True)
+    pending = []
+    for doc_type, document in documents:
+        number = document_summary(doc_type, document)[0]
+        target = os.path.join(out_dir, document_file_name(doc_type, number))
+        registered = is_number_issued(doc_type, number)
+        if registered and os.path.exists(target):
+            continue
+        if registered and f"{doc_type}:{number}" not in journal:
+            raise IngestError(f"{doc_type} number {number} has already been issued")
+        pending.append((doc_type, document, number, target, registered))
+
+    written = 0
+    for start in range(0, len(pending), HOT_FOLDER_RENDER_CHUNK):
+        chunk = pending[start:start + HOT_FOLDER_RENDER_CHUNK]
+        journal.update(f"{doc_type}:{number}" for doc_type, _, number, _, _ in chunk)
+        write_file_atomic(journal_path, json.dumps(sorted(journal)).encode("utf-8"))
+        claimed = []
+        archived = set()
+        try:
+            for doc_type, document, number, _, registered in chunk:
+                if not registered and not register_issued_number(doc_type, number):
+                    raise IngestError(f"{doc_type} number {number} has already been issued")
+                claimed.append((doc_type, number))
+            stored = {number: archived_pdf(doc_type, number) if registered else None
+                      for doc_type, _, number, _, registered in chunk}
+            to_render = [(doc_type, document) for doc_type, document, number, _, _ in chunk if not stored[number]]
+            rendered = iter(render_documents(to_render, logo, stamp, optimize=True) if to_render else [])
+            for doc_type, document, number, target, _ in chunk:
+                pdf_bytes = stored[number]
+                if not pdf_bytes:
+                    pdf_bytes = next(rendered)
+                    number, date, party, gstin, grand_total = document_summary(doc_type, document)
+                    archive_document(pdf_bytes, doc_type, number, date, party=party, gstin=gstin,
+                                     grand_total=grand_total, document=document)
+                archived.add(number)
+                write_file_atomic(target, pdf_bytes)
+                written += len(pdf_bytes)
+        except Exception:
+            for doc_type, number in claimed:
+                if number not in archived:
+                    release_issued_number(doc_type, number)
+            raise
+    return len(pending), written
+
+def claim_inbox_files(root, limit, settle_seconds=HOT_FOLDER_SETTLE_SECONDS):
+    """Move up to limit settled inbox files into processing/, oldest first; returns their names"""
+    now = time.time()
+    candidates = []
+    with os.scandir(hot_folder_path(root, "inbox")) as entries:
+        for entry in entries:
+            if entry.name.startswith(".") or not entry.name.lower().endswith(HOT_FOLDER_EXTENSIONS):
+                continue
+            try:
+                mtime = entry.stat().st_mtime
+            except OSError:
+                continue
+            if now - mtime >= settle_seconds:
+                candidates.append((mtime, entry.name))
+    claimed = []
+    for _, name in sorted(candidates)[:limit]:
+        target = name
+        if os.path.exists(hot_folder_path(root, "processing", target)):
+            stem, ext = os.path.splitext(name)
+            target = f"{stem}-{uuid.uuid4().hex[:8]}{ext}"
+        try:
+            os.rename(hot_folder_path(root, "inbox", name), hot_folder_path(root, "processing", target))
+        except FileNotFoundError:
+            continue
+        claimed.append(target)
+    return claimed
+
+def finish_hot_folder_file(root, name, error=None):
+    """Move a processed file to outbox/ or, with an error report, to failed/"""
+    source = hot_folder_path(root, "processing", name)
+    if error is None:
+        os.replace(source, hot_folder_path(root, "outbox", name))
+    else:
+        report = {"file": name, "error": str(error), "type": type(error).__name__,
+                  "traceback": "".join(traceback.format_exception(error)),
+                  "at": datetime.datetime.now().isoformat(timespec="seconds")}
+        write_file_atomic(hot_folder_path(root, "failed", f"{name}.error.json"),
+                          json.dumps(report, indent=2).encode("utf-8"))
+        os.replace(source, hot_folder_path(root, "failed", name))
+    for journal in (f"{source}.numbers", f"{source}.issued"):
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(journal)
+
+class HotFolderMetrics:
+    """Running throughput counters for a hot folder watcher"""
+
+    def __init__(self):
+        self.started = time.time()
+        self.files_done = 0
+        self.files_failed = 0
+        self.documents = 0
+        self.bytes_written = 0
+        self.file_seconds = 0.0
+
+    def record(self, seconds, documents=0, bytes_written=0, failed=False):
+        self.file_seconds += seconds
+        if failed:
+            self.files_failed += 1
+        else:
+            self.files_done += 1
+            self.documents += documents
+            self.bytes_written += bytes_written
+
+    def snapshot(self, in_flight=0, backlog=0):
+        hours = max(time.time() - self.started, 1e-9) / 3600
+        files = self.files_done + self.files_failed
+        return {"files_done": self.files_done, "files_failed": self.files_failed, "documents": self.documents,
+                "bytes_written": self.bytes_written, "in_flight": in_flight, "backlog": backlog,
+                "files_per_hour": round(files / hours, 1), "documents_per_hour": round(self.documents / hours, 1),
+                "mean_file_seconds": round(self.file_seconds / files, 3) if files else 0.0,
+                "uptime_seconds": round(hours * 3600, 1)}
+
+def recover_hot_folder(root):
+    """Files a previous watcher claimed but did not finish, oldest first"""
+    folder = hot_folder_path(root, "processing")
+    names = [name for name in os.listdir(folder) if name.lower().endswith(HOT_FOLDER_EXTENSIONS)]
+    return sorted(names, key=lambda name: os.path.getmtime(os.path.join(folder, name)))
+
+def run_hot_folder(root=HOT_FOLDER_DIR, once=False, poll_seconds=HOT_FOLDER_POLL_SECONDS,
+                   max_in_flight=HOT_FOLDER_MAX_IN_FLIGHT, logo=None, stamp=None, stop_event=None, on_file=None):
+    """Watch root/inbox and process files until stopped, or until it is empty when once is set"""
+    for folder in HOT_FOLDER_SUBDIRS:
+        os.makedirs(hot_folder_path(root, folder), exist_ok=True)
+    stop_event = stop_event or threading.Event()
+    settle_seconds = 0 if once else HOT_FOLDER_SETTLE_SECONDS
+    metrics = HotFolderMetrics()
+    queued = recover_hot_folder(root)
+    in_flight = {}
+
+    def collect(futures):
+        for future in futures:
+            name, started = in_flight.pop(future)
+            error = future.exception()
+            documents, written = (0, 0) if error else future.result()
+            try:
+                finish_hot_folder_file(root, name, error)
+            except OSError as e:
+                error = error or e
+            metrics.record(time.perf_counter() - started, documents, written, failed=error is not None)
+            if on_file:
+                on_file(name, documents, error)
+
+    with ThreadPoolExecutor(max_workers=max_in_flight) as executor:
+        while not stop_event.is_set():
+            capacity = max_in_flight - len(in_flight)
+            names, queued = queued[:capacity], queued[capacity:]
+            if len(names) < capacity:
+                names += claim_inbox_files(root, capacity - len(names), settle_seconds)
+            for name in names:
+                in_flight[executor.submit(process_hot_folder_file, root, name, logo, stamp)] = (name, time.perf_counter())
+
+            backlog = sum(1 for name in os.listdir(hot_folder_path(root, "inbox"))
+                          if name.lower().endswith(HOT_FOLDER_EXTENSIONS))
+            write_file_atomic(os.path.join(root, HOT_FOLDER_METRICS_FILE),
+                              json.dumps(metrics.snapshot(len(in_flight), backlog), indent=2).encode("utf-8"))
+            if once and not in_flight and not queued and not backlog:
+                break
+            if in_flight:
+                done, _ = concurrent.futures.wait(in_flight, timeout=poll_seconds,
+                                                  return_when=concurrent.futures.FIRST_COMPLETED)
+                collect(done)
+            else:
+                stop_event.wait(poll_seconds)
+        collect(list(concurrent.futures.as_completed(in_flight)))
+    snapshot = metrics.snapshot()
+    write_file_atomic(os.path.join(root, HOT_FOLDER_METRICS_FILE), json.dumps(snapshot, indent=2).encode("utf-8"))
+    return snapshot
+
+def hot_folder_check_orders():
+    """Sample JSON and CSV exports with purchase orders, a quotation and an invoice, keyed by file name
+
+    The JSON numbers sit well above the ones the CSV orders draw from the counters, so the two never clash.
+    """
+    today = datetime.date.today().strftime("%d-%m-%Y")
+    po = {"doc_type": "po", "po_number": generate_po_number("SP1", 900), "po_date": today,
+          "vendor_name": "Supplier Company Ltd.", "vendor_address": "Supplier Address\nCity Name - 400001",
+          "vendor_contact": "Contact Person", "vendor_mobile": "0000000000", "gst_no": "GSTNUMBER",
+          "bill_to_company": "Your Company Name", "bill_to_address": "Your Company Address",
+          "ship_to_company": "Your Company Name", "ship_to_address": "Your Company Address",
+          "end_company": "Customer Company Ltd.", "end_address": "Customer Address", "end_email": "customer@company.com",
+          "products": [{"name": "Software Product 1", "basic": 10000, "qty": 2}],
+          "payment_terms": "30 Days from Invoice date.", "delivery_terms": "Within 2 Days.",
+          "company_name": "Your Company Name"}
+    quotation = {"doc_type": "quotation", "quotation_number": generate_quotation_number("SP1", 900),
+                 "quotation_date": today, "vendor_name": "Customer Company Ltd.", "vendor_address": "Customer Address",
+                 "products": [{"name": "Software Product 2", "basic": 20000, "qty": 1}]}
+    rows = ["order_id,doc_type,item,rate,qty,customer_name,supplier_name",
+            "A1,po,Software Product 1,10000,2,Customer Company Ltd.,Supplier Company Ltd.",
+            "A1,po,Software Product 2,20000,1,Customer Company Ltd.,Supplier Company Ltd.",
+            "A2,invoice,Software Product 3,30000,1,Customer Company Ltd.,Supplier Company Ltd."]
+    resumed = [dict(po, po_number=generate_po_number("SP1", 901)),
+               dict(quotation, quotation_number=generate_quotation_number("SP1", 901))]
+    return {"orders.json": json.dumps([po, quotation]), "erp_export.csv": "\n".join(rows) + "\n",
+            "po_again.json": json.dumps(po), "resumed.json": json.dumps(resumed),
+            "bad_date.csv": "\n".join(rows[:2] + ["A3,po,Software Product 2,20000,1,Customer,Supplier,31-02-2026"])
+                            .replace("supplier_name", "supplier_name,date") + "\n"}
+
+def check_hot_folder():
+    """Run the hot folder over sample orders in a scratch directory; returns (check, passed) pairs"""
+    results = []
+
+    def check(name, test):
+        try:
+            results.append((name, bool(test())))
+        except Exception as e:
+            results.append((f"{name} ({e!r})", False))
+
+    def rendered(out_name):
+        folder = hot_folder_path(root, "outbox", out_name)
+        pdfs = sorted(os.listdir(folder)) if os.path.isdir(folder) else []
+        for name in pdfs:
+            with open(os.path.join(folder, name), "rb") as f:
+                if f.read(5) != b"%PDF-":
+                    return []
+        return pdfs
+
+    def failed(name):
+        return os.path.exists(hot_folder_path(root, "failed", name))
+
+    previous_dir = os.getcwd()
+    with tempfile.TemporaryDirectory() as scratch:
+        os.chdir(scratch)
+        try:
+            root = HOT_FOLDER_DIR
+            orders = hot_folder_check_orders()
+            for folder in HOT_FOLDER_SUBDIRS:
+                os.makedirs(hot_folder_path(root, folder), exist_ok=True)
+            for name in ("orders.json", "erp_export.csv"):
+                write_file_atomic(hot_folder_path(root, "inbox", name), orders[name].encode("utf-8"))
+            metrics = run_hot_folder(root, once=True, poll_seconds=0.05)
+
+            check("JSON purchase order and quotation are rendered",
+                  lambda: not failed("orders.json") and
+                          [name.split("_")[0] for name in rendered("orders")] == ["po", "quotation"])
+            check("CSV purchase order and invoice are rendered",
+                  lambda: not failed("erp_export.csv") and
+                          [name.split("_")[0] for name in rendered("erp_export")] == ["invoice", "po"])
+            check("no file is sent to failed/", lambda: metrics["files_failed"] == 0 and
+                                                         not os.listdir(hot_folder_path(root, "failed")))
+            check("rendered PO numbers are registered",
+                  lambda: is_number_issued("po", json.loads(orders["po_again.json"])["po_number"]))
+
+            write_file_atomic(hot_folder_path(root, "inbox", "po_again.json"), orders["po_again.json"].encode("utf-8"))
+            run_hot_folder(root, once=True, poll_seconds=0.05)
+            check("an already issued PO is refused, not rendered twice",
+                  lambda: failed("po_again.json") and not rendered("po_again"))
+
+            po_sequence = read_sharded_sequence("po", "SP1")
+            write_file_atomic(hot_folder_path(root, "inbox", "bad_date.csv"), orders["bad_date.csv"].encode("utf-8"))
+            run_hot_folder(root, once=True, poll_seconds=0.05)
+            check("an order with a bad date fails before a number is reserved",
+                  lambda: failed("bad_date.csv") and read_sharded_sequence("po", "SP1") == po_sequence)
+
+            # A watcher that crashed after registering both numbers and archiving the quotation
+            resumed = parse_order_json(orders["resumed.json"])
+            (po_number, _), (quotation_number, quotation) = [(document_summary(t, d)[0], d) for t, d in resumed]
+            processing = hot_folder_path(root, "processing", "resumed.json")
+            write_file_atomic(processing, orders["resumed.json"].encode("utf-8"))
+            write_file_atomic(f"{processing}.issued",
+                              json.dumps([f"po:{po_number}", f"quotation:{quotation_number}"]).encode("utf-8"))
+            register_issued_number("po", po_number)
+            register_issued_number("quotation", quotation_number)
+            archived = create_quotation_pdf(quotation)
+            archive_document(archived, "quotation", quotation_number, quotation.quotation_date, document=quotation)
+            run_hot_folder(root, once=True, poll_seconds=0.05)
+
+            def resumed_output():
+                with open(hot_folder_path(root, "outbox", os.path.join(
+                        "resumed", document_file_name("quotation", quotation_number))), "rb") as f:
+                    return f.read() == archived
+            check("a resumed file reuses its own numbers and publishes archived PDFs",
+                  lambda: not failed("resumed.json") and len(rendered("resumed")) == 2 and resumed_output())
+        finally:
+            os.chdir(previous_dir)
+    return results
+
+# --- Contract Renewals ---
+# Invoice lines follow the "Product / Serial # / Contract # / End Date" template,
+# so each archived invoice line with a readable end date is indexed as a
+# contract, keyed by its contract number (or buyer, serial and product when
+# there is none) and keeping only the latest end date. Renewal invoices
+# therefore move a contract forward on their own. The end_date index turns
+# "what expires in this window" into a B-tree range scan whose cost follows
+# the number of contracts found, not the size of the archive. Renewals are
+# grouped per buyer and seller into one document each and rendered through
+# the shared render pool.
+CONTRACT_LINE_PATTERN = re.compile(r"^\s*(serial|contract)\s*(?:#|no\.?)\s*:?\s*(.*?)\s*$", re.IGNORECASE)
+CONTRACT_END_DATE_PATTERN = re.compile(r"^(\s*end\s*date\s*:?)\s*(.*?)\s*$", re.IGNORECASE)
+CONTRACT_DATE_FORMATS = ("%d-%m-%Y", "%d/%m/%Y", "%d.%m.%Y", "%Y-%m-%d", "%d %b %Y", "%d %B %Y", "%d-%b-%Y")
+RENEWAL_TERM_MONTHS = 12
+RENEWAL_WINDOW_DAYS = 30
+
+def parse_contract_date(text):
+    """Date from an End Date line, or None when it is blank or unreadable"""
+    for fmt in CONTRACT_DATE_FORMATS:
+        try:
+            return datetime.datetime.strptime(text.strip(), fmt).date()
+        except ValueError:
+            continue
+    return None
+
+def parse_contract_line(description):
+    """Product, serial, contract number and end date from a templated invoice description"""
+    lines = [line for line in description.splitlines() if line.strip()]
+    fields = {"product": lines[0].strip() if lines else "", "serial": "", "contract": "", "end_date": None}
+    for line in lines[1:]:
+        match = CONTRACT_LINE_PATTERN.match(line)
+        if match:
+            fields[match.group(1).lower()] = match.group(2)
+            continue
+        match = CONTRACT_END_DATE_PATTERN.match(line)
+        if match:
+            fields["end_date"] = parse_contract_date(match.group(2))
+    return fields
+
+def add_months(date, months):
+    """Same day months later, clamped to the end of shorter months"""
+    month_index = date.month - 1 + months
+    year, month = date.year + month_index // 12, month_index % 12 + 1
+    next_month = datetime.date(year + month // 12, month % 12 + 1, 1)
+    return date.replace(year=year, month=month, day=min(date.day, (next_month - datetime.timedelta(days=1)).day))
+
+def index_invoice_contracts(conn, invoice):
+    """Upsert the contract lines of an invoice, keeping each contract's latest end date"""
+    rows = []
+    for item in invoice.items:
+        fields = parse_contract_line(item.description)
+        if fields["end_date"] is None:
+            continue
+        owner = invoice.buyer.gstin or invoice.buyer.name
+        key = fields["contract"] or f"{owner}|{fields['serial']}|{fields['product']}"
+        rows.append((key.upper(), fields["contract"], fields["serial"], fields["product"], item.description,
+                     item.quantity, item.unit_rate, item.hsn, fields["end_date"].isoformat(), invoice.buyer.name,
+                     invoice.buyer.gstin.upper(), json.dumps(dataclasses.asdict(invoice.buyer)),
+                     json.dumps(dataclasses.asdict(invoice.vendor)), invoice.invoice_no,
+                     to_iso_date(invoice.invoice_date)))
+    conn.executemany(
+        "INSERT INTO contracts (contract_key, contract_no, serial_no, product, description, quantity, unit_rate, hsn, "
+        "end_date, party, gstin, buyer, vendor, invoice_number, invoice_date) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?) "
+        "ON CONFLICT (contract_key) DO UPDATE SET contract_no = excluded.contract_no, serial_no = excluded.serial_no, "
+        "product = excluded.product, description = excluded.description, quantity = excluded.quantity, "
+        "unit_rate = excluded.unit_rate, hsn = excluded.hsn, end_date = excluded.end_date, party = excluded.party, "
+        "gstin = excluded.gstin, buyer = excluded.buyer, vendor = excluded.vendor, "
+        "invoice_number = excluded.invoice_number, invoice_date = excluded.invoice_date, renewal_quote = '' "
+        "WHERE excluded.end_date > contracts.end_date",
+        rows)
+    return len(rows)
+
+def find_expiring_contracts(start, end, party=None, unquoted_only=False, limit=None, conn=None):
+    """Contracts whose latest end date falls between start and end inclusive, soonest first"""
+    clauses = ["end_date BETWEEN ? AND ?"]
+    params = [start.isoformat(), end.isoformat()]
+    if party:
+        clauses.append("party LIKE ? ESCAPE '\\'")
+        params.append(like_prefix(party))
+    if unquoted_only:
+        clauses.append("renewal_quote = ''")
+    own_conn = conn is None
+    conn = conn or get_archive_connection()
+    try:
+        rows = conn.execute(f"SELECT * FROM contracts WHERE {' AND '.join(clauses)} ORDER BY end_date, contract_key "
+                            f"LIMIT ?", params + [-1 if limit is None else int(limit)]).fetchall()
+        return [dict(row) for row in rows]
+    finally:
+        if own_conn:
+            conn.close()
+
+def renewal_description(contract, term_months=RENEWAL_TERM_MONTHS):
+    """The contract's description with its End Date moved on by one term"""
+    new_end = add_months(datetime.date.fromisoformat(contract["end_date"]), term_months)
+    lines = []
+    for line in contract["description"].splitlines():
+        match = CONTRACT_END_DATE_PATTERN.match(line)
+        lines.append(f"{match.group(1)} {new_end.strftime('%d-%m-%Y')}" if match else line)
+    return "\n".join(lines)
+
+def renewal_deals(contracts, renewal_date, term_months=RENEWAL_TERM_MONTHS, sales_person="SP1"):
+    """One deal per buyer and seller covering all of their expiring contracts"""
+    groups = {}
+    for contract in contracts:
+        groups.setdefault((contract["buyer"], contract["vendor"]), []).append(contract)
+    deals = []
+    for (buyer, vendor), group in groups.items():
+        products = tuple(ProductLine(name=renewal_description(contract, term_months), basic=contract["unit_rate"],
+                                     qty=contract["quantity"]) for contract in group)
+        deals.append((Deal(deal_date=renewal_date.strftime("%d-%m-%Y"), customer=Party(**json.loads(buyer)),
+                           supplier=Party(), company=Party(**json.loads(vendor)), products=products,
+                           sales_person_code=sales_person, hsn=group[0]["hsn"] or "997331",
+                           subject="Renewal of Software Subscription",
+                           intro_paragraph="The following subscriptions are due for renewal."), group))
+    return deals
+
+def generate_renewals(start, end, doc_type="invoice", renewal_date=None, term_months=RENEWAL_TERM_MONTHS,
+                      sales_person="SP1", party=None, logo=None, stamp=None):
+    """Renewal quotations or invoices for every contract expiring in the window; returns (doc_type, model, pdf) triples
+
+    Issued renewal invoices re-index their contracts with the new end date, and quoted contracts are
+    marked, so running the same window twice does not renew anything twice.
+    """
+    renewal_date = renewal_date or datetime.date.today()
+    contracts = find_expiring_contracts(start, end, party=party, unquoted_only=doc_type == "quotation")
+    deals = renewal_deals(contracts, renewal_date, term_months, sales_person)
+    documents = [(doc_type, derive_deal_documents(deal, {doc_type: reserve_document_number(doc_type, sales_person)})
+                  [doc_type]) for deal, _ in deals]
+    claimed = []
+    try:
+        for _, document in documents:
+            number = document_summary(doc_type, document)[0]
+            if not register_issued_number(doc_type, number):
+                raise ValueError(f"{doc_type} number {number} has already been issued")
+            claimed.append(number)
+        pdfs = render_documents(documents, logo, stamp, optimize=True) if documents else []
+    except Exception:
+        for number in claimed:
+            release_issued_number(doc_type, number)
+        raise
+    for (_, document), (_, group), pdf_bytes in zip(documents, deals, pdfs):
+        number, date, party_name, gstin, grand_total = document_summary(doc_type, document)
+        archive_document(pdf_bytes, doc_type, number, date, sales_person=sales_person, party=party_name,
+                         gstin=gstin, grand_total=grand_total, document=document)
+        if doc_type == "quotation":
+            conn = get_archive_connection()
+            try:
+                with conn:
+                    conn.executemany("UPDATE contracts SET renewal_quote = ? WHERE contract_key = ?",
+                                     [(number, contract["contract_key"]) for contract in group])
+            finally:
+                conn.close()
+    return [(doc_type, document, pdf_bytes) for (_, document), pdf_bytes in zip(documents, pdfs)]
+
+def render_renewals_sidebar(logo=None, stamp=None):
+    """Sidebar list of contracts expiring soon, with bulk renewal generation"""
+    with st.sidebar.expander("🔁 Renewals Due"):
+        days = st.number_input("Expiring within (days)", min_value=1, max_value=366, value=RENEWAL_WINDOW_DAYS,
+                               key="renewal_window_days")
+        start = datetime.date.today()
+        end = start + datetime.timedelta(days=int(days))
+        try:
+            contracts = find_expiring_contracts(start, end)
+        except sqlite3.Error as e:
+            st.error(f"Contract lookup failed: {e}")
+            return
+        if not contracts:
+            st.info("No contracts expiring in this window")
+            return
+        st.caption(f"{len(contracts)} contracts for {len({c['buyer'] for c in contracts})} customers")
+        for contract in contracts[:10]:
+            st.markdown(f"**{contract['party']}** — {contract['product']} "
+                        f"({contract['contract_no'] or contract['serial_no']}) ends "
+                        f"{datetime.date.fromisoformat(contract['end_date']).strftime('%d-%m-%Y')}")
+        doc_type = st.radio("Generate", ["quotation", "invoice"], format_func=str.title, horizontal=True,
+                            key="renewal_doc_type")
+        if st.button("Generate Renewals", key="renewal_generate_button"):
+            try:
+                renewals = generate_renewals(start, end, doc_type, logo=logo, stamp=stamp)
+            except Exception as e:
+                st.error(f"Error generating renewals: {str(e)}")
+                return
+            if not renewals:
+                st.info("Every contract in this window already has a renewal quotation")
+                return
+            file_name = f"renewal_{doc_type}s_{start.strftime('%d-%m-%Y')}.zip"
+            path = new_spool_path(file_name)
+            with DocumentZipWriter(path) as export:
+                for renewal_type, document, pdf_bytes in renewals:
+                    export.add_document(renewal_type, document, pdf_bytes)
+            download = register_spooled_file(path, file_name, mime="application/zip")
+            st.success(f"✅ Generated {len(renewals)} renewal {doc_type}s")
+            render_spooled_download(download, "⬇ Download Renewals", key="renewal_download_button", container=st)
+
+# --- Statements of Account ---
+# A statement is built from the archive index alone; no invoice is re-rendered.
+# The buyer's invoices up to the end of the period come from one range scan on
+# (gstin | party, doc_type, doc_date) into a DataFrame. A re-archived invoice
+# keeps only its latest row. Amounts are summed as integer paise: everything
+# before the period is the opening balance, a cumulative sum gives the running
+# balance and a group-by gives the monthly subtotals.
+STATEMENT_ROW_HEIGHT = 6
+STATEMENT_COLUMNS = (("Date", 28, "L"), ("Particulars", 82, "L"), ("Debit (Rs.)", 35, "R"), ("Balance (Rs.)", 35, "R"))
+
+def load_statement_invoices(end, gstin=None, party=None, conn=None):
+    """Archived invoices of a buyer dated up to end, one row per invoice number, oldest first"""
+    if gstin:
+        where, key = "gstin = ?", gstin.strip().upper()
+    elif party:
+        where, key = "party = ?", party.strip()
+    else:
+        raise ValueError("A statement needs the buyer's GSTIN or name")
+    own_conn = conn is None
+    conn = conn or get_archive_connection()
+    try:
+        rows = conn.execute(f"SELECT id, number, doc_date, party, gstin, grand_total FROM documents "
+                            f"WHERE {where} AND doc_type = 'invoice' AND doc_date <= ? ORDER BY doc_date, id",
+                            (key, end.isoformat())).fetchall()
+    finally:
+        if own_conn:
+            conn.close()
+    frame = pd.DataFrame.from_records(rows, columns=["id", "number", "doc_date", "party", "gstin", "grand_total"])
+    frame = frame.drop_duplicates("number", keep="last").reset_index(drop=True)
+    frame["paise"] = (frame["grand_total"].astype("float64") * 100).round().astype("int64")
+    return frame
+
+def build_statement(invoices, start, end):
+    """Opening balance, period rows with running balances, monthly subtotals and closing balance"""
+    before = invoices["doc_date"] < start.isoformat()
+    opening = int(invoices.loc[before, "paise"].sum())
+    period = invoices.loc[~before].copy()
+    period["balance"] = opening + period["paise"].cumsum()
+    period["month"] = period["doc_date"].str[:7]
+    monthly = period.groupby("month", sort=True).agg(invoices=("number", "size"), paise=("paise", "sum"),
+                                                     balance=("balance", "last"))
+    latest = invoices.iloc[-1] if len(invoices) else None
+    return {"start": start, "end": end, "opening": opening, "rows": period, "monthly": monthly,
+            "closing": int(period["balance"].iloc[-1]) if len(period) else opening,
+            "party": latest["party"] if latest is not None else "",
+            "gstin": latest["gstin"] if latest is not None else ""}
+
+class STATEMENT_PDF(CachedMetricsFPDF):
+    def __init__(self, statement, company=COMPANY_PARTY):
+        super().__init__()
+        self.statement = statement
+        self.company = company
+        self.logo_path = None
+        self.set_auto_page_break(auto=False, margin=15)
+        self.set_left_margin(15)
+        self.set_right_margin(15)
+        self.alias_nb_pages()
+        self.default_font = add_calibri_fonts(self)
+
+    def header(self):
+        logo = branding_image(self.logo_path)
+        if logo:
+            try:
+                self.image(logo, x=155, y=8, w=50)
+            except Exception:
+                pass
+        statement = self.statement
+        self.set_y(12)
+        self.set_font(self.default_font, "B", 15)
+        self.cell(0, 7, "STATEMENT OF ACCOUNT", ln=True)
+        self.set_font(self.default_font, "", 10)
+        self.cell(0, 5, self.sanitize_text(self.company.name), ln=True)
+        self.ln(3)
+        self.set_font(self.default_font, "B", 10)
+        self.cell(110, 5, self.sanitize_text(statement["party"]))
+        self.cell(0, 5, f"Period: {statement['start'].strftime('%d-%m-%Y')} to {statement['end'].strftime('%d-%m-%Y')}",
+                  ln=True, align="R")
+        self.set_font(self.default_font, "", 10)
+        self.cell(0, 5, f"GSTIN: {statement['gstin'] or 'N/A'}", ln=True)
+        self.ln(3)
+        self.set_font(self.default_font, "B", 10)
+        self.set_fill_color(230, 230, 230)
+        for title, width, align in STATEMENT_COLUMNS:
+            self.cell(width, STATEMENT_ROW_HEIGHT, title, border=1, align=align, fill=True)
+        self.ln()
+        self.table_top = self.get_y()
+        self.set_font(self.default_font, "", 10)
+
+    def footer(self):
+        self.set_y(-12)
+        self.set_font(self.default_font, "I", 8)
+        self.cell(0, 5, f"Page {self.page_no()} of {{nb}}", align="C")
+
+    def close_table(self):
+        """Column rules from the table heading down to the last row, drawn once per page"""
+        x = self.l_margin
+        for _, width, _ in STATEMENT_COLUMNS:
+            self.line(x, self.table_top, x, self.get_y())
+            x += width
+        self.line(x, self.table_top, x, self.get_y())
+        self.line(self.l_margin, self.get_y(), x, self.get_y())
+
+    def row(self, values, style=""):
+        # Rows are placed with text() rather than cell(): a statement has thousands of them, and
+        # cell() re-runs fpdf's line layout for every value.
+        if self.get_y() + STATEMENT_ROW_HEIGHT > self.h - 20:
+            self.close_table()
+            self.add_page()
+        if style != self.font_style:
+            self.set_font(self.default_font, style, 10)
+        baseline = self.get_y() + STATEMENT_ROW_HEIGHT / 2 + 1.2
+        x = self.l_margin
+        for (_, width, align), value in zip(STATEMENT_COLUMNS, values):
+            if value:
+                offset = width - self.c_margin - self.get_string_width(value) if align == "R" else self.c_margin
+                self.text(x + offset, baseline, value)
+            x += width
+        self.set_y(self.get_y() + STATEMENT_ROW_HEIGHT)
+
+def layout_statement(pdf, statement):
+    pdf.add_page()
+    start_label = statement["start"].strftime("%d-%m-%Y")
+    pdf.row((start_label, "Opening Balance", "", format_inr(statement["opening"] / 100)), "B")
+    dates = pd.to_datetime(statement["rows"]["doc_date"]).dt.strftime("%d-%m-%Y")
+    monthly = statement["monthly"]
+    month = None
+    for date, number, month_key, paise, balance in zip(dates, statement["rows"]["number"], statement["rows"]["month"],
+                                                       statement["rows"]["paise"], statement["rows"]["balance"]):
+        if month is not None and month_key != month:
+            add_statement_subtotal(pdf, month, monthly.loc[month])
+        month = month_key
+        pdf.row((date, f"Invoice {pdf.sanitize_text(number)}", format_inr(paise / 100), format_inr(balance / 100)))
+    if month is not None:
+        add_statement_subtotal(pdf, month, monthly.loc[month])
+    pdf.row((statement["end"].strftime("%d-%m-%Y"), "Closing Balance", "", format_inr(statement["closing"] / 100)), "B")
+    pdf.close_table()
+
+def add_statement_subtotal(pdf, month, totals):
+    label = datetime.datetime.strptime(month, "%Y-%m").strftime("%B %Y")
+    pdf.row(("", f"Total for {label} ({totals['invoices']} invoices)", format_inr(totals["paise"] / 100), ""), "I")
+
+def create_statement_pdf(statement, company=COMPANY_PARTY, logo_path=None):
+    pdf = STATEMENT_PDF(statement, company)
+    pdf.logo_path = logo_path
+    layout_statement(pdf, statement)
+    return pdf_output_bytes(pdf)
+
+def generate_statement(start, end, gstin=None, party=None, company=COMPANY_PARTY, logo=None, conn=None):
+    """Statement data and PDF for a buyer's archived invoices over a period"""
+    statement = build_statement(load_statement_invoices(end, gstin, party, conn), start, end)
+    return statement, create_statement_pdf(statement, company, logo)
+
+def render_statement_sidebar(logo=None):
+    """Sidebar statement of account for one buyer"""
+    with st.sidebar.expander("📒 Statement of Account"):
+        buyer = st.text_input("Buyer GSTIN or Name", key="statement_buyer")
+        today = datetime.date.today()
+        start = st.date_input("From", value=today.replace(month=4, day=1) if today.month >= 4
+                              else today.replace(year=today.year - 1, month=4, day=1), key="statement_start")
+        end = st.date_input("To", value=today, key="statement_end")
+        if not st.button("Generate Statement", key="statement_generate_button"):
+            return
+        if not buyer.strip():
+            st.warning("⚠ Enter the buyer's GSTIN or name")
+            return
+        is_gstin = re.fullmatch(r"[0-9A-Za-z]{15}", buyer.strip()) is not None
+        try:
+            statement, pdf_bytes = generate_statement(start, end, gstin=buyer if is_gstin else None,
+                                                      party=None if is_gstin else buyer, logo=logo)
+        except (sqlite3.Error, ValueError) as e:
+            st.error(f"Error generating statement: {str(e)}")
+            return
+        if not statement["party"]:
+            st.info("No archived invoices for this buyer")
+            return
+        st.success(f"✅ {len(statement['rows'])} invoices, closing balance ₹{format_inr(statement['closing'] / 100)}")
+        download = spool_download(pdf_bytes, f"statement_{statement['party']}_{end.strftime('%d-%m-%Y')}.pdf")
+        render_spooled_download(download, "⬇ Download Statement", key="statement_download_button", container=st)
+
+# --- GST Returns ---
+# Every archived invoice also stores its line items in invoice_lines. Amounts
+# are integer paise, and the FY and quarter (get_current_quarter) are stored
+# so a return period is one index lookup. Each line carries its share of the
+# invoice's SGST/CGST. The rounding difference goes to the largest line, so
+# lines add up exactly to the tax printed on the invoice. A quarter loads into
+# a DataFrame and is grouped into the GSTR-1 tables: B2B per invoice and rate,
+# B2C (small) per rate, the HSN summary and a rate-wise total. All invoices are
+# intra-state today, so IGST is always zero.
+GSTIN_PATTERN = re.compile(r"\d{2}[A-Z]{5}\d{4}[A-Z][1-9A-Z]Z[0-9A-Z]")
+GST_RATE_BP = SGST_RATE_BP + CGST_RATE_BP
+GSTR1_TABLES = ("b2b", "b2cs", "hsn", "rates")
+
+def quarter_of(date):
+    """Financial year and quarter of a date, as the document numbers use them"""
+    return get_financial_year(date), get_current_quarter(date)
+
+def index_invoice_lines(conn, invoice):
+    """Replace an invoice's line items in the GST return store"""
+    if not invoice.items:
+        return 0
+    taxable = invoice_line_amounts(invoice.items)
+    invoice_date = datetime.datetime.strptime(to_iso_date(invoice.invoice_date), "%Y-%m-%d")
+    fy, quarter = quarter_of(invoice_date)
+    taxes = []
+    for total, rate_bp in ((invoice.totals.sgst, SGST_RATE_BP), (invoice.totals.cgst, CGST_RATE_BP)):
+        shares = divide_rounded(taxable * rate_bp, RATE_SCALE)
+        shares[int(np.argmax(taxable))] += to_paise(total) - int(shares.sum())
+        taxes.append(shares)
+    rows = [(invoice.invoice_no, line_no, invoice_date.strftime("%Y-%m-%d"), fy, quarter, invoice.buyer.name,
+             invoice.buyer.gstin.upper(), to_paise(invoice.totals.final_amount), item.hsn,
+             item.description.splitlines()[0] if item.description else "", item.quantity, GST_RATE_BP,
+             int(taxable[line_no - 1]), int(taxes[0][line_no - 1]), int(taxes[1][line_no - 1]))
+            for line_no, item in enumerate(invoice.items, 1)]
+    conn.execute("DELETE FROM invoice_lines WHERE invoice_no = ?", (invoice.invoice_no,))
+    conn.executemany("INSERT INTO invoice_lines (invoice_no, line_no, invoice_date, fy, quarter, buyer, buyer_gstin, "
+                     "invoice_paise, hsn, description, quantity, rate_bp, taxable_paise, sgst_paise, cgst_paise) "
+                     "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+    return len(rows)
+
+def load_return_lines(fy, quarter, conn=None):
+    """All stored invoice lines of one return period as a DataFrame"""
+    own_conn = conn is None
+    conn = conn or get_archive_connection()
+    try:
+        return pd.read_sql_query("SELECT invoice_no, line_no, invoice_date, buyer, buyer_gstin, invoice_paise, hsn, "
+                                 "description, quantity, rate_bp, taxable_paise, sgst_paise, cgst_paise, igst_paise "
+                                 "FROM invoice_lines WHERE fy = ? AND quarter = ?", conn, params=(fy, quarter))
+    finally:
+        if own_conn:
+            conn.close()
+
+def _rupees(frame, columns):
+    """Paise columns converted to rupees under their return names"""
+    for column, name in columns.items():
+        frame[name] = (frame.pop(column) / 100).round(2)
+    return frame
+
+def summarize_gst_return(lines):
+    """GSTR-1 tables for a period's invoice lines, as DataFrames keyed by table name"""
+    lines = lines.assign(rate=lines["rate_bp"] / 100, b2b=lines["buyer_gstin"].str.fullmatch(GSTIN_PATTERN))
+    amounts = {"taxable_paise": "sum", "sgst_paise": "sum", "cgst_paise": "sum", "igst_paise": "sum"}
+    money = {"taxable_paise": "taxable_value", "sgst_paise": "sgst", "cgst_paise": "cgst", "igst_paise": "igst"}
+
+    b2b = (lines[lines["b2b"]]
+           .groupby(["buyer_gstin", "buyer", "invoice_no", "invoice_date", "rate"], as_index=False)
+           .agg(invoice_paise=("invoice_paise", "first"), **{k: (k, v) for k, v in amounts.items()}))
+    b2b["place_of_supply"] = b2b["buyer_gstin"].str[:2]
+    dates = b2b["invoice_date"].str
+    b2b["invoice_date"] = dates[8:10] + "-" + dates[5:7] + "-" + dates[:4]
+    b2b = _rupees(b2b, {"invoice_paise": "invoice_value", **money})
+
+    b2cs = lines[~lines["b2b"]].groupby("rate", as_index=False).agg(
+        invoices=("invoice_no", "nunique"), **{k: (k, v) for k, v in amounts.items()})
+    b2cs = _rupees(b2cs, money)
+
+    hsn = lines.groupby(["hsn", "rate"], as_index=False).agg(
+        description=("description", "first"), quantity=("quantity", "sum"),
+        **{k: (k, v) for k, v in amounts.items()})
+    hsn["total_paise"] = hsn["taxable_paise"] + hsn["sgst_paise"] + hsn["cgst_paise"] + hsn["igst_paise"]
+    hsn = _rupees(hsn, {**money, "total_paise": "total_value"})
+
+    rates = lines.groupby("rate", as_index=False).agg(
+        invoices=("invoice_no", "nunique"), lines=("line_no", "size"), **{k: (k, v) for k, v in amounts.items()})
+    rates = _rupees(rates, money)
+    return {"b2b": b2b, "b2cs": b2cs, "hsn": hsn, "rates": rates}
+
+def gstr1_json(tables, fy, quarter, gstin=COMPANY_PARTY.gstin):
+    """GSTR-1 style JSON document for a period's summary tables"""
+    invoices = {}
+    for row in tables["b2b"].itertuples(index=False):
+        invoice = invoices.setdefault((row.buyer_gstin, row.invoice_no), {
+            "inum": row.invoice_no, "idt": row.invoice_date,
+            "val": row.invoice_value, "pos": row.place_of_supply, "rchrg": "N", "inv_typ": "R", "itms": []})
+        invoice["itms"].append({"num": len(invoice["itms"]) + 1, "itm_det": {
+            "rt": row.rate, "txval": row.taxable_value, "samt": row.sgst, "camt": row.cgst, "iamt": row.igst,
+            "csamt": 0}})
+    b2b = {}
+    for (ctin, _), invoice in invoices.items():
+        b2b.setdefault(ctin, []).append(invoice)
+    return {
+        "gstin": gstin, "fy": fy, "quarter": quarter,
+        "b2b": [{"ctin": ctin, "inv": inv} for ctin, inv in b2b.items()],
+        "b2cs": [{"sply_ty": "INTRA", "typ": "OE", "rt": row.rate, "txval": row.taxable_value, "samt": row.sgst,
+                  "camt": row.cgst, "iamt": row.igst, "csamt": 0} for row in tables["b2cs"].itertuples(index=False)],
+        "hsn": {"data": [{"num": num, "hsn_sc": row.hsn, "desc": row.description, "uqc": "NOS", "qty": row.quantity,
+                          "rt": row.rate, "txval": row.taxable_value, "samt": row.sgst, "camt": row.cgst,
+                          "iamt": row.igst, "csamt": 0, "val": row.total_value}
+                         for num, row in enumerate(tables["hsn"].itertuples(index=False), 1)]},
+    }
+
+def export_gst_return(fy, quarter, target, conn=None):
+    """Write a period's GSTR-1 JSON and one CSV per summary table into a ZIP at target; returns the tables"""
+    tables = summarize_gst_return(load_return_lines(fy, quarter, conn))
+    with zipfile.ZipFile(target, "w", zipfile.ZIP_DEFLATED) as export:
+        export.writestr(f"gstr1_{fy}_{quarter}.json", json.dumps(gstr1_json(tables, fy, quarter), separators=(",", ":")))
+        for name in GSTR1_TABLES:
+            export.writestr(f"{name}.csv", tables[name].to_csv(index=False))
+    return tables
+
+def render_gst_return_sidebar():
+    """Sidebar export of a quarter's GSTR-1 data"""
+    with st.sidebar.expander("🧾 GST Return Export"):
+        fy = st.text_input("Financial Year", value=get_financial_year(), key="gst_return_fy")
+        quarter = st.selectbox("Quarter", ["Q1", "Q2", "Q3", "Q4"],
+                               index=["Q1", "Q2", "Q3", "Q4"].index(get_current_quarter()), key="gst_return_quarter")
+        if not st.button("Export GSTR-1 Data", key="gst_return_button"):
+            return
+        file_name = f"gstr1_{fy.strip()}_{quarter}.zip"
+        path = new_spool_path(file_name)
+        try:
+            tables = export_gst_return(fy.strip(), quarter, path)
+        except (sqlite3.Error, OSError) as e:
+            st.error(f"Error exporting GST return: {str(e)}")
+            return
+        rates = tables["rates"]
+        if rates.empty:
+            st.info("No invoices stored for this quarter")
+            return
+        st.success(f"✅ {int(rates['invoices'].sum())} invoices, taxable ₹{format_inr(float(rates['taxable_value'].sum()))}")
+        download = register_spooled_file(path, file_name, mime="application/zip")
+        render_spooled_download(download, "⬇ Download GSTR-1 Data", key="gst_return_download", container=st)
+
+# --- Sales Analytics ---
+# The dashboard never scans documents. Archiving a document number for the
+# first time adds it to two rollups in the same transaction:
+# - sales_rollups: document count and total per type, sales person, quarter
+#   and party;
+# - product_rollups: line count, quantity and taxable value per product.
+# Their size grows with sales people x quarters x parties, not with documents,
+# so a year's dashboard is a handful of indexed reads and small pivots.
+# Invoice numbers carry no sales person; those without one show as
+# Unassigned. Conversion is POs raised per quotation issued by the same sales
+# person.
+ANALYTICS_TOP_N = 10
+UNASSIGNED_SALES_PERSON = "Unassigned"
+
+def number_sales_person(doc_type, number):
+    """Sales person code embedded in a quotation or PO number, or empty"""
+    try:
+        return parse_document_number(doc_type, number).get("sales_person", "")
+    except (DocumentNumberError, KeyError):
+        return ""
+
+def document_product_lines(doc_type, document):
+    """(product, quantity, taxable paise) for each line of a document model"""
+    if doc_type == "invoice":
+        names = [item.description.splitlines()[0].strip() if item.description.strip() else "" for item in document.items]
+        return zip(names, (item.quantity for item in document.items), invoice_line_amounts(document.items).tolist())
+    base = product_line_amounts(document.products)[4]
+    return zip((product.name for product in document.products), (product.qty for product in document.products),
+               base.tolist())
+
+def record_sales(conn, doc_type, number, doc_date, sales_person="", party="", grand_total=0.0, document=None):
+    """Add a newly archived document, and its product lines when given, to the sales rollups"""
+    fy, quarter = quarter_of(datetime.datetime.strptime(to_iso_date(doc_date), "%Y-%m-%d"))
+    sales_person = sales_person or number_sales_person(doc_type, number)
+    conn.execute(
+        "INSERT INTO sales_rollups (doc_type, sales_person, fy, quarter, party, documents, amount_paise) "
+        "VALUES (?, ?, ?, ?, ?, 1, ?) ON CONFLICT (doc_type, sales_person, fy, quarter, party) DO UPDATE SET "
+        "documents = documents + 1, amount_paise = amount_paise + excluded.amount_paise",
+        (doc_type, sales_person, fy, quarter, (party or "").strip(), to_paise(grand_total or 0)))
+    if document is None:
+        return
+    conn.executemany(
+        "INSERT INTO product_rollups (doc_type, sales_person, fy, quarter, product, lines, quantity, amount_paise) "
+        "VALUES (?, ?, ?, ?, ?, 1, ?, ?) ON CONFLICT (doc_type, sales_person, fy, quarter, product) DO UPDATE SET "
+        "lines = lines + 1, quantity = quantity + excluded.quantity, amount_paise = amount_paise + excluded.amount_paise",
+        [(doc_type, sales_person, fy, quarter, product, quantity, paise)
+         for product, quantity, paise in document_product_lines(doc_type, document)])
+
+def rebuild_sales_rollups(conn=None):
+    """Recompute the rollups from the archive index; product lines come from stored invoice lines only"""
+    own_conn = conn is None
+    conn = conn or get_archive_connection()
+    try:
+        with conn:
+            conn.execute("DELETE FROM sales_rollups")
+            conn.execute("DELETE FROM product_rollups")
+            rows = conn.execute("SELECT doc_type, number, doc_date, sales_person, party, grand_total FROM documents "
+                                "WHERE id IN (SELECT MIN(id) FROM documents GROUP BY doc_type, number)").fetchall()
+            for row in rows:
+                record_sales(conn, row[0], row[1], datetime.datetime.strptime(row[2], "%Y-%m-%d"), row[3], row[4],
+                             row[5])
+            conn.execute(
+                "INSERT INTO product_rollups (doc_type, sales_person, fy, quarter, product, lines, quantity, amount_paise) "
+                "SELECT 'invoice', '', fy, quarter, description, COUNT(*), SUM(quantity), SUM(taxable_paise) "
+                "FROM invoice_lines GROUP BY fy, quarter, description")
+        return len(rows)
+    finally:
+        if own_conn:
+            conn.close()
+
+def load_sales_dashboard(fy, sales_person=None, conn=None):
+    """Dashboard tables for a financial year, read from the rollups"""
+    where, params = "fy = ?", [fy]
+    if sales_person:
+        where, params = f"{where} AND sales_person = ?", params + [sales_person]
+    own_conn = conn is None
+    conn = conn or get_archive_connection()
+    try:
+        sales = pd.read_sql_query(f"SELECT doc_type, sales_person, quarter, party, documents, amount_paise "
+                                  f"FROM sales_rollups WHERE {where}", conn, params=params,
+                                  dtype={"documents": "int64", "amount_paise": "int64"})
+        products = pd.read_sql_query(f"SELECT doc_type, product, lines, quantity, amount_paise "
+                                     f"FROM product_rollups WHERE {where}", conn, params=params,
+                                     dtype={"lines": "int64", "quantity": "float64", "amount_paise": "int64"})
+    finally:
+        if own_conn:
+            conn.close()
+    sales["sales_person"] = sales["sales_person"].replace("", UNASSIGNED_SALES_PERSON)
+    sales["amount"] = sales["amount_paise"] / 100
+    products["amount"] = products["amount_paise"] / 100
+    quarters = ["Q1", "Q2", "Q3", "Q4"]
+    invoices = sales[sales["doc_type"] == "invoice"]
+
+    by_person = (sales.pivot_table(index="sales_person", columns="doc_type", values="documents", aggfunc="sum",
+                                   fill_value=0)
+                 .reindex(columns=list(BUNDLE_DOCUMENT_TYPES), fill_value=0))
+    by_person["conversion"] = (by_person["po"] / by_person["quotation"].where(by_person["quotation"] > 0)).fillna(0)
+    by_person["revenue"] = invoices.groupby("sales_person")["amount"].sum().reindex(by_person.index, fill_value=0)
+    by_quarter = (sales.pivot_table(index="quarter", columns="doc_type", values="amount", aggfunc="sum", fill_value=0)
+                  .reindex(index=quarters, columns=list(BUNDLE_DOCUMENT_TYPES), fill_value=0))
+    counts_by_quarter = (sales.pivot_table(index="quarter", columns="doc_type", values="documents", aggfunc="sum",
+                                           fill_value=0)
+                         .reindex(index=quarters, columns=list(BUNDLE_DOCUMENT_TYPES), fill_value=0))
+    top_parties = invoices.groupby("party")[["documents", "amount"]].sum().nlargest(ANALYTICS_TOP_N, "amount")
+    top_products = (products.pivot_table(index="product", columns="doc_type", values="amount", aggfunc="sum",
+                                         fill_value=0)
+                    .reindex(columns=["quotation", "invoice"], fill_value=0)
+                    .nlargest(ANALYTICS_TOP_N, ["invoice", "quotation"]))
+    return {"by_person": by_person, "by_quarter": by_quarter, "counts_by_quarter": counts_by_quarter,
+            "top_parties": top_parties, "top_products": top_products,
+            "totals": {doc_type: int(sales.loc[sales["doc_type"] == doc_type, "documents"].sum())
+                       for doc_type in BUNDLE_DOCUMENT_TYPES},
+            "revenue": float(invoices["amount"].sum())}
+
+def render_sales_dashboard():
+    """Sales analytics tab: issued documents, conversion and revenue from the rollups"""
+    st.header("Sales Analytics")
+    col1, col2 = st.columns([1, 1])
+    with col1:
+        fy = st.text_input("Financial Year", value=get_financial_year(), key="analytics_fy")
+    with col2:
+        sales_person = st.selectbox("Sales Person", options=["All"] + list(SALES_PERSON_MAPPING.keys()),
+                                    key="analytics_sales_person")
+
+    started = time.perf_counter()
+    try:
+        dashboard = load_sales_dashboard(fy.strip(), None if sales_person == "All" else sales_person)
+    except sqlite3.Error as e:
+        st.error(f"Analytics lookup failed: {e}")
+        return
+    elapsed_ms = (time.perf_counter() - started) * 1000
+
+    totals = dashboard["totals"]
+    metrics = st.columns(4)
+    metrics[0].metric("Quotations", totals["quotation"])
+    metrics[1].metric("Purchase Orders", totals["po"])
+    metrics[2].metric("Quotation → PO", f"{totals['po'] / totals['quotation']:.0%}" if totals["quotation"] else "–")
+    metrics[3].metric("Invoiced Revenue", f"₹{format_inr(dashboard['revenue'])}")
+
+    if not any(totals.values()):
+        st.info("No documents archived for this financial year")
+        if st.button("Rebuild Analytics from Archive", key="analytics_rebuild_button"):
+            st.success(f"✅ Rebuilt rollups from {rebuild_sales_rollups()} archived documents")
+        return
+
+    st.subheader("By Quarter")
+    col1, col2 = st.columns([1, 1])
+    with col1:
+        st.caption("Documents issued")
+        st.bar_chart(dashboard["counts_by_quarter"])
+    with col2:
+        st.caption("Value (₹)")
+        st.bar_chart(dashboard["by_quarter"])
+
+    st.subheader("By Sales Person")
+    st.dataframe(dashboard["by_person"].rename(columns={"quotation": "Quotations", "po": "POs", "invoice": "Invoices",
+                                                        "conversion": "Quotation → PO", "revenue": "Revenue (₹)"}),
+                 column_config={"Quotation → PO": st.column_config.NumberColumn(format="percent"),
+                                "Revenue (₹)": st.column_config.NumberColumn(format="%.2f")})
+
+    col1, col2 = st.columns([1, 1])
+    with col1:
+        st.subheader("Top Customers")
+        st.dataframe(dashboard["top_parties"].rename(columns={"documents": "Invoices", "amount": "Invoiced (₹)"}))
+    with col2:
+        st.subheader("Top Products")
+        st.dataframe(dashboard["top_products"].rename(columns={"quotation": "Quoted (₹)", "invoice": "Invoiced (₹)"}))
+    st.caption(f"Loaded from rollups in {elapsed_ms:.0f} ms")
+
+# --- Full-Text Search ---
+# Each archived version of a document is indexed in three columns: its
+# number, its parties (names, addresses, contacts, GSTINs) and its body (line
+# descriptions with serial and contract numbers, subjects, intro paragraphs,
+# references and terms). Only the latest version of a number stays indexed.
+# Hyphens, slashes and underscores are kept inside tokens, so document and
+# serial numbers match whole. Query terms of three or more characters match as
+# prefixes. Shorter ones match exactly, since "1"* expands to every number in
+# the archive. Hits are ranked by BM25, weighting number matches above party
+# matches above body matches. Only the newest SEARCH_CANDIDATES matches are
+# ranked, so a term found in nearly every document (a common product name)
+# costs the same as a rare one. Each hit joins back to the documents row that
+# points at the stored PDF.
+SEARCH_WEIGHTS = (10.0, 5.0, 1.0)
+SEARCH_RESULT_LIMIT = 20
+SEARCH_CANDIDATES = 2000
+SEARCH_PREFIX_MIN_LENGTH = 3
+
+def party_search_text(*parties):
+    return "\n".join(" ".join(value for value in (party.name, party.address, party.contact, party.mobile, party.email,
+                                                  party.gstin, party.pan, party.msme) if value)
+                     for party in parties)
+
+def document_search_fields(doc_type, document):
+    """Number, parties and body text of a document model for the search index"""
+    if doc_type == "quotation":
+        body = (document.subject, document.intro_paragraph, document.quotation_title, document.product_name,
+                *(product.name for product in document.products))
+        return document.quotation_number, party_search_text(document.vendor), "\n".join(filter(None, body))
+    if doc_type == "po":
+        body = (*(product.name for product in document.products), document.payment_terms, document.delivery_terms,
+                document.prepared_by)
+        return (document.po_number,
+                party_search_text(document.vendor, document.bill_to, document.ship_to, document.end_user),
+                "\n".join(filter(None, body)))
+    body = (*(f"{item.description} {item.hsn}" for item in document.items), document.suppliers_reference,
+            document.other_reference, document.buyers_order_no, document.destination, document.terms_of_delivery)
+    return document.invoice_no, party_search_text(document.vendor, document.buyer), "\n".join(filter(None, body))
+
+def index_document_text(conn, document_id, doc_type, number, parties, body):
+    """Index an archived documents row, replacing earlier versions of the same number"""
+    conn.execute("DELETE FROM document_text WHERE rowid IN "
+                 "(SELECT id FROM documents WHERE doc_type = ? AND number = ? AND id != ?)",
+                 (doc_type, number, document_id))
+    conn.execute("INSERT OR REPLACE INTO document_text (rowid, number, parties, body, doc_type) VALUES (?, ?, ?, ?, ?)",
+                 (document_id, number, parties, body, doc_type))
+
+def search_query(text):
+    """FTS5 query requiring every whitespace-separated term of text, longer terms as prefixes"""
+    return " ".join(f'"{term.replace(chr(34), chr(34) * 2)}"' + ("*" if len(term) >= SEARCH_PREFIX_MIN_LENGTH else "")
+                    for term in text.split())
+
+def search_term_matches(word, terms):
+    word = word.strip(",.:;()#").lower()
+    return any(word.startswith(term) if len(term) >= SEARCH_PREFIX_MIN_LENGTH else word == term for term in terms)
+
+def search_snippet(columns, text, width=10):
+    """A few words around the first query term found in columns, with matching words bracketed"""
+    terms = [term.lower() for term in text.split()]
+    for column in columns:
+        words = column.split()
+        first = next((i for i, word in enumerate(words) if search_term_matches(word, terms)), None)
+        if first is None:
+            continue
+        start = max(0, first - 2)
+        shown = [f"[{word}]" if search_term_matches(word, terms) else word for word in words[start:start + width]]
+        return f"{'...' if start else ''}{' '.join(shown)}{'...' if start + width < len(words) else ''}"
+    return ""
+
+def search_documents(text, doc_type=None, limit=SEARCH_RESULT_LIMIT, conn=None):
+    """Archived documents whose contents match text, best first, with a highlighted snippet"""
+    if not ARCHIVE_FTS5:
+        raise RuntimeError("This SQLite build has no FTS5 support")
+    query = search_query(text)
+    if not query:
+        return []
+    type_clause = "AND doc_type = ?" if doc_type else ""
+    own_conn = conn is None
+    conn = conn or get_archive_connection()
+    try:
+        ranked = conn.execute(
+            f"SELECT rowid FROM (SELECT rowid, bm25(document_text, {', '.join(map(str, SEARCH_WEIGHTS))}) AS score "
+            f"FROM document_text WHERE document_text MATCH ? {type_clause} ORDER BY rowid DESC LIMIT ?) "
+            f"ORDER BY score LIMIT ?",
+            [query] + ([doc_type] if doc_type else []) + [SEARCH_CANDIDATES, int(limit)]).fetchall()
+        ids = [row[0] for row in ranked]
+        if not ids:
+            return []
+        # Snippets are cut here from the indexed text: FTS5's snippet() would re-run the whole MATCH.
+        placeholders = ", ".join("?" * len(ids))
+        snippets = {row[0]: search_snippet(row[1:], text) for row in conn.execute(
+            f"SELECT rowid, body, parties, number FROM document_text WHERE rowid IN ({placeholders})", ids)}
+        documents = {row["id"]: dict(row) for row in
+                     conn.execute(f"SELECT * FROM documents WHERE id IN ({placeholders})", ids).fetchall()}
+        return [{**documents[i], "snippet": snippets.get(i, "")} for i in ids if i in documents]
+    finally:
+        if own_conn:
+            conn.close()
+
+def rebuild_search_index(conn=None):
+    """Re-index the latest version of every archived number from the data the archive still holds
+
+    Metadata is indexed for all documents; invoice line descriptions come from the GST line store.
+    """
+    own_conn = conn is None
+    conn = conn or get_archive_connection()
+    try:
+        with conn:
+            conn.execute("DELETE FROM document_text")
+            conn.execute(
+                "INSERT INTO document_text (rowid, number, parties, body, doc_type) "
+                "SELECT d.id, d.number, d.party || ' ' || d.gstin, "
+                "COALESCE((SELECT group_concat(l.description || ' ' || l.hsn, char(10)) FROM invoice_lines l "
+                "WHERE d.doc_type = 'invoice' AND l.invoice_no = d.number), ''), d.doc_type "
+                "FROM documents d WHERE d.id IN (SELECT MAX(id) FROM documents GROUP BY doc_type, number)")
+        return conn.execute("SELECT COUNT(*) FROM document_text").fetchone()[0]
+    finally:
+        if own_conn:
+            conn.close()
+
+def render_search_sidebar():
+    """Sidebar full-text search over archived document contents"""
+    if not ARCHIVE_FTS5:
+        return
+    with st.sidebar.expander("🔎 Search Document Contents"):
+        text = st.text_input("Serial, product, name or address", key="search_text")
+        doc_type = st.selectbox("Document Type", ["", "quotation", "po", "invoice"],
+                                format_func=lambda t: {"": "All", "po": "Purchase Order"}.get(t, t.title()),
+                                key="search_doc_type")
+        if not text.strip():
+            return
+        started = time.perf_counter()
+        try:
+            results = search_documents(text, doc_type or None)
+        except sqlite3.Error as e:
+            st.error(f"Search failed: {e}")
+            return
+        st.caption(f"{len(results)} matches in {(time.perf_counter() - started) * 1000:.0f} ms")
+        if not results:
+            return
+        selected = st.selectbox(
+            "Matching documents",
+            options=range(len(results)),
+            format_func=lambda i: f"{results[i]['doc_type'].title()} {results[i]['number']} - {results[i]['party']}",
+            key="search_result_select")
+        row = results[selected]
+        st.caption(row["snippet"])
+        entry = spool_archived_pdf(row["sha256"], f"{row['number'].replace('/', '_')}.pdf", "search_spool")
+        if entry:
+            render_spooled_download(entry, "⬇ Download PDF", key="search_download_button")
+        else:
+            st.warning("⚠ Archived file missing")
+
+# --- Benchmarks ---
+def sample_quotation_data(products=3):
+    """Representative quotation used for render benchmarks"""
+    return QuotationDocument(
+        quotation_number=generate_quotation_number("SP1", 1),
+        quotation_date=datetime.date.today().strftime("%d-%m-%Y"),
+        vendor=Party(name="Customer Company Ltd.", address="Customer Address\nCity Name - 400001",
+                     email="customer@company.com", contact="Contact Person", mobile="0000000000"),
+        products=tuple(ProductLine(name=name, basic=details["basic"], gst_percent=details["gst_percent"], qty=1.0)
+                       for name, details in list(PRODUCT_CATALOG.items())[:products]),
+        grand_total=0,
+        subject="Proposal for Software Services",
+        intro_paragraph="This is with reference to your requirement for software services.",
+    )
+
+def sample_invoice_data(items=3):
+    """Representative invoice used for render benchmarks"""
+    today = datetime.date.today().strftime("%d-%m-%Y")
+    invoice_items = tuple(InvoiceLine(description=f"Software Product {i}\nDescription\nSerial # SN{i:05d}\nContract # C{i:05d}\nEnd Date:",
+                                      hsn="997331", quantity=1.0, unit_rate=10000.0) for i in range(1, items + 1))
+    basic_amount = sum(item.quantity * item.unit_rate for item in invoice_items)
+    return InvoiceDocument(
+        invoice_no=generate_invoice_number(1),
+        invoice_date=today,
+        vendor=Party(name="Your Company Name", address="Your Company Address", gstin="GSTNUMBER", msme="MSMENUMBER"),
+        buyer=Party(name="Customer Company Ltd.", address="Customer Address", gstin="GSTNUMBER",
+                    mobile="00000 00000", email="customer@company.com"),
+        items=invoice_items,
+        totals=InvoiceTotals(basic_amount=basic_amount, sgst=basic_amount * 0.09, cgst=basic_amount * 0.09,
+                             final_amount=round(basic_amount * 1.18)),
+        suppliers_reference="NA",
+        other_reference="NA",
+        buyers_order_no="Online",
+        buyers_order_date=today,
+        dispatched_through="Online",
+        terms_of_delivery="Within Month",
+        declaration="Standard declaration text as per your requirements.",
+    )
+
+def sample_po_data(products=3):
+    """Representative purchase order used for render benchmarks"""
+    return PurchaseOrderDocument(
+        po_number=generate_po_number("SP1", 1),
+        po_date=datetime.date.today().strftime("%d-%m-%Y"),
+        vendor=Party(name="Supplier Company Ltd.", address="Supplier Address\nCity Name - 400001",
+                     contact="Contact Person", mobile="0000000000", gstin="GSTNUMBER", pan="PANNUMBER",
+                     msme="MSMENUMBER"),
+        bill_to=Party(name="Your Company Name", address="Your Company Address"),
+        ship_to=Party(name="Your Company Name", address="Your Company Address"),
+        end_user=Party(name="Customer Company Ltd.", address="Customer Address", contact="Contact Person",
+                       mobile="0000000000", email="customer@company.com"),
+        products=tuple(ProductLine(name=name, basic=details["basic"], gst_percent=details["gst_percent"], qty=1.0)
+                       for name, details in list(PRODUCT_CATALOG.items())[:products]),
+        amount_words="Rupees Seventy One Thousand Only",
+        payment_terms="30 Days from Invoice date.",
+        delivery_terms="Within 2 Days.",
+        company_name="Your Company Name",
+    )
+
+SAMPLE_DOCUMENTS = {
+    "quotation": (sample_quotation_data, "quotation_number", lambda i: generate_quotation_number("SP1", i)),
+    "po": (sample_po_data, "po_number", lambda i: generate_po_number("SP1", i)),
+    "invoice": (sample_invoice_data, "invoice_no", generate_invoice_number),
+}
+
+def numbered_samples(doc_type, count):
+    """count copies of the sample document of doc_type with consecutive numbers"""
+    sample, number_field, number = SAMPLE_DOCUMENTS[doc_type]
+    template = sample()
+    return (dataclasses.replace(template, **{number_field: number(i)}) for i in range(1, count + 1))
+
+def time_renders(render, iterations):
+    """Average wall time of render() in milliseconds"""
+    render()
+    start = time.perf_counter()
+    for _ in range(iterations):
+        render()
+    return (time.perf_counter() - start) * 1000 / iterations
+
+def benchmark_render_caches(iterations=20):
+    """Per-document render time drawn directly without caches, drawn directly with the text metrics
+    cache, and with static fragments replayed too; saved_ms is what the fragments take off"""
+    global USE_STATIC_FRAGMENTS
+    renders = {
+        "quotation": lambda: create_quotation_pdf(sample_quotation_data()),
+        "po": lambda: create_po_pdf(sample_po_data()),
+        "invoice": lambda: create_invoice_pdf(sample_invoice_data()),
+    }
+    modes = {"uncached_ms": (False, False), "metrics_ms": (True, False), "fragments_ms": (True, True)}
+    results = {}
+    previous = (TEXT_METRICS.enabled, USE_STATIC_FRAGMENTS)
+    try:
+        for name, render in renders.items():
+            results[name] = {}
+            for mode, (metrics_enabled, fragments_enabled) in modes.items():
+                TEXT_METRICS.enabled, USE_STATIC_FRAGMENTS = metrics_enabled, fragments_enabled
+                results[name][mode] = time_renders(render, iterations)
+            results[name]["saved_ms"] = results[name]["metrics_ms"] - results[name]["fragments_ms"]
+    finally:
+        TEXT_METRICS.enabled, USE_STATIC_FRAGMENTS = previous
+    return results
+
+def benchmark_output_size(logo=None, stamp=None):
+    """PDF size and per-object-type breakdown of sample documents, standard versus optimized output"""
+    renders = {
+        "quotation": lambda optimize: create_quotation_pdf(sample_quotation_data(), logo, stamp, optimize),
+        "po": lambda optimize: create_po_pdf(sample_po_data(), logo, optimize),
+        "invoice": lambda optimize: create_invoice_pdf(sample_invoice_data(), logo, stamp, optimize),
+    }
+    results = {}
+    for name, render in renders.items():
+        results[name] = {}
+        for mode, optimize in (("standard", False), ("optimized", True)):
+            pdf_bytes = render(optimize)
+            results[name][mode] = {"bytes": len(pdf_bytes), "breakdown": pdf_size_breakdown(pdf_bytes)}
+    return results
+
+def benchmark_products(lines):
+    """Catalog-priced product lines with varied paise and quantities"""
+    catalog = list(PRODUCT_CATALOG.values())
+    return [ProductLine(name=f"Line {i}", basic=catalog[i % len(catalog)]["basic"] + (i % 100) / 100,
+                        gst_percent=catalog[i % len(catalog)]["gst_percent"], qty=float(i % 7 + 1))
+            for i in range(lines)]
+
+def benchmark_money(lines=10000, iterations=5):
+    """Quotation totals over many lines with integer-paise arrays versus per-line Decimal arithmetic"""
+    products = benchmark_products(lines)
+
+    def decimal_totals():
+        cent = decimal.Decimal("0.01")
+        total = decimal.Decimal(0)
+        for p in products:
+            basic = decimal.Decimal(repr(p.basic))
+            gst = (basic * decimal.Decimal(repr(p.gst_percent)) / 100).quantize(cent, decimal.ROUND_HALF_UP)
+            total += ((basic + gst) * decimal.Decimal(repr(p.qty))).quantize(cent, decimal.ROUND_HALF_UP)
+        return total
+
+    paise_total = calculate_quotation_totals(products)["grand_total_unrounded"]
+    if Money.of(decimal_totals()) != paise_total:
+        raise AssertionError("integer-paise and Decimal totals disagree")
+    return {"lines": lines,
+            "paise_ms": time_renders(lambda: calculate_quotation_totals(products), iterations),
+            "decimal_ms": time_renders(decimal_totals, iterations)}
+
+def benchmark_formatting(cells=10000, iterations=5):
+    """Table amount cells through Western f-strings versus format_inr, cold and warm cache"""
+    line_paise = calculate_quotation_totals(benchmark_products(cells // 4))["line_paise"]
+    values = [Money(int(paise)) for column in line_paise for paise in column]
+    rupees = [value.rupees for value in values]
+
+    def cold():
+        format_inr.cache_clear()
+        return [format_inr(value) for value in values]
+
+    return {"cells": len(values),
+            "fstring_ms": time_renders(lambda: [f"{value:,.2f}" for value in rupees], iterations),
+            "cold_ms": time_renders(cold, iterations),
+            "warm_ms": time_renders(lambda: [format_inr(value) for value in values], iterations)}
+
+AMOUNT_WORDS_CASES = {
+    0: "Zero Rupees Only/-",
+    0.5: "Zero Rupees And Fifty Paise Only/-",
+    -0.5: "Minus Zero Rupees And Fifty Paise Only/-",
+    -0.05: "Minus Zero Rupees And Five Paise Only/-",
+    -100: "Minus One Hundred Rupees Only/-",
+    -1234.56: "Minus One Thousand, Two Hundred And Thirty-Four Rupees And Fifty-Six Paise Only/-",
+    "-99.99": "Minus Ninety-Nine Rupees And Ninety-Nine Paise Only/-",
+}
+
+def check_amount_words():
+    """Amounts in words and Indian formatting for zero, fractional and negative amounts; returns (check, passed) pairs"""
+    results = []
+    for amount, expected in AMOUNT_WORDS_CASES.items():
+        words = amount_in_words(amount)
+        results.append((f"amount_in_words({amount!r}) == {expected!r}" + ("" if words == expected else f", got {words!r}"),
+                        words == expected))
+    for amount, expected in ((-0.5, "-0.50"), (-1234567.89, "-12,34,567.89")):
+        formatted = format_inr(amount)
+        results.append((f"format_inr({amount!r}) == {expected!r}" + ("" if formatted == expected else f", got {formatted!r}"),
+                        formatted == expected))
+    return results
+
+def benchmark_print_batch(count=200, logo=None, stamp=None, doc_type="invoice"):
+    """Merged print batch of sample documents versus rendering each document as its own PDF"""
+    documents = list(numbered_samples(doc_type, count))
+
+    started = time.perf_counter()
+    separate_bytes = sum(len(render_document(doc_type, document, logo, stamp, optimize=True)) for document in documents)
+    separate_s = time.perf_counter() - started
+
+    started = time.perf_counter()
+    batch_bytes = len(create_print_batch_pdf(doc_type, documents, logo, stamp))
+    batch_s = time.perf_counter() - started
+    return {"doc_type": doc_type, "count": count, "separate_bytes": separate_bytes, "separate_s": separate_s,
+            "batch_bytes": batch_bytes, "batch_s": batch_s}
+
+def benchmark_renewal_lookup(contracts=200000, window_days=RENEWAL_WINDOW_DAYS, iterations=20):
+    """Expiring-contract window lookups over an in-memory archive of synthetic contracts"""
+    conn = sqlite3.connect(":memory:")
+    conn.row_factory = sqlite3.Row
+    conn.executescript(ARCHIVE_SCHEMA)
+    today = datetime.date.today()
+    buyer = json.dumps(dataclasses.asdict(sample_invoice_data().buyer))
+    vendor = json.dumps(dataclasses.asdict(COMPANY_PARTY))
+    with conn:
+        conn.executemany(
+            "INSERT INTO contracts (contract_key, contract_no, description, end_date, buyer, vendor, invoice_number, "
+            "invoice_date) VALUES (?, ?, '', ?, ?, ?, '', '')",
+            ((f"C{i:07d}", f"C{i:07d}", (today + datetime.timedelta(days=i * 7919 % 1461)).isoformat(), buyer, vendor)
+             for i in range(contracts)))
+    end = today + datetime.timedelta(days=window_days)
+    started = time.perf_counter()
+    for _ in range(iterations):
+        found = find_expiring_contracts(today, end, conn=conn)
+    lookup_ms = (time.perf_counter() - started) * 1000 / iterations
+    conn.close()
+    return {"contracts": contracts, "found": len(found), "lookup_ms": lookup_ms}
+
+def benchmark_statement(invoices=5000, iterations=5):
+    """Statement of account for one buyer with many invoices, from an in-memory archive"""
+    conn = sqlite3.connect(":memory:")
+    conn.row_factory = sqlite3.Row
+    conn.executescript(ARCHIVE_SCHEMA)
+    end = datetime.date.today()
+    with conn:
+        conn.executemany(
+            "INSERT INTO documents (doc_type, number, doc_date, party, gstin, grand_total, sha256, size, created_at) "
+            "VALUES ('invoice', ?, ?, 'Customer Company Ltd.', '27ABCDE1234F1Z5', ?, '', 0, '')",
+            ((generate_invoice_number(i), (end - datetime.timedelta(days=i % 730)).isoformat(), 1000 + i % 997 * 11.8)
+             for i in range(1, invoices + 1)))
+    start = end - datetime.timedelta(days=365)
+    generate_statement(start, end, gstin="27ABCDE1234F1Z5", conn=conn)
+    started = time.perf_counter()
+    for _ in range(iterations):
+        statement, pdf_bytes = generate_statement(start, end, gstin="27ABCDE1234F1Z5", conn=conn)
+    elapsed_ms = (time.perf_counter() - started) * 1000 / iterations
+    conn.close()
+    return {"invoices": invoices, "rows": len(statement["rows"]), "bytes": len(pdf_bytes), "ms": elapsed_ms}
+
+def benchmark_gst_return(invoices=100000, lines_per_invoice=3):
+    """GSTR-1 export of one quarter holding many invoices, from an in-memory archive"""
+    conn = sqlite3.connect(":memory:")
+    conn.executescript(ARCHIVE_SCHEMA)
+    fy, quarter = quarter_of(datetime.date.today())
+    hsn_codes = ("997331", "998313", "847130", "852351")
+    with conn:
+        conn.executemany(
+            "INSERT INTO invoice_lines (invoice_no, line_no, invoice_date, fy, quarter, buyer, buyer_gstin, "
+            "invoice_paise, hsn, description, quantity, rate_bp, taxable_paise, sgst_paise, cgst_paise) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, '', 1, ?, ?, ?, ?)",
+            ((f"INV{i:07d}", line, datetime.date.today().isoformat(), fy, quarter, f"Buyer {i % 5000}",
+              f"27ABCDE{i % 5000:04d}F1Z5" if i % 3 else "", 3 * 11800 * (i % 500 + 1) * lines_per_invoice // 3,
+              hsn_codes[(i + line) % len(hsn_codes)], GST_RATE_BP, 10000 * (i % 500 + 1), 900 * (i % 500 + 1),
+              900 * (i % 500 + 1))
+             for i in range(invoices) for line in range(1, lines_per_invoice + 1)))
+    started = time.perf_counter()
+    with tempfile.TemporaryFile() as target:
+        tables = export_gst_return(fy, quarter, target, conn)
+        size = target.tell()
+    elapsed = time.perf_counter() - started
+    conn.close()
+    return {"invoices": invoices, "lines": invoices * lines_per_invoice, "seconds": elapsed, "zip_bytes": size,
+            "b2b_rows": len(tables["b2b"]), "hsn_rows": len(tables["hsn"])}
+
+def benchmark_sales_dashboard(documents=100000, years=5, iterations=10):
+    """Dashboard load for one year over rollups built from years of synthetic documents"""
+    conn = sqlite3.connect(":memory:")
+    conn.executescript(ARCHIVE_SCHEMA)
+    today = datetime.date.today()
+    products = list(PRODUCT_CATALOG)
+    started = time.perf_counter()
+    with conn:
+        for i in range(documents):
+            doc_type = BUNDLE_DOCUMENT_TYPES[i % 3]
+            date = today - datetime.timedelta(days=i * 365 * years // documents)
+            sales_person = f"SP{i % 3 + 1}"
+            record_sales(conn, doc_type, "", date, sales_person, f"Customer {i % 500}", 10000 + i % 977)
+            conn.execute(
+                "INSERT INTO product_rollups (doc_type, sales_person, fy, quarter, product, lines, quantity, "
+                "amount_paise) VALUES (?, ?, ?, ?, ?, 1, 1, 100) ON CONFLICT (doc_type, sales_person, fy, quarter, "
+                "product) DO UPDATE SET lines = lines + 1, amount_paise = amount_paise + 100",
+                (doc_type, sales_person, *quarter_of(date), products[i % len(products)]))
+    record_ms = (time.perf_counter() - started) * 1000 / documents
+    rollup_rows = conn.execute("SELECT COUNT(*) FROM sales_rollups").fetchone()[0]
+    load_sales_dashboard(get_financial_year(), conn=conn)
+    started = time.perf_counter()
+    for _ in range(iterations):
+        load_sales_dashboard(get_financial_year(), conn=conn)
+    load_ms = (time.perf_counter() - started) * 1000 / iterations
+    conn.close()
+    return {"documents": documents, "years": years, "rollup_rows": rollup_rows, "record_ms": record_ms,
+            "load_ms": load_ms}
+
+def benchmark_search(documents=200000, iterations=50):
+    """Ranked content searches over an in-memory archive of synthetic invoices"""
+    conn = sqlite3.connect(":memory:")
+    conn.row_factory = sqlite3.Row
+    conn.executescript(ARCHIVE_SCHEMA)
+    conn.executescript(SEARCH_SCHEMA)
+    template = sample_invoice_data()
+    products = list(PRODUCT_CATALOG)
+    started = time.perf_counter()
+    with conn:
+        for i in range(1, documents + 1):
+            number = f"COM/26-27/Q{i % 4 + 1}/{i:06d}"
+            cursor = conn.execute(
+                "INSERT INTO documents (doc_type, number, doc_date, party, gstin, grand_total, sha256, size, "
+                "created_at) VALUES ('invoice', ?, '2026-10-19', ?, '', 0, '', 0, '')", (number, f"Customer {i % 5000}"))
+            items = tuple(dataclasses.replace(item, description=f"{products[(i + n) % len(products)]}\n"
+                                                               f"Serial # SN{i:06d}{n}\nContract # C{i:06d}\n"
+                                                               f"End Date: 31-03-2027")
+                          for n, item in enumerate(template.items))
+            buyer = dataclasses.replace(template.buyer, name=f"Customer {i % 5000}",
+                                        address=f"{i % 97} Industrial Estate, City {i % 300}")
+            document = dataclasses.replace(template, invoice_no=number, items=items, buyer=buyer)
+            index_document_text(conn, cursor.lastrowid, "invoice", *document_search_fields("invoice", document))
+    index_s = time.perf_counter() - started
+    queries = {"serial": f"SN{documents // 2:06d}1", "customer": "Customer 1234", "product": products[0]}
+    timings = {}
+    for name, text in queries.items():
+        search_documents(text, conn=conn)
+        started = time.perf_counter()
+        for _ in range(iterations):
+            hits = search_documents(text, conn=conn)
+        timings[name] = ((time.perf_counter() - started) * 1000 / iterations, len(hits), text)
+    conn.close()
+    return {"documents": documents, "index_s": index_s, "queries": timings}
+
+def peak_rss_mb():
+    """Peak resident memory of this process in MB, or None where it cannot be read"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+def benchmark_export(count=10000, output=None, report_every=1000, doc_type="invoice"):
+    """Stream count sample documents into a ZIP, reporting throughput and peak memory as it goes"""
+    documents = ((doc_type, document) for document in numbered_samples(doc_type, count))
+    progress = []
+
+    def tracked(documents):
+        started = time.perf_counter()
+        for done, document in enumerate(documents, 1):
+            yield document
+            if done % report_every == 0 or done == count:
+                progress.append((done, time.perf_counter() - started, peak_rss_mb()))
+
+    with (open(output, "wb") if output else tempfile.TemporaryFile()) as target:
+        export_documents_zip(tracked(documents), target)
+        size = target.tell()
+    return {"count": count, "zip_bytes": size, "progress": progress}
+
+class BrandingStandIn(http.server.BaseHTTPRequestHandler):
+    """Local image server for check_branding_fetcher: ETag revalidation and switchable failures"""
+    body = b"\x89PNG stand-in"
+    etag = '"v1"'
+    status = 200
+    requests_seen = []
+
+    def do_GET(self):
+        type(self).requests_seen.append(self.headers.get("If-None-Match"))
+        if self.status != 200:
+            self.send_response(self.status)
+            self.end_headers()
+        elif self.headers.get("If-None-Match") == self.etag:
+            self.send_response(304)
+            self.end_headers()
+        else:
+            self.send_response(200)
+            self.send_header("ETag", self.etag)
+            self.send_header("Content-Length", str(len(self.body)))
+            self.end_headers()
+            self.wfile.write(self.body)
+
+    def log_message(self, *args):
+        pass
+
+def check_branding_fetcher(writers=8):
+    """Run fetch_cached_image against a local HTTP stand-in; returns (check, passed) pairs"""
+    handler = type("StandIn", (BrandingStandIn,), {"requests_seen": []})
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_address[1]}/logo.png"
+    session = new_http_session()
+    results = []
+
+    def check(name, test):
+        try:
+            results.append((name, bool(test())))
+        except Exception as e:
+            results.append((f"{name} ({e!r})", False))
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        fetch = functools.partial(fetch_cached_image, url, timeout=5, session=session, cache_dir=cache_dir)
+        check("first fetch downloads the image",
+              lambda: fetch() == handler.body and handler.requests_seen == [None])
+        check("fresh entry is served without a request",
+              lambda: fetch() == handler.body and len(handler.requests_seen) == 1)
+        check("stale entry is revalidated with If-None-Match",
+              lambda: fetch(ttl=0) == handler.body and handler.requests_seen[-1] == handler.etag)
+
+        def race():
+            with ThreadPoolExecutor(max_workers=writers) as pool:
+                return list(pool.map(lambda _: fetch(ttl=0), range(writers * 4)))
+        check(f"{writers} concurrent refreshes of one entry all succeed",
+              lambda: all(data == handler.body for data in race()))
+        check("no temporary files are left behind",
+              lambda: not [name for name in os.listdir(cache_dir) if name.endswith(".tmp")])
+
+        handler.status = 500
+        check("server error falls back to the cached copy", lambda: fetch(ttl=0) == handler.body)
+        server.shutdown()
+        server.server_close()
+        check("unreachable server falls back to the cached copy", lambda: fetch(ttl=0) == handler.body)
+
+        def uncached_failure():
+            try:
+                fetch_cached_image(url, timeout=5, session=session, cache_dir=os.path.join(cache_dir, "empty"))
+            except requests.RequestException:
+                return True
+            return False
+        check("unreachable server without a cached copy raises", uncached_failure)
+    session.close()
+    return results
+
+# --- Rerun Latency ---
+# Streamlit reruns the script on every widget interaction. Each tab's form and
+# each sidebar number editor is a fragment (st.fragment, Streamlit 1.37+), so
+# an interaction reruns only its own section; a fragment that changes a value
+# another section has on screen triggers a full rerun. Every run of a section
+# is timed, and the latest and worst times are kept in session state and shown
+# against RERUN_BUDGET_MS in the sidebar.
+RERUN_BUDGET_MS = 250
+
+def record_section_time(name, elapsed_ms):
+    """Add one run of a section to the session's rerun timings"""
+    timings = st.session_state.setdefault("section_timings", {})
+    entry = timings.setdefault(name, {"last_ms": 0.0, "max_ms": 0.0, "runs": 0, "over_budget": 0})
+    entry["last_ms"] = elapsed_ms
+    entry["max_ms"] = max(entry["max_ms"], elapsed_ms)
+    entry["runs"] += 1
+    entry["over_budget"] += elapsed_ms > RERUN_BUDGET_MS
+
+@contextlib.contextmanager
+def timed_section(name):
+    """Time the enclosed block as one run of the named section"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_section_time(name, (time.perf_counter() - started) * 1000)
+
+def timed_fragment(name):
+    """Decorator: run a UI section as a fragment that reruns on its own, timing every run"""
+    def decorate(func):
+        @functools.wraps(func)
+        def run(*args, **kwargs):
+            with timed_section(name):
+                return func(*args, **kwargs)
+        return st.fragment(run)
+    return decorate
+
+def mark_rendered(key):
+    """Remember the value of a session key as currently shown by a form"""
+    st.session_state[f"{key}_rendered"] = st.session_state.get(key)
+
+def rerun_if_stale(key):
+    """Rerun the whole app when a fragment changed a session key since its form last showed it"""
+    rendered = st.session_state.get(f"{key}_rendered")
+    if rendered is not None and rendered != st.session_state.get(key):
+        mark_rendered(key)
+        st.rerun()
+
+@st.cache_data(show_spinner=False, max_entries=4)
+def read_contacts_workbook(data):
+    """Vendors and EndUsers sheets of an uploaded contacts workbook, parsed once per distinct file"""
+    with pd.ExcelFile(io.BytesIO(data)) as workbook:
+        return (workbook.parse("Vendors", dtype={"Mobile": str}),
+                workbook.parse("EndUsers"))
+
+def render_rerun_latency_sidebar():
+    """Sidebar readout of each section's latest and worst run time against the budget"""
+    timings = st.session_state.get("section_timings")
+    if not timings:
+        return
+    slow = [name for name, entry in timings.items() if entry["last_ms"] > RERUN_BUDGET_MS]
+    with st.sidebar.expander(f"⏱ Rerun Latency{f' ({len(slow)} over budget)' if slow else ''}"):
+        st.caption(f"Budget: {RERUN_BUDGET_MS} ms per section")
+        st.dataframe(pd.DataFrame([{"Section": name, "Last (ms)": round(entry["last_ms"], 1),
+                                    "Worst (ms)": round(entry["max_ms"], 1), "Runs": entry["runs"],
+                                    "Over Budget": entry["over_budget"]}
+                                   for name, entry in timings.items()]),
+                     hide_index=True, use_container_width=True)
+        for name in slow:
+            st.warning(f"{name} took {timings[name]['last_ms']:.0f} ms")
+
+# --- Tab Sections ---
+# Sidebar settings and number editors publish the sales person, number and
+# auto-increment choice through session state; the tab forms read them from
+# there, so either side can rerun without the other.
+@timed_fragment("Quotation number editor")
+def render_quotation_settings():
+    """Sidebar quotation settings: sales person, number editor and auto-increment"""
+    current_quarter = get_current_quarter()
+
+    st.header("Quotation Settings")
+    sales_person = st.selectbox("Select Sales Person", 
+                                    options=list(SALES_PERSON_MAPPING.keys()), 
+                                    format_func=lambda x: f"{x} - {SALES_PERSON_MAPPING[x]['name']}",
+                                    key="quote_sales_person")
+
+    current_sales_person_info = SALES_PERSON_MAPPING.get(sales_person, SALES_PERSON_MAPPING['SP1'])
+
+    def get_quotation_number():
+        if st.session_state.last_quotation_number:
+            try:
+                last_prefix, last_sales_person, last_quarter, last_date, last_year_range, last_sequence = parse_quotation_number(st.session_state.last_quotation_number)
+
+                if last_sales_person == sales_person and last_quarter == current_quarter:
+                    next_sequence = get_next_sequence_number(st.session_state.last_quotation_number)
+                    return generate_quotation_number(sales_person, next_sequence)
+                else:
+                    return generate_quotation_number(sales_person, st.session_state.quotation_seq)
+            except:
+                return generate_quotation_number(sales_person, st.session_state.quotation_seq)
+        else:
+            return generate_quotation_number(sales_person, st.session_state.quotation_seq)
+
+    if "current_quote_sales_person" not in st.session_state:
+        st.session_state.current_quote_sales_person = sales_person
+        st.session_state.quotation_number = get_quotation_number()
+
+    if (st.session_state.current_quote_sales_person != sales_person or 
+        st.session_state.get('current_quarter', '') != current_quarter):
+        st.session_state.current_quote_sales_person = sales_person
+        st.session_state.current_quarter = current_quarter
+        st.session_state.quotation_seq = get_current_quotation_sequence(sales_person)
+        st.session_state.quotation_number = get_quotation_number()
+
+    st.info(f"**Current Sales Person:** {current_sales_person_info['name']}")
+    st.info(f"**Current Quarter:** {current_quarter}")
+
+    try:
+        prefix, current_sp, quarter, date_part, year_range, sequence = parse_quotation_number(st.session_state.quotation_number)
+        st.success(f"**Auto-generated Quotation Number**")
+        st.info(f"**Format:** {current_sp}/{quarter}/{date_part}/{year_range}_{sequence}")
+    except:
+        st.warning("Could not parse quotation number")
+
+    st.subheader("Quotation Number Editor")
+
+    try:
+        current_prefix, current_sp, current_q, current_date, current_year_range, current_seq = parse_quotation_number(st.session_state.quotation_number)
+
+        col1, col2, col3, col4 = st.columns([1, 2, 2, 1])
+
+        with col1:
+            st.text_input("Sales Person", value=current_sp, key="quote_sp_display", disabled=True)
+
+        with col2:
+            new_date = st.text_input("Date", value=current_date, key="quote_date_edit")
+
+        with col3:
+            new_year_range = st.text_input("Year Range", value=current_year_range, key="quote_year_edit")
+
+        with col4:
+            new_sequence = st.number_input("Sequence", 
+                                        min_value=1, 
+                                        value=int(current_seq), 
+                                        step=1,
+                                        key="quote_seq_edit")
+
+        new_quotation_number = format_document_number(
+            "quotation", prefix="COM", sales_person=sales_person, quarter=current_q,
+            date=new_date, year_range=new_year_range, sequence=new_sequence)
+
+        if new_quotation_number != st.session_state.quotation_number:
+            st.session_state.quotation_number = new_quotation_number
+
+    except Exception as e:
+        st.error(f"Error parsing quotation number: {e}")
+        st.session_state.quotation_number = generate_quotation_number(sales_person, st.session_state.quotation_seq)
+
+    st.code(st.session_state.quotation_number)
+
+    quotation_auto_increment = st.checkbox("Auto-increment Sequence", value=True, key="quote_auto_increment")
+
+    if st.button("Reset to Auto-generate", use_container_width=True):
+        st.session_state.quotation_seq = get_current_quotation_sequence(sales_person)
+        st.session_state.last_quotation_number = ""
+        st.session_state.quotation_number = get_quotation_number()
+        st.success("Quotation number reset to auto-generated")
+        st.rerun()
+
+    rerun_if_stale("quotation_number")
+
+@timed_fragment("Quotation form")
+def render_quotation_form(global_logo=None, global_stamp=None):
+    """Quotation tab: recipient, products, totals preview and PDF generation"""
+    if global_logo:
+        st.image(global_logo, width=150)
+        st.markdown("### Quotation Generator")
+    else:
+        st.header("Quotation Generator")
+
+    today = datetime.date.today()
+    sales_person = st.session_state.quote_sales_person
+    current_sales_person_info = SALES_PERSON_MAPPING.get(sales_person, SALES_PERSON_MAPPING['SP1'])
+    quotation_auto_increment = st.session_state.quote_auto_increment
+    mark_rendered("quotation_number")
+
+
+    col1, col2 = st.columns([1, 1])
+
+    with col1:
+        st.header("Recipient Details")
+
+        selected_enduser_quote = st.selectbox(
+            "Select Company", 
+            options=get_enduser_dropdown_options(),
+            key="enduser_dropdown_quote"
+        )
+
+        if selected_enduser_quote and selected_enduser_quote != "Select End User":
+            enduser_data = END_USER_DATABASE.get(selected_enduser_quote, {})
+            st.session_state.quote_end_company = selected_enduser_quote
+            st.session_state.quote_end_address = enduser_data.get("address", "")
+            st.session_state.quote_end_person = enduser_data.get("contact", "")
+            st.session_state.quote_end_mobile = enduser_data.get("mobile", "")
+            st.session_state.quote_end_email = enduser_data.get("email", "")
+            st.session_state.quote_end_gst_no = enduser_data.get("gst_no", "")
+
+        vendor_name = st.text_input("Company Name", 
+                                value=st.session_state.get("quote_end_company", "Customer Company Ltd."), 
+                                key="quote_end_company")
+        vendor_address = st.text_area("Company Address", 
+                                    value=st.session_state.get("quote_end_address", "Customer Address"), 
+                                    key="quote_end_address")
+        vendor_email = st.text_input("Email", 
+                                value=st.session_state.get("quote_end_email", "customer@company.com"), 
+                                key="quote_end_email")
+        vendor_contact = st.text_input("Contact Person (Kind Attention)", 
+                                    value=st.session_state.get("quote_end_person", "Contact Person"), 
+                                    key="quote_end_person")
+        vendor_mobile = st.text_input("Mobile", 
+                                    value=st.session_state.get("quote_end_mobile", "0000000000"), 
+                                    key="quote_end_mobile")
+
+        vendor_gst = st.text_input("GST No (Optional)", 
+                                value=st.session_state.get("quote_end_gst_no", ""), 
+                                key="quote_end_gst_no")
+
+        st.header("Quotation Details")
+        price_validity = st.text_input("Price Validity", "10 days from Quotation date", key="quote_price_validity")
+        subject_line = st.text_input("Subject", "Proposal for Software Services", key="quote_subject")
+        intro_paragraphs_1 = st.text_area("Introduction Paragraph",
+        "This is with reference to your requirement for software services.",
+        key="quote_intro"
+        )
+
+
+    with col2:
+        st.header("Products & Services")
+
+        col_annexure, col_title = st.columns(2)
+
+        with col_annexure:
+            annexure_text = st.text_input(
+                "Annexure Text", 
+                "Annexure I - Commercials", 
+                key="quote_annexure_input",
+                help="Enter annexure text"
+            )
+
+        with col_title:
+            quotation_title = st.text_input(
+                "Quotation Title", 
+                "Quotation for Software Services", 
+                key="quote_title_input",
+                help="Enter the main title"
+            )
+
+        st.subheader("Add Products")
+        selected_product = st.selectbox("Select from Catalog", [""] + list(PRODUCT_CATALOG.keys()), key="quote_product_select_catalog")
+
+        if st.button("➕ Add Selected Product", key="quote_add_selected_product"):
+            if selected_product:
+                details = PRODUCT_CATALOG[selected_product]
+                st.session_state.quotation_products.append({
+                    "name": selected_product,
+                    "basic": details["basic"],
+                    "gst_percent": details["gst_percent"],
+                    "qty": 1.0,
+                })
+                st.success(f"{selected_product} added!")
+
+        if st.button("➕ Add Empty Product", key="quote_add_empty_product"):
+            st.session_state.quotation_products.append({"name": "New Product", "basic": 0.0, "gst_percent": 18.0, "qty": 1.0})
+
+        st.subheader("Current Products")
+        for i, p in enumerate(st.session_state.quotation_products):
+            with st.expander(f"Product {i+1}: {p['name']}", expanded=i == 0):
+                st.session_state.quotation_products[i]["name"] = st.text_input("Name", p["name"], key=f"quote_name_{i}")
+                st.session_state.quotation_products[i]["basic"] = st.number_input("Basic (₹)", p["basic"], format="%.2f", key=f"quote_basic_{i}")
+                st.session_state.quotation_products[i]["gst_percent"] = st.number_input("GST %", p["gst_percent"], format="%.1f", key=f"quote_gst_{i}")
+                st.session_state.quotation_products[i]["qty"] = st.number_input("Qty", p["qty"], format="%.2f", key=f"quote_qty_{i}")
+                if st.button("Remove", key=f"quote_remove_{i}"):
+                    st.session_state.quotation_products.pop(i)
+                    st.rerun()
+
+    st.header("Preview & Generate Quotation")
+
+    st.info(f"**Quotation Number:** {st.session_state.quotation_number}")
+    st.info(f"**Sales Person:** {current_sales_person_info['name']} ({sales_person}) - {current_sales_person_info['email']}")
+
+    totals = calculate_quotation_totals(st.session_state.quotation_products)
+
+    total_base = totals["total_base"]
+    total_gst = totals["total_gst"]
+    grand_total = totals["grand_total_unrounded"]
+    amount_words = amount_in_words(grand_total)
+
+    col3, col4, col5 = st.columns(3)
+    with col3:
+        st.metric("Total Base Amount", f"₹{format_inr(total_base)}")
+    with col4:
+        st.metric("Total GST", f"₹{format_inr(total_gst)}")
+    with col5:
+        st.metric("Grand Total", f"₹{format_inr(grand_total)}")
+
+    st.subheader("Company Branding")
+    st.info("Using global logo and stamp from sidebar settings")
+    logo_path = global_logo
+    stamp_path = global_stamp
+
+    if not logo_path:
+        st.warning("⚠ No company logo available")
+    if not stamp_path:
+        st.warning("⚠ No company stamp available")
+
+    if st.button("Generate Quotation PDF", type="primary", use_container_width=True, key="generate_quote"):
+        if not st.session_state.quotation_products:
+            st.error("Please add at least one product to generate the quotation.")
+        elif is_number_issued("quotation", st.session_state.quotation_number):
+            st.error(f"❌ Quotation number {st.session_state.quotation_number} has already been issued. "
+                     "Change the sequence before generating.")
+        elif claim_document_numbers({"quotation": st.session_state.quotation_number}):
+            totals = calculate_quotation_totals(st.session_state.quotation_products)
+            rounded_total = totals["grand_total"]
+            round_off = totals["round_off"]
+
+            grand_total = rounded_total
+            amount_words = number_to_words(rounded_total)
+
+            quotation_data = {
+                "quotation_number": st.session_state.quotation_number,
+                "quotation_date": today.strftime("%d-%m-%Y"),
+                "vendor_name": vendor_name,
+                "vendor_address": vendor_address,
+                "vendor_email": vendor_email,
+                "vendor_contact": vendor_contact,
+                "vendor_mobile": vendor_mobile,
+                "products": st.session_state.quotation_products,
+                "price_validity": price_validity,
+                "grand_total": grand_total,
+                "round_off": round_off,
+                "amount_words": amount_words,
+                "subject": subject_line,
+                "intro_paragraph": intro_paragraphs_1,
+                "product_name": selected_product if selected_product else "Software",   
+                "sales_person_code": sales_person,  
+                "annexure_text": annexure_text,  
+                "quotation_title": quotation_title
+            }
+
+            try:
+                pdf_bytes = create_quotation_pdf(quotation_data, logo_path, stamp_path)
+                if not pdf_bytes:
+                    raise ValueError("the PDF came out empty")
+            except Exception as e:
+                release_issued_number("quotation", quotation_data["quotation_number"])
+                st.error(f"Error generating PDF: {str(e)}")
+                pdf_bytes = None
+
+            if pdf_bytes:
+                try:
+                    archive_document(pdf_bytes, "quotation", quotation_data["quotation_number"],
+                                     quotation_data["quotation_date"], sales_person=sales_person,
+                                     party=vendor_name, gstin=vendor_gst, grand_total=grand_total,
+                                     document=quotation_data)
+                except (OSError, sqlite3.Error) as e:
+                    st.warning(f"⚠ Could not archive quotation: {e}")
+
+                st.session_state.last_quotation_number = st.session_state.quotation_number
+
+                if quotation_auto_increment:
+                    next_sequence = get_next_quotation_sequence(sales_person)
+                    st.session_state.quotation_seq = next_sequence
+
+                st.success("✅ Quotation generated successfully!")
+                st.info(f"📧 Sales Person: {current_sales_person_info['name']}")
+
+                download = spool_download(
+                    pdf_bytes, f"{vendor_name}_{st.session_state.quotation_number.replace('/', '_')}.pdf")
+                render_spooled_download(download, "⬇ Download Quotation PDF", use_container_width=True)
+
+@timed_fragment("PO number editor")
+def render_po_settings():
+    """Sidebar PO settings: sales person, number editor and auto-increment"""
+    current_quarter = get_current_quarter()
+
+    st.header("PO Settings")
+
+    po_sales_person = st.selectbox("Select Sales Person", 
+                                        options=list(SALES_PERSON_MAPPING.keys()), 
+                                        format_func=lambda x: f"{x} - {SALES_PERSON_MAPPING[x]['name']}",
+                                        key="po_sales_person_select")
+
+    current_sales_person_info = SALES_PERSON_MAPPING.get(po_sales_person, SALES_PERSON_MAPPING['SP1'])
+
+    def get_po_number():
+        if st.session_state.last_po_number:
+            try:
+                last_prefix, last_sales_person, last_year, last_quarter, last_sequence = parse_po_number(st.session_state.last_po_number)
+
+                if last_sales_person == po_sales_person and last_quarter == current_quarter:
+                    next_sequence = get_next_sequence_number_po(st.session_state.last_po_number)
+                    return generate_po_number(po_sales_person, next_sequence)
+                else:
+                    return generate_po_number(po_sales_person, st.session_state.po_seq)
+            except:
+                return generate_po_number(po_sales_person, st.session_state.po_seq)
+        else:
+            return generate_po_number(po_sales_person, st.session_state.po_seq)
+
+    if "current_po_sales_person" not in st.session_state:
+        st.session_state.current_po_sales_person = po_sales_person
+        st.session_state.po_number = get_po_number()
+
+    if (st.session_state.current_po_sales_person != po_sales_person or 
+        st.session_state.get('current_po_quarter', '') != current_quarter):
+        st.session_state.current_po_sales_person = po_sales_person
+        st.session_state.current_po_quarter = current_quarter
+        st.session_state.po_seq = get_current_po_sequence(po_sales_person)
+        st.session_state.po_number = get_po_number()
+
+    st.info(f"**Current Sales Person:** {current_sales_person_info['name']}")
+    st.info(f"**Current Quarter:** {current_quarter}")
+
+    try:
+        prefix, current_sp, year, quarter, sequence = parse_po_number(st.session_state.po_number)
+        st.success(f"**Auto-generated PO Number**")
+        st.info(f"**Format:** {current_sp}/{year}/{quarter}_{sequence}")
+    except:
+        st.warning("Could not parse PO number")
+
+    st.subheader("PO Number Editor")
+
+    try:
+        current_prefix, current_sp, current_year, current_q, current_seq = parse_po_number(st.session_state.po_number)
+
+        col1, col2, col3, col4 = st.columns([1, 2, 2, 1])
+
+        with col1:
+            st.text_input("Sales Person", value=current_sp, key="po_sp_display", disabled=True)
+
+        with col2:
+            new_year = st.text_input("Year", value=current_year, key="po_year_edit")
+
+        with col3:
+            new_quarter = st.text_input("Quarter", value=current_q, key="po_quarter_edit")
+
+        with col4:
+            new_sequence = st.number_input("Sequence", 
+                                        min_value=1, 
+                                        value=int(current_seq), 
+                                        step=1,
+                                        key="po_seq_edit")
+
+        new_po_number = format_document_number(
+            "po", prefix="COM", sales_person=po_sales_person, year=new_year,
+            quarter=new_quarter, sequence=new_sequence)
+
+        if new_po_number != st.session_state.po_number:
+            st.session_state.po_number = new_po_number
+
+    except Exception as e:
+        st.error(f"Error parsing PO number: {e}")
+        st.session_state.po_number = generate_po_number(po_sales_person, st.session_state.po_seq)
+
+    st.code(st.session_state.po_number)
+
+    po_auto_increment = st.checkbox("Auto-increment Sequence", value=True, key="po_auto_increment_checkbox")
+
+    if st.button("Reset to Auto-generate", use_container_width=True, key="po_reset_auto_generate"):
+        st.session_state.po_seq = get_current_po_sequence(po_sales_person)
+        st.session_state.last_po_number = ""
+        st.session_state.po_number = get_po_number()
+        st.success("PO number reset to auto-generated")
+        st.rerun()
+
+    rerun_if_stale("po_number")
+
+@timed_fragment("PO form")
+def render_po_form(global_logo=None):
+    """Purchase order tab: vendor, end user, products, preview and PDF generation"""
+    if global_logo:
+        st.image(global_logo, width=150)
+        st.markdown("### Purchase Order Generator")
+    else:
+        st.header("Purchase Order Generator")
+
+    po_sales_person = st.session_state.po_sales_person_select
+    current_sales_person_info = SALES_PERSON_MAPPING.get(po_sales_person, SALES_PERSON_MAPPING['SP1'])
+    po_auto_increment = st.session_state.po_auto_increment_checkbox
+    mark_rendered("po_number")
+
+
+    col1, col2 = st.columns(2)
+
+    with col1:
+        st.subheader("Vendor & End User Details")
+
+        selected_vendor = st.selectbox(
+            "Select Vendor", 
+            options=get_vendor_dropdown_options(),
+            key="vendor_dropdown_po"
+        )
+
+        if selected_vendor and selected_vendor != "Select Vendor":
+            update_vendor_fields(selected_vendor)
+
+        st.subheader("Vendor Details")
+        vendor_name = st.text_input(
+            "Vendor Name",
+            value=st.session_state.get("po_vendor_name", "Supplier Company Ltd."),
+            key="po_vendor_name"
+        )
+        vendor_address = st.text_area(
+            "Vendor Address",
+            value=st.session_state.get("po_vendor_address", "Supplier Address"),
+            key="po_vendor_address"
+        )
+        vendor_contact = st.text_input(
+            "Contact Person",
+            value=st.session_state.get("po_vendor_contact", "Contact Person"),
+            key="po_vendor_contact"
+        )
+        vendor_mobile = st.text_input(
+            "Mobile",
+            value=st.session_state.get("po_vendor_mobile", "+91 00000 00000"),
+            key="po_vendor_mobile"
+        )
+
+        st.subheader("End User Details")
+
+        selected_enduser = st.selectbox(
+            "Select End User", 
+            options=get_enduser_dropdown_options(),
+            key="enduser_dropdown_po"
+        )
+
+        if selected_enduser and selected_enduser != "Select End User":
+            update_enduser_fields(selected_enduser)
+
+        end_company = st.text_input(
+            "End User Company",
+            value=st.session_state.get("po_end_company", "Customer Company Ltd."),
+            key="po_end_company"
+        )
+        end_address = st.text_area(
+            "End User Address",
+            value=st.session_state.get("po_end_address", "Customer Address"),
+            key="po_end_address"
+        )
+        end_person = st.text_input(
+            "End User Contact",
+            value=st.session_state.get("po_end_person", "Contact Person"),
+            key="po_end_person"
+        )
+        end_mobile = st.text_input(
+            "End Mobile",
+            value=str(st.session_state.get("po_end_mobile", "0000000000") or "").strip(),
+            key="po_end_mobile"
+        )
+        end_email = st.text_input(
+            "End User Email",
+            value=st.session_state.get("po_end_email", "customer@company.com"),
+            key="po_end_email"
+        )
+
+        st.subheader("Products")
+        selected_product = st.selectbox("Select from Catalog", [""] + list(PRODUCT_CATALOG.keys()), key="po_product_select_catalog")
+
+        col_add1, col_add2 = st.columns(2)
+        with col_add1:
+            if st.button("➕ Add Selected Product", key="po_add_selected_product", use_container_width=True):
+                if selected_product:
+                    details = PRODUCT_CATALOG[selected_product]
+                    st.session_state.products.append({
+                        "name": selected_product,
+                        "basic": details["basic"],
+                        "gst_percent": details["gst_percent"],
+                        "qty": 1.0,
+                    })
+                    st.success(f"{selected_product} added!")
+                    st.rerun()
+        with col_add2:
+            if st.button("➕ Add Empty Product", key="po_add_empty_product", use_container_width=True):
+                st.session_state.products.append({"name": "New Product", "basic": 0.0, "gst_percent": 18.0, "qty": 1.0})
+                st.rerun()
+
+        for i, p in enumerate(st.session_state.products):
+            with st.expander(f"Product {i+1}: {p['name']}", expanded=True):
+                col_prod1, col_prod2, col_prod3, col_prod4 = st.columns([3, 2, 2, 1])
+                with col_prod1:
+                    st.session_state.products[i]["name"] = st.text_input("Name", p["name"], key=f"po_name_{i}")
+                with col_prod2:
+                    st.session_state.products[i]["basic"] = st.number_input("Basic (₹)", p["basic"], format="%.2f", key=f"po_basic_{i}")
+                with col_prod3:
+                    st.session_state.products[i]["gst_percent"] = st.number_input("GST %", p["gst_percent"], format="%.1f", key=f"po_gst_{i}")
+                with col_prod4:
+                    st.session_state.products[i]["qty"] = st.number_input("Qty", p["qty"], format="%.2f", key=f"po_qty_{i}")
+                if st.button("Remove", key=f"po_remove_{i}", use_container_width=True):
+                    st.session_state.products.pop(i)
+                    st.rerun()
+
+    with col2:
+        st.subheader("Company & Tax Details")
+
+        bill_to_company = st.text_input(
+            "Bill To",
+            value=safe_str_state("po_bill_to_company", "Your Company Name"),
+            key="po_bill_to_company_input"
+        )
+        bill_to_address = st.text_area(
+            "Bill To Address",
+            value=safe_str_state("po_bill_to_address", "Your Company Address"),
+            key="po_bill_to_address_input"
+        )
+        ship_to_company = st.text_input(
+            "Ship To",
+            value=safe_str_state("po_ship_to_company", "Your Company Name"),
+            key="po_ship_to_company_input"
+        )
+        ship_to_address = st.text_area(
+            "Ship To Address",
+            value=safe_str_state("po_ship_to_address", "Your Company Address"),
+            key="po_ship_to_address_input"
+        )
+        gst_no = st.text_input(
+            "GST No",
+            value=st.session_state.get("po_gst_no", "GSTNUMBER"),
+            key="po_gst_no_input"
+        )
+        pan_no = st.text_input(
+            "PAN No",
+            value=st.session_state.get("po_pan_no", "PANNUMBER"),
+            key="po_pan_no_input"
+        )
+        msme_no = st.text_input(
+            "MSME No",
+            value=st.session_state.get("po_msme_no", "MSMENUMBER"),
+            key="po_msme_no_input"
+        )
+
+        st.subheader("Terms & Authorization")
+        payment_terms = st.text_input("Payment Terms", "30 Days from Invoice date.", key="po_payment_terms_input")
+        delivery_days = st.number_input("Delivery (Days)", min_value=1, value=2, key="po_delivery_days_input")
+        delivery_terms = st.text_input("Delivery Terms", f"Within {delivery_days} Days.", key="po_delivery_terms_input")
+        prepared_by = st.text_input("Prepared By", "Finance Department", key="po_prepared_by_input")
+        authorized_by = st.text_input("Authorized By", "Your Company Name", key="po_authorized_by_input")
+
+        st.subheader("Preview & Generate")
+
+        st.info(f"**PO Number:** {st.session_state.po_number}")
+        st.info(f"**Sales Person:** {current_sales_person_info['name']} ({po_sales_person}) - {current_sales_person_info['email']}")
+
+        grand_total = calculate_quotation_totals(st.session_state.products)["grand_total_unrounded"]
+        amount_words = amount_in_words(grand_total)
+        st.metric("Grand Total", f"₹{format_inr(grand_total)}")
+
+        logo_path = global_logo
+        if not logo_path:
+            st.warning("No company logo available. Please upload one in the sidebar.")
+
+        po_generate = st.button("Generate PO", type="primary", key="po_generate_button", use_container_width=True)
+        if po_generate and is_number_issued("po", st.session_state.po_number):
+            st.error(f"❌ PO number {st.session_state.po_number} has already been issued. "
+                     "Change the sequence before generating.")
+        elif po_generate and claim_document_numbers({"po": st.session_state.po_number}):
+            totals = calculate_quotation_totals(st.session_state.products)
+            rounded_total = totals["grand_total"]
+            round_off = totals["round_off"]
+
+            grand_total = rounded_total
+            amount_words = number_to_words(rounded_total)
+
+            po_data = {
+                "po_number": st.session_state.po_number,
+                "po_date": st.session_state.po_date,
+                "vendor_name": vendor_name,
+                "vendor_address": vendor_address,
+                "vendor_contact": vendor_contact,
+                "vendor_mobile": vendor_mobile,
+                "gst_no": gst_no,
+                "pan_no": pan_no,
+                "msme_no": msme_no,
+                "bill_to_company": bill_to_company,
+                "bill_to_address": bill_to_address,
+                "ship_to_company": ship_to_company,
+                "ship_to_address": ship_to_address,
+                "end_company": end_company,
+                "end_address": end_address,
+                "end_person": end_person,
+                "end_mobile": end_mobile,
+                "end_email": end_email,
+                "products": st.session_state.products,
+                "grand_total": grand_total,
+                "amount_words": amount_words,
+                "payment_terms": payment_terms,
+                "delivery_terms": delivery_terms,
+                "prepared_by": prepared_by,
+                "authorized_by": authorized_by,
+                "company_name": st.session_state.company_name
+            }
+
+            try:
+                pdf_bytes = create_po_pdf(po_data, logo_path)
+                if not pdf_bytes:
+                    raise ValueError("the PDF came out empty")
+            except Exception as e:
+                release_issued_number("po", po_data["po_number"])
+                st.error(f"Error generating PDF: {str(e)}")
+                pdf_bytes = None
+
+            if pdf_bytes:
+                try:
+                    archive_document(pdf_bytes, "po", po_data["po_number"], po_data["po_date"],
+                                     sales_person=po_sales_person, party=vendor_name, gstin=gst_no,
+                                     grand_total=grand_total, document=po_data)
+                except (OSError, sqlite3.Error) as e:
+                    st.warning(f"⚠ Could not archive PO: {e}")
+                st.session_state.last_po_number = st.session_state.po_number
+
+                if po_auto_increment:
+                    next_sequence = get_next_po_sequence(po_sales_person)
+                    st.session_state.po_seq = next_sequence
+
+                st.success("Purchase Order generated!")
+                st.info(f"📧 Sales Person: {current_sales_person_info['name']}")
+
+                download = spool_download(pdf_bytes, f"{end_company}_{st.session_state.po_number.replace('/', '_')}.pdf")
+                render_spooled_download(download, "⬇ Download Purchase Order", use_container_width=True)
+
+@timed_fragment("Invoice number editor")
+def render_invoice_settings():
+    """Sidebar invoice settings: number editor and auto-increment"""
+    current_quarter = get_current_quarter()
+
+    st.header("Invoice Settings")
+
+    def get_invoice_number():
+        if st.session_state.last_invoice_number:
+            try:
+                last_prefix, last_year_range, last_quarter, last_sequence = parse_invoice_number(st.session_state.last_invoice_number)
+
+                if last_quarter == current_quarter:
+                    next_sequence = get_next_sequence_number_invoice(st.session_state.last_invoice_number)
+                    return generate_invoice_number(next_sequence)
+                else:
+                    return generate_invoice_number(1)
+            except:
+                return generate_invoice_number(st.session_state.invoice_seq)
+        else:
+            return generate_invoice_number(st.session_state.invoice_seq)
+
+    if "current_invoice_quarter" not in st.session_state:
+        st.session_state.current_invoice_quarter = current_quarter
+        st.session_state.invoice_number = get_invoice_number()
+
+    if st.session_state.get('current_invoice_quarter', '') != current_quarter:
+        st.session_state.current_invoice_quarter = current_quarter
+        st.session_state.invoice_number = get_invoice_number()
+
+    st.info(f"**Current Quarter:** {current_quarter}")
+
+    try:
+        prefix, year_range, quarter, sequence = parse_invoice_number(st.session_state.invoice_number)
+        st.success(f"**Auto-generated Invoice Number**")
+        st.info(f"**Format:** {year_range}/{quarter}/{sequence}")
+    except:
+        st.warning("Could not parse invoice number")
+
+    st.subheader("Invoice Number Editor")
+
+    try:
+        current_prefix, current_year_range, current_q, current_seq = parse_invoice_number(st.session_state.invoice_number)
+
+        col1, col2, col3 = st.columns([2, 2, 1])
+
+        with col1:
+            new_year_range = st.text_input("Year Range", value=current_year_range, key="invoice_year_edit")
+
+        with col2:
+            new_quarter = st.text_input("Quarter", value=current_q, key="invoice_quarter_edit")
+
+        with col3:
+            new_sequence = st.number_input("Sequence", 
+                                        min_value=1, 
+                                        value=int(current_seq), 
+                                        step=1,
+                                        key="invoice_seq_edit")
+
+        new_invoice_number = format_document_number(
+            "invoice", prefix="COM", short_year_range=new_year_range,
+            quarter=new_quarter, sequence=new_sequence)
+
+        if new_invoice_number != st.session_state.invoice_number:
+            st.session_state.invoice_number = new_invoice_number
+
+    except Exception as e:
+        st.error(f"Error parsing invoice number: {e}")
+        st.session_state.invoice_number = generate_invoice_number(st.session_state.invoice_seq)
+
+    st.code(st.session_state.invoice_number)
+
+    invoice_auto_increment = st.checkbox("Auto-increment Sequence", value=True, key="invoice_auto_increment")
+
+    if st.button("Reset to Auto-generate", use_container_width=True, key="invoice_reset_auto_generate"):
+        next_sequence = get_next_invoice_sequence()
+        st.session_state.invoice_seq = next_sequence
+        st.session_state.last_invoice_number = ""
+        st.session_state.invoice_number = generate_invoice_number(next_sequence)
+        st.success(f"Invoice number reset to next sequence: {next_sequence}")
+        st.rerun()
+
+    rerun_if_stale("invoice_number")
+
+@timed_fragment("Invoice form")
+def render_invoice_form(global_logo=None, global_stamp=None):
+    """Tax invoice tab: invoice details, parties, items and PDF generation"""
+    if global_logo:
+        st.image(global_logo, width=150)
+        st.markdown("### Tax Invoice Generator")
+    else:
+        st.header("Tax Invoice Generator")
+
+    invoice_auto_increment = st.session_state.invoice_auto_increment
+    mark_rendered("invoice_number")
+
+
+    col1, col2 = st.columns([1,1])
+    with col1:
+        st.subheader("Invoice Details")
+
+        st.info(f"**Invoice Number:** {st.session_state.invoice_number}")
+
+        invoice_no = st.text_input("Invoice No", st.session_state.invoice_number, key="invoice_number_input")
+        invoice_date = st.text_input("Invoice Date", datetime.date.today().strftime("%d-%m-%Y"))
+        Suppliers_Reference = st.text_input("Supplier's Reference", "NA")
+        Others_Reference = st.text_input("Other's Reference", "NA")
+        buyers_order_no = st.text_input("Buyer's Order No.", "Online")
+        buyers_order_date = st.text_input("Buyer's Order Date", datetime.date.today().strftime("%d-%m-%Y"))
+        dispatched_through = st.text_input("Dispatched Through", "Online")
+
+        payment_terms = st.text_input("Mode/Terms of Payment", "100% Advance with Purchase")
+
+        terms_of_delivery = st.text_input("Terms of delivery", "Within Month")
+
+        destination = st.text_input("Destination", "City Name")
+
+        st.subheader("Seller Details")
+        vendor_name = st.text_input("Seller Name", "Your Company Name")
+        vendor_address = st.text_area("Seller Address", "Your Company Address")
+        vendor_gst = st.text_input("Seller GST No.", "GSTNUMBER")
+        vendor_msme = st.text_input("Seller MSME Registration No.", "MSMENUMBER")
+
+    with col2:
+        st.subheader("Buyer Details")
+
+        selected_enduser_invoice = st.selectbox(
+            "Select Buyer", 
+            options=get_enduser_dropdown_options(),
+            key="enduser_dropdown_invoice"
+        )
+
+        if selected_enduser_invoice and selected_enduser_invoice != "Select End User":
+            enduser_data = END_USER_DATABASE.get(selected_enduser_invoice, {})
+            st.session_state.invoice_buyer_company = selected_enduser_invoice
+            st.session_state.invoice_buyer_address = enduser_data.get("address", "")
+            st.session_state.invoice_buyer_mobile = enduser_data.get("mobile", "")
+            st.session_state.invoice_buyer_email = enduser_data.get("email", "")
+            st.session_state.invoice_buyer_gst = enduser_data.get("gst_no", "")
+
+        buyer_name = st.text_input(
+            "Buyer Name",
+            value=st.session_state.get("invoice_buyer_company", "Customer Company Ltd."),
+            key="invoice_buyer_company"
+        )
+
+        buyer_address = st.text_area(
+            "Buyer Address",
+            value=st.session_state.get("invoice_buyer_address", "Customer Address"),
+            key="invoice_buyer_address"
+        )
+
+        buyer_mobile = st.text_input(
+            "Buyer mobile.",
+            value=st.session_state.get("invoice_buyer_mobile", "00000 00000"),
+            key="invoice_buyer_mobile"
+        )
+        buyer_email = st.text_input(
+            "Buyer email.",
+            value=st.session_state.get("invoice_buyer_email", "customer@company.com"),
+            key="invoice_buyer_email"
+        )
+        buyer_gst = st.text_input(
+            "Buyer GST No.",
+            value=st.session_state.get("invoice_buyer_gst", "GSTNUMBER"),
+            key="invoice_buyer_gst"
+        )
+
+        st.subheader("Products")
+        items = []
+        num_items = st.number_input("Number of Products", 1, 10, 1, key="invoice_num_items")
+        for i in range(num_items):
+            with st.expander(f"Product {i+1}"):
+                desc = st.text_area(f"Description {i+1}", "Software Product\nDescription\nSerial #\nContract #\nEnd Date:", key=f"invoice_desc_{i}")
+                hsn = st.text_input(f"HSN/SAC {i+1}", "997331", key=f"invoice_hsn_{i}")
+                qty = st.number_input(f"Quantity {i+1}", 1.00, 100.00, 1.00, key=f"invoice_qty_{i}")
+                rate = st.number_input(f"Unit Rate {i+1}", 0.00, 100000000.00, 10000.00, key=f"invoice_rate_{i}")
+                rate = Money.of(rate).rupees
+                items.append({"description": desc, "hsn": hsn, "quantity": qty, "unit_rate": rate})
+
+        st.subheader("Declaration")
+        declaration = st.text_area("Declaration", "Standard declaration text as per your requirements.")
+
+        st.subheader("Company Branding")
+        st.info("Using global logo and stamp from sidebar settings")
+        logo_path = global_logo
+        stamp_path = global_stamp
+
+        if not logo_path:
+            st.warning("⚠ No company logo available")
+        if not stamp_path:
+            st.warning("⚠ No company stamp available")
+
+        st.subheader("Invoice Preview & Download")
+
+        invoice_generate = st.button("Generate Invoice", key="generate_invoice_button")
+        if invoice_generate and is_number_issued("invoice", st.session_state.invoice_number):
+            st.error(f"❌ Invoice number {st.session_state.invoice_number} has already been issued. "
+                     "Change the sequence before generating.")
+        elif invoice_generate and not valid_document_date(invoice_date):
+            st.error(f"❌ Invoice date {invoice_date!r} is not a dd-mm-YYYY date.")
+        elif invoice_generate:
+            current_invoice_no = st.session_state.invoice_number
+
+            manual_sequence = None
+            try:
+                prefix, year_range, quarter, sequence = parse_invoice_number(current_invoice_no)
+                manual_sequence = int(sequence)
+                st.session_state.invoice_seq = manual_sequence
+
+            except Exception as e:
+                st.error(f"Error parsing invoice number: {e}")
+
+            invoice_no = current_invoice_no
+
+            invoice_totals = calculate_invoice_totals(items)
+            basic_amount = invoice_totals["basic_amount"]
+            sgst = invoice_totals["sgst"]
+            cgst = invoice_totals["cgst"]
+            final_amount = invoice_totals["final_amount"]
+            round_off = invoice_totals["round_off"]
+
+            st.info(f"**Calculated Amounts:** Basic: ₹{format_inr(basic_amount)}, SGST: ₹{format_inr(sgst)}, CGST: ₹{format_inr(cgst)}, Final: ₹{format_inr(final_amount)}")
+            if round_off != 0:
+                st.info(f"**Round Off:** ₹{format_inr(round_off)}")
+
+            final_amount_words = amount_in_words(final_amount)
+            tax_in_words = amount_in_words(invoice_totals["tax_total"])
+
+            invoice_data = {
+                "invoice": {"invoice_no": invoice_no, "date": invoice_date},
+                "Reference": {"Suppliers_Reference": Suppliers_Reference, "Other": Others_Reference},
+                "vendor": {"name": vendor_name, "address": vendor_address, "gst": vendor_gst, "msme": vendor_msme},
+                "buyer": {"name": buyer_name, "address": buyer_address, "gst": buyer_gst, "mobile":buyer_mobile, "email":buyer_email},
+                "invoice_details": {
+                    "buyers_order_no": buyers_order_no,
+                    "buyers_order_date": buyers_order_date,
+                    "dispatched_through": dispatched_through,
+                    "payment_terms": payment_terms,
+                    "terms_of_delivery": terms_of_delivery,
+                    "destination": destination
+                },
+                "items": items,
+                "totals": {
+                    "basic_amount": basic_amount,
+                    "sgst": sgst,
+                    "cgst": cgst,
+                    "final_amount": final_amount,
+                    "amount_in_words": final_amount_words,
+                    "tax_in_words": tax_in_words
+                },
+                "declaration": declaration
+            }
+
+            pdf_file = None
+            if claim_document_numbers({"invoice": invoice_no}):
+                try:
+                    pdf_file = create_invoice_pdf(invoice_data, logo_path, stamp_path)
+                    if not pdf_file:
+                        raise ValueError("the PDF came out empty")
+                except Exception as e:
+                    release_issued_number("invoice", invoice_no)
+                    st.error(f"Error generating PDF: {str(e)}")
+                    pdf_file = None
+
+            if pdf_file:
+                try:
+                    archive_document(pdf_file, "invoice", invoice_no, invoice_date, party=buyer_name,
+                                     gstin=buyer_gst, grand_total=final_amount, document=invoice_data)
+                except (OSError, sqlite3.Error) as e:
+                    st.warning(f"⚠ Could not archive invoice: {e}")
+
+                st.session_state.last_invoice_number = invoice_no
+
+                if manual_sequence is not None:
+                    stored_sequence = manual_sequence + 1 if invoice_auto_increment else manual_sequence
+                    st.session_state.invoice_seq = stored_sequence
+                    reserve_sequence_through(INVOICE_COUNTER_FILE, stored_sequence)
+                    st.success(f"✅ Invoice sequence updated to: {stored_sequence}")
+
+                st.success("Invoice generated successfully!")
+
+                download = spool_download(pdf_file, f"{buyer_name}_{invoice_date}_{invoice_no.replace('/', '_')}.pdf")
+                render_spooled_download(download, "⬇ Download Invoice PDF", key="invoice_download_button")
+
+@timed_fragment("Deal bundle form")
+def render_deal_bundle_form(global_logo=None, global_stamp=None):
+    """Deal bundle tab: one deal rendered as quotation, PO and invoice together"""
+    st.header("Deal Bundle")
+    st.caption("Enter a deal once to generate its quotation, purchase order and invoice together")
+
+    deal_sales_person = st.selectbox("Sales Person",
+                                     options=list(SALES_PERSON_MAPPING.keys()),
+                                     format_func=lambda x: f"{x} - {SALES_PERSON_MAPPING[x]['name']}",
+                                     key="deal_sales_person")
+
+    col1, col2 = st.columns([1, 1])
+    with col1:
+        st.subheader("Customer")
+        selected_enduser_deal = st.selectbox("Select Customer", options=get_enduser_dropdown_options(),
+                                             key="enduser_dropdown_deal")
+        if selected_enduser_deal and selected_enduser_deal != "Select End User":
+            enduser_data = END_USER_DATABASE.get(selected_enduser_deal, {})
+            st.session_state.deal_customer_name = selected_enduser_deal
+            st.session_state.deal_customer_address = enduser_data.get("address", "")
+            st.session_state.deal_customer_contact = enduser_data.get("contact", "")
+            st.session_state.deal_customer_mobile = enduser_data.get("mobile", "")
+            st.session_state.deal_customer_email = enduser_data.get("email", "")
+            st.session_state.deal_customer_gst = enduser_data.get("gst_no", "")
+
+        customer = Party(
+            name=st.text_input("Company Name", value=st.session_state.get("deal_customer_name", "Customer Company Ltd."),
+                               key="deal_customer_name"),
+            address=st.text_area("Address", value=st.session_state.get("deal_customer_address", "Customer Address"),
+                                 key="deal_customer_address"),
+            contact=st.text_input("Contact Person", value=st.session_state.get("deal_customer_contact", "Contact Person"),
+                                  key="deal_customer_contact"),
+            mobile=st.text_input("Mobile", value=st.session_state.get("deal_customer_mobile", "0000000000"),
+                                 key="deal_customer_mobile"),
+            email=st.text_input("Email", value=st.session_state.get("deal_customer_email", "customer@company.com"),
+                                key="deal_customer_email"),
+            gstin=st.text_input("GST No", value=st.session_state.get("deal_customer_gst", ""),
+                                key="deal_customer_gst"))
+
+        st.subheader("Supplier")
+        selected_vendor_deal = st.selectbox("Select Supplier", options=get_vendor_dropdown_options(),
+                                            key="vendor_dropdown_deal")
+        vendor_data = VENDOR_DATABASE.get(selected_vendor_deal, {})
+        supplier = Party(
+            name=selected_vendor_deal if vendor_data else "Vendor Company Ltd.",
+            address=vendor_data.get("address", "Vendor Address"),
+            contact=vendor_data.get("contact", ""),
+            mobile=vendor_data.get("mobile", ""),
+            gstin=vendor_data.get("gst_no", ""),
+            pan=vendor_data.get("pan_no", ""),
+            msme=vendor_data.get("msme_no", ""))
+
+    with col2:
+        st.subheader("Products")
+        deal_product_names = st.multiselect("Products", list(PRODUCT_CATALOG.keys()),
+                                            default=list(PRODUCT_CATALOG.keys())[:1], key="deal_products")
+        deal_products = []
+        for name in deal_product_names:
+            qty = st.number_input(f"Qty - {name}", min_value=1.0, value=1.0, key=f"deal_qty_{name}")
+            deal_products.append(ProductLine(name=name, basic=PRODUCT_CATALOG[name]["basic"],
+                                             gst_percent=PRODUCT_CATALOG[name]["gst_percent"], qty=qty))
+
+        st.subheader("Terms")
+        deal_payment_terms = st.text_input("Payment Terms", "30 Days from Invoice date.", key="deal_payment_terms")
+        deal_delivery_terms = st.text_input("Delivery Terms", "Within 2 Days.", key="deal_delivery_terms")
+        deal_hsn = st.text_input("HSN/SAC", "997331", key="deal_hsn")
+
+        if deal_products:
+            deal_preview = calculate_quotation_totals(deal_products)
+            st.metric("Grand Total", f"₹{format_inr(deal_preview['grand_total'])}")
+
+    if st.button("Generate Deal Bundle", type="primary", use_container_width=True, key="generate_deal_bundle"):
+        if not deal_products:
+            st.error("Please select at least one product for the deal.")
+        else:
+            deal = Deal(deal_date=datetime.date.today().strftime("%d-%m-%Y"), customer=customer,
+                        supplier=supplier,
+                        company=dataclasses.replace(COMPANY_PARTY, name=st.session_state.company_name),
+                        products=deal_products, sales_person_code=deal_sales_person, hsn=deal_hsn,
+                        payment_terms=deal_payment_terms, delivery_terms=deal_delivery_terms)
+            numbers = reserve_deal_numbers(deal_sales_person)
+            pdfs = None
+            if claim_document_numbers(numbers):
+                try:
+                    started = time.perf_counter()
+                    documents, pdfs, bundle = create_deal_bundle(deal, numbers, global_logo, global_stamp)
+                    elapsed_ms = (time.perf_counter() - started) * 1000
+                except Exception as e:
+                    for doc_type, number in numbers.items():
+                        release_issued_number(doc_type, number)
+                    st.error(f"Error generating deal bundle: {str(e)}")
+                    pdfs = None
+
+            if pdfs:
+                totals = deal_totals(deal)
+                archive_totals = {"quotation": totals["quotation"]["grand_total"],
+                                  "po": totals["quotation"]["grand_total"],
+                                  "invoice": totals["invoice"]["final_amount"]}
+                for doc_type in BUNDLE_DOCUMENT_TYPES:
+                    try:
+                        archive_document(pdfs[doc_type], doc_type, numbers[doc_type], deal.deal_date,
+                                         sales_person=deal_sales_person,
+                                         party=supplier.name if doc_type == "po" else customer.name,
+                                         gstin=supplier.gstin if doc_type == "po" else customer.gstin,
+                                         grand_total=archive_totals[doc_type], document=documents[doc_type])
+                    except (OSError, sqlite3.Error) as e:
+                        st.warning(f"⚠ Could not archive {doc_type}: {e}")
+
+                st.success(f"✅ Deal bundle generated in {elapsed_ms:.0f} ms")
+                for doc_type in BUNDLE_DOCUMENT_TYPES:
+                    st.info(f"**{doc_type.upper()}:** {numbers[doc_type]}")
+                download = spool_download(bundle, f"{customer.name}_{numbers['quotation'].replace('/', '_')}.zip",
+                                          mime="application/zip")
+                render_spooled_download(download, "⬇ Download Deal Bundle (ZIP)", use_container_width=True,
+                                        key="deal_bundle_download")
+
+@timed_fragment("Sales analytics")
+def render_sales_analytics():
+    """Sales analytics tab"""
+    render_sales_dashboard()
+
+
+# --- The main function ---
+def main():
+    st.set_page_config(page_title="Document Generator", page_icon="📑", layout="wide")
+    load_contact_databases()
+    st.title("📑 Document Generator - Invoice, PO & Quotation")
+    started = time.perf_counter()
+
+    # --- Logo and Stamp Configuration in Sidebar ---
+    st.sidebar.header("📷 Company Branding")
+    
+    use_github = st.sidebar.checkbox("Use GitHub Images", value=False, 
+                                   help="Use logo and stamp from GitHub repository")
+    
+    uploaded_logo = None
+    uploaded_stamp = None
+    
+    if not use_github:
+        st.sidebar.subheader("Upload Custom Images")
+        uploaded_logo = st.sidebar.file_uploader("Upload Company Logo", 
+                                               type=["png", "jpg", "jpeg"], 
+                                               key="global_logo")
+        uploaded_stamp = st.sidebar.file_uploader("Upload Company Stamp", 
+                                                type=["png", "jpg", "jpeg"], 
+                                                key="global_stamp")
+    
+    global_logo = None
+    global_stamp = None
+    
+    if use_github:
+        with st.sidebar.status("Loading images from GitHub..."):
+            global_logo, global_stamp = load_session_github_images()
+            
+            if global_logo:
+                st.sidebar.success("✓ GitHub logo loaded")
+            else:
+                st.sidebar.error("❌ GitHub logo failed")
+                
+            if global_stamp:
+                st.sidebar.success("✓ GitHub stamp loaded")
+            else:
+                st.sidebar.error("❌ GitHub stamp failed")
+    else:
+        if uploaded_logo:
+            global_logo = save_uploaded_file(uploaded_logo, "custom_logo")
+            if global_logo:
+                st.sidebar.success("✓ Custom logo loaded")
+        
+        if uploaded_stamp:
+            global_stamp = save_uploaded_file(uploaded_stamp, "custom_stamp")
+            if global_stamp:
+                st.sidebar.success("✓ Custom stamp loaded")
+    
+    st.sidebar.subheader("Image Status")
+    if global_logo:
+        st.sidebar.info("Logo: ✅ Loaded")
+    else:
+        st.sidebar.error("Logo: ❌ Not available")
+    
+    if global_stamp:
+        st.sidebar.info("Stamp: ✅ Loaded")
+    else:
+        st.sidebar.error("Stamp: ❌ Not available")
+
+    with timed_section("Sidebar tools"):
+        cleanup_download_spool()
+        render_archive_sidebar()
+        render_search_sidebar()
+        render_number_gaps_sidebar()
+        render_renewals_sidebar(global_logo, global_stamp)
+        render_statement_sidebar(global_logo)
+        render_gst_return_sidebar()
+        render_recent_downloads_sidebar()
+
+    # --- Initialize Session State ---
+    # Quotation session states
+    if "quotation_seq" not in st.session_state:
+        st.session_state.quotation_seq = get_current_quotation_sequence()
+    if "quotation_products" not in st.session_state:
+        st.session_state.quotation_products = []
+    if "last_quotation_number" not in st.session_state:
+        st.session_state.last_quotation_number = ""
+    if "quotation_number" not in st.session_state:
+        st.session_state.quotation_number = generate_quotation_number("SP1", st.session_state.quotation_seq)
+    if "current_quote_sales_person" not in st.session_state:
+        st.session_state.current_quote_sales_person = "SP1"
+
+    # PO session states  
+    if "po_seq" not in st.session_state:
+        st.session_state.po_seq = get_current_po_sequence()
+    if "products" not in st.session_state:
+        st.session_state.products = []
+    if "company_name" not in st.session_state:
+        st.session_state.company_name = "Your Company Name"
+    if "po_number" not in st.session_state:
+        st.session_state.po_number = generate_po_number("SP1", st.session_state.po_seq)
+    if "po_date" not in st.session_state:
+        st.session_state.po_date = datetime.date.today().strftime("%d-%m-%Y")
+    if "last_po_number" not in st.session_state:
+        st.session_state.last_po_number = ""
+    if "current_po_sales_person" not in st.session_state:
+        st.session_state.current_po_sales_person = "SP1"
+    if "current_po_quarter" not in st.session_state:
+        st.session_state.current_po_quarter = get_current_quarter()
+
+    # Invoice session states
+    if "invoice_seq" not in st.session_state:
+        st.session_state.invoice_seq = get_current_invoice_sequence()
+    if "invoice_number" not in st.session_state:
+        st.session_state.invoice_number = generate_invoice_number(st.session_state.invoice_seq)
+    if "last_invoice_number" not in st.session_state:
+        st.session_state.last_invoice_number = ""
+    if "current_invoice_quarter" not in st.session_state:
+        st.session_state.current_invoice_quarter = get_current_quarter()
+
+    # Invoice buyer session states
+    if "invoice_buyer_company" not in st.session_state:
+        st.session_state.invoice_buyer_company = "Customer Company Ltd."
+    if "invoice_buyer_address" not in st.session_state:
+        st.session_state.invoice_buyer_address = "Customer Address"
+    if "invoice_buyer_gst" not in st.session_state:
+        st.session_state.invoice_buyer_gst = "GSTNUMBER"
+    if "invoice_buyer_mobile" not in st.session_state:
+        st.session_state.invoice_buyer_mobile = "00000 00000"
+    if "invoice_buyer_email" not in st.session_state:
+        st.session_state.invoice_buyer_email = "customer@company.com"
+
+    # Vendor session states
+    if "po_vendor_name" not in st.session_state:
+        st.session_state.po_vendor_name = "Supplier Company Ltd."
+    if "po_vendor_address" not in st.session_state:
+        st.session_state.po_vendor_address = "Supplier Address"
+    if "po_vendor_contact" not in st.session_state:
+        st.session_state.po_vendor_contact = "Contact Person"
+    if "po_vendor_mobile" not in st.session_state:
+        st.session_state.po_vendor_mobile = "+91 00000 00000"
+    if "po_gst_no" not in st.session_state:
+        st.session_state.po_gst_no = "GSTNUMBER"
+    if "po_pan_no" not in st.session_state:
+        st.session_state.po_pan_no = "PANNUMBER"
+    if "po_msme_no" not in st.session_state:
+        st.session_state.po_msme_no = "MSMENUMBER"
+
+    # Quotation end user session states
+    if "quote_end_company" not in st.session_state:
+        st.session_state.quote_end_company = "Customer Company Ltd."
+    if "quote_end_address" not in st.session_state:
+        st.session_state.quote_end_address = "Customer Address"
+    if "quote_end_person" not in st.session_state:
+        st.session_state.quote_end_person = "Contact Person"
+    if "quote_end_mobile" not in st.session_state:
+        st.session_state.quote_end_mobile = "0000000000"
+    if "quote_end_email" not in st.session_state:
+        st.session_state.quote_end_email = "customer@company.com"
+    if "quote_end_gst_no" not in st.session_state:
+        st.session_state.quote_end_gst_no = "GSTNUMBER"
+
+    # PO end user session states
+    if "po_end_company" not in st.session_state:
+        st.session_state.po_end_company = "Customer Company Ltd."
+    if "po_end_address" not in st.session_state:
+        st.session_state.po_end_address = "Customer Address"
+    if "po_end_person" not in st.session_state:
+        st.session_state.po_end_person = "Contact Person"
+    if "po_end_mobile" not in st.session_state:
+        st.session_state.po_end_mobile = "0000000000"
+    if "po_end_email" not in st.session_state:
+        st.session_state.po_end_email = "customer@company.com"
+    if "po_end_gst_no" not in st.session_state:
+        st.session_state.po_end_gst_no = "GSTNUMBER"
+
+    # PO bill to/ship to session states
+    if "po_bill_to_company" not in st.session_state:
+        st.session_state.po_bill_to_company = "Your Company Name"
+    if "po_bill_to_address" not in st.session_state:
+        st.session_state.po_bill_to_address = "Your Company Address"
+    if "po_ship_to_company" not in st.session_state:
+        st.session_state.po_ship_to_company = "Your Company Name"
+    if "po_ship_to_address" not in st.session_state:
+        st.session_state.po_ship_to_address = "Your Company Address"
+
+    # --- Upload Excel and Load Vendor/End User ---
+    uploaded_excel = st.file_uploader("📂 Upload Vendor & End User Excel", type=["xlsx"])
+
+    if uploaded_excel:
+        vendors_df, endusers_df = read_contacts_workbook(uploaded_excel.getvalue())
+
+        st.success("✅ Excel loaded successfully!")
+
+        vendor_name = st.selectbox("Select Vendor", vendors_df["Vendor Name"].unique())
+        vendor = vendors_df[vendors_df["Vendor Name"] == vendor_name].iloc[0]
+
+        end_user_name = st.selectbox("Select End User", endusers_df["End User Company"].unique())
+        end_user = endusers_df[endusers_df["End User Company"] == end_user_name].iloc[0]
+
+        def safe_strip(value):
+            try:
+                if pd.isna(value):
+                    return ""
+                return str(value).split(".")[0].strip()
+            except Exception:
+                return ""
+
+        vendor_mobile = safe_strip(vendor.get("Mobile", ""))
+        End_user_mobile = safe_strip(end_user.get("End Mobile", ""))
+
+        st.session_state.po_vendor_name = vendor["Vendor Name"]
+        st.session_state.po_vendor_address = vendor["Vendor Address"]
+        st.session_state.po_vendor_contact = vendor["Contact Person"]
+        st.session_state.po_vendor_mobile = vendor_mobile
+        st.session_state.po_end_company = end_user["End User Company"]
+        st.session_state.po_end_address = end_user["End User Address"]
+        st.session_state.po_end_person = end_user["End User Contact"]
+        st.session_state.po_end_mobile = End_user_mobile
+        st.session_state.po_end_email = end_user["End User Email"]
+        st.session_state.po_end_gst_no = end_user["GST NO"]
+
+        st.info("Vendor & End User details auto-filled from Excel ✅")
+
+    with st.sidebar:
+        render_quotation_settings()
+        render_po_settings()
+        render_invoice_settings()
+
+    # Create tabs for different document types
+    tab1, tab2, tab3, tab4, tab5 = st.tabs(["Quotation Generator", "Purchase Order Generator",
+                                            "Tax Invoice Generator", "Deal Bundle", "Sales Analytics"])
+
+    with tab1:
+        render_quotation_form(global_logo, global_stamp)
+
+    with tab2:
+        render_po_form(global_logo)
+
+    with tab3:
+        render_invoice_form(global_logo, global_stamp)
+
+    with tab4:
+        render_deal_bundle_form(global_logo, global_stamp)
+
+    with tab5:
+        render_sales_analytics()
+
+    st.divider()
+    st.caption("© 2025 Document Generator")
+
+    record_section_time("Full rerun", (time.perf_counter() - started) * 1000)
+    render_rerun_latency_sidebar()
+
+def cli_benchmark_render(args):
+    for name, result in benchmark_render_caches(args.iterations).items():
+        print(f"{name:<10} uncached {result['uncached_ms']:8.2f} ms  metrics cache {result['metrics_ms']:8.2f} ms  "
+              f"fragments {result['fragments_ms']:8.2f} ms  saved {result['saved_ms']:8.2f} ms/document")
+    stats = TEXT_METRICS.stats()
+    print(f"text metrics: widths {stats['width_hit_rate']:.1%} hit ({stats['width_hits']}/{stats['width_hits'] + stats['width_misses']}), "
+          f"wraps {stats['wrap_hit_rate']:.1%} hit ({stats['wrap_hits']}/{stats['wrap_hits'] + stats['wrap_misses']})")
+
+def cli_validate_numbers(args):
+    started = time.perf_counter()
+    checked, invalid = validate_archived_numbers()
+    for doc_type, number, error in invalid:
+        print(f"{doc_type:<10} {error}")
+    print(f"checked {checked} numbers, {len(invalid)} invalid, in {time.perf_counter() - started:.2f}s")
+    if invalid:
+        sys.exit(1)
+
+def cli_check_hot_folder(args):
+    results = check_hot_folder()
+    for name, passed in results:
+        print(f"{'ok' if passed else 'FAILED':<7} {name}")
+    if not all(passed for _, passed in results):
+        sys.exit(1)
+
+def cli_check_amounts(args):
+    results = check_amount_words()
+    for name, passed in results:
+        print(f"{'ok' if passed else 'FAILED':<7} {name}")
+    if not all(passed for _, passed in results):
+        sys.exit(1)
+
+def cli_check_branding(args):
+    results = check_branding_fetcher(args.writers)
+    for name, passed in results:
+        print(f"{'ok' if passed else 'FAILED':<7} {name}")
+    if not all(passed for _, passed in results):
+        sys.exit(1)
+
+def cli_benchmark_money(args):
+    result = benchmark_money(args.lines)
+    print(f"{result['lines']} lines: integer paise {result['paise_ms']:.2f} ms, Decimal {result['decimal_ms']:.2f} ms")
+
+def cli_benchmark_format(args):
+    result = benchmark_formatting(args.cells)
+    print(f"{result['cells']} cells: f-string {result['fstring_ms']:.2f} ms, "
+          f"format_inr cold {result['cold_ms']:.2f} ms, warm {result['warm_ms']:.2f} ms")
+
+def cli_benchmark_export(args):
+    result = benchmark_export(args.count, args.output, doc_type=args.type)
+    for done, elapsed, peak in result["progress"]:
+        memory = f"{peak:.1f} MB peak RSS" if peak is not None else "peak RSS unavailable"
+        print(f"{done:>7} {args.type} documents  {elapsed:8.1f} s  {memory}")
+    print(f"ZIP size {result['zip_bytes'] / (1024 * 1024):.1f} MB")
+
+def cli_benchmark_batch(args):
+    logo = open(args.logo, "rb").read() if args.logo else None
+    stamp = open(args.stamp, "rb").read() if args.stamp else None
+    result = benchmark_print_batch(args.count, logo, stamp, args.type)
+    print(f"{result['count']} {result['doc_type']} documents: separate PDFs {result['separate_bytes'] / 1024:.0f} KB in {result['separate_s']:.2f} s, "
+          f"print batch {result['batch_bytes'] / 1024:.0f} KB in {result['batch_s']:.2f} s")
+
+def cli_benchmark_size(args):
+    logo = open(args.logo, "rb").read() if args.logo else None
+    stamp = open(args.stamp, "rb").read() if args.stamp else None
+    for name, modes in benchmark_output_size(logo, stamp).items():
+        for mode, result in modes.items():
+            parts = ", ".join(f"{kind} {size / 1024:.1f}" for kind, size in
+                              sorted(result["breakdown"].items(), key=lambda item: -item[1]) if size)
+            print(f"{name:<10} {mode:<9} {result['bytes'] / 1024:7.1f} KB  ({parts} KB)")
+
+def cli_benchmark_renewals(args):
+    result = benchmark_renewal_lookup(args.contracts, args.days)
+    print(f"{result['contracts']} contracts: {result['found']} expiring within {args.days} days, "
+          f"found in {result['lookup_ms']:.2f} ms")
+
+def cli_renewals(args):
+    start = datetime.datetime.strptime(args.start, "%d-%m-%Y").date() if args.start else datetime.date.today()
+    end = (datetime.datetime.strptime(args.end, "%d-%m-%Y").date() if args.end
+           else start + datetime.timedelta(days=RENEWAL_WINDOW_DAYS))
+    if args.dry_run:
+        for contract in find_expiring_contracts(start, end, party=args.party):
+            print(f"{contract['end_date']}  {contract['party']:<30} {contract['product']:<30} "
+                  f"{contract['contract_no'] or contract['serial_no']}")
+        return
+    logo = open(args.logo, "rb").read() if args.logo else None
+    stamp = open(args.stamp, "rb").read() if args.stamp else None
+    renewals = generate_renewals(start, end, args.type, term_months=args.term_months,
+                                 sales_person=args.sales_person, party=args.party, logo=logo, stamp=stamp)
+    with DocumentZipWriter(args.output) as export:
+        for doc_type, document, pdf_bytes in renewals:
+            export.add_document(doc_type, document, pdf_bytes)
+    print(f"{len(renewals)} renewal {args.type}s written to {args.output}")
+
+def cli_benchmark_statement(args):
+    result = benchmark_statement(args.invoices)
+    print(f"{result['invoices']} archived invoices: statement of {result['rows']} rows, "
+          f"{result['bytes'] / 1024:.0f} KB in {result['ms']:.0f} ms")
+
+def cli_statement(args):
+    end = datetime.datetime.strptime(args.end, "%d-%m-%Y").date() if args.end else datetime.date.today()
+    start = (datetime.datetime.strptime(args.start, "%d-%m-%Y").date() if args.start
+             else end - datetime.timedelta(days=365))
+    logo = open(args.logo, "rb").read() if args.logo else None
+    statement, pdf_bytes = generate_statement(start, end, gstin=args.gstin, party=args.party, logo=logo)
+    with open(args.output, "wb") as f:
+        f.write(pdf_bytes)
+    print(f"{len(statement['rows'])} invoices, closing balance {format_inr(statement['closing'] / 100)}, "
+          f"written to {args.output}")
+
+def cli_benchmark_gst_return(args):
+    result = benchmark_gst_return(args.invoices)
+    print(f"{result['invoices']} invoices ({result['lines']} lines): GSTR-1 export in {result['seconds']:.2f} s, "
+          f"{result['b2b_rows']} B2B rows, {result['hsn_rows']} HSN rows, {result['zip_bytes'] / 1024:.0f} KB")
+
+def cli_gst_return(args):
+    fy, quarter = args.fy or get_financial_year(), args.quarter or get_current_quarter()
+    output = args.output or f"gstr1_{fy}_{quarter}.zip"
+    tables = export_gst_return(fy, quarter, output)
+    for row in tables["rates"].itertuples(index=False):
+        print(f"{row.rate:5.1f}%  {row.invoices:>6} invoices  taxable {format_inr(row.taxable_value):>16}  "
+              f"SGST {format_inr(row.sgst):>14}  CGST {format_inr(row.cgst):>14}")
+    print(f"written to {output}")
+
+def cli_benchmark_dashboard(args):
+    result = benchmark_sales_dashboard(args.documents, args.years)
+    print(f"{result['documents']} documents over {result['years']} years -> {result['rollup_rows']} rollup rows; "
+          f"{result['record_ms']:.3f} ms per document recorded, dashboard loads in {result['load_ms']:.1f} ms")
+
+def cli_rebuild_analytics(args):
+    print(f"rebuilt sales rollups from {rebuild_sales_rollups()} archived documents")
+
+def cli_benchmark_search(args):
+    result = benchmark_search(args.documents)
+    print(f"indexed {result['documents']} invoices in {result['index_s']:.1f} s")
+    for name, (ms, hits, text) in result["queries"].items():
+        print(f"{name:<9} {text!r:<32} {hits:>3} hits in {ms:.2f} ms")
+
+def cli_search(args):
+    if args.rebuild:
+        print(f"re-indexed {rebuild_search_index()} documents")
+    for row in search_documents(" ".join(args.query), args.type, args.limit):
+        print(f"{row['doc_type']:<10} {row['number']:<40} {row['party']:<30} {row['snippet']}")
+
+def cli_hot_folder(args):
+    logo = open(args.logo, "rb").read() if args.logo else None
+    stamp = open(args.stamp, "rb").read() if args.stamp else None
+    stop_event = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *_: stop_event.set())
+
+    def report(name, documents, error):
+        status = f"failed: {error}" if error else f"{documents} documents"
+        print(f"{datetime.datetime.now():%H:%M:%S} {name}: {status}", flush=True)
+
+    try:
+        metrics = run_hot_folder(args.root, once=args.once, poll_seconds=args.poll, max_in_flight=args.max_in_flight,
+                                 logo=logo, stamp=stamp, stop_event=stop_event, on_file=report)
+    except KeyboardInterrupt:
+        return
+    print(f"{metrics['files_done']} files ({metrics['documents']} documents) done, {metrics['files_failed']} failed, "
+          f"{metrics['files_per_hour']:.0f} files/hour")
+
+def run_cli(argv):
+    """Command line entry points for work that does not need the Streamlit UI"""
+    parser = argparse.ArgumentParser(prog="Final.py")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    bench = commands.add_parser("benchmark-render", help="Time document renders with and without layout caches")
+    bench.add_argument("--iterations", type=int, default=20)
+    bench.set_defaults(handler=cli_benchmark_render)
+
+    money = commands.add_parser("benchmark-money", help="Compare integer-paise totals with Decimal arithmetic")
+    money.add_argument("--lines", type=int, default=10000)
+    money.set_defaults(handler=cli_benchmark_money)
+
+    fmt = commands.add_parser("benchmark-format", help="Compare Indian amount formatting with Western f-strings")
+    fmt.add_argument("--cells", type=int, default=10000)
+    fmt.set_defaults(handler=cli_benchmark_format)
+
+    export = commands.add_parser("benchmark-export", help="Stream sample documents into a ZIP and track memory")
+    export.add_argument("--count", type=int, default=10000)
+    export.add_argument("--type", choices=list(SAMPLE_DOCUMENTS), default="invoice")
+    export.add_argument("--output", help="Keep the ZIP at this path instead of a temporary file")
+    export.set_defaults(handler=cli_benchmark_export)
+
+    batch = commands.add_parser("benchmark-batch", help="Compare a merged print batch with separate document PDFs")
+    batch.add_argument("--count", type=int, default=200)
+    batch.add_argument("--type", choices=list(SAMPLE_DOCUMENTS), default="invoice")
+    batch.add_argument("--logo", help="Logo image to embed")
+    batch.add_argument("--stamp", help="Stamp image to embed")
+    batch.set_defaults(handler=cli_benchmark_batch)
+
+    size = commands.add_parser("benchmark-size", help="Compare PDF size by object type with and without optimized output")
+    size.add_argument("--logo", help="Logo image to embed")
+    size.add_argument("--stamp", help="Stamp image to embed")
+    size.set_defaults(handler=cli_benchmark_size)
+
+    renew_bench = commands.add_parser("benchmark-renewals", help="Time expiring-contract lookups")
+    renew_bench.add_argument("--contracts", type=int, default=200000)
+    renew_bench.add_argument("--days", type=int, default=RENEWAL_WINDOW_DAYS)
+    renew_bench.set_defaults(handler=cli_benchmark_renewals)
+
+    renew = commands.add_parser("renewals", help="Generate renewals for contracts expiring in a window")
+    renew.add_argument("--from", dest="start", help="Window start as dd-mm-YYYY (default today)")
+    renew.add_argument("--to", dest="end", help=f"Window end as dd-mm-YYYY (default {RENEWAL_WINDOW_DAYS} days on)")
+    renew.add_argument("--type", choices=["quotation", "invoice"], default="quotation")
+    renew.add_argument("--term-months", type=int, default=RENEWAL_TERM_MONTHS)
+    renew.add_argument("--sales-person", default="SP1")
+    renew.add_argument("--party", help="Only renew contracts of buyers whose name starts with this")
+    renew.add_argument("--output", default="renewals.zip")
+    renew.add_argument("--dry-run", action="store_true", help="List the expiring contracts without generating")
+    renew.add_argument("--logo", help="Logo image to embed")
+    renew.add_argument("--stamp", help="Stamp image to embed")
+    renew.set_defaults(handler=cli_renewals)
+
+    statement_bench = commands.add_parser("benchmark-statement", help="Time a statement over many invoices")
+    statement_bench.add_argument("--invoices", type=int, default=5000)
+    statement_bench.set_defaults(handler=cli_benchmark_statement)
+
+    statement = commands.add_parser("statement", help="Statement of account for one buyer")
+    buyer = statement.add_mutually_exclusive_group(required=True)
+    buyer.add_argument("--gstin")
+    buyer.add_argument("--party", help="Exact buyer name")
+    statement.add_argument("--from", dest="start", help="Period start as dd-mm-YYYY (default a year before --to)")
+    statement.add_argument("--to", dest="end", help="Period end as dd-mm-YYYY (default today)")
+    statement.add_argument("--output", default="statement.pdf")
+    statement.add_argument("--logo", help="Logo image to embed")
+    statement.set_defaults(handler=cli_statement)
+
+    gst_bench = commands.add_parser("benchmark-gstr1", help="Time a GSTR-1 export over many invoices")
+    gst_bench.add_argument("--invoices", type=int, default=100000)
+    gst_bench.set_defaults(handler=cli_benchmark_gst_return)
+
+    gst = commands.add_parser("gstr1", help="Export a quarter's GSTR-1 data as JSON and CSV")
+    gst.add_argument("--fy", help="Financial year such as 2026-27 (default current)")
+    gst.add_argument("--quarter", choices=["Q1", "Q2", "Q3", "Q4"], help="Default current quarter")
+    gst.add_argument("--output", help="ZIP to write (default gstr1_<fy>_<quarter>.zip)")
+    gst.set_defaults(handler=cli_gst_return)
+
+    dashboard_bench = commands.add_parser("benchmark-dashboard", help="Time sales dashboard loads from the rollups")
+    dashboard_bench.add_argument("--documents", type=int, default=100000)
+    dashboard_bench.add_argument("--years", type=int, default=5)
+    dashboard_bench.set_defaults(handler=cli_benchmark_dashboard)
+
+    rebuild = commands.add_parser("rebuild-analytics", help="Recompute the sales rollups from the archive")
+    rebuild.set_defaults(handler=cli_rebuild_analytics)
+
+    search_bench = commands.add_parser("benchmark-search", help="Time full-text searches over many documents")
+    search_bench.add_argument("--documents", type=int, default=200000)
+    search_bench.set_defaults(handler=cli_benchmark_search)
+
+    search = commands.add_parser("search", help="Full-text search over archived document contents")
+    search.add_argument("query", nargs="*")
+    search.add_argument("--type", choices=["quotation", "po", "invoice"])
+    search.add_argument("--limit", type=int, default=SEARCH_RESULT_LIMIT)
+    search.add_argument("--rebuild", action="store_true", help="Re-index the archive before searching")
+    search.set_defaults(handler=cli_search)
+
+    hot = commands.add_parser("hot-folder", help="Watch an inbox directory and render the documents dropped into it")
+    hot.add_argument("--root", default=HOT_FOLDER_DIR)
+    hot.add_argument("--once", action="store_true", help="Exit when the inbox is empty")
+    hot.add_argument("--poll", type=float, default=HOT_FOLDER_POLL_SECONDS)
+    hot.add_argument("--max-in-flight", type=int, default=HOT_FOLDER_MAX_IN_FLIGHT)
+    hot.add_argument("--logo", help="Logo image to embed")
+    hot.add_argument("--stamp", help="Stamp image to embed")
+    hot.set_defaults(handler=cli_hot_folder)
+
+    validate = commands.add_parser("validate-numbers", help="Check archived document numbers against the number grammar")
+    validate.set_defaults(handler=cli_validate_numbers)
+
+    branding = commands.add_parser("check-branding", help="Exercise the branding cache against a local HTTP stand-in")
+    branding.add_argument("--writers", type=int, default=8, help="Concurrent fetches racing on one cache entry")
+    branding.set_defaults(handler=cli_check_branding)
+
+    amounts = commands.add_parser("check-amounts", help="Check amounts in words and Indian formatting, negatives included")
+    amounts.set_defaults(handler=cli_check_amounts)
+
+    hot_check = commands.add_parser("check-hot-folder", help="Run the hot folder over sample orders in a scratch directory")
+    hot_check.set_defaults(handler=cli_check_hot_folder)
+
+    args = parser.parse_args(argv)
+    args.handler(args)
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        run_cli(sys.argv[1:])
+    else:
+        main()
+
+
+